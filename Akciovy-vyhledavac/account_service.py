@@ -0,0 +1,198 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import func
+from werkzeug.security import check_password_hash, generate_password_hash
+from models import db, User as DB_User, Portfolio as DB_Portfolio, PortfolioItem
+from database import session_scope
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class UserRecord:
+    """
+    Neměnná kopie uživatele z databáze.
+    """
+    id: int
+    username: str
+    email: str
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_row(cls, row: DB_User) -> "UserRecord":
+        return cls(row.id, row.username, row.email, row.created_at)
+
+
+@dataclass(frozen=True, slots=True)
+class PortfolioListing:
+    """
+    Řádek přehledu portfolií uživatele (bez načítání položek).
+    """
+    id: int
+    name: str
+    created_at: Optional[datetime]
+    item_count: int
+
+
+class AccountService:
+    """
+    Uživatelé a jejich portfolia.
+
+    Všechny dotazy jdou přes indexované sloupce (user.username, portfolio.user_id,
+    portfolio_item.portfolio_id) a seznamy se stránkují, takže odezva nezávisí
+    na celkovém počtu uživatelů v databázi.
+    """
+
+    def ensure_user(self, username: str, email: str) -> UserRecord:
+        """
+        Vrátí uživatele podle jména, případně ho založí (výchozí portfolio
+        vznikne při prvním přístupu, viz default_portfolio_id). Založený účet
+        nemá heslo, takže se do něj nelze přihlásit (viz set_password).
+
+        Parametry:
+            username: Uživatelské jméno
+            email: E-mailová adresa (použije se jen při založení)
+
+        Vrací:
+            UserRecord
+        """
+        row = DB_User.query.filter_by(username=username).one_or_none()
+        if row is None:
+            with session_scope(immediate=True) as session:
+                row = DB_User(username=username, email=email)
+                session.add(row)
+            logger.info("Založen uživatel %s", username)
+        return UserRecord.from_row(row)
+
+    def authenticate(self, username: str, email: str, password: str) -> UserRecord:
+        """
+        Přihlášení jménem, e-mailem a heslem; neznámý uživatel se založí
+        s tímto heslem. Účet bez hesla (založený před zavedením hesel nebo
+        z příkazové řádky) se přihlásit nedá, dokud mu heslo nenastaví
+        správce (viz set_password).
+
+        Parametry:
+            username: Uživatelské jméno
+            email: E-mailová adresa
+            password: Heslo
+
+        Vrací:
+            UserRecord (ValueError při neshodě e-mailu nebo hesla)
+        """
+        row = DB_User.query.filter_by(username=username).one_or_none()
+        if row is None:
+            with session_scope(immediate=True) as session:
+                row = DB_User(username=username, email=email, password_hash=generate_password_hash(password))
+                session.add(row)
+            logger.info("Založen uživatel %s", username)
+            return UserRecord.from_row(row)
+
+        # Stejná chyba pro jiný e-mail i heslo (neprozradí, co nesouhlasí)
+        if row.email.casefold() != email.casefold():
+            raise ValueError("Nesprávný e-mail nebo heslo")
+        if row.password_hash is None:
+            raise ValueError("Účet nemá nastavené heslo, požádejte správce o jeho nastavení")
+        if not check_password_hash(row.password_hash, password):
+            raise ValueError("Nesprávný e-mail nebo heslo")
+        return UserRecord.from_row(row)
+
+    def set_password(self, username: str, password: str) -> bool:
+        """
+        Nastaví heslo existujícímu uživateli (správa z příkazové řádky).
+
+        Vrací:
+            True, pokud uživatel existuje
+        """
+        with session_scope(immediate=True) as session:
+            row = session.query(DB_User).filter_by(username=username).one_or_none()
+            if row is None:
+                return False
+            row.password_hash = generate_password_hash(password)
+        logger.info("Uživateli %s nastaveno heslo", username)
+        return True
+
+    def get(self, user_id: int) -> Optional[UserRecord]:
+        row = db.session.get(DB_User, user_id)
+        return UserRecord.from_row(row) if row is not None else None
+
+    def adopt_orphan_portfolios(self, user_id: int) -> int:
+        """
+        Přiřadí portfolia z doby před zavedením uživatelů (bez user_id) danému uživateli.
+
+        Vrací:
+            Počet přiřazených portfolií
+        """
+        count = (DB_Portfolio.query.filter(DB_Portfolio.user_id.is_(None))
+                 .update({DB_Portfolio.user_id: user_id}, synchronize_session=False))
+        db.session.commit()
+        if count:
+            logger.info("Uživateli %s přiřazeno %s starších portfolií", user_id, count)
+        return count
+
+    def default_portfolio_id(self, user_id: int) -> int:
+        """
+        Vrací:
+            ID nejstaršího portfolia uživatele (založí ho, pokud žádné nemá)
+        """
+        portfolio_id = (db.session.query(DB_Portfolio.id)
+                        .filter(DB_Portfolio.user_id == user_id)
+                        .order_by(DB_Portfolio.id)
+                        .limit(1)
+                        .scalar())
+        if portfolio_id is None:
+            portfolio_id = self.create_portfolio(user_id, "Moje Portfolio")
+        return portfolio_id
+
+    def owns(self, user_id: int, portfolio_id: int) -> bool:
+        return (db.session.query(DB_Portfolio.id)
+                .filter(DB_Portfolio.id == portfolio_id, DB_Portfolio.user_id == user_id)
+                .first()) is not None
+
+    def portfolio_name(self, portfolio_id: int) -> Optional[str]:
+        return db.session.query(DB_Portfolio.name).filter(DB_Portfolio.id == portfolio_id).scalar()
+
+    def create_portfolio(self, user_id: int, name: str) -> int:
+        """
+        Založení dalšího portfolia uživatele.
+
+        Vrací:
+            ID nového portfolia
+        """
+        portfolio = DB_Portfolio(user_id=user_id, name=name)
+        db.session.add(portfolio)
+        db.session.commit()
+        return portfolio.id
+
+    def portfolios(self, user_id: int, page: int = 1, per_page: int = 20) -> Tuple[List[PortfolioListing], int]:
+        """
+        Stránkovaný přehled portfolií uživatele s počtem položek.
+
+        Počty položek se zjistí jedním agregačním dotazem (GROUP BY) pro celou
+        stránku, ne načítáním Portfolio.items pro každé portfolio zvlášť.
+
+        Parametry:
+            user_id: ID uživatele
+            page: Číslo stránky (od 1)
+            per_page: Počet portfolií na stránku
+
+        Vrací:
+            Dvojici (portfolia na stránce, celkový počet portfolií)
+        """
+        base = DB_Portfolio.query.filter(DB_Portfolio.user_id == user_id)
+        total = base.count()
+        rows = base.order_by(DB_Portfolio.id).offset((page - 1) * per_page).limit(per_page).all()
+
+        counts = {}
+        if rows:
+            counts = dict(db.session.query(PortfolioItem.portfolio_id, func.count(PortfolioItem.id))
+                          .filter(PortfolioItem.portfolio_id.in_([row.id for row in rows]))
+                          .group_by(PortfolioItem.portfolio_id)
+                          .all())
+        listings = [PortfolioListing(row.id, row.name, row.created_at, counts.get(row.id, 0)) for row in rows]
+        return listings, total
+
+
+# Sdílená služba pro celou aplikaci
+account_service = AccountService()
@@ -0,0 +1,416 @@
+import logging
+import queue
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from models import db, PriceAlert
+from database import session_scope
+from market_cache import QuoteCache, quote_cache
+from stock_data import StockData
+
+logger = logging.getLogger(__name__)
+
+# Typy upozornění: cena nad hranicí, pod hranicí, pohyb o procenta od ceny při vytvoření
+ALERT_KINDS = ("above", "below", "move")
+# Počet nedoručených událostí na jedno otevřené SSE spojení (starší se zahodí)
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+@dataclass(frozen=True, slots=True)
+class AlertEvent:
+    """
+    Spuštěné upozornění (doručí se do SSE a uloží do databáze).
+    """
+    alert_id: int
+    user_id: int
+    ticker: str
+    kind: str
+    threshold: float
+    price: float
+    triggered_at: datetime
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.alert_id,
+            'ticker': self.ticker,
+            'kind': self.kind,
+            'threshold': self.threshold,
+            'price': self.price,
+            'triggered_at': self.triggered_at.isoformat(),
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class _ActiveAlert:
+    user_id: int
+    ticker: str
+    kind: str
+    threshold: float
+    above: Optional[float]  # cenová hranice v knize "nad" (None = není)
+    below: Optional[float]  # cenová hranice v knize "pod"
+
+
+class ThresholdBook:
+    """
+    Seřazené cenové hranice jednoho tickeru a jednoho směru.
+
+    Spuštěné hranice tvoří vždy souvislý začátek (směr nahoru) nebo konec
+    (směr dolů) pole, takže se najdou jedním půlením a odeberou jedním řezem.
+    """
+    __slots__ = ("levels", "ids")
+
+    def __init__(self, entries: Iterable[Tuple[float, int]] = ()):
+        ordered = sorted(entries)
+        self.levels: List[float] = [level for level, _ in ordered]
+        self.ids: List[int] = [alert_id for _, alert_id in ordered]
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def add(self, level: float, alert_id: int) -> None:
+        i = bisect_right(self.levels, level)
+        self.levels.insert(i, level)
+        self.ids.insert(i, alert_id)
+
+    def remove(self, level: float, alert_id: int) -> bool:
+        i = bisect_left(self.levels, level)
+        while i < len(self.levels) and self.levels[i] == level:
+            if self.ids[i] == alert_id:
+                del self.levels[i], self.ids[i]
+                return True
+            i += 1
+        return False
+
+    def pop_at_most(self, price: float) -> List[int]:
+        """Odebere a vrátí hranice <= price (spuštěné růstem ceny)."""
+        k = bisect_right(self.levels, price)
+        triggered = self.ids[:k]
+        del self.levels[:k], self.ids[:k]
+        return triggered
+
+    def pop_at_least(self, price: float) -> List[int]:
+        """Odebere a vrátí hranice >= price (spuštěné poklesem ceny)."""
+        k = bisect_left(self.levels, price)
+        triggered = self.ids[k:]
+        del self.levels[k:], self.ids[k:]
+        return triggered
+
+
+class AlertEngine:
+    """
+    Cenová upozornění uživatelů vyhodnocovaná nad proudem cen ze sdílené cache.
+
+    Každé aktivní upozornění je cenová hranice v seřazeném poli svého tickeru
+    (pohyb o procenta má hranici nahoře i dole). Nová cena se porovná jen
+    s nejnižší hranicí nahoře a nejvyšší dole; teprve když některou
+    překročí, půlením se najdou spuštěná upozornění. Cena tickeru bez
+    spuštění tak stojí dvě porovnání bez ohledu na počet upozornění.
+
+    Spuštění se hned rozešlou otevřeným SSE spojením uživatele a do databáze
+    se zapíšou hromadně ve vlákně na pozadí, které také pravidelně stahuje
+    ceny tickerů s aktivními upozorněními.
+    """
+
+    def __init__(self, quotes: QuoteCache, poll_interval: float = 60.0, max_per_user: int = 500):
+        """
+        Parametry:
+            quotes: Cache cen, jejíž změny se vyhodnocují
+            poll_interval: Interval stahování cen tickerů s upozorněními v sekundách (0 = nestahovat)
+            max_per_user: Nejvyšší počet aktivních upozornění jednoho uživatele
+        """
+        self.poll_interval: float = poll_interval
+        self.max_per_user: int = max_per_user
+        self._above: Dict[str, ThresholdBook] = {}
+        self._below: Dict[str, ThresholdBook] = {}
+        self._alerts: Dict[int, _ActiveAlert] = {}
+        self._pending: List[AlertEvent] = []
+        self._subscribers: Dict[int, List["queue.Queue[AlertEvent]"]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        quotes.subscribe(self._on_quote)
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    @staticmethod
+    def levels(kind: str, threshold: float, reference: Optional[float]) -> Tuple[Optional[float], Optional[float]]:
+        """
+        Cenové hranice upozornění.
+
+        Parametry:
+            kind: Typ upozornění (viz ALERT_KINDS)
+            threshold: Cena (above, below) nebo procento pohybu (move)
+            reference: Cena při vytvoření (pro move)
+
+        Vrací:
+            Dvojici (hranice nahoře, hranice dole); chybějící směr je None
+        """
+        if kind == "above":
+            return threshold, None
+        if kind == "below":
+            return None, threshold
+        return reference * (1 + threshold / 100.0), reference * (1 - threshold / 100.0)
+
+    def _register(self, alert_id: int, user_id: int, ticker: str, kind: str, threshold: float,
+                  reference: Optional[float]) -> None:
+        above, below = self.levels(kind, threshold, reference)
+        self._alerts[alert_id] = _ActiveAlert(user_id, ticker, kind, threshold, above, below)
+        if above is not None:
+            self._above.setdefault(ticker, ThresholdBook()).add(above, alert_id)
+        if below is not None:
+            self._below.setdefault(ticker, ThresholdBook()).add(below, alert_id)
+
+    def _unregister(self, alert_id: int) -> Optional[_ActiveAlert]:
+        alert = self._alerts.pop(alert_id, None)
+        if alert is not None:
+            if alert.above is not None:
+                self._above[alert.ticker].remove(alert.above, alert_id)
+            if alert.below is not None:
+                self._below[alert.ticker].remove(alert.below, alert_id)
+        return alert
+
+    def load(self) -> int:
+        """
+        Načte aktivní upozornění z databáze (vyžaduje kontext aplikace).
+
+        Vrací:
+            Počet aktivních upozornění
+        """
+        rows = db.session.execute(select(PriceAlert.id, PriceAlert.user_id, PriceAlert.ticker, PriceAlert.kind,
+                                         PriceAlert.threshold, PriceAlert.reference_price)
+                                  .where(PriceAlert.triggered_at.is_(None))).all()
+        alerts: Dict[int, _ActiveAlert] = {}
+        above: Dict[str, List[Tuple[float, int]]] = {}
+        below: Dict[str, List[Tuple[float, int]]] = {}
+        for row in rows:
+            up, down = self.levels(row.kind, row.threshold, row.reference_price)
+            alerts[row.id] = _ActiveAlert(row.user_id, row.ticker, row.kind, row.threshold, up, down)
+            if up is not None:
+                above.setdefault(row.ticker, []).append((up, row.id))
+            if down is not None:
+                below.setdefault(row.ticker, []).append((down, row.id))
+        # Pole se seřadí jednou místo postupného vkládání
+        with self._lock:
+            self._alerts = alerts
+            self._above = {ticker: ThresholdBook(entries) for ticker, entries in above.items()}
+            self._below = {ticker: ThresholdBook(entries) for ticker, entries in below.items()}
+        logger.info("Načteno %s aktivních cenových upozornění", len(alerts))
+        return len(alerts)
+
+    def add(self, user_id: int, ticker: str, kind: str, threshold: float) -> int:
+        """
+        Vytvoří upozornění.
+
+        Parametry:
+            user_id: ID uživatele
+            ticker: Symbol akcie
+            kind: Typ upozornění (viz ALERT_KINDS)
+            threshold: Cena (above, below) nebo procento pohybu od aktuální ceny (move)
+
+        Vrací:
+            ID upozornění (podmínku splněnou už aktuální cenou v cache hned spustí);
+            při neplatném zadání, překročení limitu nebo chybějící ceně pro pohyb
+            vyvolá ValueError
+        """
+        if kind not in ALERT_KINDS:
+            raise ValueError(f"Neznámý typ upozornění: {kind}")
+        if not threshold > 0:
+            raise ValueError("Hranice upozornění musí být kladná")
+        if kind == "move" and threshold >= 100:
+            raise ValueError("Pohyb ceny musí být menší než 100 %")
+        reference = None
+        if kind == "move":
+            reference = quote_cache.get(ticker) or StockData(ticker).get_price()
+            if not reference:
+                raise ValueError(f"Aktuální cena {ticker} není k dispozici")
+
+        with session_scope(immediate=True) as session:
+            active = session.execute(select(func.count()).select_from(PriceAlert)
+                                     .where(PriceAlert.user_id == user_id, PriceAlert.triggered_at.is_(None))).scalar()
+            if active >= self.max_per_user:
+                raise ValueError(f"Lze mít nejvýše {self.max_per_user} aktivních upozornění")
+            alert_id = session.execute(insert(PriceAlert).returning(PriceAlert.id), {
+                "user_id": user_id, "ticker": ticker, "kind": kind, "threshold": threshold,
+                "reference_price": reference, "created_at": datetime.utcnow(),
+            }).scalar_one()
+        with self._lock:
+            self._register(alert_id, user_id, ticker, kind, threshold, reference)
+        logger.debug("Upozornění %s: %s %s %s", alert_id, ticker, kind, threshold)
+        # Hranice už překročená známou cenou se spustí hned, ne až při další změně ceny
+        price = quote_cache.get(ticker)
+        if price is not None:
+            self.evaluate({ticker: price})
+        return alert_id
+
+    def remove(self, user_id: int, alert_id: int) -> bool:
+        """
+        Smaže upozornění uživatele (aktivní i spuštěné).
+
+        Vrací:
+            True, pokud upozornění existovalo
+        """
+        with session_scope(immediate=True) as session:
+            deleted = session.execute(delete(PriceAlert).where(PriceAlert.id == alert_id,
+                                                               PriceAlert.user_id == user_id)).rowcount
+        if deleted:
+            with self._lock:
+                self._unregister(alert_id)
+        return bool(deleted)
+
+    def evaluate(self, prices: Mapping[str, float]) -> List[AlertEvent]:
+        """
+        Vyhodnotí dávku cen a spuštěná upozornění odebere z aktivních.
+
+        Parametry:
+            prices: Ticker -> nová cena
+
+        Vrací:
+            Spuštěná upozornění
+        """
+        events: List[AlertEvent] = []
+        now: Optional[datetime] = None
+        with self._lock:
+            for ticker, price in prices.items():
+                above, below = self._above.get(ticker), self._below.get(ticker)
+                # Rychlá cesta: cena je mezi nejnižší hranicí nahoře a nejvyšší dole
+                if (not above or price < above.levels[0]) and (not below or price > below.levels[-1]):
+                    continue
+                triggered = (above.pop_at_most(price) if above else []) + (below.pop_at_least(price) if below else [])
+                now = now or datetime.utcnow()
+                for alert_id in triggered:
+                    alert = self._alerts.pop(alert_id)
+                    # Druhá hranice pohybu o procenta zůstala v opačné knize
+                    if alert.above is not None and alert.below is not None:
+                        if price >= alert.above:
+                            below.remove(alert.below, alert_id)
+                        else:
+                            above.remove(alert.above, alert_id)
+                    events.append(AlertEvent(alert_id, alert.user_id, ticker, alert.kind, alert.threshold, price, now))
+        if events:
+            self._publish(events)
+        return events
+
+    def _on_quote(self, ticker: str, old_price: Optional[float], new_price: float) -> None:
+        self.evaluate({ticker: new_price})
+
+    def _publish(self, events: List[AlertEvent]) -> None:
+        with self._lock:
+            self._pending.extend(events)
+            targets = {event.user_id: list(self._subscribers.get(event.user_id, ())) for event in events}
+        for event in events:
+            for subscriber in targets[event.user_id]:
+                try:
+                    subscriber.put_nowait(event)
+                except queue.Full:
+                    logger.debug("Fronta SSE uživatele %s je plná", event.user_id)
+        self._wake.set()
+        logger.info("Spuštěno %s cenových upozornění", len(events))
+
+    def flush(self) -> int:
+        """
+        Zapíše spuštěná upozornění do databáze (vyžaduje kontext aplikace).
+
+        Vrací:
+            Počet zapsaných upozornění
+        """
+        with self._lock:
+            events, self._pending = self._pending, []
+        if events:
+            # Jádrový UPDATE (ne ORM podle klíče): mezitím smazané upozornění se jen přeskočí
+            statement = (update(PriceAlert.__table__).where(PriceAlert.__table__.c.id == bindparam("alert_id"))
+                         .values(triggered_at=bindparam("at"), triggered_price=bindparam("price")))
+            with session_scope(immediate=True) as session:
+                session.execute(statement, [{"alert_id": event.alert_id, "at": event.triggered_at,
+                                             "price": event.price} for event in events])
+        return len(events)
+
+    def active_tickers(self) -> List[str]:
+        """Tickery s aktivními upozorněními."""
+        with self._lock:
+            return sorted({alert.ticker for alert in self._alerts.values()})
+
+    def alerts(self, user_id: int, triggered: bool = False, limit: int = 100) -> List[PriceAlert]:
+        """
+        Upozornění uživatele z databáze.
+
+        Parametry:
+            user_id: ID uživatele
+            triggered: False = aktivní (od nejnovějšího), True = spuštěná (od naposledy spuštěného)
+            limit: Maximální počet
+
+        Vrací:
+            Seznam PriceAlert
+        """
+        if triggered:
+            self.flush()
+            statement = (select(PriceAlert).where(PriceAlert.user_id == user_id, PriceAlert.triggered_at.is_not(None))
+                         .order_by(PriceAlert.triggered_at.desc()))
+        else:
+            statement = (select(PriceAlert).where(PriceAlert.user_id == user_id, PriceAlert.triggered_at.is_(None))
+                         .order_by(PriceAlert.created_at.desc()))
+        return db.session.execute(statement.limit(limit)).scalars().all()
+
+    def subscribe(self, user_id: int) -> "queue.Queue[AlertEvent]":
+        """
+        Fronta spuštěných upozornění uživatele pro jedno SSE spojení.
+        """
+        events: "queue.Queue[AlertEvent]" = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(user_id, []).append(events)
+        return events
+
+    def unsubscribe(self, user_id: int, events: "queue.Queue[AlertEvent]") -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(user_id, [])
+            if events in subscribers:
+                subscribers.remove(events)
+            if not subscribers:
+                self._subscribers.pop(user_id, None)
+
+    def start(self, app: Any) -> None:
+        """
+        Spustí vlákno, které zapisuje spuštěná upozornění a stahuje ceny
+        tickerů s aktivními upozorněními.
+
+        Parametry:
+            app: Flask aplikace (vlákno potřebuje její kontext pro databázi)
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def run() -> None:
+            next_poll = time.monotonic()
+            while not self._stop_event.is_set():
+                try:
+                    if self.poll_interval > 0 and time.monotonic() >= next_poll:
+                        next_poll = time.monotonic() + self.poll_interval
+                        tickers = self.active_tickers()
+                        if tickers:
+                            # Nové ceny projdou cache a jejím posluchačem (evaluate)
+                            StockData.get_prices(tickers)
+                    with app.app_context():
+                        self.flush()
+                except Exception as e:
+                    logger.error("Chyba při zpracování cenových upozornění: %s", e)
+                timeout = max(0.0, next_poll - time.monotonic()) if self.poll_interval > 0 else None
+                self._wake.wait(timeout)
+                self._wake.clear()
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=run, name="price-alerts", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Zastaví vlákno upozornění."""
+        self._stop_event.set()
+        self._wake.set()
+
+
+# Sdílený vyhodnocovač upozornění navázaný na sdílenou cache cen
+alert_engine = AlertEngine(quote_cache)
@@ -3,9 +3,8 @@ from typing import Dict, Any, List, Optional
 import pandas as pd
 from stock_data import StockData
 from news_handler import NewsHandler
+from news_store import news_service
 
-# Konfigurace logování
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 class APIHandler:
@@ -26,7 +25,7 @@ class APIHandler:
         Vrací:
             Pandas DataFrame s cenovými daty akcie
         """
-        logger.debug(f"Načítám data akcií pro {ticker} s obdobím {period}")
+        logger.debug("Načítám data akcií pro %s s obdobím %s", ticker, period)
         stock = StockData(ticker)
         return stock.get_history(period)
     
@@ -42,7 +41,15 @@ class APIHandler:
         Vrací:
             Seznam zpráv
         """
-        logger.debug(f"Načítám zprávy pro {ticker}")
+        logger.debug("Načítám zprávy pro %s", ticker)
+        try:
+            # Uložené zprávy (ingest na pozadí, případně stažení tickeru na požádání)
+            news = news_service.news_for(ticker, limit)
+            if news:
+                return news
+            return NewsHandler.sample_news(ticker, limit)
+        except Exception as e:
+            logger.warning("Uložené zprávy pro %s nejsou k dispozici: %s", ticker, e)
         return NewsHandler.get_stock_news(ticker, limit)
     
     @staticmethod
@@ -56,6 +63,6 @@ class APIHandler:
         Vrací:
             Slovník s informacemi o společnosti
         """
-        logger.debug(f"Načítám informace o společnosti pro {ticker}")
+        logger.debug("Načítám informace o společnosti pro %s", ticker)
         stock = StockData(ticker)
         return stock.get_company_info()
\ No newline at end of file
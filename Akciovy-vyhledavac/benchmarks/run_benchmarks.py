@@ -0,0 +1,402 @@
+"""
+Benchmarky aplikace nad deterministickými offline daty.
+
+Spuštění (z adresáře aplikace):
+    python benchmarks/run_benchmarks.py                    # porovnání s uloženým baseline
+    python benchmarks/run_benchmarks.py --update-baseline  # uložení nového baseline
+
+Měří latenci (p50/p95/p99) a propustnost hlavních cest aplikace a několika
+mikrobenchmarků. Scénář, který překročí povolenou toleranci, se změří znovu
+(viz --retries; platí lepší z měření), aby jednorázový šum nehlásil regresi.
+Pokud je některé p50 i pak horší než baseline, nebo scénář v baseline chybí,
+skript skončí s nenulovým návratovým kódem. Kdo přidá scénář, obnoví baseline
+pomocí --update-baseline.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Izolované prostředí: offline data, dočasná databáze a adresář pro grafy
+WORK_DIR = tempfile.mkdtemp(prefix="akcie-bench-")
+os.environ["STOCK_DATA_OFFLINE"] = "1"
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'bench.db')}"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# Obnova screeneru na pozadí by ovlivňovala měření (snímek se sestaví níže)
+os.environ.setdefault("SCREENER_REFRESH_INTERVAL", "0")
+os.environ.setdefault("NEWS_INGEST_INTERVAL", "0")
+os.environ.setdefault("ALERT_POLL_INTERVAL", "0")
+os.environ.setdefault("PREFETCH_INTERVAL", "0")
+os.environ.setdefault("CACHE_SNAPSHOT_PATH", "")
+sys.path.insert(0, APP_DIR)
+
+from server import app, default_portfolio_id, default_user_id  # noqa: E402
+from account_service import account_service  # noqa: E402
+from alerts import AlertEngine  # noqa: E402
+from market_cache import QuoteCache  # noqa: E402
+from models import db, Portfolio as DB_Portfolio, PortfolioItem, PriceAlert  # noqa: E402
+from graph_generator import GraphGenerator  # noqa: E402
+from indicators import IndicatorEngine  # noqa: E402
+from portfolio import Portfolio  # noqa: E402
+from portfolio_service import portfolio_service  # noqa: E402
+from news_store import FeedItem, news_service  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from screener import FundamentalsRecord, ScreenerQuery, ScreenerSnapshot  # noqa: E402
+from stock_data import StockData  # noqa: E402
+from valuation import PortfolioValuation  # noqa: E402
+
+TICKERS = ["AAPL", "MSFT", "GOOG", "AMZN", "TSLA", "CEZ.PR", "META", "NVDA"]
+
+# Rozdíly pod touto hranicí se za regresi nepovažují (šum u velmi rychlých cest)
+MIN_DELTA_MS = 2.0
+
+
+def calibrate() -> float:
+    """
+    Změří pevnou referenční zátěž, aby šlo výsledky z různě rychlých strojů
+    (nebo různě vytíženého stroje) porovnávat s baseline.
+
+    Vrací:
+        Medián doby referenční zátěže v milisekundách
+    """
+    def workload():
+        total = 0
+        for i in range(200_000):
+            total += i * i
+        np.sort(np.random.default_rng(0).random(200_000))
+        return total
+
+    samples = []
+    for _ in range(7):
+        start = time.perf_counter()
+        workload()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples) * 1000.0)
+
+
+def summarize(samples: List[float], wall_time: float) -> Dict[str, float]:
+    """
+    Souhrnné statistiky latencí.
+
+    Parametry:
+        samples: Doby jednotlivých volání v sekundách
+        wall_time: Celková doba běhu v sekundách
+
+    Vrací:
+        Slovník s p50/p95/p99 v milisekundách a propustností za sekundu
+    """
+    ms = np.asarray(samples) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "n": len(samples),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "throughput_per_s": round(len(samples) / wall_time, 2) if wall_time > 0 else 0.0,
+    }
+
+
+def measure(fn: Callable[[], Any], iterations: int, warmup: int = 2, concurrency: int = 1) -> Dict[str, float]:
+    """
+    Opakovaně spustí funkci a změří latence.
+
+    Parametry:
+        fn: Měřená funkce bez parametrů
+        iterations: Počet měřených volání
+        warmup: Počet neměřených zahřívacích volání
+        concurrency: Počet souběžných vláken
+
+    Vrací:
+        Souhrnné statistiky (viz summarize)
+    """
+    for _ in range(warmup):
+        fn()
+
+    def timed(_):
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+
+    wall_start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(timed, range(iterations)))
+    else:
+        samples = [timed(i) for i in range(iterations)]
+    return summarize(samples, time.perf_counter() - wall_start)
+
+
+def seed_portfolio(positions: int) -> None:
+    """Naplní benchmarkovou databázi zadaným počtem pozic."""
+    with app.app_context():
+        # Výchozí portfolio, se kterým pracují nepřihlášené požadavky
+        db_portfolio = db.session.get(DB_Portfolio, default_portfolio_id)
+        start = datetime(2024, 1, 2)
+        for i in range(positions):
+            db.session.add(PortfolioItem(
+                portfolio_id=db_portfolio.id,
+                ticker=TICKERS[i % len(TICKERS)],
+                quantity=1 + i % 10,
+                purchase_price=90.0 + i % 20,
+                purchase_date=start + timedelta(days=i % 300),
+            ))
+        db.session.commit()
+        # Hromadně vložené loty se zapíšou do knihy transakcí jako nákupy
+        portfolio_service.backfill_ledger(db_portfolio.id)
+
+
+def seed_news(articles: int) -> None:
+    """Naplní úložiště zpráv zadaným počtem článků rozdělených mezi tickery."""
+    words = ["cloud", "revenue", "dividend", "earnings", "guidance", "merger", "chips", "energy", "growth", "outlook"]
+    now = datetime.utcnow()
+    items = [FeedItem(url=f"https://news.example.com/{i}", title=f"{TICKERS[i % len(TICKERS)]} {words[i % 10]} update {i}",
+                      source="Benchmark", published_at=now - timedelta(minutes=i),
+                      summary=" ".join(words[(i + k) % 10] for k in range(12)), title_cz="", summary_cz="",
+                      tickers=(TICKERS[i % len(TICKERS)],))
+             for i in range(articles)]
+    with app.app_context():
+        news_service.store(items)
+
+
+def seed_alerts(alerts: int, tickers: int) -> AlertEngine:
+    """
+    Uloží zadaný počet upozornění rozdělených mezi tickery a načte je do
+    samostatného vyhodnocovače (sdílený vyhodnocovač aplikace je neuvidí).
+    """
+    now = datetime.utcnow()
+    rows = [{"user_id": default_user_id, "ticker": f"T{i % tickers:04d}", "kind": ("above", "below", "move")[i % 3],
+             "threshold": 5.0 if i % 3 == 2 else 100.0 + (-1) ** i * (10 + i % 50), "reference_price": 100.0,
+             "created_at": now}
+            for i in range(alerts)]
+    engine = AlertEngine(QuoteCache())
+    with app.app_context():
+        db.session.execute(insert(PriceAlert), rows)
+        db.session.commit()
+        engine.load()
+    return engine
+
+
+def concurrent_writes(writers: int) -> Callable[[], Any]:
+    """
+    Zápis nákupu přes PortfolioService do jednoho z několika portfolií
+    (souběžná vlákna zapisují do různých portfolií stejné SQLite databáze).
+
+    Parametry:
+        writers: Počet portfolií, mezi která se zápisy střídají
+
+    Vrací:
+        Měřenou funkci bez parametrů
+    """
+    with app.app_context():
+        portfolio_ids = [account_service.create_portfolio(default_user_id, f"Zápisy {i}") for i in range(writers)]
+    targets = itertools.cycle(portfolio_ids)
+
+    def write():
+        with app.app_context():
+            portfolio_service.add_position(next(targets), "AAPL", 1.0, 100.0)
+    return write
+
+
+def check_ok(response) -> None:
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.path} vrátil HTTP {response.status_code}")
+
+
+def run(iterations: int, concurrency: int, positions: int,
+        writers: int) -> Tuple[Dict[str, Dict[str, float]], Dict[str, Callable[[], Dict[str, float]]]]:
+    """
+    Spustí všechny scénáře.
+
+    Vrací:
+        Dvojici (název scénáře -> statistiky, název scénáře -> funkce pro opakované měření)
+    """
+    os.makedirs(os.path.join(WORK_DIR, "static", "images"), exist_ok=True)
+    # GraphGenerator ukládá grafy relativně k pracovnímu adresáři
+    os.chdir(WORK_DIR)
+    seed_portfolio(positions)
+    seed_news(20_000)
+
+    local = app.test_client
+
+    def get(path):
+        return lambda: check_ok(local().get(path))
+
+    def post(path, data):
+        return lambda: check_ok(local().post(path, data=data))
+
+    scenarios: Dict[str, Callable[[], Any]] = {
+        "http GET /": get("/"),
+        "http POST / AAPL 1y": post("/", {"ticker": "AAPL", "period": "1y"}),
+        "http GET /portfolio": get("/portfolio"),
+        "http POST /compare 3x1y": post("/compare", {"ticker1": "AAPL", "ticker2": "MSFT", "ticker3": "CEZ.PR", "period": "1y"}),
+        "http GET /api/stock-data 5y": get("/api/stock-data?ticker=AAPL&period=5y"),
+        "http GET /api/symbols/search": get("/api/symbols/search?q=micro"),
+        "http GET /api/news 20k articles": get("/api/news?ticker=MSFT&limit=5"),
+        "http GET /api/news/search 20k articles": get("/api/news/search?q=merger%20outlo&limit=20"),
+    }
+
+    history = StockData("AAPL").get_history("5y")
+    history_10y = StockData("AAPL").get_history("10y")
+    mem_portfolio = Portfolio(name="Benchmark")
+    for i in range(positions):
+        mem_portfolio.add_stock(f"T{i:04d}", 1 + i % 10, 90.0 + i % 20)
+
+    rng = np.random.default_rng(0)
+    quantities, purchase_prices, current_prices = rng.random((3, 10_000)) * 100
+
+    # Snímek fundamentů pro 5000 tickerů a dotaz se třemi rozsahy, sektorem a řazením
+    caps, pes, betas = rng.random((3, 5000))
+    screener_snapshot = ScreenerSnapshot([
+        FundamentalsRecord(f"S{i:05d}", sector=("Technology", "Energy", "Utilities")[i % 3], price=100.0,
+                           market_cap=caps[i] * 1e12, pe_ratio=pes[i] * 60, beta=betas[i] * 2)
+        for i in range(5000)
+    ])
+    screener_query = ScreenerQuery.from_args({"market_cap_min": "1e11", "pe_ratio_max": "30", "beta_min": "0.5",
+                                              "sector": "Energy", "sort": "market_cap", "limit": "100"})
+
+    # Tik 500 cen, které žádné ze 100 000 upozornění nespustí (běžný případ)
+    alert_engine = seed_alerts(100_000, 500)
+    alert_prices = {f"T{i:04d}": 100.0 + i % 3 for i in range(500)}
+
+    micro: Dict[str, Callable[[], Any]] = {
+        "GraphGenerator.plot_stock 5y": lambda: GraphGenerator.plot_stock(history, "AAPL", "5y"),
+        # Výpočet všech indikátorů bez cache (nový engine) musí být zlomkem vykreslení grafu
+        "IndicatorEngine all indicators 10y": lambda: IndicatorEngine().compute("AAPL", history_10y),
+        "GraphGenerator.plot_comparison 3x1y": lambda: GraphGenerator.plot_comparison(["AAPL", "MSFT", "CEZ.PR"], "1y"),
+        f"Portfolio.get_total_value {positions} pos": mem_portfolio.get_total_value,
+        "ScreenerSnapshot.query 5000 tickers": lambda: screener_snapshot.query(screener_query),
+        "PortfolioValuation 10000 pos": lambda: PortfolioValuation(quantities, purchase_prices, current_prices).summary(),
+        "AlertEngine.evaluate 500 quotes 100k alerts": lambda: alert_engine.evaluate(alert_prices),
+    }
+
+    cases: Dict[str, Callable[[], Dict[str, float]]] = {
+        name: partial(measure, fn, iterations, concurrency=concurrency) for name, fn in scenarios.items()
+    }
+    # Souběžné zápisy do lokální SQLite (WAL, busy_timeout, krátké transakce)
+    cases[f"db add_position {writers} threads"] = partial(measure, concurrent_writes(writers), iterations * writers,
+                                                          concurrency=writers)
+    cases.update({name: partial(measure, fn, max(5, iterations // 2)) for name, fn in micro.items()})
+
+    results = {}
+    for name, case in cases.items():
+        results[name] = case()
+        print_row(name, results[name])
+    return results, cases
+
+
+def print_row(name: str, stats: Dict[str, float]) -> None:
+    print(f"{name:<42} p50 {stats['p50_ms']:>9.2f} ms  p95 {stats['p95_ms']:>9.2f} ms  "
+          f"p99 {stats['p99_ms']:>9.2f} ms  {stats['throughput_per_s']:>8.2f}/s")
+
+
+def compare_with_baseline(results: Dict[str, Dict[str, float]], calibration_ms: float,
+                          tolerance: float) -> Dict[str, str]:
+    """
+    Porovná výsledky s uloženým baseline.
+
+    Parametry:
+        results: Aktuální výsledky
+        calibration_ms: Doba referenční zátěže v tomto běhu
+        tolerance: Povolené relativní zhoršení p50 (0.25 = o 25 %)
+
+    Vrací:
+        Slovník název scénáře -> popis regrese (prázdný, pokud žádná není);
+        scénář bez záznamu v baseline se hlásí také
+    """
+    if not os.path.exists(BASELINE_PATH):
+        print("Baseline neexistuje, spusťte s --update-baseline")
+        return {}
+
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        stored = json.load(f)
+    baseline = stored["results"]
+
+    # Pomalejší stroj než při vytvoření baseline posouvá limity úměrně
+    speed_factor = max(1.0, calibration_ms / stored.get("calibration_ms", calibration_ms))
+    if speed_factor > 1.0:
+        print(f"Stroj je {speed_factor:.2f}x pomalejší než při vytvoření baseline, limity upraveny")
+
+    regressions = {}
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if not base:
+            regressions[name] = f"{name}: chybí v baseline (spusťte s --update-baseline)"
+            continue
+        limit = max(base["p50_ms"] * speed_factor * (1 + tolerance), base["p50_ms"] + MIN_DELTA_MS)
+        if stats["p50_ms"] > limit:
+            regressions[name] = (f"{name}: p50 {stats['p50_ms']:.2f} ms > {limit:.2f} ms "
+                                 f"(baseline {base['p50_ms']:.2f} ms)")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarky Akciového vyhledávače (offline data)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--positions", type=int, default=50)
+    parser.add_argument("--writers", type=int, default=8, help="Počet souběžně zapisujících vláken")
+    parser.add_argument("--tolerance", type=float, default=0.35)
+    parser.add_argument("--retries", type=int, default=2,
+                        help="Kolikrát se scénář nad limitem změří znovu, než se ohlásí regrese")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="Uložit výsledky jako JSON do souboru")
+    args = parser.parse_args()
+
+    calibration_ms = calibrate()
+    results, cases = run(args.iterations, args.concurrency, args.positions, args.writers)
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "calibration_ms": round(calibration_ms, 3),
+        "params": {"iterations": args.iterations, "concurrency": args.concurrency, "positions": args.positions,
+                   "writers": args.writers},
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"Baseline uložen do {BASELINE_PATH}")
+        return 0
+
+    regressions = compare_with_baseline(results, calibration_ms, args.tolerance)
+    for attempt in range(args.retries):
+        slow = list(regressions)
+        if not slow:
+            break
+        print(f"\nOpakované měření ({attempt + 1}/{args.retries}): {', '.join(slow)}")
+        for name in slow:
+            stats = cases[name]()
+            print_row(name, stats)
+            if stats["p50_ms"] < results[name]["p50_ms"]:
+                results[name] = stats
+        regressions = compare_with_baseline(results, calibration_ms, args.tolerance)
+
+    if regressions:
+        print("\n!!! REGRESE VÝKONU !!!", file=sys.stderr)
+        for line in regressions.values():
+            print(f"  {line}", file=sys.stderr)
+        return 1
+
+    print("\nBez regresí oproti baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
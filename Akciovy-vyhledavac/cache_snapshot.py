@@ -0,0 +1,202 @@
+import atexit
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from functools import partial
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from market_cache import HistoryCache, QuoteCache, quote_cache, history_cache
+
+logger = logging.getLogger(__name__)
+
+# Hlavička souboru: značka formátu, délka manifestu (JSON), počet časů a počet hodnot
+MAGIC = b"AKCIE-CACHE-1\n"
+HEADER = struct.Struct("<QQQ")
+# Zarovnání polí v souboru (memmap čte int64/float64 po celých slovech)
+ALIGN = 8
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+class CacheSnapshot:
+    """
+    Snímek sdílených cache cen a historií na disku, ze kterého se cache
+    po restartu aplikace znovu naplní (bez dotazů na yfinance).
+
+    Soubor obsahuje JSON manifest a za ním dvě souvislá pole: časy všech
+    historií (int64, ns) a jejich hodnoty (float64, po sloupcích). Při startu
+    se načte jen manifest, pole se namapují do paměti (memmap) a DataFrame
+    konkrétní historie se sestaví až při jejím prvním použití. Data ze
+    snímku mají původní stáří, takže se chovají jako zastaralá data v cache
+    (vrátí se a obnoví na pozadí, viz prefetch.py).
+
+    Snímek se ukládá v intervalu a při ukončení procesu; zápis jde přes
+    dočasný soubor, takže se nikdy nenačte rozepsaný snímek.
+    """
+
+    def __init__(self, quotes: QuoteCache, histories: HistoryCache, path: str = "", interval: float = 300.0,
+                 max_age: float = 21600.0):
+        """
+        Parametry:
+            quotes: Cache cen
+            histories: Cache historií
+            path: Cesta k souboru snímku (prázdná = snímky vypnuté)
+            interval: Interval ukládání v sekundách (0 = jen při ukončení)
+            max_age: Starší data se do snímku neukládají ani z něj nenačítají
+        """
+        self.quotes: QuoteCache = quotes
+        self.histories: HistoryCache = histories
+        self.path: str = path
+        self.interval: float = interval
+        self.max_age: float = max_age
+        self._save_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._registered = False
+
+    def save(self) -> int:
+        """
+        Uloží obsah cache do souboru snímku.
+
+        Vrací:
+            Počet uložených cen a historií
+        """
+        if not self.path:
+            return 0
+        started = time.perf_counter()
+        quotes = [entry for entry in self.quotes.snapshot() if entry[2] <= self.max_age]
+        manifest: List[Dict[str, Any]] = []
+        index_parts: List[np.ndarray] = []
+        value_parts: List[np.ndarray] = []
+        rows = values = 0
+        for ticker, period, data, age in self.histories.snapshot():
+            if age > self.max_age or data.empty or not isinstance(data.index, pd.DatetimeIndex):
+                continue
+            try:
+                # Sloupce za sebou (každý sloupec souvisle)
+                block = data.to_numpy(dtype="float64").T.ravel()
+            except (TypeError, ValueError):
+                logger.debug("Historie %s %s obsahuje nečíselné sloupce, do snímku se neukládá", ticker, period)
+                continue
+            index = data.index.as_unit("ns").asi8
+            manifest.append({
+                "ticker": ticker, "period": period, "age": age,
+                "rows": [rows, len(index)], "values": [values, len(block)],
+                "columns": [str(column) for column in data.columns],
+                "dtypes": [str(dtype) for dtype in data.dtypes],
+                "tz": str(data.index.tz) if data.index.tz is not None else None,
+                "name": data.index.name,
+            })
+            index_parts.append(index)
+            value_parts.append(block)
+            rows += len(index)
+            values += len(block)
+
+        header = json.dumps({"saved_at": time.time(), "quotes": quotes, "histories": manifest}).encode("utf-8")
+        start = _aligned(len(MAGIC) + HEADER.size + len(header))
+        directory = os.path.dirname(os.path.abspath(self.path))
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with self._save_lock:
+            os.makedirs(directory, exist_ok=True)
+            with open(temporary, "wb") as handle:
+                handle.write(MAGIC)
+                handle.write(HEADER.pack(len(header), rows, values))
+                handle.write(header)
+                handle.write(b"\0" * (start - handle.tell()))
+                for part in index_parts:
+                    handle.write(part.astype("<i8", copy=False).tobytes())
+                for part in value_parts:
+                    handle.write(part.astype("<f8", copy=False).tobytes())
+            os.replace(temporary, self.path)
+        logger.info("Snímek cache uložen: %s cen, %s historií (%s řádků) za %.2f s",
+                    len(quotes), len(manifest), rows, time.perf_counter() - started)
+        return len(quotes) + len(manifest)
+
+    @staticmethod
+    def _frame(index: np.ndarray, values: np.ndarray, entry: Dict[str, Any]) -> pd.DataFrame:
+        start, length = entry["rows"]
+        offset, size = entry["values"]
+        columns = entry["columns"]
+        # Kopie z namapovaného souboru (novější snímek soubor nahradí)
+        block = np.array(values[offset:offset + size]).reshape(len(columns), length).T
+        dates = pd.DatetimeIndex(np.array(index[start:start + length]).view("datetime64[ns]"), name=entry["name"])
+        if entry["tz"]:
+            dates = dates.tz_localize("UTC").tz_convert(entry["tz"])
+        frame = pd.DataFrame(block, index=dates, columns=columns)
+        return frame.astype(dict(zip(columns, entry["dtypes"])))
+
+    def load(self) -> int:
+        """
+        Naplní cache ze souboru snímku (historie se sestaví až při použití).
+        Chybějící nebo poškozený snímek cache ponechá prázdné.
+
+        Vrací:
+            Počet obnovených cen a historií
+        """
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, "rb") as handle:
+                if handle.read(len(MAGIC)) != MAGIC:
+                    raise ValueError("neznámý formát souboru")
+                header_length, rows, values = HEADER.unpack(handle.read(HEADER.size))
+                manifest = json.loads(handle.read(header_length).decode("utf-8"))
+            start = _aligned(len(MAGIC) + HEADER.size + header_length)
+            index = np.memmap(self.path, dtype="<i8", mode="r", offset=start, shape=(rows,)) if rows \
+                else np.empty(0, dtype="<i8")
+            data = np.memmap(self.path, dtype="<f8", mode="r", offset=start + rows * 8, shape=(values,)) if values \
+                else np.empty(0, dtype="<f8")
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            logger.warning("Snímek cache %s nelze načíst: %s", self.path, e)
+            return 0
+
+        # Data stárnou i po dobu, kdy aplikace neběžela
+        elapsed = max(0.0, time.time() - manifest.get("saved_at", 0.0))
+        quotes = self.quotes.restore((ticker, price, age + elapsed) for ticker, price, age in manifest["quotes"]
+                                     if age + elapsed <= self.max_age)
+        histories = self.histories.restore(
+            (entry["ticker"], entry["period"], partial(self._frame, index, data, entry), entry["age"] + elapsed)
+            for entry in manifest["histories"] if entry["age"] + elapsed <= self.max_age
+        )
+        logger.info("Ze snímku cache obnoveno %s cen a %s historií", quotes, histories)
+        return quotes + histories
+
+    def _save_quietly(self) -> None:
+        try:
+            self.save()
+        except Exception as e:
+            logger.error("Chyba při ukládání snímku cache: %s", e)
+
+    def start(self) -> None:
+        """
+        Spustí ukládání snímku v intervalu a zaregistruje uložení při ukončení procesu.
+        """
+        if not self.path:
+            return
+        if not self._registered:
+            atexit.register(self._save_quietly)
+            self._registered = True
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+
+        def run() -> None:
+            while not self._stop_event.wait(self.interval):
+                self._save_quietly()
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=run, name="cache-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Zastaví ukládání snímku v intervalu."""
+        self._stop_event.set()
+
+
+# Sdílený snímek sdílených cache (cesta se nastaví při startu serveru)
+cache_snapshot = CacheSnapshot(quote_cache, history_cache)
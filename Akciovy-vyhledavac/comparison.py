@@ -0,0 +1,105 @@
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Tuple
+import numpy as np
+from price_matrix import PriceMatrix
+from importer import TICKER_PATTERN
+
+logger = logging.getLogger(__name__)
+
+# Oddělovače tickerů v jednom poli formuláře / parametru URL
+TICKER_SEPARATORS = re.compile(r"[\s,;]+")
+
+
+def parse_tickers(values: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """
+    Rozloží zadané symboly (i více v jednom poli, oddělené čárkou nebo mezerou).
+
+    Parametry:
+        values: Hodnoty polí formuláře nebo parametrů URL
+
+    Vrací:
+        Dvojici (platné tickery bez duplicit v zadaném pořadí, neplatné symboly)
+    """
+    tickers: Dict[str, None] = {}
+    invalid = []
+    for value in values:
+        for symbol in TICKER_SEPARATORS.split(value or ""):
+            symbol = symbol.strip().upper()
+            if not symbol:
+                continue
+            if TICKER_PATTERN.match(symbol):
+                tickers[symbol] = None
+            else:
+                invalid.append(symbol)
+    return list(tickers), invalid
+
+
+@dataclass(frozen=True)
+class Comparison:
+    """
+    Srovnání výkonnosti libovolného počtu akcií.
+
+    Všechny řady leží na jedné zarovnané matici (sjednocení obchodních dnů,
+    dopředné doplnění), takže začínají ve stejný den i pro akcie z různých
+    burz. Procentuální změna se počítá vektorově pro celou matici najednou.
+    """
+    period: str
+    matrix: PriceMatrix
+    changes: np.ndarray
+    missing: List[str] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, tickers: List[str], period: str) -> "Comparison":
+        """
+        Načte historie všech tickerů (jedno hromadné stažení) a sestaví srovnání.
+
+        Parametry:
+            tickers: Seznam tickerů
+            period: Časové období
+
+        Vrací:
+            Comparison (tickery bez dat jsou v missing)
+        """
+        matrix = PriceMatrix.load(tickers, period).common()
+        missing = [ticker for ticker in tickers if ticker not in matrix.tickers]
+        if missing:
+            logger.warning("Srovnání %s: chybí data pro %s", period, missing)
+        return cls(period, matrix, matrix.rebased(), missing)
+
+    @property
+    def tickers(self) -> List[str]:
+        return self.matrix.tickers
+
+    def ranking(self) -> List[Tuple[str, float]]:
+        """
+        Vrací:
+            Dvojice (ticker, změna v % za celé období) od nejvýkonnějšího
+        """
+        if not len(self.matrix):
+            return []
+        final = self.changes[-1]
+        order = np.argsort(-final, kind="stable")
+        return [(self.tickers[i], float(final[i])) for i in order]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Vrací:
+            Zarovnané řady pro JSON (data, zavírací ceny a změna v % pro každý ticker)
+        """
+        return {
+            'period': self.period,
+            'dates': np.datetime_as_string(self.matrix.dates, unit="D").tolist(),
+            'tickers': self.tickers,
+            'missing': self.missing,
+            'series': {
+                ticker: {
+                    'close': np.round(self.matrix.closes[:, i], 4).tolist(),
+                    'change_percent': np.round(self.changes[:, i], 4).tolist(),
+                }
+                for i, ticker in enumerate(self.tickers)
+            },
+            'ranking': [{'ticker': ticker, 'change_percent': round(change, 4)}
+                        for ticker, change in self.ranking()],
+        }
@@ -0,0 +1,139 @@
+import os
+from database import normalize_database_url
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    """
+    Načte logickou hodnotu z proměnné prostředí.
+
+    Parametry:
+        name: Název proměnné prostředí
+        default: Výchozí hodnota, pokud proměnná není nastavena
+
+    Vrací:
+        True pro hodnoty 1/true/yes/on, jinak False
+    """
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class Config:
+    """
+    Konfigurace aplikace načítaná z proměnných prostředí.
+    """
+
+    # Databáze z DATABASE_URL (PostgreSQL v produkci), bez ní lokální SQLite
+    SQLALCHEMY_DATABASE_URI = normalize_database_url(os.environ.get("DATABASE_URL", "sqlite:///portfolio.db"))
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Pool spojení (PostgreSQL) a čekání na zámek databáze (SQLite), viz database.py
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+    # Offline režim: deterministická lokální data místo volání yfinance (benchmarky, profilování)
+    STOCK_DATA_OFFLINE = _env_bool("STOCK_DATA_OFFLINE")
+
+    # Doba v sekundách, po kterou se cena ze sdílené cache považuje za aktuální
+    QUOTE_CACHE_TTL = float(os.environ.get("QUOTE_CACHE_TTL", "60"))
+    HISTORY_CACHE_TTL = float(os.environ.get("HISTORY_CACHE_TTL", "900"))
+
+    # Uživatelé a portfolia (výchozí účet pro nepřihlášené návštěvníky, stránkování)
+    DEFAULT_USERNAME = os.environ.get("DEFAULT_USERNAME", "Demo User")
+    DEFAULT_EMAIL = os.environ.get("DEFAULT_EMAIL", "demo@example.com")
+    PORTFOLIO_PAGE_SIZE = int(os.environ.get("PORTFOLIO_PAGE_SIZE", "50"))
+    PORTFOLIO_CACHE_SIZE = int(os.environ.get("PORTFOLIO_CACHE_SIZE", "4096"))
+
+    # Hromadný import pozic z CSV (velikost dávky pro INSERT, limit velikosti nahrávaného souboru)
+    IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "1000"))
+    MAX_CONTENT_LENGTH = int(os.environ.get("MAX_CONTENT_LENGTH", str(16 * 1024 * 1024)))
+
+    # Export dat (počet řádků v jednom bloku CSV / skupině řádků Parquet)
+    EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", "5000"))
+
+    # Lokální seznam symbolů pro našeptávání; ve striktním režimu se neznámé tickery odmítnou bez volání
+    # yfinance. Se SYMBOLS_VERIFY_UPSTREAM se symbol mimo seznam při přidání do portfolia a importu
+    # jednou ověří u yfinance (neexistující symbol se pak odmítá po dobu SYMBOLS_NEGATIVE_TTL)
+    SYMBOLS_FILE = os.environ.get("SYMBOLS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                               "data", "symbols.csv"))
+    SYMBOLS_STRICT = _env_bool("SYMBOLS_STRICT", True)
+    SYMBOLS_VERIFY_UPSTREAM = _env_bool("SYMBOLS_VERIFY_UPSTREAM", False)
+    SYMBOLS_NEGATIVE_TTL = float(os.environ.get("SYMBOLS_NEGATIVE_TTL", "86400"))
+    SYMBOL_SEARCH_LIMIT = int(os.environ.get("SYMBOL_SEARCH_LIMIT", "10"))
+
+    # Screener: seznam tickerů (soubor nebo čárkami oddělené; prázdné = akcie ze SYMBOLS_FILE),
+    # interval obnovy snímku fundamentů na pozadí v sekundách (0 = vypnuto) a velikost dávky stahování
+    SCREENER_UNIVERSE = os.environ.get("SCREENER_UNIVERSE", "")
+    SCREENER_REFRESH_INTERVAL = float(os.environ.get("SCREENER_REFRESH_INTERVAL", "86400"))
+    SCREENER_BATCH_SIZE = int(os.environ.get("SCREENER_BATCH_SIZE", "100"))
+    SCREENER_WORKERS = int(os.environ.get("SCREENER_WORKERS", "8"))
+    SCREENER_MAX_LIMIT = int(os.environ.get("SCREENER_MAX_LIMIT", "500"))
+
+    # Zprávy: souběžně stahované články celkem a na jeden server, časový limit požadavku
+    # a doba platnosti shrnutí článků v cache (sekundy)
+    NEWS_FETCH_WORKERS = int(os.environ.get("NEWS_FETCH_WORKERS", "8"))
+    NEWS_PER_HOST = int(os.environ.get("NEWS_PER_HOST", "2"))
+    NEWS_FETCH_TIMEOUT = float(os.environ.get("NEWS_FETCH_TIMEOUT", "5"))
+    NEWS_SUMMARY_TTL = float(os.environ.get("NEWS_SUMMARY_TTL", "21600"))
+
+    # Překlady do češtiny: "google" (googletrans) nebo "local" (jen slovník, bez sítě; v offline režimu vždy),
+    # časový limit požadavku a počet překladů v paměti procesu (ostatní jsou v databázi)
+    TRANSLATION_BACKEND = os.environ.get("TRANSLATION_BACKEND", "google")
+    TRANSLATION_TIMEOUT = float(os.environ.get("TRANSLATION_TIMEOUT", "10"))
+    TRANSLATION_CACHE_SIZE = int(os.environ.get("TRANSLATION_CACHE_SIZE", "4096"))
+
+    # Předběžné načítání oblíbených tickerů: jak často plánovač kontroluje oblíbená data (0 = vypnuto),
+    # interval obnovy cen a historií během obchodních hodin, počet oblíbených tickerů, poločas
+    # oblíbenosti a nejvyšší stáří dat, která se požadavku ještě vrátí a obnoví na pozadí (sekundy)
+    PREFETCH_INTERVAL = float(os.environ.get("PREFETCH_INTERVAL", "30"))
+    PREFETCH_QUOTE_INTERVAL = float(os.environ.get("PREFETCH_QUOTE_INTERVAL", "60"))
+    PREFETCH_HISTORY_INTERVAL = float(os.environ.get("PREFETCH_HISTORY_INTERVAL", "900"))
+    PREFETCH_HOT_SIZE = int(os.environ.get("PREFETCH_HOT_SIZE", "50"))
+    PREFETCH_HALF_LIFE = float(os.environ.get("PREFETCH_HALF_LIFE", "3600"))
+    STALE_MAX_AGE = float(os.environ.get("STALE_MAX_AGE", "21600"))
+
+    # Snímek cache cen a historií na disku pro rychlý start po restartu: soubor (prázdný = vypnuto)
+    # a interval ukládání v sekundách (0 = jen při ukončení); starší data než STALE_MAX_AGE se neukládají
+    CACHE_SNAPSHOT_PATH = os.environ.get("CACHE_SNAPSHOT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                             "instance", "cache_snapshot.bin"))
+    CACHE_SNAPSHOT_INTERVAL = float(os.environ.get("CACHE_SNAPSHOT_INTERVAL", "300"))
+
+    # Cenová upozornění: interval stahování cen tickerů s upozorněními (0 = jen ceny z běžných požadavků),
+    # limit aktivních upozornění na uživatele a interval udržovací zprávy SSE spojení (sekundy)
+    ALERT_POLL_INTERVAL = float(os.environ.get("ALERT_POLL_INTERVAL", "60"))
+    ALERT_MAX_PER_USER = int(os.environ.get("ALERT_MAX_PER_USER", "500"))
+    ALERT_SSE_HEARTBEAT = float(os.environ.get("ALERT_SSE_HEARTBEAT", "15"))
+
+    # Ingest zpráv: JSON zdroje (soubory nebo URL oddělené čárkou), tickery pro Yahoo Finance
+    # (jako SCREENER_UNIVERSE), interval ingestu na pozadí (0 = vypnuto), počet zpráv na ticker
+    # a po kolika dnech se zprávy mažou
+    NEWS_FEEDS = os.environ.get("NEWS_FEEDS", "")
+    NEWS_TICKERS = os.environ.get("NEWS_TICKERS", "")
+    NEWS_INGEST_INTERVAL = float(os.environ.get("NEWS_INGEST_INTERVAL", "1800"))
+    NEWS_PER_TICKER = int(os.environ.get("NEWS_PER_TICKER", "10"))
+    NEWS_RETENTION_DAYS = int(os.environ.get("NEWS_RETENTION_DAYS", "90"))
+    NEWS_SEARCH_LIMIT = int(os.environ.get("NEWS_SEARCH_LIMIT", "20"))
+
+    # Srovnání akcií (nejvyšší počet tickerů v jednom grafu / odpovědi API)
+    COMPARE_MAX_TICKERS = int(os.environ.get("COMPARE_MAX_TICKERS", "40"))
+    CORRELATION_MAX_TICKERS = int(os.environ.get("CORRELATION_MAX_TICKERS", "300"))
+
+    # Riziková analýza portfolia (benchmark pro betu a období historie)
+    RISK_BENCHMARK = os.environ.get("RISK_BENCHMARK", "SPY")
+    RISK_PERIOD = os.environ.get("RISK_PERIOD", "1y")
+
+    # Logování (LOG_FORMAT: "json" nebo "text")
+    LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")
+    LOG_DEBUG_SAMPLE_RATE = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+
+    # Profilování jednotlivých požadavků (vypnuto, dokud není nastaveno tajemství)
+    PROFILING_ENABLED = _env_bool("PROFILING_ENABLED")
+    PROFILING_SECRET = os.environ.get("PROFILING_SECRET", "")
+    PROFILING_MODE = os.environ.get("PROFILING_MODE", "sample")
+    PROFILING_INTERVAL = float(os.environ.get("PROFILING_INTERVAL", "0.005"))
+    PROFILE_DIR = os.environ.get("PROFILE_DIR")
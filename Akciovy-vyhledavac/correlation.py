@@ -0,0 +1,165 @@
+import logging
+import threading
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from price_matrix import PriceMatrix
+from risk import ReturnStats
+
+logger = logging.getLogger(__name__)
+
+# Klouzavá okna v obchodních dnech nabízená ve formuláři (0 = celé období)
+WINDOWS = (0, 20, 60, 120, 250)
+
+
+class CorrelationAnalyzer:
+    """
+    Párové korelace denních výnosů pro libovolnou skupinu akcií.
+
+    Matice výnosů se pro danou skupinu tickerů a období sestaví jednou za den
+    a sdílí ji všechna okna; korelační matice celé skupiny je jediné maticové
+    násobení (BLAS) nad vycentrovanými výnosy okna, ne smyčka přes dvojice.
+    Hotové výsledky se pamatují podle (tickery, období, okno, den); data se
+    načítají a výsledky počítají mimo zámek.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Parametry:
+            max_entries: Maximální počet pamatovaných výsledků (nejstarší se zahazují)
+        """
+        self.max_entries: int = max_entries
+        self._returns: Dict[Tuple[Tuple[str, ...], str, date], Tuple[List[str], np.ndarray, np.ndarray]] = {}
+        self._reports: Dict[Tuple[Tuple[str, ...], str, int, date], Dict[str, Any]] = {}
+        # Rozpracovaná načtení matic výnosů (klíč -> událost dokončení)
+        self._loading: Dict[Tuple[Tuple[str, ...], str, date], threading.Event] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def correlation(returns: np.ndarray) -> np.ndarray:
+        """
+        Korelační matice sloupců matice výnosů.
+
+        Parametry:
+            returns: Výnosy tvaru (počet dní, počet tickerů)
+
+        Vrací:
+            Matici korelací (NaN pro tickery s nulovým rozptylem)
+        """
+        n = len(returns)
+        if n < 2:
+            return np.full((returns.shape[1], returns.shape[1]), np.nan)
+        centered = returns - returns.mean(axis=0)
+        return ReturnStats.correlation_from(centered.T @ centered / (n - 1))
+
+    @staticmethod
+    def cluster_order(corr: np.ndarray) -> np.ndarray:
+        """
+        Pořadí tickerů, ve kterém leží společně se pohybující akcie vedle sebe
+        (úhel v rovině dvou hlavních vlastních vektorů korelační matice).
+
+        Vrací:
+            Indexy tickerů v novém pořadí
+        """
+        count = len(corr)
+        if count < 3:
+            return np.arange(count)
+        _, vectors = np.linalg.eigh(np.nan_to_num(corr))
+        return np.argsort(np.arctan2(vectors[:, -2], vectors[:, -1]), kind="stable")
+
+    def _returns_for(self, tickers: Tuple[str, ...], period: str, day: date) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        # Volá se bez zámku; stejnou skupinu tickerů načítá (stahuje) jen jedno vlákno, ostatní čekají
+        key = (tickers, period, day)
+        while True:
+            with self._lock:
+                cached = self._returns.get(key)
+                if cached is not None:
+                    return cached
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    break
+            loading.wait()
+
+        try:
+            matrix = PriceMatrix.load(list(tickers), period).common()
+            cached = (matrix.tickers, matrix.dates[1:], matrix.returns())
+            with self._lock:
+                self._remember(self._returns, key, cached, day)
+            logger.debug("Matice výnosů %s tickerů (%s) sestavena: %s dní", len(tickers), period, len(cached[2]))
+            return cached
+        finally:
+            with self._lock:
+                del self._loading[key]
+            loading.set()
+
+    def _remember(self, store: Dict, key: Tuple, value: Any, day: date) -> None:
+        # Výsledky z minulých dnů už nejsou potřeba
+        for stale in [k for k in store if k[-1] != day]:
+            del store[stale]
+        store[key] = value
+        while len(store) > self.max_entries:
+            store.pop(next(iter(store)))
+
+    def analyze(self, tickers: Sequence[str], period: str = "1y", window: int = 0,
+                pairs: int = 10) -> Dict[str, Any]:
+        """
+        Korelační matice skupiny akcií.
+
+        Parametry:
+            tickers: Tickery (na pořadí nezáleží)
+            period: Časové období historie
+            window: Počet posledních obchodních dní (0 = celé období)
+            pairs: Počet nejvíce a nejméně korelovaných dvojic ve výsledku
+
+        Vrací:
+            Slovník s tickery, maticí korelací, pořadím pro heatmapu a dvojicemi
+        """
+        ticker_set = tuple(sorted(set(tickers)))
+        day = date.today()
+        key = (ticker_set, period, window, day)
+        with self._lock:
+            report = self._reports.get(key)
+        if report is not None:
+            return report
+
+        present, dates, returns = self._returns_for(ticker_set, period, day)
+        if window:
+            dates, returns = dates[-window:], returns[-window:]
+        corr = self.correlation(returns) if len(present) else np.empty((0, 0))
+        order = self.cluster_order(corr)
+
+        report = {
+            'period': period,
+            'window': window,
+            'as_of': str(dates[-1]) if len(dates) else None,
+            'observations': len(returns),
+            'tickers': present,
+            'missing': [ticker for ticker in ticker_set if ticker not in present],
+            'matrix': self._json_matrix(corr),
+            'order': [present[i] for i in order],
+            'most_correlated': self._pairs(corr, present, pairs, highest=True),
+            'least_correlated': self._pairs(corr, present, pairs, highest=False),
+        }
+        with self._lock:
+            self._remember(self._reports, key, report, day)
+        return report
+
+    @staticmethod
+    def _json_matrix(corr: np.ndarray) -> List[List[Optional[float]]]:
+        # NaN není platné JSON - tickery bez pohybu ceny mají null
+        return [[None if value != value else value for value in row] for row in np.round(corr, 4).tolist()]
+
+    @staticmethod
+    def _pairs(corr: np.ndarray, tickers: List[str], count: int, highest: bool) -> List[Dict[str, Any]]:
+        rows, cols = np.triu_indices(len(tickers), k=1)
+        values = corr[rows, cols]
+        valid = ~np.isnan(values)
+        rows, cols, values = rows[valid], cols[valid], values[valid]
+        order = np.argsort(-values if highest else values, kind="stable")[:count]
+        return [{'a': tickers[rows[i]], 'b': tickers[cols[i]], 'correlation': round(float(values[i]), 4)}
+                for i in order]
+
+
+# Sdílený analyzátor pro celou aplikaci
+correlation_analyzer = CorrelationAnalyzer()
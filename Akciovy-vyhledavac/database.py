@@ -0,0 +1,172 @@
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Mapping
+from sqlalchemy import event, insert
+from sqlalchemy.sql.dml import Insert
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session
+from models import db
+
+logger = logging.getLogger(__name__)
+
+# Volba spojení určující, jak session_scope zahájí transakci v SQLite
+SQLITE_BEGIN_OPTION = "sqlite_begin"
+# Značka v session.info: právě běží blok session_scope
+SCOPE_FLAG = "in_session_scope"
+
+
+def normalize_database_url(url: str) -> str:
+    """
+    Převede DATABASE_URL do tvaru, kterému rozumí SQLAlchemy.
+
+    Hostingy (Heroku, Replit) předávají PostgreSQL jako postgres://, což
+    SQLAlchemy 2 nepodporuje; explicitně se zvolí ovladač psycopg2.
+
+    Parametry:
+        url: Adresa databáze z prostředí
+
+    Vrací:
+        Adresu pro SQLALCHEMY_DATABASE_URI
+    """
+    if url.startswith("postgres://"):
+        return "postgresql+psycopg2://" + url[len("postgres://"):]
+    if url.startswith("postgresql://"):
+        return "postgresql+psycopg2://" + url[len("postgresql://"):]
+    return url
+
+
+def engine_options(config: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Parametry enginu podle typu databáze.
+
+    PostgreSQL dostane pool s omezenou velikostí, kontrolou spojení před
+    použitím a pravidelnou recyklací. SQLite čeká na zámek databáze místo
+    okamžité chyby "database is locked" a spojení může přejít mezi vlákny.
+
+    Parametry:
+        config: Konfigurace aplikace (SQLALCHEMY_DATABASE_URI, DB_POOL_*)
+
+    Vrací:
+        Slovník pro SQLALCHEMY_ENGINE_OPTIONS
+    """
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    if url.get_backend_name() == "sqlite":
+        return {
+            "connect_args": {
+                "timeout": config["SQLITE_BUSY_TIMEOUT_MS"] / 1000.0,
+                "check_same_thread": False,
+            },
+        }
+    return {
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": True,
+    }
+
+
+def configure_engine(engine: Engine, busy_timeout_ms: int = 5000) -> None:
+    """
+    Nastaví SQLite pro souběžný přístup (u jiných databází nedělá nic).
+
+    Každé nové spojení přepne databázi do režimu WAL (čtenáři neblokují
+    zapisovatele a naopak), nastaví busy_timeout a synchronous=NORMAL (ve WAL
+    bezpečné, fsync jen při checkpointu). Transakce zahajuje SQLAlchemy
+    explicitně, aby šlo zápisy začínat příkazem BEGIN IMMEDIATE (viz
+    session_scope) - odložená transakce, která nejdřív čte a pak zapisuje,
+    by při souběžném zápisu skončila chybou bez čekání na busy_timeout.
+
+    Parametry:
+        engine: Engine aplikace
+        busy_timeout_ms: Jak dlouho čekat na uvolnění zámku databáze
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    in_memory = engine.url.database in (None, "", ":memory:")
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            if not in_memory:
+                cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        finally:
+            cursor.close()
+        # Ovladač sqlite3 pak sám transakce nezahajuje (dělá to _on_begin)
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(connection):
+        mode = connection.get_execution_options().get(SQLITE_BEGIN_OPTION, "DEFERRED")
+        connection.exec_driver_sql(f"BEGIN {mode}")
+
+    logger.info("SQLite %s: WAL, busy_timeout=%s ms, synchronous=NORMAL", engine.url.database, busy_timeout_ms)
+
+
+def insert_ignoring(model: Any, *index_elements: str) -> Insert:
+    """
+    INSERT, který řádky porušující jedinečný index přeskočí
+    (ON CONFLICT DO NOTHING v SQLite i PostgreSQL).
+
+    Parametry:
+        model: Model tabulky
+        index_elements: Sloupce jedinečného indexu
+
+    Vrací:
+        Příkaz INSERT pro session.execute
+    """
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return insert(model)
+    return dialect_insert(model).on_conflict_do_nothing(index_elements=list(index_elements))
+
+
+def in_session_scope() -> bool:
+    """
+    Vrací:
+        True, pokud session aktuálního požadavku právě běží v bloku session_scope
+    """
+    return bool(db.session().info.get(SCOPE_FLAG))
+
+
+@contextmanager
+def session_scope(immediate: bool = False) -> Iterator[Session]:
+    """
+    Krátká transakce nad session aktuálního požadavku.
+
+    Případná rozpracovaná (čtecí) transakce session se nejdřív ukončí, blok
+    pak běží v nové transakci, která se na konci potvrdí, nebo při výjimce
+    vrátí. Spojení tak zůstává zamčené jen po dobu bloku. Bloky nelze
+    vnořovat (vnitřní blok by potvrdil vnější transakci) - vnořený blok
+    skončí chybou RuntimeError.
+
+    Parametry:
+        immediate: Zápis - v SQLite se zámek pro zápis získá hned na začátku
+            (BEGIN IMMEDIATE), takže čtení uvnitř bloku vidí konzistentní data
+
+    Vrací:
+        Session (jako kontextový manažer)
+    """
+    session = db.session()
+    if session.info.get(SCOPE_FLAG):
+        raise RuntimeError("session_scope nelze vnořit do jiného session_scope")
+    if session.in_transaction():
+        session.commit()
+    session.info[SCOPE_FLAG] = True
+    try:
+        if immediate:
+            session.connection(execution_options={SQLITE_BEGIN_OPTION: "IMMEDIATE"})
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.info.pop(SCOPE_FLAG, None)
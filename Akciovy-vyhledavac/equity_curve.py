@@ -0,0 +1,212 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Sequence, Tuple
+import numpy as np
+from sqlalchemy import select
+from models import db, Transaction
+from ledger import HoldingChange, Ledger
+from price_matrix import PriceMatrix
+
+logger = logging.getLogger(__name__)
+
+
+class EquityCurve:
+    """
+    Vývoj hodnoty portfolia v čase.
+
+    Z matice cen datum × ticker a ze změn pozic podle knihy transakcí (nákupy,
+    prodeje, opravy) se jedním vektorovým průchodem spočítá hodnota držených
+    akcií, jejich nákupní cena a kumulativní realizovaný zisk pro každý
+    obchodní den; prodej tak nemaže dřívější držbu z historie. Nový obchodní
+    den se přidává přírůstkově v O(tickerů).
+    """
+
+    def __init__(self, matrix: PriceMatrix, changes: Sequence[HoldingChange]):
+        """
+        Parametry:
+            matrix: Zarovnaná matice zavíracích cen
+            changes: Změny pozic (viz Ledger.changes)
+        """
+        self.tickers = list(matrix.tickers)
+        n_tickers = len(self.tickers)
+
+        # Tickery bez cenových dat se do křivky nezapočítají
+        rows = [(matrix.column(change.ticker), change) for change in changes]
+        rows = [(col, change) for col, change in rows if col is not None]
+        first_day = matrix.dates[0] if len(matrix) else np.datetime64("1970-01-01")
+        change_dates = np.array(
+            [np.datetime64(change.date, "D") if change.date else first_day for _, change in rows],
+            dtype="datetime64[D]"
+        )
+
+        # Změny seřazené podle data - nové dny pak berou jen souvislý úsek
+        order = np.argsort(change_dates, kind="stable")
+        self._change_dates = change_dates[order]
+        self._cols = np.array([col for col, _ in rows], dtype=np.intp)[order]
+        self._qty = np.array([change.quantity for _, change in rows], dtype=np.float64)[order]
+        self._cost = np.array([change.cost for _, change in rows], dtype=np.float64)[order]
+        self._realized = np.array([change.realized for _, change in rows], dtype=np.float64)[order]
+
+        n_days = len(matrix)
+        self.dates = matrix.dates.copy()
+        if n_days == 0 or n_tickers == 0:
+            self.values = np.zeros(n_days)
+            self.costs = np.zeros(n_days)
+            self.realized = np.zeros(n_days)
+            self._last_holdings = np.zeros(n_tickers)
+            self._last_closes = np.zeros(n_tickers)
+            return
+
+        # Změny držby v den transakce a kumulativní součet přes dny
+        day_idx = np.searchsorted(self.dates, self._change_dates, side="left")
+        deltas = np.zeros((n_days + 1, n_tickers))
+        np.add.at(deltas, (day_idx, self._cols), self._qty)
+        holdings = np.cumsum(deltas[:-1], axis=0)
+
+        cost_deltas = np.bincount(day_idx, weights=self._cost, minlength=n_days + 1)
+        self.costs = np.cumsum(cost_deltas[:-1])
+        realized_deltas = np.bincount(day_idx, weights=self._realized, minlength=n_days + 1)
+        self.realized = np.cumsum(realized_deltas[:-1])
+        # Před prvním obchodem tickeru (NaN) ho nelze držet, hodnota je nulová
+        self.values = np.einsum("ij,ij->i", holdings, np.nan_to_num(matrix.closes))
+
+        self._last_holdings = holdings[-1].copy()
+        self._last_closes = matrix.closes[-1].copy()
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def update(self, matrix: PriceMatrix) -> bool:
+        """
+        Přírůstková aktualizace o nové obchodní dny z novější matice.
+
+        Parametry:
+            matrix: Novější matice se stejnými tickery
+
+        Vrací:
+            True pokud šlo křivku navázat, False pokud je nutné ji sestavit znovu
+            (jiné tickery nebo zpětně upravené ceny)
+        """
+        if not len(self.dates) or matrix.tickers != self.tickers:
+            return False
+        last = matrix.row_index(self.dates[-1])
+        if last is None or not np.allclose(matrix.closes[last], self._last_closes):
+            return False
+
+        new_rows = matrix.rows_after(self.dates[-1])
+        if len(new_rows):
+            values = np.empty(len(new_rows))
+            costs = np.empty(len(new_rows))
+            realized_values = np.empty(len(new_rows))
+            holdings = self._last_holdings
+            cost = self.costs[-1]
+            realized = self.realized[-1]
+            previous_day = self.dates[-1]
+            for i, row in enumerate(new_rows):
+                day = matrix.dates[row]
+                start, end = np.searchsorted(self._change_dates, [previous_day, day], side="right")
+                if end > start:
+                    holdings = holdings + np.bincount(self._cols[start:end], weights=self._qty[start:end],
+                                                      minlength=len(self.tickers))
+                    cost += self._cost[start:end].sum()
+                    realized += self._realized[start:end].sum()
+                values[i] = holdings @ matrix.closes[row]
+                costs[i] = cost
+                realized_values[i] = realized
+                previous_day = day
+
+            self.dates = np.concatenate([self.dates, matrix.dates[new_rows]])
+            self.values = np.concatenate([self.values, values])
+            self.costs = np.concatenate([self.costs, costs])
+            self.realized = np.concatenate([self.realized, realized_values])
+            self._last_holdings = holdings
+            self._last_closes = matrix.closes[new_rows[-1]].copy()
+
+        # Okno období se posouvá - nejstarší dny, které už matice nemá, se zahodí
+        if len(matrix):
+            keep = int(np.searchsorted(self.dates, matrix.dates[0], side="left"))
+            if keep:
+                self.dates = self.dates[keep:]
+                self.values = self.values[keep:]
+                self.costs = self.costs[keep:]
+                self.realized = self.realized[keep:]
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Vrací:
+            Série pro JSON API (data ve formátu ISO, hodnota, investovaná částka
+            a kumulativní realizovaný zisk)
+        """
+        return {
+            'dates': np.datetime_as_string(self.dates, unit="D").tolist(),
+            'value': np.round(self.values, 2).tolist(),
+            'cost': np.round(self.costs, 2).tolist(),
+            'realized': np.round(self.realized, 2).tolist()
+        }
+
+
+class EquityCurveCache:
+    """
+    Křivky podle (portfolio, období); při novém obchodním dni se jen prodlouží.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Parametry:
+            max_entries: Maximální počet pamatovaných křivek (nejdéle nepoužité se zahazují)
+        """
+        self.max_entries: int = max_entries
+        self._curves: "OrderedDict[Tuple[int, str], Tuple[Any, EquityCurve, List[HoldingChange]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def changes(portfolio_id: int) -> List[HoldingChange]:
+        """
+        Vrací:
+            Změny pozic portfolia z knihy transakcí (vyžaduje kontext aplikace)
+        """
+        transactions = db.session.execute(
+            select(Transaction.ticker, Transaction.side, Transaction.quantity, Transaction.price,
+                   Transaction.executed_at, Transaction.lot_id, Transaction.realized_pl)
+            .where(Transaction.portfolio_id == portfolio_id)
+            .order_by(Transaction.id)
+        ).all()
+        return Ledger.changes(transactions)
+
+    def get(self, state: Any, period: str) -> EquityCurve:
+        """
+        Vrátí aktuální křivku portfolia.
+
+        Parametry:
+            state: PortfolioState (neměnný stav pozic; nový stav = nová transakce)
+            period: Časové období
+
+        Vrací:
+            EquityCurve
+        """
+        key = (state.portfolio_id, period)
+        with self._lock:
+            cached = self._curves.get(key)
+        changes = cached[2] if cached is not None and cached[0] is state else self.changes(state.portfolio_id)
+        matrix = PriceMatrix.load(list(dict.fromkeys(change.ticker for change in changes)), period)
+
+        with self._lock:
+            cached = self._curves.get(key)
+            # Stejný stav pozic - stačí navázat nové dny
+            if cached is not None and cached[0] is state and cached[1].update(matrix):
+                self._curves.move_to_end(key)
+                return cached[1]
+
+            curve = EquityCurve(matrix, changes)
+            self._curves[key] = (state, curve, changes)
+            self._curves.move_to_end(key)
+            while len(self._curves) > self.max_entries:
+                self._curves.popitem(last=False)
+            logger.debug("Křivka hodnoty portfolia %s (%s) sestavena: %s dní", state.portfolio_id, period, len(curve))
+            return curve
+
+
+# Sdílená cache křivek
+equity_curves = EquityCurveCache()
@@ -0,0 +1,172 @@
+import csv
+import io
+import itertools
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Iterable, Iterator, List, Sequence, Tuple
+from sqlalchemy import select
+from models import db, Transaction
+from stock_data import StockData
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export je volitelný
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class Column:
+    """
+    Sloupec exportu (název a typ pro Parquet: str, float, int, datetime).
+    """
+    name: str
+    kind: str
+
+
+POSITION_COLUMNS = (
+    Column("id", "int"), Column("ticker", "str"), Column("quantity", "float"),
+    Column("purchase_price", "float"), Column("purchase_date", "datetime"), Column("notes", "str"),
+)
+TRANSACTION_COLUMNS = (
+    Column("id", "int"), Column("ticker", "str"), Column("side", "str"), Column("quantity", "float"),
+    Column("price", "float"), Column("executed_at", "datetime"), Column("lot_id", "int"),
+    Column("realized_pl", "float"), Column("notes", "str"),
+)
+HISTORY_COLUMNS = (
+    Column("date", "datetime"), Column("open", "float"), Column("high", "float"),
+    Column("low", "float"), Column("close", "float"), Column("volume", "float"),
+)
+
+
+class Exporter:
+    """
+    Export dat portfolia a cenových historií po částech.
+
+    Zdroje se čtou jako proudy řádků (dotazy s yield_per, iterace DataFrame),
+    CSV se posílá po blocích a Parquet se zapisuje po skupinách řádků, takže
+    paměť workeru nezávisí na velikosti exportu.
+    """
+
+    @staticmethod
+    def parquet_available() -> bool:
+        return pa is not None
+
+    @staticmethod
+    def positions(state: Any) -> Iterator[Tuple]:
+        """
+        Vrací:
+            Řádky otevřených lotů portfolia (ze stavu v paměti)
+        """
+        for position in state.positions:
+            yield (position.id, position.ticker, position.quantity, position.purchase_price,
+                   position.purchase_date, position.notes)
+
+    @staticmethod
+    def transactions(portfolio_id: int, chunk_rows: int = 5000) -> Iterator[Tuple]:
+        """
+        Vrací:
+            Řádky knihy transakcí, načítané z databáze po dávkách (yield_per)
+        """
+        statement = (select(Transaction.id, Transaction.ticker, Transaction.side, Transaction.quantity,
+                            Transaction.price, Transaction.executed_at, Transaction.lot_id,
+                            Transaction.realized_pl, Transaction.notes)
+                     .where(Transaction.portfolio_id == portfolio_id)
+                     .order_by(Transaction.id)
+                     .execution_options(yield_per=chunk_rows))
+        for row in db.session.execute(statement):
+            yield tuple(row)
+
+    @staticmethod
+    def history(ticker: str, period: str) -> Iterator[Tuple]:
+        """
+        Vrací:
+            Řádky cenové historie (sdílená cache, DataFrame se nekopíruje)
+        """
+        data = StockData(ticker).get_history(period)
+        if data.empty:
+            return
+        columns = [data[name].to_numpy() if name in data else itertools.repeat(None)
+                   for name in ("Open", "High", "Low", "Close", "Volume")]
+        for timestamp, *values in zip(data.index, *columns):
+            yield (timestamp.to_pydatetime(), *(None if value is None else float(value) for value in values))
+
+    @staticmethod
+    def _csv_value(value: Any) -> Any:
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return "" if value is None else value
+
+    @staticmethod
+    def csv_chunks(columns: Sequence[Column], rows: Iterable[Tuple], chunk_rows: int = 5000) -> Iterator[str]:
+        """
+        Převede proud řádků na CSV po blocích (pro streamovanou odpověď).
+
+        Parametry:
+            columns: Sloupce exportu (hlavička)
+            rows: Proud řádků
+            chunk_rows: Počet řádků v jednom bloku
+
+        Vrací:
+            Iterátor textových bloků CSV
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([column.name for column in columns])
+        count = 0
+        for row in rows:
+            writer.writerow([Exporter._csv_value(value) for value in row])
+            count += 1
+            if count % chunk_rows == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    @staticmethod
+    def _arrow_schema(columns: Sequence[Column]) -> "pa.Schema":
+        types = {"str": pa.string(), "float": pa.float64(), "int": pa.int64(), "datetime": pa.timestamp("us")}
+        return pa.schema([(column.name, types[column.kind]) for column in columns])
+
+    @staticmethod
+    def write_csv(columns: Sequence[Column], rows: Iterable[Tuple], stream: io.TextIOBase,
+                  chunk_rows: int = 5000) -> None:
+        for chunk in Exporter.csv_chunks(columns, rows, chunk_rows):
+            stream.write(chunk)
+
+    @staticmethod
+    def write_parquet(columns: Sequence[Column], rows: Iterable[Tuple], path: str,
+                      chunk_rows: int = 5000) -> int:
+        """
+        Zapíše proud řádků do souboru Parquet po skupinách řádků.
+
+        Parametry:
+            columns: Sloupce exportu
+            rows: Proud řádků
+            path: Cílový soubor
+            chunk_rows: Počet řádků v jedné skupině (row group)
+
+        Vrací:
+            Počet zapsaných řádků
+        """
+        if pa is None:
+            raise RuntimeError("Export do Parquet vyžaduje balíček pyarrow")
+        schema = Exporter._arrow_schema(columns)
+        iterator = iter(rows)
+        total = 0
+        with pq.ParquetWriter(path, schema) as writer:
+            while True:
+                chunk: List[Tuple] = list(itertools.islice(iterator, chunk_rows))
+                if not chunk and total:
+                    break
+                arrays = [pa.array([row[i] for row in chunk], type=field.type) for i, field in enumerate(schema)]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                total += len(chunk)
+                if len(chunk) < chunk_rows:
+                    break
+        logger.debug("Parquet export %s: %s řádků", path, total)
+        return total
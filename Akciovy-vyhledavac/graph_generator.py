@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import matplotlib
 matplotlib.use('Agg')
@@ -9,13 +10,20 @@ import logging
 import os
 import uuid
 import time
-from typing import Optional, List, Dict, Any
-from stock_data import StockData
+from typing import Optional, List, Dict, Any, Sequence
+from comparison import Comparison
+from indicators import INDICATORS, SMA_WINDOWS, EMA_SPAN, RSI_PERIOD, VOLUME_WINDOW, indicator_engine
 
-# Konfigurace logování
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Barvy srovnávacího grafu pro několik akcií; při více řadách paleta tab20
+COMPARISON_COLORS = ['#2ecc71', '#3498db', '#e74c3c', '#f39c12', '#9b59b6', '#1abc9c']
+COMPARISON_LINE_STYLES = ['-', '--', ':', '-.']
+
+# Indikátory kreslené pod cenový graf (ostatní se kreslí přes cenu)
+INDICATOR_PANELS = ('volume', 'rsi', 'macd')
+SMA_COLORS = ['#f1c40f', '#e67e22', '#9b59b6']
+
 
 class GraphGenerator:
     """
@@ -23,26 +31,40 @@ class GraphGenerator:
     """
 
     @staticmethod
-    def plot_stock(data: pd.DataFrame, ticker: str, period: str) -> str:
+    def plot_stock(data: pd.DataFrame, ticker: str, period: str, overlays: Sequence[str] = ()) -> str:
         """
         Vytvoří graf ceny akcie na základě poskytnutých dat.
         
+        Klouzavé průměry a Bollingerova pásma se kreslí přes cenu, objem, RSI
+        a MACD do samostatných panelů pod ní. Hodnoty indikátorů poskytuje
+        indicator_engine (počítané jednou pro historii z cache).
+        
         Parametry:
             data: DataFrame obsahující data o ceně akcie
             ticker: Symbol akcie
             period: Zobrazené časové období
+            overlays: Zvolené indikátory (viz indicators.INDICATORS)
             
         Vrací:
             Cestu k uloženému souboru s obrázkem
         """
-        logger.debug(f"Vytvářím graf pro {ticker} s {len(data)} datovými body")
+        logger.debug("Vytvářím graf pro %s s %s datovými body", ticker, len(data))
 
         try:
             # změna barvy pro lepší vizualizaci
             plt.style.use('dark_background')
 
+            overlays = [name for name in INDICATORS if name in overlays]
+            panels = [name for name in INDICATOR_PANELS if name in overlays]
+
             # pro čitelnější graf a lepší rozlišení
-            fig, ax = plt.subplots(figsize=(12, 7), dpi=100)
+            if panels:
+                fig, axes = plt.subplots(len(panels) + 1, 1, figsize=(12, 7 + 2.2 * len(panels)), dpi=100,
+                                         sharex=True, gridspec_kw={'height_ratios': [4] + [1.3] * len(panels)})
+                ax = axes[0]
+            else:
+                fig, ax = plt.subplots(figsize=(12, 7), dpi=100)
+                axes = [ax]
 
             # tohle zjistí proč se cena změnila a nastaví barvu
             if len(data) > 1:
@@ -59,6 +81,9 @@ class GraphGenerator:
             # pridani plochy pod graf pro lepší vizualizaci
             ax.fill_between(data.index, data['Close'], alpha=0.2, color=color)
 
+            if overlays:
+                GraphGenerator._plot_indicators(data, ticker, overlays, ax, dict(zip(panels, axes[1:])))
+
             # pridani titulku a popisku osy
             title = f"{ticker} - Cena akcie ({period})"
             if len(data) > 1:
@@ -67,22 +92,24 @@ class GraphGenerator:
                 title += change_text
 
             ax.set_title(title, fontsize=16, fontweight='bold', color='white')
-            ax.set_xlabel('Datum', fontsize=14, color='white')
+            axes[-1].set_xlabel('Datum', fontsize=14, color='white')
             ax.set_ylabel('Cena (USD)', fontsize=14, color='white')
 
             # formatovaní osy y
-            ax.xaxis.set_major_locator(mdates.AutoDateLocator())
-            ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
+            axes[-1].xaxis.set_major_locator(mdates.AutoDateLocator())
+            axes[-1].xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
             plt.xticks(rotation=45, color='white')
             plt.yticks(color='white')
 
-            # vylepšení grafu (mřížka)
-            ax.grid(True, linestyle='--', alpha=0.3, color='gray')
+            for axis in axes:
+                # vylepšení grafu (mřížka)
+                axis.grid(True, linestyle='--', alpha=0.3, color='gray')
+                axis.tick_params(colors='white')
 
-            # ohraničení
-            for spine in ax.spines.values():
-                spine.set_edgecolor('gray')
-                spine.set_linewidth(0.5)
+                # ohraničení
+                for spine in axis.spines.values():
+                    spine.set_edgecolor('gray')
+                    spine.set_linewidth(0.5)
 
             # Adjust layout
             plt.tight_layout()
@@ -99,75 +126,119 @@ class GraphGenerator:
             return filename
 
         except Exception as e:
-            logger.error(f"Error creating plot: {str(e)}")
+            logger.error("Error creating plot: %s", e)
             return ""
 
     @staticmethod
-    def plot_comparison(tickers: List[str], period: str = "1mo") -> str:
+    def _plot_indicators(data: pd.DataFrame, ticker: str, overlays: Sequence[str], ax: Any,
+                         panels: Dict[str, Any]) -> None:
+        """
+        Dokreslí zvolené indikátory do cenového grafu a panelů pod ním.
+
+        Parametry:
+            data: DataFrame s historií (sloupce Close a Volume)
+            ticker: Symbol akcie
+            overlays: Zvolené indikátory
+            ax: Osa cenového grafu
+            panels: Slovník indikátor -> osa panelu (objem, RSI, MACD)
+        """
+        values = indicator_engine.compute(ticker, data)
+        dates = data.index
+
+        if 'sma' in overlays:
+            for window, sma_color in zip(SMA_WINDOWS, SMA_COLORS):
+                ax.plot(dates, values[f"sma_{window}"], color=sma_color, linewidth=1.2, label=f"SMA {window}")
+        if 'ema' in overlays:
+            ax.plot(dates, values[f"ema_{EMA_SPAN}"], color='#1abc9c', linewidth=1.2, linestyle='--',
+                    label=f"EMA {EMA_SPAN}")
+        if 'bollinger' in overlays:
+            ax.plot(dates, values["bb_upper"], color='#95a5a6', linewidth=0.8)
+            ax.plot(dates, values["bb_lower"], color='#95a5a6', linewidth=0.8)
+            ax.fill_between(dates, values["bb_lower"], values["bb_upper"], color='#95a5a6', alpha=0.12,
+                            label='Bollinger (20, 2σ)')
+        if ax.get_legend_handles_labels()[0]:
+            legend = ax.legend(loc='upper left', fancybox=True, framealpha=0.7, fontsize=9)
+            for text in legend.get_texts():
+                text.set_color('white')
+
+        if 'volume' in panels:
+            volume_ax = panels['volume']
+            close = data['Close'].to_numpy()
+            rising = np.r_[True, close[1:] >= close[:-1]]
+            # Svislé čáry (jedna kolekce) místo sloupců - tisíce obdélníků by kreslení zpomalily
+            volume_ax.vlines(dates, 0, values["volume"], colors=np.where(rising, '#2ecc71', '#e74c3c'), alpha=0.5)
+            volume_ax.plot(dates, values[f"volume_sma_{VOLUME_WINDOW}"], color='#f1c40f', linewidth=1.0)
+            volume_ax.set_ylabel('Objem', fontsize=11, color='white')
+        if 'rsi' in panels:
+            rsi_ax = panels['rsi']
+            rsi_ax.plot(dates, values[f"rsi_{RSI_PERIOD}"], color='#9b59b6', linewidth=1.2)
+            rsi_ax.axhline(70, color='#e74c3c', linestyle='--', alpha=0.6)
+            rsi_ax.axhline(30, color='#2ecc71', linestyle='--', alpha=0.6)
+            rsi_ax.set_ylim(0, 100)
+            rsi_ax.set_ylabel(f"RSI {RSI_PERIOD}", fontsize=11, color='white')
+        if 'macd' in panels:
+            macd_ax = panels['macd']
+            hist = values["macd_hist"]
+            macd_ax.vlines(dates, 0, hist, colors=np.where(hist >= 0, '#2ecc71', '#e74c3c'), alpha=0.5)
+            macd_ax.plot(dates, values["macd"], color='#3498db', linewidth=1.2)
+            macd_ax.plot(dates, values["macd_signal"], color='#f39c12', linewidth=1.0)
+            macd_ax.axhline(0, color='gray', alpha=0.5)
+            macd_ax.set_ylabel('MACD', fontsize=11, color='white')
+
+    @staticmethod
+    def plot_comparison(tickers: List[str], period: str = "1mo",
+                        comparison: Optional[Comparison] = None) -> str:
         """
         Vytvoří srovnávací graf více akcií.
         
+        Všechny řady vycházejí z jedné zarovnané matice cen, takže začínají ve
+        stejný den i pro akcie z různých burz. Při větším počtu akcií se
+        zúží čáry, barvy se berou z palety s 20 odstíny (další řady se liší
+        typem čáry) a legenda seřazená podle výkonnosti je vedle grafu.
+        
         Parametry:
             tickers: Seznam symbolů akcií ke srovnání
             period: Časové období pro data
+            comparison: Již sestavené srovnání (jinak se načte)
             
         Vrací:
             Cestu k uloženému souboru s obrázkem
         """
-        logger.debug(f"Vytvářím srovnávací graf pro {tickers}")
+        logger.debug("Vytvářím srovnávací graf pro %s", tickers)
 
         try:
+            # Jedno hromadné načtení a zarovnání všech řad
+            if comparison is None:
+                comparison = Comparison.load(list(tickers), period)
+            if not len(comparison.matrix):
+                logger.warning("Pro srovnání %s nejsou žádná data", tickers)
+                return ""
+            count = len(comparison.tickers)
+            dates = comparison.matrix.dates
+            changes = comparison.changes
+
             # Set styles for better appearance
             plt.style.use('dark_background')
 
-            # Create a figure and axis with higher resolution
-            fig, ax = plt.subplots(figsize=(12, 7), dpi=100)
-
-            # Colors for different lines
-            colors = [
-                '#2ecc71', '#3498db', '#e74c3c', '#f39c12', '#9b59b6',
-                '#1abc9c'
-            ]
-
-            # Create a data cache to avoid multiple StockData instances
-            stock_data_cache = {}
-
-            # Pre-fetch all stock data first (improves performance by batching API calls)
-            for ticker in tickers:
-                try:
-                    stock = StockData(ticker)
-                    data = stock.get_history(period)
-                    if not data.empty:
-                        stock_data_cache[ticker] = data
-                except Exception as e:
-                    logger.error(f"Error fetching data for {ticker}: {str(e)}")
-
-            # For normalization
-            first_values = {}
-
-            # Plot each ticker using the cached data
-            for i, ticker in enumerate(tickers):
-                data = stock_data_cache.get(ticker)
-
-                if data is not None and not data.empty:
-                    # Normalize data to percentage change from first day
-                    first_value = data['Close'].iloc[0]
-                    first_values[ticker] = first_value
-                    normalized_data = (data['Close'] / first_value - 1) * 100
-
-                    # Plot normalized data with better styling
-                    color = colors[i % len(colors)]
-                    line, = ax.plot(data.index,
-                                    normalized_data,
-                                    color=color,
-                                    linewidth=2.5,
-                                    label=ticker)
-
-                    # Add slight transparency for better visuals
-                    ax.fill_between(data.index,
-                                    normalized_data,
-                                    alpha=0.1,
-                                    color=color)
+            # Legenda s mnoha položkami je vpravo ve sloupcích po 20
+            legend_columns = -(-count // 20)
+            width = 12 + (2.2 * legend_columns if count > 6 else 0)
+            fig, ax = plt.subplots(figsize=(width, 7), dpi=100)
+
+            # Všechny řady jedním voláním (sloupce matice)
+            linewidth = 2.5 if count <= 6 else 1.6 if count <= 12 else 1.1
+            lines = ax.plot(dates, changes, linewidth=linewidth)
+            for i, line in enumerate(lines):
+                if count <= len(COMPARISON_COLORS):
+                    line.set_color(COMPARISON_COLORS[i])
+                else:
+                    line.set_color(plt.get_cmap('tab20')(i % 20))
+                    line.set_linestyle(COMPARISON_LINE_STYLES[(i // 20) % len(COMPARISON_LINE_STYLES)])
+
+            # Výplň pod křivkou jen u několika řad, jinak by se překrývala
+            if count <= 3:
+                for i, line in enumerate(lines):
+                    ax.fill_between(dates, changes[:, i], alpha=0.1, color=line.get_color())
 
             # Add title and labels
             ax.set_title(f"Porovnání akcií - Procentuální změna ({period})",
@@ -183,9 +254,18 @@ class GraphGenerator:
             plt.xticks(rotation=45, color='white')
             plt.yticks(color='white')
 
-            # Add grid and legend with better styling
+            # Legenda seřazená podle výkonnosti za období
+            columns = {ticker: i for i, ticker in enumerate(comparison.tickers)}
+            ranking = comparison.ranking()
+            handles = [lines[columns[ticker]] for ticker, _ in ranking]
+            labels = [f"{ticker} {change:+.1f} %" for ticker, change in ranking]
             ax.grid(True, linestyle='--', alpha=0.3, color='gray')
-            legend = ax.legend(loc='best', fancybox=True, framealpha=0.7)
+            if count <= 6:
+                legend = ax.legend(handles, labels, loc='best', fancybox=True, framealpha=0.7)
+            else:
+                legend = ax.legend(handles, labels, loc='upper left', bbox_to_anchor=(1.01, 1.0),
+                                   ncol=legend_columns, fontsize=9 if count <= 20 else 8,
+                                   fancybox=True, framealpha=0.7)
 
             # Style the legend text
             for text in legend.get_texts():
@@ -203,7 +283,9 @@ class GraphGenerator:
             plt.tight_layout()
 
             # Generate a unique filename
-            tickers_str = '_'.join(tickers)
+            tickers_str = '_'.join(comparison.tickers[:3])
+            if count > 3:
+                tickers_str += f"_{count - 3}more"
             filename = f"compare_{tickers_str}_{period}_{int(time.time())}_{uuid.uuid4().hex[:8]}.png"
             filepath = os.path.join('static', 'images', filename)
 
@@ -215,5 +297,139 @@ class GraphGenerator:
             return filename
 
         except Exception as e:
-            logger.error(f"Error creating comparison plot: {str(e)}")
+            logger.error("Error creating comparison plot: %s", e)
+            return ""
+
+    @staticmethod
+    def plot_correlation(report: Dict[str, Any]) -> str:
+        """
+        Vytvoří heatmapu korelací denních výnosů.
+        
+        Tickery jsou v pořadí report['order'], takže skupiny akcií, které se
+        pohybují společně, tvoří souvislé bloky. Popisky os se zobrazují do
+        60 tickerů, hodnoty v buňkách do 15 tickerů.
+        
+        Parametry:
+            report: Výsledek CorrelationAnalyzer.analyze
+            
+        Vrací:
+            Cestu k uloženému souboru s obrázkem
+        """
+        tickers = report['order']
+        count = len(tickers)
+        logger.debug("Vytvářím heatmapu korelací pro %s tickerů", count)
+        if count < 2:
+            return ""
+
+        try:
+            columns = {ticker: i for i, ticker in enumerate(report['tickers'])}
+            idx = np.array([columns[ticker] for ticker in tickers])
+            # None (ticker bez pohybu ceny) se převede na NaN
+            matrix = np.array(report['matrix'], dtype=float)[np.ix_(idx, idx)]
+
+            plt.style.use('dark_background')
+            size = min(8 + count * 0.08, 20)
+            fig, ax = plt.subplots(figsize=(size + 1.5, size), dpi=100)
+
+            image = ax.imshow(np.ma.masked_invalid(matrix), cmap='RdYlGn', vmin=-1.0, vmax=1.0,
+                              interpolation='nearest')
+            colorbar = fig.colorbar(image, ax=ax, fraction=0.046, pad=0.04)
+            colorbar.ax.tick_params(colors='white')
+
+            if count <= 60:
+                fontsize = 10 if count <= 20 else 7
+                ax.set_xticks(range(count))
+                ax.set_yticks(range(count))
+                ax.set_xticklabels(tickers, rotation=90, fontsize=fontsize, color='white')
+                ax.set_yticklabels(tickers, fontsize=fontsize, color='white')
+            else:
+                ax.set_xticks([])
+                ax.set_yticks([])
+
+            if count <= 15:
+                for i in range(count):
+                    for j in range(count):
+                        if not np.isnan(matrix[i, j]):
+                            ax.text(j, i, f"{matrix[i, j]:.2f}", ha='center', va='center', fontsize=8,
+                                    color='black')
+
+            window = f", okno {report['window']} dní" if report['window'] else ""
+            ax.set_title(f"Korelace denních výnosů ({report['period']}{window})",
+                         fontsize=16, fontweight='bold', color='white')
+
+            plt.tight_layout()
+
+            filename = f"correlation_{count}_{report['period']}_{int(time.time())}_{uuid.uuid4().hex[:8]}.png"
+            filepath = os.path.join('static', 'images', filename)
+
+            plt.savefig(filepath, format='png', dpi=120, bbox_inches='tight')
+            plt.close()
+
+            return filename
+
+        except Exception as e:
+            logger.error("Error creating correlation heatmap: %s", e)
+            return ""
+
+    @staticmethod
+    def plot_equity_curve(dates: Sequence[Any], values: Sequence[float], costs: Sequence[float],
+                          period: str = "1y") -> str:
+        """
+        Vytvoří graf vývoje hodnoty portfolia.
+        
+        Parametry:
+            dates: Obchodní dny
+            values: Hodnota portfolia v jednotlivých dnech
+            costs: Investovaná částka v jednotlivých dnech
+            period: Zobrazené časové období
+            
+        Vrací:
+            Cestu k uloženému souboru s obrázkem
+        """
+        logger.debug("Vytvářím graf hodnoty portfolia s %s datovými body", len(dates))
+
+        try:
+            plt.style.use('dark_background')
+            fig, ax = plt.subplots(figsize=(12, 7), dpi=100)
+
+            # Hodnota portfolia a investovaná částka
+            ax.plot(dates, values, color='#f39c12', linewidth=2.5, label='Hodnota portfolia')
+            ax.plot(dates, costs, color='#95a5a6', linewidth=1.5, linestyle='--', label='Investováno')
+
+            # Zisk zeleně, ztráta červeně mezi oběma křivkami
+            ax.fill_between(dates, values, costs, where=[v >= c for v, c in zip(values, costs)],
+                            interpolate=True, alpha=0.2, color='#2ecc71')
+            ax.fill_between(dates, values, costs, where=[v < c for v, c in zip(values, costs)],
+                            interpolate=True, alpha=0.2, color='#e74c3c')
+
+            ax.set_title(f"Vývoj hodnoty portfolia ({period})", fontsize=16, fontweight='bold', color='white')
+            ax.set_xlabel('Datum', fontsize=14, color='white')
+            ax.set_ylabel('Hodnota', fontsize=14, color='white')
+
+            ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+            ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
+            plt.xticks(rotation=45, color='white')
+            plt.yticks(color='white')
+
+            ax.grid(True, linestyle='--', alpha=0.3, color='gray')
+            legend = ax.legend(loc='best', fancybox=True, framealpha=0.7)
+            for text in legend.get_texts():
+                text.set_color('white')
+
+            for spine in ax.spines.values():
+                spine.set_edgecolor('gray')
+                spine.set_linewidth(0.5)
+
+            plt.tight_layout()
+
+            filename = f"equity_{period}_{int(time.time())}_{uuid.uuid4().hex[:8]}.png"
+            filepath = os.path.join('static', 'images', filename)
+
+            plt.savefig(filepath, format='png', dpi=120, bbox_inches='tight')
+            plt.close()
+
+            return filename
+
+        except Exception as e:
+            logger.error("Error creating equity curve plot: %s", e)
             return ""
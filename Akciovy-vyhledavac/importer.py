@@ -0,0 +1,180 @@
+import csv
+import itertools
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Symbol Yahoo Finance; indexy začínají stříškou (^GSPC)
+TICKER_PATTERN = re.compile(r"^\^?[A-Z0-9][A-Z0-9.\-^=]{0,19}$")
+DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y", "%m/%d/%Y", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S")
+
+# Názvy sloupců běžných exportů od brokerů (porovnává se bez velikosti písmen)
+COLUMN_ALIASES: Dict[str, Tuple[str, ...]] = {
+    'ticker': ("ticker", "symbol", "instrument", "isin/ticker"),
+    'quantity': ("quantity", "qty", "shares", "units", "množství", "pocet", "počet"),
+    'purchase_price': ("purchase_price", "price", "cost", "unit price", "cena", "nákupní cena"),
+    'purchase_date': ("purchase_date", "date", "trade date", "datum", "datum nákupu"),
+    'notes': ("notes", "note", "comment", "poznámka", "poznamka"),
+}
+REQUIRED_COLUMNS = ("ticker", "quantity", "purchase_price")
+
+
+@dataclass(frozen=True, slots=True)
+class ImportedRow:
+    """
+    Zkontrolovaný řádek importu (jeden nákupní lot).
+    """
+    line: int
+    ticker: str
+    quantity: float
+    purchase_price: float
+    purchase_date: datetime
+    notes: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class RowError:
+    """
+    Chyba validace řádku importu.
+    """
+    line: int
+    message: str
+
+
+@dataclass
+class ImportResult:
+    """
+    Výsledek importu (počty, nové tickery, chyby a ceny z hromadného načtení).
+    """
+    imported: int = 0
+    tickers: List[str] = field(default_factory=list)
+    errors: List[RowError] = field(default_factory=list)
+    prices: Dict[str, float] = field(default_factory=dict)
+    committed: bool = False
+
+
+class CsvPositionReader:
+    """
+    Proudové čtení CSV s pozicemi od brokera.
+
+    Soubor se nečte celý do paměti - řádky se validují postupně a vrací jako
+    ImportedRow nebo RowError. Oddělovač (čárka, středník, tabulátor) se
+    odhadne z hlavičky, desetinná čárka je podporována.
+    """
+
+    def __init__(self, stream: TextIO, default_date: Optional[datetime] = None,
+                 known_ticker: Optional[Callable[[str], bool]] = None):
+        """
+        Parametry:
+            stream: Textový proud s CSV (hlavička v prvním řádku)
+            default_date: Datum nákupu pro řádky bez data (výchozí je teď)
+            known_ticker: Ověření existence symbolu (výchozí jen kontrola formátu)
+        """
+        self._stream = stream
+        self.default_date: datetime = default_date or datetime.utcnow()
+        self.known_ticker: Optional[Callable[[str], bool]] = known_ticker
+
+    @staticmethod
+    def _columns(header: List[str]) -> Dict[str, int]:
+        normalized = [name.strip().lower() for name in header]
+        columns = {}
+        for key, aliases in COLUMN_ALIASES.items():
+            for alias in aliases:
+                if alias in normalized:
+                    columns[key] = normalized.index(alias)
+                    break
+        return columns
+
+    @staticmethod
+    def _number(value: str) -> float:
+        text = value.strip().replace(" ", "").replace("\u00a0", "")
+        # Desetinný je poslední z oddělovačů (1.234,56 i 1,234.56); opakovaný
+        # oddělovač je vždy oddělovač tisíců (1.234.567), samotná čárka desetinná
+        decimal = max((",", "."), key=text.rfind) if "," in text and "." in text else None
+        if decimal is None:
+            for separator in (",", "."):
+                if text.count(separator) > 1:
+                    text = text.replace(separator, "")
+            decimal = "," if "," in text else "."
+        thousands = "." if decimal == "," else ","
+        text = text.replace(thousands, "").replace(decimal, ".")
+        try:
+            number = float(text)
+        except ValueError:
+            raise ValueError(f"neplatné číslo '{value.strip()}'") from None
+        if not math.isfinite(number):
+            raise ValueError(f"neplatné číslo '{value.strip()}'")
+        return number
+
+    def _date(self, value: str) -> datetime:
+        value = value.strip()
+        if not value:
+            return self.default_date
+        for date_format in DATE_FORMATS:
+            try:
+                return datetime.strptime(value, date_format)
+            except ValueError:
+                continue
+        raise ValueError(f"neplatné datum '{value}'")
+
+    def __iter__(self) -> Iterator[Union[ImportedRow, RowError]]:
+        header_line = self._stream.readline()
+        if not header_line:
+            yield RowError(1, "Soubor je prázdný")
+            return
+        delimiter = max((",", ";", "\t"), key=header_line.count)
+        reader = csv.reader(itertools.chain([header_line], self._stream), delimiter=delimiter)
+        header = next(reader)
+        columns = self._columns(header)
+        missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+        if missing:
+            yield RowError(1, f"Chybí sloupce: {', '.join(missing)}")
+            return
+
+        for line, values in enumerate(reader, start=2):
+            if not any(value.strip() for value in values):
+                continue
+
+            def value_of(name: str) -> str:
+                index = columns.get(name)
+                return values[index] if index is not None and index < len(values) else ""
+
+            ticker = value_of("ticker").strip().upper()
+            if not TICKER_PATTERN.match(ticker):
+                yield RowError(line, f"neplatný ticker '{ticker}'")
+                continue
+            if self.known_ticker is not None and not self.known_ticker(ticker):
+                yield RowError(line, f"neznámý ticker '{ticker}'")
+                continue
+            try:
+                quantity = self._number(value_of("quantity"))
+                purchase_price = self._number(value_of("purchase_price"))
+                purchase_date = self._date(value_of("purchase_date"))
+            except ValueError as e:
+                yield RowError(line, str(e))
+                continue
+            if quantity <= 0:
+                yield RowError(line, "množství musí být kladné")
+                continue
+            if purchase_price < 0:
+                yield RowError(line, "cena nesmí být záporná")
+                continue
+            notes = value_of("notes").strip() or None
+            yield ImportedRow(line, ticker, quantity, purchase_price, purchase_date, notes)
+
+
+def batched(rows: Iterable[ImportedRow], size: int) -> Iterator[List[ImportedRow]]:
+    """
+    Rozdělí proud řádků na dávky pro hromadné vkládání.
+    """
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,272 @@
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SMA_WINDOWS = (20, 50, 200)
+EMA_SPAN = 20
+BOLLINGER_WINDOW = 20
+BOLLINGER_WIDTH = 2.0
+RSI_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+VOLUME_WINDOW = 20
+
+# Skupiny indikátorů (volby v grafu a API) a jejich sloupce
+INDICATOR_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    'sma': tuple(f"sma_{window}" for window in SMA_WINDOWS),
+    'ema': (f"ema_{EMA_SPAN}",),
+    'bollinger': ("bb_upper", "bb_middle", "bb_lower"),
+    'rsi': (f"rsi_{RSI_PERIOD}",),
+    'macd': ("macd", "macd_signal", "macd_hist"),
+    'volume': ("volume", f"volume_sma_{VOLUME_WINDOW}"),
+}
+INDICATORS = tuple(INDICATOR_COLUMNS)
+
+
+def _ema(values: np.ndarray, alpha: float, initial: Optional[float] = None) -> np.ndarray:
+    """
+    Exponenciální průměr (rekurzivní, adjust=False) vektorově přes pandas.
+
+    Parametry:
+        values: Vstupní řada
+        alpha: Váha nové hodnoty
+        initial: Hodnota průměru před prvním prvkem (navázání na předchozí výpočet)
+
+    Vrací:
+        Řadu průměrů stejné délky jako values
+    """
+    if initial is None:
+        return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    extended = np.concatenate(([initial], values))
+    return pd.Series(extended).ewm(alpha=alpha, adjust=False).mean().to_numpy()[1:]
+
+
+def _bar_keys(index: pd.Index) -> np.ndarray:
+    """
+    Vrací:
+        Časy svíček jako int64 (ns) bez časové zóny - klíč pro navazování řad
+    """
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.asi8
+
+
+class IndicatorSeries:
+    """
+    Stav indikátorů nad souvislou řadou denních svíček jednoho tickeru.
+
+    Drží se jen rekurzivní a kumulativní mezivýsledky (prefixové součty,
+    exponenciální průměry, průměrné zisky a ztráty pro RSI) pro každou
+    svíčku. Nové svíčky se připojí bez přepočtu celé historie a libovolný
+    úsek se z mezivýsledků dopočítá vektorově.
+    """
+
+    def __init__(self, keys: np.ndarray, close: np.ndarray, volume: np.ndarray):
+        """
+        Parametry:
+            keys: Časy svíček (viz _bar_keys), vzestupně
+            close: Zavírací ceny
+            volume: Objemy obchodů
+        """
+        self.keys = keys[:0]
+        self.close = close[:0]
+        self.volume = volume[:0]
+        # Posun cen zlepšuje přesnost rozptylu z prefixových součtů
+        self._base = float(close[0]) if len(close) else 0.0
+        self._cum = np.zeros(1)
+        self._cum_sq = np.zeros(1)
+        self._cum_volume = np.zeros(1)
+        self._ema = np.empty(0)
+        self._fast = np.empty(0)
+        self._slow = np.empty(0)
+        self._signal = np.empty(0)
+        self._gain = np.empty(0)
+        self._loss = np.empty(0)
+        self.append(keys, close, volume)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def truncate(self, length: int) -> None:
+        """
+        Zahodí svíčky od indexu length (např. neuzavřený poslední den).
+        """
+        self.keys, self.close, self.volume = self.keys[:length], self.close[:length], self.volume[:length]
+        self._cum, self._cum_sq = self._cum[:length + 1], self._cum_sq[:length + 1]
+        self._cum_volume = self._cum_volume[:length + 1]
+        for name in ("_ema", "_fast", "_slow", "_signal", "_gain", "_loss"):
+            setattr(self, name, getattr(self, name)[:length])
+
+    def append(self, keys: np.ndarray, close: np.ndarray, volume: np.ndarray) -> None:
+        """
+        Připojí nové svíčky a dopočítá mezivýsledky jen pro ně.
+
+        Parametry:
+            keys: Časy nových svíček (pozdější než poslední uložená)
+            close: Zavírací ceny nových svíček
+            volume: Objemy nových svíček
+        """
+        if not len(keys):
+            return
+        close = np.asarray(close, dtype=np.float64)
+        volume = np.asarray(volume, dtype=np.float64)
+        has_previous = len(self.keys) > 0
+
+        def last(values: np.ndarray) -> Optional[float]:
+            return float(values[-1]) if has_previous else None
+
+        shifted = close - self._base
+        self._cum = np.concatenate((self._cum, self._cum[-1] + np.cumsum(shifted)))
+        self._cum_sq = np.concatenate((self._cum_sq, self._cum_sq[-1] + np.cumsum(shifted * shifted)))
+        self._cum_volume = np.concatenate((self._cum_volume, self._cum_volume[-1] + np.cumsum(volume)))
+
+        self._ema = np.concatenate((self._ema, _ema(close, 2.0 / (EMA_SPAN + 1), last(self._ema))))
+        fast = _ema(close, 2.0 / (MACD_FAST + 1), last(self._fast))
+        slow = _ema(close, 2.0 / (MACD_SLOW + 1), last(self._slow))
+        signal = _ema(fast - slow, 2.0 / (MACD_SIGNAL + 1), last(self._signal))
+        self._fast = np.concatenate((self._fast, fast))
+        self._slow = np.concatenate((self._slow, slow))
+        self._signal = np.concatenate((self._signal, signal))
+
+        # Wilderovo vyhlazení změn cen; první svíčka celé řady žádnou změnu nemá
+        change = np.diff(close, prepend=self.close[-1] if has_previous else np.nan)
+        if has_previous:
+            gain = _ema(np.clip(change, 0.0, None), 1.0 / RSI_PERIOD, last(self._gain))
+            loss = _ema(np.clip(-change, 0.0, None), 1.0 / RSI_PERIOD, last(self._loss))
+        else:
+            gain = np.r_[0.0, _ema(np.clip(change[1:], 0.0, None), 1.0 / RSI_PERIOD)]
+            loss = np.r_[0.0, _ema(np.clip(-change[1:], 0.0, None), 1.0 / RSI_PERIOD)]
+        self._gain = np.concatenate((self._gain, gain))
+        self._loss = np.concatenate((self._loss, loss))
+
+        self.keys = np.concatenate((self.keys, keys))
+        self.close = np.concatenate((self.close, close))
+        self.volume = np.concatenate((self.volume, volume))
+
+    def _rolling(self, cum: np.ndarray, window: int, start: int, stop: int) -> np.ndarray:
+        rows = np.arange(start, stop)
+        first = rows + 1 - window
+        result = (cum[rows + 1] - cum[np.clip(first, 0, None)]) / window
+        result[first < 0] = np.nan
+        return result
+
+    def columns(self, start: int, stop: int) -> Dict[str, np.ndarray]:
+        """
+        Hodnoty všech indikátorů pro svíčky start..stop-1.
+
+        Vrací:
+            Slovník sloupec -> řada (NaN tam, kde okno ještě není naplněné)
+        """
+        result: Dict[str, np.ndarray] = {}
+        for window in SMA_WINDOWS:
+            result[f"sma_{window}"] = self._rolling(self._cum, window, start, stop) + self._base
+        result[f"ema_{EMA_SPAN}"] = self._ema[start:stop]
+
+        mean = self._rolling(self._cum, BOLLINGER_WINDOW, start, stop)
+        mean_sq = self._rolling(self._cum_sq, BOLLINGER_WINDOW, start, stop)
+        std = np.sqrt(np.clip(mean_sq - mean * mean, 0.0, None))
+        result["bb_middle"] = mean + self._base
+        result["bb_upper"] = result["bb_middle"] + BOLLINGER_WIDTH * std
+        result["bb_lower"] = result["bb_middle"] - BOLLINGER_WIDTH * std
+
+        gain, loss = self._gain[start:stop], self._loss[start:stop]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(loss > 0, 100.0 - 100.0 / (1.0 + gain / loss), 100.0)
+        rsi[np.arange(start, stop) < RSI_PERIOD] = np.nan
+        result[f"rsi_{RSI_PERIOD}"] = rsi
+
+        macd = self._fast[start:stop] - self._slow[start:stop]
+        result["macd"] = macd
+        result["macd_signal"] = self._signal[start:stop]
+        result["macd_hist"] = macd - self._signal[start:stop]
+
+        result["volume"] = self.volume[start:stop]
+        result[f"volume_sma_{VOLUME_WINDOW}"] = self._rolling(self._cum_volume, VOLUME_WINDOW, start, stop)
+        return result
+
+
+class IndicatorEngine:
+    """
+    Technické indikátory (SMA, EMA, Bollinger, RSI, MACD, objem) pro historie
+    ze sdílené cache.
+
+    Řady se drží podle tickeru a první svíčky historie, takže výsledek je
+    vždy stejný jako výpočet z předané historie (EMA, RSI a MACD závisí na
+    počátku řady) bez ohledu na to, jaká období se počítala dřív. Když cache
+    vrátí novější historii se stejným začátkem, připojí se jen nové svíčky
+    (poslední, ještě neuzavřený den se přepočítá); přepočet celé řady
+    nastane jen při nenavazujících datech, např. po zpětné úpravě cen o dividendy.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        """
+        Parametry:
+            max_entries: Maximální počet řad (ticker + začátek historie) držených v paměti
+        """
+        self.max_entries: int = max_entries
+        self._series: Dict[Tuple[str, Any], IndicatorSeries] = {}
+        self._lock = threading.Lock()
+
+    def _series_for(self, ticker: str, keys: np.ndarray, close: np.ndarray, volume: np.ndarray) -> IndicatorSeries:
+        key = (ticker, keys[0])
+        series = self._series.get(key)
+        if series is not None and len(series):
+            overlap = min(len(series), len(keys))
+            # Navazuje, pokud se překrývající svíčky shodují (poslední se může lišit)
+            matches = (np.array_equal(series.keys[:overlap], keys[:overlap])
+                       and np.allclose(series.close[:overlap - 1], close[:overlap - 1]))
+            if matches:
+                last = overlap - 1
+                if overlap == len(keys) and np.isclose(series.close[last], close[-1]):
+                    return series
+                if last == len(series) - 1:
+                    # Přepočet posledního (neuzavřeného) dne a připojení nových
+                    series.truncate(last)
+                    series.append(keys[overlap - 1:], close[overlap - 1:], volume[overlap - 1:])
+                    return series
+
+        series = IndicatorSeries(keys, close, volume)
+        self._series.pop(key, None)
+        self._series[key] = series
+        while len(self._series) > self.max_entries:
+            self._series.pop(next(iter(self._series)))
+        logger.debug("Indikátory %s sestaveny pro %s svíček", ticker, len(keys))
+        return series
+
+    def compute(self, ticker: str, data: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Indikátory pro historii z StockData.get_history.
+
+        Parametry:
+            ticker: Symbol akcie
+            data: DataFrame se sloupci Close a Volume
+
+        Vrací:
+            Slovník sloupec -> řada zarovnaná s řádky data
+        """
+        if data.empty:
+            return {column: np.empty(0) for columns in INDICATOR_COLUMNS.values() for column in columns}
+        keys = _bar_keys(data.index)
+        close = data['Close'].to_numpy(dtype=np.float64)
+        volume = (data['Volume'].to_numpy(dtype=np.float64) if 'Volume' in data
+                  else np.zeros(len(data)))
+        with self._lock:
+            series = self._series_for(ticker, keys, close, volume)
+            return series.columns(0, len(keys))
+
+    @staticmethod
+    def select(columns: Dict[str, np.ndarray], indicators: Iterable[str]) -> Dict[str, np.ndarray]:
+        """
+        Vrací:
+            Jen sloupce zvolených skupin indikátorů (neznámé skupiny se ignorují)
+        """
+        names: List[str] = [column for indicator in indicators for column in INDICATOR_COLUMNS.get(indicator, ())]
+        return {name: columns[name] for name in names}
+
+
+# Sdílený výpočet indikátorů pro celou aplikaci
+indicator_engine = IndicatorEngine()
@@ -0,0 +1,213 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Zbytky množství menší než EPSILON (zaokrouhlovací chyby float) se berou jako nula
+EPSILON = 1e-9
+
+BUY = "buy"
+SELL = "sell"
+REMOVE = "remove"
+
+
+class LotAccounting:
+    """
+    Účetní pravidla pro loty a materializované pozice (FIFO).
+
+    Metody pracují s libovolnými objekty se stejnými atributy, takže je sdílí
+    databázové modely (PortfolioItem, Holding) i přehrání knihy v paměti (Ledger).
+    """
+
+    @staticmethod
+    def fifo_fills(lots: Iterable[Any], quantity: float) -> List[Tuple[Any, float]]:
+        """
+        Rozpad prodeje na otevřené loty od nejstaršího. Pokud loty nepokrývají
+        celé množství, vyhodí ValueError.
+
+        Parametry:
+            lots: Otevřené loty seřazené od nejstaršího (atribut quantity)
+            quantity: Prodávané množství
+
+        Vrací:
+            Seznam dvojic (lot, odebrané množství)
+        """
+        fills = []
+        remaining = quantity
+        for lot in lots:
+            if remaining <= EPSILON:
+                break
+            taken = min(lot.quantity, remaining)
+            fills.append((lot, taken))
+            remaining -= taken
+        if remaining > EPSILON:
+            raise ValueError(f"Nedostatečné množství v portfoliu (chybí {remaining:g} ks)")
+        return fills
+
+    @staticmethod
+    def fifo_key(lot: Any) -> Tuple[datetime, int]:
+        """
+        Vrací:
+            Klíč pořadí lotů pro FIFO (datum nákupu, ID lotu; chybějící hodnoty první jako v SQL)
+        """
+        return lot.purchase_date or datetime.min, lot.id or 0
+
+    @staticmethod
+    def buy(holding: Any, quantity: float, price: float) -> None:
+        holding.quantity += quantity
+        holding.cost_basis += quantity * price
+
+    @staticmethod
+    def sell(holding: Any, fills: List[Tuple[Any, float]], price: float) -> float:
+        """
+        Promítne prodej do pozice.
+
+        Vrací:
+            Realizovaný zisk/ztrátu prodeje
+        """
+        consumed = sum(taken * lot.purchase_price for lot, taken in fills)
+        quantity = sum(taken for _, taken in fills)
+        realized = quantity * price - consumed
+        holding.quantity -= quantity
+        holding.cost_basis -= consumed
+        holding.realized_pl += realized
+        LotAccounting._settle(holding)
+        return realized
+
+    @staticmethod
+    def remove(holding: Any, quantity: float, price: float) -> None:
+        holding.quantity -= quantity
+        holding.cost_basis -= quantity * price
+        LotAccounting._settle(holding)
+
+    @staticmethod
+    def _settle(holding: Any) -> None:
+        # Uzavřená pozice nemá zbytkové náklady z nepřesnosti float
+        if holding.quantity <= EPSILON:
+            holding.quantity = 0.0
+            holding.cost_basis = 0.0
+
+
+@dataclass(slots=True)
+class Lot:
+    """
+    Otevřený nákupní lot.
+    """
+    id: Optional[int]
+    ticker: str
+    quantity: float
+    purchase_price: float
+    purchase_date: Optional[datetime] = None
+
+
+@dataclass(slots=True)
+class HoldingState:
+    """
+    Pozice jednoho tickeru vzniklá přehráním knihy transakcí.
+    """
+    ticker: str
+    quantity: float = 0.0
+    cost_basis: float = 0.0
+    realized_pl: float = 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class HoldingChange:
+    """
+    Změna pozice tickeru k datu jedné transakce (pro vývoj portfolia v čase).
+    """
+    ticker: str
+    date: Optional[datetime]
+    quantity: float
+    cost: float
+    realized: float = 0.0
+
+
+class Ledger:
+    """
+    Přehrání knihy transakcí v paměti.
+
+    Slouží k počátečnímu sestavení a kontrole materializovaných pozic; běžný
+    provoz pozice upravuje přírůstkově s každou transakcí (PortfolioService).
+    """
+
+    def __init__(self):
+        self.holdings: Dict[str, HoldingState] = {}
+        self.lots: Dict[str, List[Lot]] = {}
+
+    @classmethod
+    def replay(cls, transactions: Iterable[Any]) -> "Ledger":
+        """
+        Parametry:
+            transactions: Transakce seřazené podle pořadí zápisu (prodej spotřebuje
+                loty otevřené do té doby, od nejstaršího data nákupu)
+
+        Vrací:
+            Ledger s pozicemi a otevřenými loty
+        """
+        ledger = cls()
+        for transaction in transactions:
+            ledger.apply(transaction)
+        return ledger
+
+    def apply(self, transaction: Any) -> None:
+        """
+        Promítne jednu transakci (atributy side, ticker, quantity, price, lot_id, executed_at).
+        """
+        ticker = transaction.ticker
+        holding = self.holdings.setdefault(ticker, HoldingState(ticker))
+        lots = self.lots.setdefault(ticker, [])
+
+        if transaction.side == BUY:
+            lots.append(Lot(transaction.lot_id, ticker, transaction.quantity, transaction.price,
+                            transaction.executed_at))
+            LotAccounting.buy(holding, transaction.quantity, transaction.price)
+        elif transaction.side == SELL:
+            # Stejné pořadí jako živý prodej (PortfolioService.sell): datum nákupu, pak ID lotu
+            lots.sort(key=LotAccounting.fifo_key)
+            fills = LotAccounting.fifo_fills(lots, transaction.quantity)
+            LotAccounting.sell(holding, fills, transaction.price)
+            for lot, taken in fills:
+                lot.quantity -= taken
+            lots[:] = [lot for lot in lots if lot.quantity > EPSILON]
+        elif transaction.side == REMOVE:
+            for i, lot in enumerate(lots):
+                if lot.id == transaction.lot_id:
+                    LotAccounting.remove(holding, lot.quantity, lot.purchase_price)
+                    del lots[i]
+                    break
+            else:
+                logger.warning("Lot %s pro %s v knize nenalezen", transaction.lot_id, ticker)
+        else:
+            raise ValueError(f"Neznámý typ transakce: {transaction.side}")
+
+    @staticmethod
+    def changes(transactions: Iterable[Any]) -> List[HoldingChange]:
+        """
+        Změny množství, nákladů a realizovaného zisku podle data transakcí.
+
+        Prodej sníží náklady o cenu spotřebovaných lotů (prodejní hodnota minus
+        realizovaný zisk) a realizuje zisk v den prodeje. Odebrání lotu je oprava
+        chybného zápisu, proto se zbytek lotu odečte už k datu jeho nákupu.
+
+        Parametry:
+            transactions: Transakce seřazené podle pořadí zápisu
+
+        Vrací:
+            Seznam HoldingChange v pořadí transakcí
+        """
+        transactions = list(transactions)
+        bought = {t.lot_id: t.executed_at for t in transactions if t.side == BUY and t.lot_id is not None}
+        changes = []
+        for t in transactions:
+            if t.side == BUY:
+                changes.append(HoldingChange(t.ticker, t.executed_at, t.quantity, t.quantity * t.price))
+            elif t.side == SELL:
+                changes.append(HoldingChange(t.ticker, t.executed_at, -t.quantity,
+                                             -(t.quantity * t.price - t.realized_pl), t.realized_pl))
+            elif t.side == REMOVE:
+                changes.append(HoldingChange(t.ticker, bought.get(t.lot_id, t.executed_at), -t.quantity,
+                                             -t.quantity * t.price))
+        return changes
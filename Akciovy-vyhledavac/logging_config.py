@@ -0,0 +1,80 @@
+import json
+import logging
+import random
+from datetime import datetime, timezone
+from typing import Any, Mapping
+
+# Atributy, které má každý LogRecord; vše ostatní pochází z parametru extra=
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formátuje záznamy logu jako jeden JSON objekt na řádek.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+
+        # Strukturovaná pole předaná přes extra={...}
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DebugSamplingFilter(logging.Filter):
+    """
+    Propouští jen zadaný podíl DEBUG záznamů, ostatní úrovně vždy.
+    """
+
+    def __init__(self, rate: float = 1.0):
+        """
+        Parametry:
+            rate: Podíl DEBUG záznamů, které se zapíšou (0.0 - 1.0)
+        """
+        super().__init__()
+        self.rate: float = max(0.0, min(1.0, rate))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+def setup_logging(config: Mapping[str, Any]) -> None:
+    """
+    Jednotné nastavení logování pro celou aplikaci.
+
+    Parametry:
+        config: Konfigurace aplikace (LOG_LEVEL, LOG_FORMAT, LOG_DEBUG_SAMPLE_RATE)
+    """
+    level = logging.getLevelName(str(config.get("LOG_LEVEL", "INFO")).upper())
+    if not isinstance(level, int):
+        level = logging.INFO
+
+    handler = logging.StreamHandler()
+    if config.get("LOG_FORMAT", "json") == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    handler.addFilter(DebugSamplingFilter(float(config.get("LOG_DEBUG_SAMPLE_RATE", 1.0))))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    # Knihovny třetích stran logují na DEBUG velmi upovídaně
+    for noisy in ("urllib3", "matplotlib", "PIL", "yfinance", "peewee"):
+        logging.getLogger(noisy).setLevel(max(level, logging.WARNING))
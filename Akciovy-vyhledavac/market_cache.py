@@ -0,0 +1,257 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Posluchač změny ceny: (ticker, předchozí cena nebo None, nová cena)
+QuoteListener = Callable[[str, Optional[float], float], None]
+# Odložené načtení historie (např. ze snímku cache na disku)
+HistoryLoader = Callable[[], pd.DataFrame]
+
+
+class QuoteCache:
+    """
+    Sdílená cache aktuálních cen akcií pro všechny požadavky.
+
+    Při každé změně ceny upozorní registrované posluchače, takže odvozená data
+    (např. souhrn portfolia) lze aktualizovat přírůstkově.
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        """
+        Parametry:
+            ttl: Doba v sekundách, po kterou je cena považována za aktuální
+        """
+        self.ttl: float = ttl
+        self._quotes: Dict[str, Tuple[float, float]] = {}  # ticker -> (cena, čas uložení)
+        self._listeners: List[QuoteListener] = []
+        self._lock = threading.Lock()
+
+    def get(self, ticker: str, max_age: Optional[float] = None) -> Optional[float]:
+        """
+        Vrátí čerstvou cenu z cache.
+
+        Parametry:
+            ticker: Symbol akcie
+            max_age: Maximální stáří v sekundách (výchozí je ttl)
+
+        Vrací:
+            Cenu, nebo None pokud chybí nebo je starší než max_age
+        """
+        entry = self._quotes.get(ticker)
+        if entry is None:
+            return None
+        price, stored_at = entry
+        if time.monotonic() - stored_at > (self.ttl if max_age is None else max_age):
+            return None
+        return price
+
+    def last(self, ticker: str) -> Optional[float]:
+        """
+        Vrací:
+            Poslední známou cenu bez ohledu na její stáří, nebo None
+        """
+        entry = self._quotes.get(ticker)
+        return entry[0] if entry else None
+
+    def peek(self, ticker: str) -> Optional[Tuple[float, float]]:
+        """
+        Vrací:
+            Dvojici (cena, stáří v sekundách) bez ohledu na ttl, nebo None
+        """
+        entry = self._quotes.get(ticker)
+        return (entry[0], time.monotonic() - entry[1]) if entry else None
+
+    def set(self, ticker: str, price: float) -> None:
+        """
+        Uloží cenu a při změně upozorní posluchače.
+
+        Parametry:
+            ticker: Symbol akcie
+            price: Nová cena
+        """
+        price = float(price)
+        with self._lock:
+            previous = self._quotes.get(ticker)
+            self._quotes[ticker] = (price, time.monotonic())
+            listeners = list(self._listeners)
+
+        old_price = previous[0] if previous else None
+        if old_price == price:
+            return
+        for listener in listeners:
+            try:
+                listener(ticker, old_price, price)
+            except Exception as e:
+                logger.error("Quote listener failed for %s: %s", ticker, e)
+
+    def snapshot(self) -> List[Tuple[str, float, float]]:
+        """
+        Vrací:
+            Všechny ceny jako (ticker, cena, stáří v sekundách)
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [(ticker, price, now - stored_at) for ticker, (price, stored_at) in self._quotes.items()]
+
+    def restore(self, entries: Iterable[Tuple[str, float, float]]) -> int:
+        """
+        Vloží uložené ceny (snímek z minulého běhu) bez upozornění posluchačů;
+        ceny, které už v cache jsou, se nepřepisují.
+
+        Parametry:
+            entries: Dvojice (ticker, cena, stáří v sekundách)
+
+        Vrací:
+            Počet vložených cen
+        """
+        now = time.monotonic()
+        restored = 0
+        with self._lock:
+            for ticker, price, age in entries:
+                if ticker not in self._quotes:
+                    self._quotes[ticker] = (float(price), now - age)
+                    restored += 1
+        return restored
+
+    def subscribe(self, listener: QuoteListener) -> None:
+        """
+        Registrace posluchače změn cen.
+
+        Parametry:
+            listener: Funkce volaná jako listener(ticker, stará cena, nová cena)
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._quotes.clear()
+
+
+class HistoryCache:
+    """
+    Sdílená cache historických cenových dat podle (ticker, období).
+
+    Uložené DataFrame se sdílejí mezi požadavky a nesmí se měnit na místě.
+    """
+
+    def __init__(self, ttl: float = 900.0, max_entries: int = 512):
+        """
+        Parametry:
+            ttl: Doba v sekundách, po kterou jsou data považována za aktuální
+            max_entries: Maximální počet uložených historií (nejstarší se zahazují)
+        """
+        self.ttl: float = ttl
+        self.max_entries: int = max_entries
+        self._entries: Dict[Tuple[str, str], Tuple[pd.DataFrame, float]] = {}
+        # Historie ze snímku, které se načtou až při prvním použití
+        self._lazy: Dict[Tuple[str, str], Tuple[HistoryLoader, float]] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, key: Tuple[str, str]) -> Optional[Tuple[pd.DataFrame, float]]:
+        entry = self._entries.get(key)
+        if entry is not None or not self._lazy:
+            return entry
+        with self._lock:
+            lazy = self._lazy.pop(key, None)
+        if lazy is None:
+            return None
+        loader, stored_at = lazy
+        try:
+            data = loader()
+        except Exception as e:
+            logger.warning("Historii %s %s ze snímku nelze načíst: %s", key[0], key[1], e)
+            return None
+        with self._lock:
+            # Mezitím mohla být uložena novější data
+            if key not in self._entries:
+                self._entries[key] = (data, stored_at)
+                self._evict()
+            return self._entries.get(key)
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            # Slovník zachovává pořadí vložení - první klíč je nejstarší
+            self._entries.pop(next(iter(self._entries)))
+
+    def get(self, ticker: str, period: str) -> Optional[pd.DataFrame]:
+        """
+        Vrací:
+            Čerstvou historii z cache, nebo None
+        """
+        entry = self._entry((ticker, period))
+        if entry is None:
+            return None
+        data, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl:
+            return None
+        return data
+
+    def peek(self, ticker: str, period: str) -> Optional[Tuple[pd.DataFrame, float]]:
+        """
+        Vrací:
+            Dvojici (historie, stáří v sekundách) bez ohledu na ttl, nebo None
+        """
+        entry = self._entry((ticker, period))
+        return (entry[0], time.monotonic() - entry[1]) if entry else None
+
+    def set(self, ticker: str, period: str, data: pd.DataFrame) -> None:
+        with self._lock:
+            self._lazy.pop((ticker, period), None)
+            self._entries.pop((ticker, period), None)
+            self._entries[(ticker, period)] = (data, time.monotonic())
+            self._evict()
+
+    def snapshot(self) -> List[Tuple[str, str, pd.DataFrame, float]]:
+        """
+        Všechny historie včetně dosud nenačtených ze snímku.
+
+        Vrací:
+            Čtveřice (ticker, období, data, stáří v sekundách) od nejstarší uložené
+        """
+        now = time.monotonic()
+        with self._lock:
+            entries = [(key, data, stored_at) for key, (data, stored_at) in self._entries.items()]
+            lazy = [(key, loader, stored_at) for key, (loader, stored_at) in self._lazy.items()]
+        result = []
+        for key, loader, stored_at in lazy:
+            try:
+                result.append((key[0], key[1], loader(), now - stored_at))
+            except Exception as e:
+                logger.warning("Historii %s %s ze snímku nelze načíst: %s", key[0], key[1], e)
+        result.extend((key[0], key[1], data, now - stored_at) for key, data, stored_at in entries)
+        return result
+
+    def restore(self, entries: Iterable[Tuple[str, str, HistoryLoader, float]]) -> int:
+        """
+        Zaregistruje historie ze snímku z minulého běhu; načtou se až při
+        prvním použití. Historie, které už v cache jsou, se nepřepisují.
+
+        Parametry:
+            entries: Čtveřice (ticker, období, funkce vracející data, stáří v sekundách)
+
+        Vrací:
+            Počet zaregistrovaných historií
+        """
+        now = time.monotonic()
+        restored = 0
+        with self._lock:
+            for ticker, period, loader, age in entries:
+                if (ticker, period) not in self._entries:
+                    self._lazy[(ticker, period)] = (loader, now - age)
+                    restored += 1
+        return restored
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._lazy.clear()
+
+
+# Sdílené instance pro celou aplikaci
+quote_cache = QuoteCache()
+history_cache = HistoryCache()
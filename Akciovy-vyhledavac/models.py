@@ -1,24 +1,249 @@
+import logging
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 db = SQLAlchemy()
 
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), nullable=False, unique=True)
+    email = db.Column(db.String(120), nullable=False, unique=True)
+    # Hash hesla (werkzeug); účty založené před zavedením hesel ho nemají
+    password_hash = db.Column(db.String(256), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Portfolia se načítají dotazem se stránkováním, ne celým vztahem
+    portfolios = db.relationship('Portfolio', backref='user', lazy='dynamic')
+
+    def __repr__(self):
+        return f"<User {self.username}>"
+
 class Portfolio(db.Model):
     id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True, index=True)
     name = db.Column(db.String(100), nullable=False, default="Moje Portfolio")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Vztah s položkami portfolia
+    # Vztah s položkami portfolia (hromadně přes selectinload, viz PortfolioService)
     items = db.relationship('PortfolioItem', backref='portfolio', lazy=True, cascade="all, delete-orphan")
 
 class PortfolioItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    portfolio_id = db.Column(db.Integer, db.ForeignKey('portfolio.id'), nullable=False)
+    portfolio_id = db.Column(db.Integer, db.ForeignKey('portfolio.id'), nullable=False, index=True)
     ticker = db.Column(db.String(20), nullable=False)
     quantity = db.Column(db.Float, nullable=False)
     purchase_price = db.Column(db.Float, nullable=False)
     purchase_date = db.Column(db.DateTime, default=datetime.utcnow)
     notes = db.Column(db.Text, nullable=True)
     
+    __table_args__ = (db.Index('ix_portfolio_item_portfolio_ticker', 'portfolio_id', 'ticker'),)
+    
+    def __repr__(self):
+        return f"<PortfolioItem {self.ticker} - {self.quantity}>"
+
+class Transaction(db.Model):
+    """
+    Záznam v knize transakcí (append-only - řádky se nikdy nemění ani nemažou).
+
+    side: "buy" (nákup, vznikne lot), "sell" (prodej FIFO) nebo "remove"
+    (oprava - odebrání konkrétního lotu bez realizace zisku).
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    portfolio_id = db.Column(db.Integer, db.ForeignKey('portfolio.id'), nullable=False)
+    ticker = db.Column(db.String(20), nullable=False)
+    side = db.Column(db.String(10), nullable=False)
+    quantity = db.Column(db.Float, nullable=False)
+    price = db.Column(db.Float, nullable=False)
+    executed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    lot_id = db.Column(db.Integer, nullable=True)
+    realized_pl = db.Column(db.Float, nullable=False, default=0.0)
+    notes = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_transaction_portfolio_ticker', 'portfolio_id', 'ticker'),)
+
+    def __repr__(self):
+        return f"<Transaction {self.side} {self.ticker} - {self.quantity}>"
+
+class Holding(db.Model):
+    """
+    Materializovaná pozice (jeden řádek na ticker), upravovaná s každou transakcí.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    portfolio_id = db.Column(db.Integer, db.ForeignKey('portfolio.id'), nullable=False)
+    ticker = db.Column(db.String(20), nullable=False)
+    quantity = db.Column(db.Float, nullable=False, default=0.0)
+    cost_basis = db.Column(db.Float, nullable=False, default=0.0)
+    realized_pl = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (db.UniqueConstraint('portfolio_id', 'ticker', name='uq_holding_portfolio_ticker'),)
+
+    def __repr__(self):
+        return f"<Holding {self.ticker} - {self.quantity}>"
+
+class Fundamentals(db.Model):
+    """
+    Snímek fundamentálních ukazatelů pro screener (jeden řádek na ticker),
+    obnovovaný na pozadí. Indexy slouží rozsahovým filtrům a řazení.
+    """
+    ticker = db.Column(db.String(20), primary_key=True)
+    name = db.Column(db.String(200), nullable=True)
+    sector = db.Column(db.String(100), nullable=True)
+    industry = db.Column(db.String(100), nullable=True)
+    exchange = db.Column(db.String(20), nullable=True)
+    price = db.Column(db.Float, nullable=True)
+    market_cap = db.Column(db.Float, nullable=True, index=True)
+    pe_ratio = db.Column(db.Float, nullable=True, index=True)
+    dividend_yield = db.Column(db.Float, nullable=True, index=True)
+    eps = db.Column(db.Float, nullable=True)
+    beta = db.Column(db.Float, nullable=True, index=True)
+    fifty_two_week_high = db.Column(db.Float, nullable=True)
+    fifty_two_week_low = db.Column(db.Float, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (db.Index('ix_fundamentals_sector_market_cap', 'sector', 'market_cap'),)
+
+    def __repr__(self):
+        return f"<Fundamentals {self.ticker}>"
+
+class NewsArticle(db.Model):
+    """
+    Článek ze zdrojů zpráv (jeden řádek na článek bez ohledu na počet tickerů).
+    Duplicity se poznají podle normalizované URL a podle titulku u stejného zdroje.
+    """
+    __tablename__ = 'news_article'
+    id = db.Column(db.Integer, primary_key=True)
+    url_key = db.Column(db.String(40), nullable=False, unique=True)
+    title_key = db.Column(db.String(40), nullable=False, index=True)
+    url = db.Column(db.String(1000), nullable=False)
+    title = db.Column(db.String(500), nullable=False)
+    title_cz = db.Column(db.String(500), nullable=True)
+    source = db.Column(db.String(200), nullable=True)
+    summary = db.Column(db.Text, nullable=True)
+    summary_cz = db.Column(db.Text, nullable=True)
+    published_at = db.Column(db.DateTime, nullable=False, index=True)
+    fetched_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<NewsArticle {self.id} {self.title[:40]}>"
+
+class NewsTicker(db.Model):
+    """
+    Přiřazení článku k tickeru. Datum publikace je zopakované kvůli indexu,
+    ze kterého se nejnovější zprávy tickeru čtou bez řazení.
+    """
+    __tablename__ = 'news_ticker'
+    article_id = db.Column(db.Integer, db.ForeignKey('news_article.id'), primary_key=True)
+    ticker = db.Column(db.String(20), primary_key=True)
+    published_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (db.Index('ix_news_ticker_ticker_published', 'ticker', 'published_at'),)
+
+    def __repr__(self):
+        return f"<NewsTicker {self.ticker} - {self.article_id}>"
+
+class PriceAlert(db.Model):
+    """
+    Cenové upozornění uživatele. Aktivní je, dokud nemá triggered_at; u pohybu
+    o procenta je threshold procento a reference_price cena při vytvoření.
+    """
+    __tablename__ = 'price_alert'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    ticker = db.Column(db.String(20), nullable=False)
+    kind = db.Column(db.String(10), nullable=False)
+    threshold = db.Column(db.Float, nullable=False)
+    reference_price = db.Column(db.Float, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    triggered_at = db.Column(db.DateTime, nullable=True)
+    triggered_price = db.Column(db.Float, nullable=True)
+
+    __table_args__ = (db.Index('ix_price_alert_user_triggered', 'user_id', 'triggered_at'),)
+
+    def __repr__(self):
+        return f"<PriceAlert {self.ticker} {self.kind} {self.threshold}>"
+
+class Translation(db.Model):
+    """
+    Uložený překlad (klíčem je hash překladače, cílového jazyka a textu),
+    aby se stejný text nepřekládal znovu ani po restartu.
+    """
+    key = db.Column(db.String(40), primary_key=True)
+    backend = db.Column(db.String(20), nullable=False)
+    dest = db.Column(db.String(10), nullable=False)
+    text = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
     def __repr__(self):
-        return f"<PortfolioItem {self.ticker} - {self.quantity}>"
\ No newline at end of file
+        return f"<Translation {self.backend}/{self.dest} {self.key[:8]}>"
+
+# Fulltextový index zpráv (SQLite FTS5) nad tabulkou news_article; triggery ho drží v souladu
+NEWS_FTS_TABLE = 'news_fts'
+NEWS_FTS_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {NEWS_FTS_TABLE} USING fts5("
+    "title, summary, title_cz, summary_cz, content='news_article', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS news_article_ai AFTER INSERT ON news_article BEGIN "
+    f"INSERT INTO {NEWS_FTS_TABLE}(rowid, title, summary, title_cz, summary_cz) "
+    "VALUES (new.id, new.title, new.summary, new.title_cz, new.summary_cz); END",
+    f"CREATE TRIGGER IF NOT EXISTS news_article_ad AFTER DELETE ON news_article BEGIN "
+    f"INSERT INTO {NEWS_FTS_TABLE}({NEWS_FTS_TABLE}, rowid, title, summary, title_cz, summary_cz) "
+    "VALUES ('delete', old.id, old.title, old.summary, old.title_cz, old.summary_cz); END",
+    f"CREATE TRIGGER IF NOT EXISTS news_article_au AFTER UPDATE ON news_article BEGIN "
+    f"INSERT INTO {NEWS_FTS_TABLE}({NEWS_FTS_TABLE}, rowid, title, summary, title_cz, summary_cz) "
+    "VALUES ('delete', old.id, old.title, old.summary, old.title_cz, old.summary_cz); "
+    f"INSERT INTO {NEWS_FTS_TABLE}(rowid, title, summary, title_cz, summary_cz) "
+    "VALUES (new.id, new.title, new.summary, new.title_cz, new.summary_cz); END",
+)
+
+def create_news_search_index() -> bool:
+    """
+    Založí fulltextový index zpráv (jen SQLite s modulem FTS5). Při prvním
+    založení se do indexu načtou už uložené články.
+
+    Vrací:
+        True, pokud je fulltextový index k dispozici
+    """
+    if db.engine.dialect.name != "sqlite":
+        return False
+    existed = NEWS_FTS_TABLE in inspect(db.engine).get_table_names()
+    try:
+        with db.engine.begin() as connection:
+            for statement in NEWS_FTS_DDL:
+                connection.execute(text(statement))
+            if not existed:
+                connection.execute(text(f"INSERT INTO {NEWS_FTS_TABLE}({NEWS_FTS_TABLE}) VALUES ('rebuild')"))
+    except Exception as e:
+        logger.warning("Fulltextový index zpráv nelze vytvořit (chybí FTS5?): %s", e)
+        return False
+    if not existed:
+        logger.info("Vytvořen fulltextový index %s", NEWS_FTS_TABLE)
+    return True
+
+def upgrade_schema() -> None:
+    """
+    Doplní do existující databáze sloupce a indexy přidané po jejím vytvoření
+    (db.create_all zakládá jen chybějící tabulky). Změny jsou pouze aditivní.
+    """
+    inspector = inspect(db.engine)
+    if 'user_id' not in {column['name'] for column in inspector.get_columns('portfolio')}:
+        with db.engine.begin() as connection:
+            connection.execute(text('ALTER TABLE portfolio ADD COLUMN user_id INTEGER REFERENCES "user" (id)'))
+        logger.info("Do tabulky portfolio přidán sloupec user_id")
+    if 'password_hash' not in {column['name'] for column in inspector.get_columns('user')}:
+        with db.engine.begin() as connection:
+            connection.execute(text('ALTER TABLE "user" ADD COLUMN password_hash VARCHAR(256)'))
+        logger.info("Do tabulky user přidán sloupec password_hash")
+
+    for table in (Portfolio.__table__, PortfolioItem.__table__, Transaction.__table__):
+        existing = {index['name'] for index in inspect(db.engine).get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.engine)
+                logger.info("Vytvořen index %s", index.name)
+
+    create_news_search_index()
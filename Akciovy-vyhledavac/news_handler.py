@@ -1,15 +1,396 @@
 import requests
 from bs4 import BeautifulSoup
 import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 import re
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional
+from urllib.parse import urlsplit
 import json
+import yfinance as yf
+from requests.adapters import HTTPAdapter
+from stock_data import StockData
+from translation import translation_service
 
-# Konfigurace logování
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+try:
+    import trafilatura
+except ImportError:  # volitelné - bez něj se text článku hledá v odstavcích přes BeautifulSoup
+    trafilatura = None
+
+try:
+    from charset_normalizer import from_bytes
+except ImportError:  # volitelné (obvykle instalováno s requests) - bez něj se stránka bez charsetu čte jako UTF-8
+    from_bytes = None
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+              "Chrome/91.0.4472.124 Safari/537.36")
+# Větší stránky se nestahují celé (text článku je na začátku)
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+# Kolik bajtů začátku stránky stačí na odhad kódování
+DETECT_BYTES = 64 * 1024
+
+
+class ArticleFetcher:
+    """
+    Souběžné stahování článků a jejich shrnutí.
+
+    Stránky se stahují ve sdíleném poolu vláken přes jednu requests.Session
+    (znovupoužitá spojení - keep-alive), s omezením souběžných požadavků na
+    jeden server. Shrnutí se pamatují podle URL; neúspěch se pamatuje kratší
+    dobu, aby nedostupný server nezdržoval každé zobrazení stránky.
+    """
+
+    def __init__(self, max_workers: int = 8, per_host: int = 2, timeout: float = 5.0,
+                 ttl: float = 21600.0, failure_ttl: float = 300.0, max_entries: int = 1024):
+        """
+        Parametry:
+            max_workers: Počet souběžně stahovaných stránek celkem
+            per_host: Počet souběžných požadavků na jeden server
+            timeout: Časový limit jednoho požadavku v sekundách
+            ttl: Doba platnosti shrnutí v cache v sekundách
+            failure_ttl: Doba, po kterou se nezkouší znovu stáhnout nedostupný článek
+            max_entries: Maximální počet shrnutí v cache
+        """
+        self.max_workers: int = max_workers
+        self.per_host: int = per_host
+        self.timeout: float = timeout
+        self.ttl: float = ttl
+        self.failure_ttl: float = failure_ttl
+        self.max_entries: int = max_entries
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()  # url -> (shrnutí nebo None, čas uložení)
+        self._hosts: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._session: Optional[requests.Session] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._session = requests.Session()
+                self._session.headers["User-Agent"] = USER_AGENT
+                adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=max(self.per_host, 1))
+                self._session.mount("http://", adapter)
+                self._session.mount("https://", adapter)
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="article-fetch")
+            return self._executor
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            slot = self._hosts.get(host)
+            if slot is None:
+                slot = self._hosts[host] = threading.BoundedSemaphore(max(self.per_host, 1))
+            return slot
+
+    def cached(self, url: str) -> tuple:
+        """
+        Vrací:
+            Dvojici (nalezeno, shrnutí nebo None) z cache
+        """
+        with self._lock:
+            entry = self._cache.get(url)
+            if entry is None:
+                return False, None
+            summary, stored_at = entry
+            if time.monotonic() - stored_at > (self.ttl if summary is not None else self.failure_ttl):
+                del self._cache[url]
+                return False, None
+            self._cache.move_to_end(url)
+            return True, summary
+
+    def _remember(self, url: str, summary: Optional[str]) -> None:
+        with self._lock:
+            self._cache[url] = (summary, time.monotonic())
+            self._cache.move_to_end(url)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def extract_text(html: str, url: str = "") -> str:
+        """
+        Vytáhne z HTML text článku (trafilatura, pokud je k dispozici, jinak
+        odstavce z elementu article nebo prvních pět odstavců stránky).
+
+        Parametry:
+            html: Obsah stránky
+            url: Adresa stránky (pomáhá trafilatuře s metadaty)
+
+        Vrací:
+            Text článku (prázdný, pokud se nepodařilo nic najít)
+        """
+        if trafilatura is not None:
+            text = trafilatura.extract(html, url=url or None, include_comments=False, include_tables=False,
+                                       favor_precision=True)
+            if text:
+                return " ".join(text.split())
+
+        soup = BeautifulSoup(html, HTML_PARSER)
+        article_container = soup.select_one('article') or soup.select_one('.article-content') or soup.select_one('.article-body')
+        if article_container:
+            paragraphs = article_container.select('p')
+        else:
+            paragraphs = soup.select('p')[:5]
+        return " ".join(text for text in (p.get_text(" ", strip=True) for p in paragraphs) if text)
+
+    @staticmethod
+    def shorten(text: str, max_length: int) -> str:
+        """
+        Zkrátí text na max_length znaků (na hranici slova) a doplní "...".
+        """
+        if len(text) <= max_length:
+            return text
+        return text[:max_length].rsplit(" ", 1)[0].rstrip(",.;:") + "..."
+
+    def _download(self, url: str) -> Optional[str]:
+        with self._host_slot(url):
+            with self._session.get(url, timeout=self.timeout, stream=True) as response:
+                if response.status_code != 200:
+                    logger.debug("Článek %s vrátil HTTP %s", url, response.status_code)
+                    return None
+                chunks, size = [], 0
+                for chunk in response.iter_content(chunk_size=65536):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= MAX_PAGE_BYTES:
+                        break
+                body = b"".join(chunks)
+                # Bez charsetu v hlavičce (requests pak pro text/* hlásí ISO-8859-1) se kódování
+                # odhadne jen ze staženého začátku stránky - apparent_encoding by četl zbytek
+                # streamované odpovědi přes limit velikosti
+                if "charset" in response.headers.get("Content-Type", "").lower():
+                    encoding = response.encoding
+                else:
+                    encoding = self._detect_encoding(body)
+                return body.decode(encoding or "utf-8", errors="replace")
+
+    @staticmethod
+    def _detect_encoding(body: bytes) -> str:
+        """
+        Odhadne kódování stažené stránky, bez charset_normalizer předpokládá UTF-8.
+        """
+        if from_bytes is not None:
+            match = from_bytes(body[:DETECT_BYTES]).best()
+            if match is not None:
+                return match.encoding
+        return "utf-8"
+
+    def _fetch(self, url: str) -> Optional[str]:
+        try:
+            html = self._download(url)
+            text = self.extract_text(html, url) if html else ""
+        except Exception as e:
+            logger.warning("Chyba při načítání článku %s: %s", url, e)
+            text = ""
+        self._remember(url, text or None)
+        return text or None
+
+    def texts(self, urls: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Texty článků pro více URL najednou (chybějící v cache se stáhnou souběžně).
+
+        Parametry:
+            urls: Adresy článků
+
+        Vrací:
+            Slovník url -> text článku, nebo None pokud se ho nepodařilo získat
+        """
+        results: Dict[str, Optional[str]] = {}
+        missing = []
+        for url in dict.fromkeys(url for url in urls if url):
+            found, text = self.cached(url)
+            if found:
+                results[url] = text
+            else:
+                missing.append(url)
+        if missing:
+            executor = self._pool()
+            futures = {executor.submit(self._fetch, url): url for url in missing}
+            # Celkový limit: stránky jednoho serveru se stahují postupně po per_host
+            done, _ = wait(futures, timeout=self.timeout * 2)
+            for future, url in futures.items():
+                results[url] = future.result() if future in done else None
+            logger.debug("Staženo %s článků, %s z cache", len(done), len(results) - len(futures))
+        return results
+
+    def summaries(self, urls: Iterable[str], max_length: int = 250) -> Dict[str, Optional[str]]:
+        """
+        Vrací:
+            Slovník url -> shrnutí (zkrácený text článku), nebo None
+        """
+        return {url: self.shorten(text, max_length) if text else None for url, text in self.texts(urls).items()}
+
+
+# Sdílený stahovač článků (pool vláken a spojení pro celou aplikaci)
+article_fetcher = ArticleFetcher()
+
+
+# Ukázkové zprávy pro známé tickery; "days_ago" se při výběru převede na datum
+SAMPLE_NEWS: Dict[str, List[Dict[str, Any]]] = {
+    "AAPL": [
+        {
+            "title": "Apple Reports Strong Quarterly Results for AAPL",
+            "title_cz": "[Přeloženo automaticky] Společnost Apple oznamuje silné čtvrtletní výsledky pro AAPL",
+            "url": "https://finance.yahoo.com/news/apple-strong-results",
+            "source": "Yahoo Finance",
+            "days_ago": 1,
+            "summary": "Apple Inc. reported earnings that exceeded analyst expectations, driven by strong iPhone sales and growth in services.",
+            "summary_cz": "[Přeloženo automaticky] Společnost Apple Inc. oznámila výsledky, které překonaly očekávání analytiků, díky silným prodejům iPhonů a růstu služeb."
+        },
+        {
+            "title": "New AAPL Products Announcement Expected Next Month",
+            "title_cz": "[Přeloženo automaticky] Příští měsíc se očekává oznámení nových produktů AAPL",
+            "url": "https://finance.yahoo.com/news/apple-new-products",
+            "source": "Bloomberg",
+            "days_ago": 2,
+            "summary": "Apple is expected to unveil new products at its upcoming event, including updates to the iPhone, iPad, and MacBook lines.",
+            "summary_cz": "[Přeloženo automaticky] Očekává se, že společnost Apple představí na své nadcházející akci nové produkty, včetně aktualizací řad iPhone, iPad a MacBook."
+        }
+    ],
+    "MSFT": [
+        {
+            "title": "MSFT Cloud Revenue Surges 30% Year-Over-Year",
+            "title_cz": "[Přeloženo automaticky] Příjmy z cloudu MSFT rostou meziročně o 30 %",
+            "url": "https://finance.yahoo.com/news/microsoft-cloud-growth",
+            "source": "Yahoo Finance",
+            "days_ago": 1,
+            "summary": "Microsoft reported a 30% increase in cloud revenue, as more businesses adopt its Azure platform for digital transformation.",
+            "summary_cz": "[Přeloženo automaticky] Microsoft oznámil 30% nárůst příjmů z cloudu, protože více podniků přijímá jeho platformu Azure pro digitální transformaci."
+        },
+        {
+            "title": "MSFT Announces New AI Features for Microsoft 365",
+            "title_cz": "[Přeloženo automaticky] MSFT oznamuje nové funkce AI pro Microsoft 365",
+            "url": "https://finance.yahoo.com/news/microsoft-ai-features",
+            "source": "Reuters",
+            "days_ago": 2,
+            "summary": "Microsoft is introducing several new AI-powered features to its Microsoft 365 suite of applications, designed to enhance productivity and collaboration.",
+            "summary_cz": "[Přeloženo automaticky] Microsoft zavádí několik nových funkcí s podporou umělé inteligence do své sady aplikací Microsoft 365, které jsou navrženy tak, aby zvýšily produktivitu a spolupráci."
+        }
+    ],
+    "GOOG": [
+        {
+            "title": "GOOG Ad Revenue Rebounds in Latest Quarter",
+            "title_cz": "[Přeloženo automaticky] Příjmy z reklamy GOOG se v posledním čtvrtletí zotavují",
+            "url": "https://finance.yahoo.com/news/google-ad-revenue",
+            "source": "Yahoo Finance",
+            "days_ago": 1,
+            "summary": "Google's advertising business showed strong recovery in the latest quarter, with revenue up 15% compared to the same period last year.",
+            "summary_cz": "[Přeloženo automaticky] Reklamní podnikání společnosti Google vykázalo v posledním čtvrtletí silné oživení, s nárůstem příjmů o 15 % ve srovnání se stejným obdobím loňského roku."
+        },
+        {
+            "title": "GOOG Expands AI Research Initiatives",
+            "title_cz": "[Přeloženo automaticky] GOOG rozšiřuje výzkumné iniciativy v oblasti umělé inteligence",
+            "url": "https://finance.yahoo.com/news/google-ai-research",
+            "source": "TechCrunch",
+            "days_ago": 2,
+            "summary": "Google is investing billions in expanded AI research facilities and hiring top talent as it races to compete with other tech giants in artificial intelligence development.",
+            "summary_cz": "[Přeloženo automaticky] Google investuje miliardy do rozšířených výzkumných zařízení v oblasti umělé inteligence a najímá špičkové talenty, protože závodí s ostatními technologickými giganty ve vývoji umělé inteligence."
+        }
+    ],
+    "AMZN": [
+        {
+            "title": "AMZN E-commerce Growth Accelerates",
+            "title_cz": "[Přeloženo automaticky] Růst e-commerce AMZN zrychluje",
+            "url": "https://finance.yahoo.com/news/amazon-ecommerce",
+            "source": "Yahoo Finance",
+            "days_ago": 1,
+            "summary": "Amazon's core e-commerce business posted strong growth this quarter, outpacing analyst expectations as online shopping continues to expand.",
+            "summary_cz": "[Přeloženo automaticky] Hlavní e-commerce podnikání Amazonu zaznamenalo v tomto čtvrtletí silný růst, který překonal očekávání analytiků, protože online nakupování se nadále rozšiřuje."
+        },
+        {
+            "title": "AMZN Web Services Remains Dominant Cloud Provider",
+            "title_cz": "[Přeloženo automaticky] AMZN Web Services zůstává dominantním poskytovatelem cloudu",
+            "url": "https://finance.yahoo.com/news/aws-dominance",
+            "source": "Wall Street Journal",
+            "days_ago": 2,
+            "summary": "AWS maintained its market leadership position in cloud computing, with 33% market share and revenue growth of 25% year over year.",
+            "summary_cz": "[Přeloženo automaticky] AWS si udržel své vedoucí postavení na trhu cloud computingu s 33% podílem na trhu a růstem příjmů o 25 % meziročně."
+        }
+    ],
+    "TSLA": [
+        {
+            "title": "TSLA Vehicle Deliveries Exceed Expectations",
+            "title_cz": "[Přeloženo automaticky] Dodávky vozidel TSLA překonávají očekávání",
+            "url": "https://finance.yahoo.com/news/tesla-deliveries",
+            "source": "Reuters",
+            "days_ago": 1,
+            "summary": "Tesla delivered more vehicles than expected in the latest quarter, suggesting strong demand despite increasing competition in the electric vehicle market.",
+            "summary_cz": "[Přeloženo automaticky] Tesla dodala v posledním čtvrtletí více vozidel, než se očekávalo, což naznačuje silnou poptávku navzdory rostoucí konkurenci na trhu s elektrickými vozidly."
+        },
+        {
+            "title": "TSLA Expands European Gigafactory Production",
+            "title_cz": "[Přeloženo automaticky] TSLA rozšiřuje výrobu v evropské Gigafactory",
+            "url": "https://finance.yahoo.com/news/tesla-gigafactory",
+            "source": "Bloomberg",
+            "days_ago": 2,
+            "summary": "Tesla announced plans to increase production capacity at its Berlin Gigafactory, targeting a 50% increase in output by the end of the year.",
+            "summary_cz": "[Přeloženo automaticky] Tesla oznámila plány na zvýšení výrobní kapacity ve své berlínské Gigafactory, přičemž cílí na 50% nárůst produkce do konce roku."
+        }
+    ],
+    "CEZ.PR": [
+        {
+            "title": "CEZ.PR Zvyšuje Investice do Obnovitelných Zdrojů",
+            "title_cz": "CEZ.PR Zvyšuje Investice do Obnovitelných Zdrojů",
+            "url": "https://finance.yahoo.com/news/cez-renewable",
+            "source": "Hospodářské Noviny",
+            "days_ago": 1,
+            "summary": "Czech energy giant CEZ announced plans to increase investments in renewable energy sources, with a focus on solar and wind power projects.",
+            "summary_cz": "Česká energetická společnost ČEZ oznámila plány na zvýšení investic do obnovitelných zdrojů energie, se zaměřením na solární a větrné projekty."
+        },
+        {
+            "title": "CEZ.PR Reports Strong Q1 Financial Results",
+            "title_cz": "CEZ.PR Oznamuje Silné Finanční Výsledky za První Čtvrtletí",
+            "url": "https://finance.yahoo.com/news/cez-results",
+            "source": "Patria Finance",
+            "days_ago": 2,
+            "summary": "CEZ Group reported better-than-expected financial results for Q1, with EBITDA growing by 15% year-on-year, driven by higher electricity prices and operational efficiencies.",
+            "summary_cz": "Skupina ČEZ oznámila lepší než očekávané finanční výsledky za první čtvrtletí, s růstem EBITDA o 15 % meziročně, díky vyšším cenám elektřiny a provozní efektivitě."
+        }
+    ]
+}
+
+# Výchozí ukázkové zprávy pro jakýkoliv jiný ticker ({ticker} se doplní při výběru)
+DEFAULT_SAMPLE_NEWS: List[Dict[str, Any]] = [
+    {
+        "title": "Market Analysis: What's Next for {ticker} Stock",
+        "title_cz": "[Přeloženo automaticky] Analýza trhu: Co bude dál s akciemi {ticker}",
+        "url": "https://finance.yahoo.com/news/market-analysis",
+        "source": "Yahoo Finance",
+        "days_ago": 1,
+        "summary": "Analysts provide insights on the future prospects of {ticker} stock, including revenue forecasts and growth potential.",
+        "summary_cz": "[Přeloženo automaticky] Analytici poskytují pohled na budoucí vyhlídky akcií {ticker}, včetně prognóz příjmů a potenciálu růstu."
+    },
+    {
+        "title": "Quarterly Earnings Preview: What to Expect from {ticker}",
+        "title_cz": "[Přeloženo automaticky] Náhled čtvrtletních výsledků: Co očekávat od {ticker}",
+        "url": "https://finance.yahoo.com/news/earnings-preview",
+        "source": "Financial Times",
+        "days_ago": 2,
+        "summary": "A comprehensive preview of {ticker}'s upcoming earnings report, including key metrics to watch and analyst expectations.",
+        "summary_cz": "[Přeloženo automaticky] Komplexní náhled nadcházející zprávy o výsledcích společnosti {ticker}, včetně klíčových metrik, které je třeba sledovat, a očekávání analytiků."
+    },
+    {
+        "title": "Industry Trends: How {ticker} is Positioned for 2025",
+        "title_cz": "[Přeloženo automaticky] Trendy v oboru: Jak je {ticker} připraven na rok 2025",
+        "url": "https://finance.yahoo.com/news/industry-trends",
+        "source": "Bloomberg",
+        "days_ago": 3,
+        "summary": "An analysis of industry trends and how {ticker} is adapting its strategy to stay competitive in the evolving market landscape.",
+        "summary_cz": "[Přeloženo automaticky] Analýza trendů v oboru a jak {ticker} přizpůsobuje svou strategii, aby zůstal konkurenceschopný na vyvíjejícím se trhu."
+    }
+]
+
+
 class NewsHandler:
     """
     Handler pro načítání a zpracování finančních zpráv.
@@ -27,170 +408,88 @@ class NewsHandler:
         Vrací:
             Seznam zpráv s názvem, url, zdrojem, datem a shrnutím
         """
-        logger.debug(f"Načítání zpráv pro {ticker}")
+        logger.debug("Načítání zpráv pro %s", ticker)
         
-        # Generujeme ukázkové zprávy, protože máme problémy se scrapingem
-        now = datetime.now()
-        yesterday = (now - timedelta(days=1)).strftime("%Y-%m-%d")
-        two_days_ago = (now - timedelta(days=2)).strftime("%Y-%m-%d")
+        if not StockData.offline:
+            try:
+                news = NewsHandler._fetch_yahoo_news(ticker, limit)
+                if news:
+                    return news
+            except Exception as e:
+                logger.warning("Zprávy pro %s se nepodařilo načíst z Yahoo Finance: %s", ticker, e)
         
-        # Use pre-defined news data based on ticker
-        news_data = {
-            "AAPL": [
-                {
-                    "title": f"Apple Reports Strong Quarterly Results for {ticker}",
-                    "title_cz": f"[Přeloženo automaticky] Společnost Apple oznamuje silné čtvrtletní výsledky pro {ticker}",
-                    "url": "https://finance.yahoo.com/news/apple-strong-results",
-                    "source": "Yahoo Finance",
-                    "date": yesterday,
-                    "summary": "Apple Inc. reported earnings that exceeded analyst expectations, driven by strong iPhone sales and growth in services.",
-                    "summary_cz": "[Přeloženo automaticky] Společnost Apple Inc. oznámila výsledky, které překonaly očekávání analytiků, díky silným prodejům iPhonů a růstu služeb."
-                },
-                {
-                    "title": f"New {ticker} Products Announcement Expected Next Month",
-                    "title_cz": f"[Přeloženo automaticky] Příští měsíc se očekává oznámení nových produktů {ticker}",
-                    "url": "https://finance.yahoo.com/news/apple-new-products",
-                    "source": "Bloomberg",
-                    "date": two_days_ago,
-                    "summary": "Apple is expected to unveil new products at its upcoming event, including updates to the iPhone, iPad, and MacBook lines.",
-                    "summary_cz": "[Přeloženo automaticky] Očekává se, že společnost Apple představí na své nadcházející akci nové produkty, včetně aktualizací řad iPhone, iPad a MacBook."
-                }
-            ],
-            "MSFT": [
-                {
-                    "title": f"{ticker} Cloud Revenue Surges 30% Year-Over-Year",
-                    "title_cz": f"[Přeloženo automaticky] Příjmy z cloudu {ticker} rostou meziročně o 30 %",
-                    "url": "https://finance.yahoo.com/news/microsoft-cloud-growth",
-                    "source": "Yahoo Finance",
-                    "date": yesterday,
-                    "summary": "Microsoft reported a 30% increase in cloud revenue, as more businesses adopt its Azure platform for digital transformation.",
-                    "summary_cz": "[Přeloženo automaticky] Microsoft oznámil 30% nárůst příjmů z cloudu, protože více podniků přijímá jeho platformu Azure pro digitální transformaci."
-                },
-                {
-                    "title": f"{ticker} Announces New AI Features for Microsoft 365",
-                    "title_cz": f"[Přeloženo automaticky] {ticker} oznamuje nové funkce AI pro Microsoft 365",
-                    "url": "https://finance.yahoo.com/news/microsoft-ai-features",
-                    "source": "Reuters",
-                    "date": two_days_ago,
-                    "summary": "Microsoft is introducing several new AI-powered features to its Microsoft 365 suite of applications, designed to enhance productivity and collaboration.",
-                    "summary_cz": "[Přeloženo automaticky] Microsoft zavádí několik nových funkcí s podporou umělé inteligence do své sady aplikací Microsoft 365, které jsou navrženy tak, aby zvýšily produktivitu a spolupráci."
-                }
-            ],
-            "GOOG": [
-                {
-                    "title": f"{ticker} Ad Revenue Rebounds in Latest Quarter",
-                    "title_cz": f"[Přeloženo automaticky] Příjmy z reklamy {ticker} se v posledním čtvrtletí zotavují",
-                    "url": "https://finance.yahoo.com/news/google-ad-revenue",
-                    "source": "Yahoo Finance",
-                    "date": yesterday,
-                    "summary": "Google's advertising business showed strong recovery in the latest quarter, with revenue up 15% compared to the same period last year.",
-                    "summary_cz": "[Přeloženo automaticky] Reklamní podnikání společnosti Google vykázalo v posledním čtvrtletí silné oživení, s nárůstem příjmů o 15 % ve srovnání se stejným obdobím loňského roku."
-                },
-                {
-                    "title": f"{ticker} Expands AI Research Initiatives",
-                    "title_cz": f"[Přeloženo automaticky] {ticker} rozšiřuje výzkumné iniciativy v oblasti umělé inteligence",
-                    "url": "https://finance.yahoo.com/news/google-ai-research",
-                    "source": "TechCrunch",
-                    "date": two_days_ago,
-                    "summary": "Google is investing billions in expanded AI research facilities and hiring top talent as it races to compete with other tech giants in artificial intelligence development.",
-                    "summary_cz": "[Přeloženo automaticky] Google investuje miliardy do rozšířených výzkumných zařízení v oblasti umělé inteligence a najímá špičkové talenty, protože závodí s ostatními technologickými giganty ve vývoji umělé inteligence."
-                }
-            ],
-            "AMZN": [
-                {
-                    "title": f"{ticker} E-commerce Growth Accelerates",
-                    "title_cz": f"[Přeloženo automaticky] Růst e-commerce {ticker} zrychluje",
-                    "url": "https://finance.yahoo.com/news/amazon-ecommerce",
-                    "source": "Yahoo Finance",
-                    "date": yesterday,
-                    "summary": "Amazon's core e-commerce business posted strong growth this quarter, outpacing analyst expectations as online shopping continues to expand.",
-                    "summary_cz": "[Přeloženo automaticky] Hlavní e-commerce podnikání Amazonu zaznamenalo v tomto čtvrtletí silný růst, který překonal očekávání analytiků, protože online nakupování se nadále rozšiřuje."
-                },
-                {
-                    "title": f"{ticker} Web Services Remains Dominant Cloud Provider",
-                    "title_cz": f"[Přeloženo automaticky] {ticker} Web Services zůstává dominantním poskytovatelem cloudu",
-                    "url": "https://finance.yahoo.com/news/aws-dominance",
-                    "source": "Wall Street Journal",
-                    "date": two_days_ago,
-                    "summary": "AWS maintained its market leadership position in cloud computing, with 33% market share and revenue growth of 25% year over year.",
-                    "summary_cz": "[Přeloženo automaticky] AWS si udržel své vedoucí postavení na trhu cloud computingu s 33% podílem na trhu a růstem příjmů o 25 % meziročně."
-                }
-            ],
-            "TSLA": [
-                {
-                    "title": f"{ticker} Vehicle Deliveries Exceed Expectations",
-                    "title_cz": f"[Přeloženo automaticky] Dodávky vozidel {ticker} překonávají očekávání",
-                    "url": "https://finance.yahoo.com/news/tesla-deliveries",
-                    "source": "Reuters",
-                    "date": yesterday,
-                    "summary": "Tesla delivered more vehicles than expected in the latest quarter, suggesting strong demand despite increasing competition in the electric vehicle market.",
-                    "summary_cz": "[Přeloženo automaticky] Tesla dodala v posledním čtvrtletí více vozidel, než se očekávalo, což naznačuje silnou poptávku navzdory rostoucí konkurenci na trhu s elektrickými vozidly."
-                },
-                {
-                    "title": f"{ticker} Expands European Gigafactory Production",
-                    "title_cz": f"[Přeloženo automaticky] {ticker} rozšiřuje výrobu v evropské Gigafactory",
-                    "url": "https://finance.yahoo.com/news/tesla-gigafactory",
-                    "source": "Bloomberg",
-                    "date": two_days_ago,
-                    "summary": "Tesla announced plans to increase production capacity at its Berlin Gigafactory, targeting a 50% increase in output by the end of the year.",
-                    "summary_cz": "[Přeloženo automaticky] Tesla oznámila plány na zvýšení výrobní kapacity ve své berlínské Gigafactory, přičemž cílí na 50% nárůst produkce do konce roku."
-                }
-            ],
-            "CEZ.PR": [
-                {
-                    "title": f"{ticker} Zvyšuje Investice do Obnovitelných Zdrojů",
-                    "title_cz": f"{ticker} Zvyšuje Investice do Obnovitelných Zdrojů",
-                    "url": "https://finance.yahoo.com/news/cez-renewable",
-                    "source": "Hospodářské Noviny",
-                    "date": yesterday,
-                    "summary": "Czech energy giant CEZ announced plans to increase investments in renewable energy sources, with a focus on solar and wind power projects.",
-                    "summary_cz": "Česká energetická společnost ČEZ oznámila plány na zvýšení investic do obnovitelných zdrojů energie, se zaměřením na solární a větrné projekty."
-                },
-                {
-                    "title": f"{ticker} Reports Strong Q1 Financial Results",
-                    "title_cz": f"{ticker} Oznamuje Silné Finanční Výsledky za První Čtvrtletí",
-                    "url": "https://finance.yahoo.com/news/cez-results",
-                    "source": "Patria Finance",
-                    "date": two_days_ago,
-                    "summary": "CEZ Group reported better-than-expected financial results for Q1, with EBITDA growing by 15% year-on-year, driven by higher electricity prices and operational efficiencies.",
-                    "summary_cz": "Skupina ČEZ oznámila lepší než očekávané finanční výsledky za první čtvrtletí, s růstem EBITDA o 15 % meziročně, díky vyšším cenám elektřiny a provozní efektivitě."
-                }
-            ]
-        }
+        # Ukázkové zprávy (offline režim nebo výpadek Yahoo Finance)
+        return NewsHandler.sample_news(ticker, limit)
+    
+    @staticmethod
+    def sample_news(ticker: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Ukázkové zprávy pro ticker (konkrétní pro známé tickery, jinak obecné).
+        
+        Parametry:
+            ticker: Symbol akcie
+            limit: Maximální počet zpráv
+            
+        Vrací:
+            Seznam zpráv s datem odvozeným od dnešního dne
+        """
+        now = datetime.now()
+        specific = SAMPLE_NEWS.get(ticker)
+        news = []
+        for template in (specific or DEFAULT_SAMPLE_NEWS)[:limit]:
+            item = {key: value if specific or not isinstance(value, str) else value.format(ticker=ticker)
+                    for key, value in template.items() if key != "days_ago"}
+            item["date"] = (now - timedelta(days=template["days_ago"])).strftime("%Y-%m-%d")
+            news.append(item)
+        return news
+    
+    @staticmethod
+    def _fetch_yahoo_news(ticker: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Zprávy z Yahoo Finance; u zpráv bez perexu se souběžně stáhnou články
+        a shrnutí se vezme z jejich textu.
         
-        # Výchozí zprávy pro jakýkoliv jiný ticker
-        default_news = [
-            {
-                "title": f"Market Analysis: What's Next for {ticker} Stock",
-                "title_cz": f"[Přeloženo automaticky] Analýza trhu: Co bude dál s akciemi {ticker}",
-                "url": "https://finance.yahoo.com/news/market-analysis",
-                "source": "Yahoo Finance",
-                "date": yesterday,
-                "summary": f"Analysts provide insights on the future prospects of {ticker} stock, including revenue forecasts and growth potential.",
-                "summary_cz": f"[Přeloženo automaticky] Analytici poskytují pohled na budoucí vyhlídky akcií {ticker}, včetně prognóz příjmů a potenciálu růstu."
-            },
-            {
-                "title": f"Quarterly Earnings Preview: What to Expect from {ticker}",
-                "title_cz": f"[Přeloženo automaticky] Náhled čtvrtletních výsledků: Co očekávat od {ticker}",
-                "url": "https://finance.yahoo.com/news/earnings-preview",
-                "source": "Financial Times",
-                "date": two_days_ago,
-                "summary": f"A comprehensive preview of {ticker}'s upcoming earnings report, including key metrics to watch and analyst expectations.",
-                "summary_cz": f"[Přeloženo automaticky] Komplexní náhled nadcházející zprávy o výsledcích společnosti {ticker}, včetně klíčových metrik, které je třeba sledovat, a očekávání analytiků."
-            },
-            {
-                "title": f"Industry Trends: How {ticker} is Positioned for 2025",
-                "title_cz": f"[Přeloženo automaticky] Trendy v oboru: Jak je {ticker} připraven na rok 2025",
-                "url": "https://finance.yahoo.com/news/industry-trends",
-                "source": "Bloomberg",
-                "date": (now - timedelta(days=3)).strftime("%Y-%m-%d"),
-                "summary": f"An analysis of industry trends and how {ticker} is adapting its strategy to stay competitive in the evolving market landscape.",
-                "summary_cz": f"[Přeloženo automaticky] Analýza trendů v oboru a jak {ticker} přizpůsobuje svou strategii, aby zůstal konkurenceschopný na vyvíjejícím se trhu."
-            }
-        ]
+        Parametry:
+            ticker: Symbol akcie
+            limit: Maximální počet zpráv
+            
+        Vrací:
+            Seznam zpráv ve stejném tvaru jako ukázkové zprávy
+        """
+        news = []
+        for item in (yf.Ticker(ticker).news or [])[:limit]:
+            # Novější yfinance vnořuje data do "content"
+            content = item.get("content") or item
+            url = ((content.get("canonicalUrl") or content.get("clickThroughUrl") or {}).get("url")
+                   or content.get("link"))
+            if not url or not content.get("title"):
+                continue
+            published = content.get("pubDate") or content.get("providerPublishTime")
+            if isinstance(published, (int, float)):
+                date = datetime.fromtimestamp(published).strftime("%Y-%m-%d")
+            else:
+                date = (published or "")[:10] or datetime.now().strftime("%Y-%m-%d")
+            news.append({
+                "title": content["title"],
+                "url": url,
+                "source": (content.get("provider") or {}).get("displayName") or content.get("publisher") or "Yahoo Finance",
+                "date": date,
+                "published": published,
+                "summary": content.get("summary") or "",
+            })
         
-        # Vrátit konkrétní zprávy pro známé tickery, nebo výchozí zprávy pro ostatní
-        return news_data.get(ticker, default_news)[:limit]
+        # Shrnutí chybějících perexů z textu článků (souběžně, s cache podle URL)
+        summaries = article_fetcher.summaries(item["url"] for item in news if not item["summary"])
+        for item in news:
+            if not item["summary"]:
+                item["summary"] = summaries.get(item["url"]) or "Nepodařilo se načíst shrnutí článku."
+            item["summary"] = ArticleFetcher.shorten(item["summary"], 250)
+        # Titulky i shrnutí jednou dávkou
+        translated = translation_service.translate_many([item["title"] for item in news] +
+                                                        [item["summary"] for item in news])
+        for item, title_cz, summary_cz in zip(news, translated[:len(news)], translated[len(news):]):
+            item["title_cz"], item["summary_cz"] = title_cz, summary_cz
+        return news
     
     @staticmethod
     def _parse_relative_date(date_str: str) -> str:
@@ -219,69 +518,11 @@ class NewsHandler:
     
     @staticmethod
     def _get_article_summary(url: str, max_length: int = 250) -> Optional[str]:
-        """Get summary of article content"""
-        try:
-            # Make a request to the URL
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
-            response = requests.get(url, headers=headers, timeout=5)
-            
-            if response.status_code != 200:
-                return "Nepodařilo se načíst obsah článku."
-            
-            # Parse the response with BeautifulSoup
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Try to extract the article content - look for common article elements
-            article_text = ""
-            
-            # Look for article containers
-            article_container = soup.select_one('article') or soup.select_one('.article-content') or soup.select_one('.article-body')
-            
-            if article_container:
-                # Get all paragraphs from the article container
-                paragraphs = article_container.select('p')
-                article_text = " ".join([p.text.strip() for p in paragraphs if p.text.strip()])
-            else:
-                # Fallback to all paragraphs
-                paragraphs = soup.select('p')
-                article_text = " ".join([p.text.strip() for p in paragraphs[:5] if p.text.strip()])
-            
-            # Truncate to max_length
-            if len(article_text) > max_length:
-                return article_text[:max_length] + "..."
-            
-            return article_text if article_text else "Nepodařilo se načíst shrnutí článku."
-            
-        except Exception as e:
-            logger.error(f"Error getting article summary: {str(e)}")
-            return "Chyba při načítání obsahu článku."
+        """Get summary of article content (sdílený stahovač s cache podle URL)"""
+        summary = article_fetcher.summaries([url], max_length).get(url)
+        return summary or "Nepodařilo se načíst shrnutí článku."
     
     @staticmethod
     def _translate_to_czech(text: str) -> str:
-        """Simple 'translation' - just hardcoded Czech text for demo"""
-        if not text:
-            return ""
-        
-    
-        # For a real app, you would use a translation service API
-        common_phrases = {
-            "stock": "akcie", 
-            "market": "trh",
-            "company": "společnost",
-            "price": "cena",
-            "investor": "investor",
-            "earnings": "výnosy",
-            "revenue": "příjmy",
-            "growth": "růst",
-            "decline": "pokles",
-            "report": "zpráva",
-            "quarter": "čtvrtletí",
-            "forecast": "prognóza",
-            "increase": "nárůst",
-            "decrease": "pokles"
-        }
-        
-        # Return the original text with Czech label
-        return f"[Přeloženo automaticky] {text}"
\ No newline at end of file
+        """Překlad do češtiny přes sdílenou překladovou službu (s trvalou pamětí)"""
+        return translation_service.translate(text)
@@ -0,0 +1,573 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import requests
+from sqlalchemy import delete, insert, inspect, or_, select, text, tuple_
+from models import db, NewsArticle, NewsTicker, NEWS_FTS_TABLE
+from database import insert_ignoring, session_scope
+from news_handler import NewsHandler, article_fetcher
+from stock_data import StockData
+from translation import translation_service
+from comparison import parse_tickers
+
+logger = logging.getLogger(__name__)
+
+# Parametry URL, které jen sledují původ návštěvy (stejný článek pod různými adresami)
+TRACKING_PARAMS = {"guccounter", "guce_referrer", "guce_referrer_sig", "ncid", "cmpid", "fbclid", "gclid", "mc_cid"}
+# Nejvyšší počet parametrů v jednom SQL dotazu (limit SQLite je 999 u starších verzí)
+QUERY_CHUNK = 500
+WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalizovaná adresa článku pro poznání duplicit (malá písmena v hostiteli,
+    bez www, fragmentu, sledovacích parametrů a koncového lomítka).
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS)
+    return urlunsplit((parts.scheme.lower() or "https", host, parts.path.rstrip("/") or "/", urlencode(query), ""))
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+
+def _published(value: Any) -> datetime:
+    """
+    Vrací:
+        Čas publikace v UTC bez časové zóny (Unix čas, ISO 8601 nebo datum; jinak teď)
+    """
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+    if isinstance(value, str) and value.strip():
+        try:
+            return _published(datetime.fromisoformat(value.strip().replace("Z", "+00:00")))
+        except ValueError:
+            logger.debug("Neznámý formát data zprávy: %s", value)
+    return datetime.utcnow()
+
+
+def fts_query(query: str) -> str:
+    """
+    Převede text hledání na dotaz FTS5: všechna slova musí být v článku,
+    poslední i jako začátek slova. Operátory FTS5 v textu se neuplatní.
+    """
+    words = WORD.findall(query)
+    terms = [f'"{word}"' for word in words[:-1]] + [f'"{word}"*' for word in words[-1:]]
+    return " ".join(terms)
+
+
+@dataclass(frozen=True, slots=True)
+class FeedItem:
+    """
+    Jedna zpráva ze zdroje, před uložením do databáze.
+    """
+    url: str
+    title: str
+    source: str
+    published_at: datetime
+    summary: str = ""
+    title_cz: Optional[str] = None
+    summary_cz: Optional[str] = None
+    tickers: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any], tickers: Iterable[str] = ()) -> Optional["FeedItem"]:
+        """
+        Zpráva ze slovníku (tvar NewsHandler nebo JSON zdroje); tickery se
+        sloučí s tickery uvedenými ve zprávě.
+
+        Vrací:
+            FeedItem, nebo None, pokud zprávě chybí titulek nebo adresa
+        """
+        url = (data.get("url") or data.get("link") or "").strip()
+        title = (data.get("title") or "").strip()
+        if not url or not title:
+            return None
+        listed = data.get("tickers") or ()
+        if isinstance(listed, str):
+            listed = listed.split(",")
+        valid, _ = parse_tickers([*tickers, *listed])
+        return cls(url=url, title=title, source=(data.get("source") or "").strip(),
+                   published_at=_published(data.get("published_at") or data.get("published") or data.get("date")),
+                   summary=(data.get("summary") or "").strip(), title_cz=data.get("title_cz"),
+                   summary_cz=data.get("summary_cz"), tickers=tuple(valid))
+
+    @property
+    def url_key(self) -> str:
+        return _digest(canonical_url(self.url))
+
+    @property
+    def title_key(self) -> str:
+        return _digest(f"{self.source.lower()}\n{' '.join(WORD.findall(self.title.lower()))}")
+
+
+class FeedSource:
+    """
+    Zdroj zpráv pro ingest. Podtřídy vrací zprávy z fetch(); zdroje
+    s per_ticker=True umí stáhnout zprávy i pro jednotlivý ticker na požádání.
+    """
+    name = "feed"
+    per_ticker = False
+
+    def fetch(self, tickers: Sequence[str]) -> List[FeedItem]:
+        """
+        Parametry:
+            tickers: Sledované tickery (zdroje bez vazby na tickery je ignorují)
+
+        Vrací:
+            Zprávy ze zdroje
+        """
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.name}>"
+
+
+class YahooFeedSource(FeedSource):
+    """
+    Zprávy z Yahoo Finance pro jednotlivé tickery (souběžně). V offline režimu
+    vrací ukázkové zprávy.
+    """
+    name = "yahoo"
+    per_ticker = True
+
+    def __init__(self, limit: int = 10, workers: int = 8):
+        """
+        Parametry:
+            limit: Počet zpráv na ticker
+            workers: Počet souběžně stahovaných tickerů
+        """
+        self.limit: int = limit
+        self.workers: int = workers
+
+    def _ticker_news(self, ticker: str) -> List[FeedItem]:
+        if StockData.offline:
+            news = NewsHandler.sample_news(ticker, self.limit)
+        else:
+            try:
+                news = NewsHandler._fetch_yahoo_news(ticker, self.limit)
+            except Exception as e:
+                logger.warning("Zprávy pro %s se nepodařilo stáhnout: %s", ticker, e)
+                return []
+        return [item for item in (FeedItem.from_dict(entry, (ticker,)) for entry in news) if item is not None]
+
+    def fetch(self, tickers: Sequence[str]) -> List[FeedItem]:
+        if len(tickers) <= 1:
+            return [item for ticker in tickers for item in self._ticker_news(ticker)]
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            return [item for items in executor.map(self._ticker_news, tickers) for item in items]
+
+
+class JsonFeedSource(FeedSource):
+    """
+    Zprávy ze souboru nebo HTTP adresy ve formátu JSON: seznam zpráv nebo
+    objekt s klíčem "items". Zpráva má klíče title, url, source, published
+    (nebo date), summary a tickers.
+    """
+
+    def __init__(self, location: str, timeout: float = 10.0):
+        """
+        Parametry:
+            location: Cesta k souboru nebo http(s) adresa
+            timeout: Časový limit stažení v sekundách
+        """
+        self.location: str = location
+        self.timeout: float = timeout
+        self.name = location
+
+    def fetch(self, tickers: Sequence[str]) -> List[FeedItem]:
+        if self.location.startswith(("http://", "https://")):
+            response = requests.get(self.location, timeout=self.timeout)
+            response.raise_for_status()
+            payload = response.json()
+        else:
+            with open(self.location, encoding="utf-8") as handle:
+                payload = json.load(handle)
+        entries = payload.get("items", []) if isinstance(payload, dict) else payload
+        items = [FeedItem.from_dict(entry) for entry in entries if isinstance(entry, dict)]
+        return [item for item in items if item is not None]
+
+
+def feed_sources(locations: str, limit: int = 10, workers: int = 8) -> List[FeedSource]:
+    """
+    Zdroje zpráv podle konfigurace: vždy Yahoo Finance a dále JSON zdroje.
+
+    Parametry:
+        locations: Cesty nebo adresy JSON zdrojů oddělené čárkou
+        limit: Počet zpráv na ticker ze Yahoo Finance
+        workers: Počet souběžně stahovaných tickerů
+
+    Vrací:
+        Seznam zdrojů
+    """
+    sources: List[FeedSource] = [YahooFeedSource(limit, workers)]
+    for location in filter(None, (value.strip() for value in locations.split(","))):
+        if not location.startswith(("http://", "https://")) and not os.path.isfile(location):
+            logger.warning("Zdroj zpráv %s neexistuje", location)
+            continue
+        sources.append(JsonFeedSource(location))
+    return sources
+
+
+class NewsService:
+    """
+    Ingest zpráv na pozadí a jejich čtení z databáze.
+
+    Zprávy ze zdrojů se po dávkách deduplikují (normalizovaná URL, titulek
+    u stejného zdroje) a ukládají do tabulek news_article a news_ticker.
+    Nejnovější zprávy tickeru se čtou jedním dotazem přes index
+    (ticker, published_at), text zpráv se prohledává fulltextovým indexem
+    FTS5. Tickery mimo sledovaný seznam se stáhnou na požádání a uloží,
+    další zobrazení je už čte z databáze.
+    """
+
+    def __init__(self, sources: Sequence[FeedSource] = (), interval: float = 1800.0, retention_days: int = 90,
+                 max_tracked: int = 4096):
+        """
+        Parametry:
+            sources: Zdroje zpráv
+            interval: Interval ingestu na pozadí v sekundách (0 = bez vlákna na pozadí);
+                zároveň stáří, po kterém se zprávy tickeru na požádání stáhnou znovu
+            retention_days: Po kolika dnech od publikace se zprávy mažou
+            max_tracked: Nejvyšší počet tickerů s pamatovaným časem stažení (nejstarší se zapomínají)
+        """
+        self.sources: List[FeedSource] = list(sources)
+        self.interval: float = interval
+        self.retention_days: int = retention_days
+        self.tickers: List[str] = []
+        self.full_text: Optional[bool] = None
+        self.max_tracked: int = max_tracked
+        self._fetched: "OrderedDict[str, float]" = OrderedDict()  # ticker -> čas posledního stažení
+        self._fetched_lock = threading.Lock()
+        self._ingest_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _has_full_text(self) -> bool:
+        if self.full_text is None:
+            self.full_text = NEWS_FTS_TABLE in inspect(db.engine).get_table_names()
+        return self.full_text
+
+    def store(self, items: Iterable[FeedItem]) -> int:
+        """
+        Uloží zprávy; u už uložených článků jen doplní nové tickery.
+
+        Parametry:
+            items: Zprávy ze zdrojů (mohou obsahovat duplicity)
+
+        Vrací:
+            Počet nově uložených článků
+        """
+        # Sloučení duplicit v dávce (tickery se spojí); zprávy po době uchování se neukládají
+        cutoff = (datetime.utcnow() - timedelta(days=self.retention_days)) if self.retention_days > 0 else datetime.min
+        merged: Dict[str, FeedItem] = {}
+        by_title: Dict[str, str] = {}
+        for item in items:
+            if item.published_at < cutoff:
+                continue
+            url_key, title_key = item.url_key, item.title_key
+            key = url_key if url_key in merged else by_title.get(title_key, url_key)
+            previous = merged.get(key)
+            if previous is not None:
+                item = replace(previous, tickers=tuple(dict.fromkeys(previous.tickers + item.tickers)))
+            merged[key] = item
+            by_title.setdefault(title_key, key)
+        if not merged:
+            return 0
+
+        # Čtení bez zámku pro zápis; stahování a překlady až mimo transakci
+        with session_scope() as session:
+            ids = self._known_ids(session, merged)
+        new_keys = [key for key in merged if key not in ids]
+        rows = self._article_rows({key: merged[key] for key in new_keys}) if new_keys else []
+
+        # Krátká zapisovací transakce jen s lokálními dotazy
+        stored = 0
+        with session_scope(immediate=True) as session:
+            if rows:
+                # Souběžný ingest mohl stejné články mezitím uložit
+                ids.update(self._known_ids(session, {key: merged[key] for key in new_keys}))
+                rows = [row for row in rows if row["url_key"] not in ids]
+            if rows:
+                inserted = session.execute(insert_ignoring(NewsArticle, "url_key")
+                                           .returning(NewsArticle.id, NewsArticle.url_key), rows).all()
+                stored = len(inserted)
+                ids.update((row.url_key, row.id) for row in inserted)
+                unresolved = {key: merged[key] for key in merged if key not in ids}
+                if unresolved:
+                    ids.update(self._known_ids(session, unresolved))
+
+            links = {(ids[key], ticker): merged[key].published_at
+                     for key in merged if key in ids for ticker in merged[key].tickers}
+            pairs = list(links)
+            for start in range(0, len(pairs), QUERY_CHUNK // 2):
+                chunk = pairs[start:start + QUERY_CHUNK // 2]
+                existing = set(session.execute(select(NewsTicker.article_id, NewsTicker.ticker)
+                                               .where(tuple_(NewsTicker.article_id, NewsTicker.ticker).in_(chunk))).all())
+                new_links = [{"article_id": article_id, "ticker": ticker, "published_at": links[(article_id, ticker)]}
+                             for article_id, ticker in chunk if (article_id, ticker) not in existing]
+                if new_links:
+                    session.execute(insert(NewsTicker), new_links)
+        return stored
+
+    @staticmethod
+    def _known_ids(session: Any, items: Mapping[str, FeedItem]) -> Dict[str, int]:
+        """
+        Vrací:
+            Klíč URL -> ID už uloženého článku (shoda URL nebo titulku u stejného zdroje)
+        """
+        ids: Dict[str, int] = {}
+        keys = list(items)
+        for start in range(0, len(keys), QUERY_CHUNK):
+            chunk = keys[start:start + QUERY_CHUNK]
+            title_keys = [items[key].title_key for key in chunk]
+            rows = session.execute(select(NewsArticle.id, NewsArticle.url_key, NewsArticle.title_key)
+                                   .where(or_(NewsArticle.url_key.in_(chunk),
+                                              NewsArticle.title_key.in_(title_keys)))).all()
+            known_titles = {row.title_key: row.id for row in rows}
+            known_urls = {row.url_key: row.id for row in rows}
+            for key in chunk:
+                article_id = known_urls.get(key) or known_titles.get(items[key].title_key)
+                if article_id is not None:
+                    ids[key] = article_id
+        return ids
+
+    @staticmethod
+    def _article_rows(items: Mapping[str, FeedItem]) -> List[Dict[str, Any]]:
+        """
+        Řádky news_article pro nové zprávy; chybějící shrnutí se stáhnou
+        a chybějící překlady přeloží jednou dávkou (síť, mimo transakci).
+        """
+        missing = [item.url for item in items.values() if not item.summary]
+        summaries = article_fetcher.summaries(missing) if missing else {}
+        texts = [item.summary or summaries.get(item.url) or "" for item in items.values()]
+        pending = [text for item, summary in zip(items.values(), texts)
+                   for text, done in ((item.title, item.title_cz), (summary, item.summary_cz)) if not done]
+        translated = dict(zip(pending, translation_service.translate_many(pending)))
+        now = datetime.utcnow()
+        return [{
+            "url_key": key, "title_key": item.title_key, "url": item.url, "title": item.title[:500],
+            "title_cz": (item.title_cz or translated[item.title])[:500],
+            "source": item.source[:200] or None, "summary": summary,
+            "summary_cz": item.summary_cz or translated[summary],
+            "published_at": item.published_at, "fetched_at": now,
+        } for (key, item), summary in zip(items.items(), texts)]
+
+    def prune(self) -> int:
+        """
+        Smaže zprávy starší než retention_days.
+
+        Vrací:
+            Počet smazaných článků
+        """
+        if self.retention_days <= 0:
+            return 0
+        cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+        with session_scope(immediate=True) as session:
+            session.execute(delete(NewsTicker).where(NewsTicker.published_at < cutoff))
+            deleted = session.execute(delete(NewsArticle).where(NewsArticle.published_at < cutoff)).rowcount
+        if deleted:
+            logger.info("Smazáno %s starých zpráv", deleted)
+        return deleted
+
+    def ingest(self, tickers: Optional[Sequence[str]] = None) -> int:
+        """
+        Stáhne zprávy ze všech zdrojů a uloží je. Souběžný ingest se nespouští (vrátí 0).
+
+        Parametry:
+            tickers: Tickery pro zdroje vázané na tickery (výchozí sledovaný seznam)
+
+        Vrací:
+            Počet nově uložených článků
+        """
+        if not self._ingest_lock.acquire(blocking=False):
+            logger.info("Ingest zpráv už běží")
+            return 0
+        try:
+            tickers = list(dict.fromkeys(self.tickers if tickers is None else tickers))
+            stored = 0
+            for source in self.sources:
+                try:
+                    items = source.fetch(tickers)
+                except Exception as e:
+                    logger.warning("Zdroj zpráv %s selhal: %s", source.name, e)
+                    continue
+                stored += self.store(items)
+                logger.debug("Zdroj %s: %s zpráv", source.name, len(items))
+            for ticker in tickers:
+                self._mark_fetched(ticker)
+            self._forget_expired()
+            self.prune()
+            logger.info("Ingest zpráv: %s nových článků, %s tickerů", stored, len(tickers))
+            return stored
+        finally:
+            self._ingest_lock.release()
+
+    def _stale_after(self) -> float:
+        return self.interval or 1800.0
+
+    def _mark_fetched(self, ticker: str) -> None:
+        with self._fetched_lock:
+            self._fetched[ticker] = time.monotonic()
+            self._fetched.move_to_end(ticker)
+            while len(self._fetched) > self.max_tracked:
+                self._fetched.popitem(last=False)
+
+    def _forget_expired(self) -> None:
+        # Záznam starší než interval obnovy se chová stejně jako chybějící
+        expired = time.monotonic() - self._stale_after()
+        with self._fetched_lock:
+            while self._fetched and next(iter(self._fetched.values())) < expired:
+                self._fetched.popitem(last=False)
+
+    @staticmethod
+    def _to_dicts(articles: Sequence[NewsArticle], tickers: Mapping[int, List[str]]) -> List[Dict[str, Any]]:
+        return [{
+            "id": article.id,
+            "title": article.title,
+            "title_cz": article.title_cz or article.title,
+            "url": article.url,
+            "source": article.source or "",
+            "date": article.published_at.strftime("%Y-%m-%d"),
+            "published_at": article.published_at.isoformat(),
+            "summary": article.summary or "",
+            "summary_cz": article.summary_cz or article.summary or "",
+            "tickers": tickers.get(article.id, []),
+        } for article in articles]
+
+    def _with_tickers(self, articles: Sequence[NewsArticle]) -> List[Dict[str, Any]]:
+        tickers: Dict[int, List[str]] = {}
+        if articles:
+            rows = db.session.execute(select(NewsTicker.article_id, NewsTicker.ticker)
+                                      .where(NewsTicker.article_id.in_([article.id for article in articles]))
+                                      .order_by(NewsTicker.ticker)).all()
+            for article_id, ticker in rows:
+                tickers.setdefault(article_id, []).append(ticker)
+        return self._to_dicts(articles, tickers)
+
+    def latest(self, ticker: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Nejnovější uložené zprávy tickeru (jeden dotaz přes index tickeru).
+
+        Vrací:
+            Zprávy ve tvaru NewsHandler.get_stock_news, od nejnovější
+        """
+        articles = db.session.execute(
+            select(NewsArticle)
+            .join(NewsTicker, NewsTicker.article_id == NewsArticle.id)
+            .where(NewsTicker.ticker == ticker)
+            .order_by(NewsTicker.published_at.desc(), NewsTicker.article_id.desc())
+            .limit(limit)
+        ).scalars().all()
+        return self._to_dicts(articles, {article.id: [ticker] for article in articles})
+
+    def news_for(self, ticker: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Zprávy tickeru z databáze. Ticker, který neobnovuje ingest na pozadí,
+        se při zastaralých zprávách nejdřív stáhne ze zdrojů vázaných na tickery.
+
+        Vrací:
+            Zprávy od nejnovější (prázdný seznam, pokud žádné nejsou)
+        """
+        background = self._thread is not None and self._thread.is_alive() and ticker in self.tickers
+        fetched = self._fetched.get(ticker)
+        stale = fetched is None or time.monotonic() - fetched > self._stale_after()
+        if stale and (not background or fetched is None):
+            self._mark_fetched(ticker)
+            items = []
+            for source in self.sources:
+                if source.per_ticker:
+                    try:
+                        items.extend(source.fetch([ticker]))
+                    except Exception as e:
+                        logger.warning("Zdroj zpráv %s selhal pro %s: %s", source.name, ticker, e)
+            if items:
+                self.store(items)
+        return self.latest(ticker, limit)
+
+    def search(self, query: str, ticker: Optional[str] = None, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Fulltextové hledání v titulcích a shrnutích zpráv (i v překladech).
+
+        Parametry:
+            query: Hledaný text (slova bez ohledu na diakritiku, poslední i jako začátek slova)
+            ticker: Jen zprávy tohoto tickeru
+            limit: Maximální počet výsledků
+            offset: Počet přeskočených výsledků
+
+        Vrací:
+            Zprávy seřazené podle relevance (bez FTS5 podle data)
+        """
+        words = WORD.findall(query)
+        if not words:
+            return []
+        if self._has_full_text():
+            join = "JOIN news_ticker ON news_ticker.article_id = news_fts.rowid AND news_ticker.ticker = :ticker" if ticker else ""
+            rows = db.session.execute(text(
+                f"SELECT news_fts.rowid FROM {NEWS_FTS_TABLE} {join} WHERE {NEWS_FTS_TABLE} MATCH :match "
+                f"ORDER BY bm25({NEWS_FTS_TABLE}) LIMIT :limit OFFSET :offset"
+            ), {"match": fts_query(query), "ticker": ticker, "limit": limit, "offset": offset}).all()
+            ids = [row[0] for row in rows]
+            articles = {article.id: article for article in
+                        db.session.execute(select(NewsArticle).where(NewsArticle.id.in_(ids))).scalars()}
+            return self._with_tickers([articles[article_id] for article_id in ids if article_id in articles])
+
+        statement = select(NewsArticle)
+        for word in words:
+            statement = statement.where(or_(*(column.icontains(word, autoescape=True) for column in
+                                              (NewsArticle.title, NewsArticle.summary,
+                                               NewsArticle.title_cz, NewsArticle.summary_cz))))
+        if ticker:
+            statement = statement.join(NewsTicker, NewsTicker.article_id == NewsArticle.id).where(NewsTicker.ticker == ticker)
+        statement = statement.order_by(NewsArticle.published_at.desc()).limit(limit).offset(offset)
+        return self._with_tickers(db.session.execute(statement).scalars().all())
+
+    def start(self, app: Any) -> None:
+        """
+        Spustí vlákno, které pravidelně stahuje zprávy ze zdrojů.
+
+        Parametry:
+            app: Flask aplikace (vlákno potřebuje její kontext pro databázi)
+        """
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+
+        def run() -> None:
+            wait = 0.0
+            while not self._stop_event.wait(wait):
+                wait = self.interval
+                try:
+                    with app.app_context():
+                        self.ingest()
+                except Exception as e:
+                    logger.error("Chyba při ingestu zpráv: %s", e)
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=run, name="news-ingest", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Zastaví vlákno ingestu."""
+        self._stop_event.set()
+
+
+# Sdílená služba zpráv pro celou aplikaci
+news_service = NewsService()
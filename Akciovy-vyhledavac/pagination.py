@@ -0,0 +1,40 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class Page:
+    """
+    Stránka výpisu (číslo stránky, velikost a celkový počet záznamů).
+    """
+    number: int
+    per_page: int
+    total: int
+
+    @classmethod
+    def of(cls, number: int, per_page: int, total: int) -> "Page":
+        """
+        Vytvoří stránku s číslem omezeným na platný rozsah.
+        """
+        per_page = max(per_page, 1)
+        pages = max((total + per_page - 1) // per_page, 1)
+        return cls(min(max(number, 1), pages), per_page, total)
+
+    @property
+    def pages(self) -> int:
+        return max((self.total + self.per_page - 1) // self.per_page, 1)
+
+    @property
+    def start(self) -> int:
+        return (self.number - 1) * self.per_page
+
+    @property
+    def end(self) -> int:
+        return min(self.start + self.per_page, self.total)
+
+    @property
+    def has_prev(self) -> bool:
+        return self.number > 1
+
+    @property
+    def has_next(self) -> bool:
+        return self.number < self.pages
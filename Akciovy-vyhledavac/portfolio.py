@@ -1,11 +1,14 @@
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Optional, Sequence, Tuple, TYPE_CHECKING
 from datetime import datetime
 from stock_data import StockData
 from graph_generator import GraphGenerator
+from valuation import PortfolioValuation
+from positions import Position, PositionRow, PortfolioView
+
+if TYPE_CHECKING:
+    from portfolio_service import PortfolioService
 
-# Konfigurace logování
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 class Portfolio:
@@ -13,18 +16,32 @@ class Portfolio:
     Třída reprezentující akciové portfolio uživatele.
     """
     
-    def __init__(self, name: str = "My Portfolio", balance: float = 0.0):
+    def __init__(self, name: str = "My Portfolio", balance: float = 0.0,
+                 service: Optional["PortfolioService"] = None, portfolio_id: Optional[int] = None):
         """
         Inicializace nového portfolia.
         
         Parametry:
             name: Název portfolia
             balance: Hotovostní zůstatek v portfoliu
+            service: Služba portfolií; je-li zadána, pozice se čtou a zapisují přes ni
+            portfolio_id: ID portfolia v databázi (spolu se service)
         """
         self.name: str = name
-        self.stocks: Dict[str, Dict[str, Any]] = {}  # Slovník ticker -> detaily akcie
+        self._stocks: Dict[str, Position] = {}  # Slovník ticker -> pozice
         self.balance: float = balance
-        logger.debug(f"Portfolio '{name}' inicializováno")
+        self.service = service
+        self.portfolio_id = portfolio_id
+        logger.debug("Portfolio '%s' inicializováno", name)
+    
+    @property
+    def stocks(self) -> Dict[str, Position]:
+        """
+        Pozice podle tickeru - z databáze přes službu, nebo z paměti.
+        """
+        if self.service is not None:
+            return self.service.stocks(self.portfolio_id)
+        return self._stocks
     
     def add_stock(self, ticker: str, quantity: float, purchase_price: float, 
                   purchase_date: datetime = None, notes: str = None) -> bool:
@@ -39,119 +56,127 @@ class Portfolio:
             notes: Volitelné poznámky k této akcii
             
         Vrací:
-            True pokud úspěšné, jinak False
+            True pokud úspěšné, jinak False (neplatné množství nebo cenu
+            služba odmítne výjimkou ValueError, která se předá dál)
         """
         try:
+            if self.service is not None:
+                self.service.add_position(self.portfolio_id, ticker, quantity, purchase_price, purchase_date, notes)
+                return True
+            
             if not purchase_date:
                 purchase_date = datetime.now()
                 
             # Check if stock already exists
-            if ticker in self.stocks:
-                # Calculate new average purchase price
-                current = self.stocks[ticker]
-                total_shares = current['quantity'] + quantity
-                total_cost = (current['quantity'] * current['purchase_price']) + (quantity * purchase_price)
-                avg_price = total_cost / total_shares if total_shares > 0 else 0
-                
-                # Update stock entry
-                self.stocks[ticker]['quantity'] = total_shares
-                self.stocks[ticker]['purchase_price'] = avg_price
-                self.stocks[ticker]['notes'] = notes or current['notes']
-                
-                logger.debug(f"Updated {ticker} in portfolio, new quantity: {total_shares}")
+            current = self.stocks.get(ticker)
+            if current is not None:
+                # Nákupní cena se přepočítá na vážený průměr
+                current.add(quantity, purchase_price, notes)
+                logger.debug("Updated %s in portfolio, new quantity: %s", ticker, current.quantity)
             else:
                 # Add new stock
-                self.stocks[ticker] = {
-                    'ticker': ticker,
-                    'quantity': quantity,
-                    'purchase_price': purchase_price,
-                    'purchase_date': purchase_date,
-                    'notes': notes
-                }
-                logger.debug(f"Added {ticker} to portfolio, quantity: {quantity}")
+                self.stocks[ticker] = Position(ticker, quantity, purchase_price, purchase_date, notes)
+                logger.debug("Added %s to portfolio, quantity: %s", ticker, quantity)
                 
             return True
+        except ValueError:
+            raise
         except Exception as e:
-            logger.error(f"Error adding stock to portfolio: {str(e)}")
+            logger.error("Error adding stock to portfolio: %s", e)
             return False
     
-    def remove_stock(self, ticker: str, quantity: float = None) -> bool:
+    def remove_stock(self, ticker: str, quantity: float = None, price: float = None) -> bool:
         """
         Remove a stock or reduce quantity from the portfolio.
         
         Args:
             ticker: The stock ticker symbol
             quantity: Quantity to remove (None = all)
+            price: Sale price per share (with a service the sale is recorded
+                in the transaction ledger; None = last known price)
             
         Returns:
             True if successful, False otherwise
         """
         try:
             if ticker not in self.stocks:
-                logger.warning(f"{ticker} not found in portfolio")
+                logger.warning("%s not found in portfolio", ticker)
                 return False
+            
+            if self.service is not None:
+                return self.service.remove_ticker(self.portfolio_id, ticker, quantity, price)
                 
-            if quantity is None or quantity >= self.stocks[ticker]['quantity']:
+            if quantity is None or quantity >= self.stocks[ticker].quantity:
                 # Remove entire position
                 del self.stocks[ticker]
-                logger.debug(f"Removed {ticker} from portfolio")
+                logger.debug("Removed %s from portfolio", ticker)
             else:
                 # Reduce position
-                self.stocks[ticker]['quantity'] -= quantity
-                logger.debug(f"Reduced {ticker} in portfolio by {quantity}")
+                self.stocks[ticker].quantity -= quantity
+                logger.debug("Reduced %s in portfolio by %s", ticker, quantity)
                 
             return True
         except Exception as e:
-            logger.error(f"Error removing stock from portfolio: {str(e)}")
+            logger.error("Error removing stock from portfolio: %s", e)
             return False
     
-    def get_portfolio(self) -> List[Dict[str, Any]]:
+    def _fetch_market_data(self, with_company_info: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Načte aktuální cenu (a název společnosti) pro každý ticker právě jednou.
+        
+        Parametry:
+            with_company_info: Zda načítat i informace o společnosti
+            
+        Vrací:
+            Slovník ticker -> {'price': ..., 'company_name': ...}
+        """
+        market_data = {}
+        for ticker in self.stocks:
+            try:
+                stock = StockData(ticker)
+                company_info = stock.get_company_info() if with_company_info else {}
+                market_data[ticker] = {
+                    'price': stock.get_price(),
+                    'company_name': company_info.get('name', ticker)
+                }
+            except Exception as e:
+                logger.error("Error processing portfolio item %s: %s", ticker, e)
+                market_data[ticker] = {'price': 0.0, 'company_name': ticker}
+        return market_data
+    
+    def valuate(self, with_company_info: bool = True) -> Tuple[PortfolioView, Dict[str, float]]:
+        """
+        Ocenění celého portfolia jedním vektorovým průchodem.
+        
+        Parametry:
+            with_company_info: Zda doplnit názvy společností do položek
+            
+        Vrací:
+            Dvojici (oceněné pozice jako PortfolioView, souhrnné ukazatele)
+        """
+        market_data = self._fetch_market_data(with_company_info)
+        positions = list(self.stocks.values())
+        
+        valuation = PortfolioValuation(
+            [position.quantity for position in positions],
+            [position.purchase_price for position in positions],
+            [market_data[position.ticker]['price'] for position in positions]
+        )
+        company_names = {ticker: data['company_name'] for ticker, data in market_data.items()}
+        
+        return PortfolioView(positions, valuation, company_names), valuation.summary(self.balance)
+    
+    def get_portfolio(self) -> Sequence[PositionRow]:
         """
         Get all stocks in the portfolio with current prices and performance.
         
         Returns:
-            List of portfolio items with performance metrics
+            Portfolio rows (PositionRow views) with performance metrics
         """
         try:
-            portfolio_items = []
-            
-            for ticker, stock_data in self.stocks.items():
-                try:
-                    # Get current data
-                    stock = StockData(ticker)
-                    current_price = stock.get_price()
-                    company_info = stock.get_company_info()
-                    
-                    # Calculate performance
-                    quantity = stock_data['quantity']
-                    purchase_price = stock_data['purchase_price']
-                    current_value = quantity * current_price
-                    cost_basis = quantity * purchase_price
-                    gain_loss = current_value - cost_basis
-                    gain_loss_percent = (gain_loss / cost_basis) * 100 if cost_basis > 0 else 0
-                    
-                    # Create portfolio item with all information
-                    item = {
-                        'ticker': ticker,
-                        'company_name': company_info.get('name', ticker),
-                        'quantity': quantity,
-                        'purchase_price': purchase_price,
-                        'purchase_date': stock_data['purchase_date'],
-                        'current_price': current_price,
-                        'current_value': current_value,
-                        'cost_basis': cost_basis,
-                        'gain_loss': gain_loss,
-                        'gain_loss_percent': gain_loss_percent,
-                        'notes': stock_data['notes']
-                    }
-                    
-                    portfolio_items.append(item)
-                except Exception as e:
-                    logger.error(f"Error processing portfolio item {ticker}: {str(e)}")
-            
-            return portfolio_items
+            return self.valuate()[0]
         except Exception as e:
-            logger.error(f"Error getting portfolio: {str(e)}")
+            logger.error("Error getting portfolio: %s", e)
             return []
     
     def get_total_value(self) -> Dict[str, float]:
@@ -162,34 +187,14 @@ class Portfolio:
             Dictionary with total value, cost, and performance metrics
         """
         try:
-            total_value = 0.0
-            total_cost = 0.0
-            
-            portfolio_items = self.get_portfolio()
-            for item in portfolio_items:
-                total_value += item['current_value']
-                total_cost += item['cost_basis']
-            
-            # Add cash balance
-            total_value += self.balance
-            
-            # Calculate performance
-            total_gain_loss = total_value - total_cost - self.balance
-            total_gain_loss_percent = (total_gain_loss / total_cost) * 100 if total_cost > 0 else 0
-            
-            return {
-                'total_value': total_value,
-                'total_cost': total_cost,
-                'total_gain_loss': total_gain_loss,
-                'total_gain_loss_percent': total_gain_loss_percent,
-                'cash_balance': self.balance
-            }
+            # Pro souhrn stačí ceny, informace o společnostech se nenačítají
+            return self.valuate(with_company_info=False)[1]
         except Exception as e:
-            logger.error(f"Error calculating portfolio total value: {str(e)}")
+            logger.error("Error calculating portfolio total value: %s", e)
             return {
                 'total_value': 0.0,
                 'total_cost': 0.0,
                 'total_gain_loss': 0.0,
                 'total_gain_loss_percent': 0.0,
                 'cash_balance': self.balance
-            }
\ No newline at end of file
+            }
@@ -0,0 +1,519 @@
+import logging
+import math
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple, Union
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, selectinload
+from models import db, Portfolio as DB_Portfolio, PortfolioItem, Transaction, Holding
+from database import in_session_scope, session_scope
+from portfolio_snapshot import PortfolioSnapshot, SnapshotRegistry, snapshots
+from positions import Position
+from ledger import BUY, SELL, REMOVE, EPSILON, HoldingState, Ledger, LotAccounting
+from importer import ImportedRow, ImportResult, RowError, batched
+from market_cache import quote_cache
+
+logger = logging.getLogger(__name__)
+
+
+def check_trade(quantity: float, price: float) -> None:
+    """
+    Ověří množství a cenu obchodu dřív, než se zapíše do knihy transakcí
+    (ta je jen pro přidávání, chybný zápis by zůstal trvale).
+
+    Vyvolá ValueError pro nekonečné nebo chybějící hodnoty (NaN), množství
+    menší nebo rovné nule a zápornou cenu.
+    """
+    if not (math.isfinite(quantity) and math.isfinite(price)):
+        raise ValueError("Množství a cena musí být konečná čísla")
+    if quantity <= 0:
+        raise ValueError("Množství musí být kladné")
+    if price < 0:
+        raise ValueError("Cena nesmí být záporná")
+
+
+@dataclass(frozen=True, slots=True)
+class PositionRecord:
+    """
+    Neměnná kopie jedné položky portfolia z databáze.
+    """
+    id: int
+    ticker: str
+    quantity: float
+    purchase_price: float
+    purchase_date: Optional[datetime]
+    notes: Optional[str]
+
+    @classmethod
+    def from_item(cls, item: PortfolioItem) -> "PositionRecord":
+        return cls(item.id, item.ticker, item.quantity, item.purchase_price, item.purchase_date, item.notes)
+
+
+@dataclass(frozen=True, slots=True)
+class HoldingRecord:
+    """
+    Neměnná kopie materializované pozice (množství, náklady, realizovaný zisk).
+    """
+    ticker: str
+    quantity: float
+    cost_basis: float
+    realized_pl: float
+
+    @classmethod
+    def from_row(cls, row: Holding) -> "HoldingRecord":
+        return cls(row.ticker, row.quantity, row.cost_basis, row.realized_pl)
+
+    def unrealized_pl(self, price: float) -> float:
+        return self.quantity * price - self.cost_basis
+
+
+@dataclass(frozen=True, slots=True)
+class PortfolioState:
+    """
+    Neměnný snímek portfolia, který lze bezpečně sdílet mezi vlákny.
+
+    positions jsou otevřené loty, holdings materializované pozice podle tickeru.
+    """
+    portfolio_id: int
+    name: str
+    positions: Tuple[PositionRecord, ...]
+    holdings: Tuple[HoldingRecord, ...] = ()
+
+    @property
+    def realized_pl(self) -> float:
+        return sum(holding.realized_pl for holding in self.holdings)
+
+    def by_ticker(self) -> Dict[str, Position]:
+        """
+        Agregace pozic podle tickeru (množství a průměrná nákupní cena).
+
+        Vrací:
+            Slovník ticker -> Position ve tvaru Portfolio.stocks
+        """
+        stocks: Dict[str, Position] = {}
+        for record in self.positions:
+            current = stocks.get(record.ticker)
+            if current is None:
+                stocks[record.ticker] = Position(record.ticker, record.quantity, record.purchase_price,
+                                                 record.purchase_date, record.notes)
+            else:
+                current.add(record.quantity, record.purchase_price, record.notes)
+        return stocks
+
+
+class PortfolioService:
+    """
+    Jediný zdroj pravdy o pozicích portfolií.
+
+    Pozice se z databáze načtou jednou a drží se jako neměnný PortfolioState.
+    Každý zápis jde přes službu, uloží se do databáze a zneplatní uložený stav,
+    takže čtení (zobrazení stránek) nikdy nic nezapisuje ani nepřepočítává.
+
+    Zápisy do jednoho portfolia se řadí za sebe zámkem portfolia; zápisy do
+    různých portfolií běží souběžně, každý v krátké transakci (session_scope).
+    """
+
+    def __init__(self, snapshot_registry: SnapshotRegistry, max_states: int = 4096):
+        """
+        Parametry:
+            snapshot_registry: Registr materializovaných souhrnů portfolií
+            max_states: Maximální počet portfolií držených v paměti
+                (nejdéle načtená se zahazují a při dalším přístupu znovu načtou)
+        """
+        self._snapshots = snapshot_registry
+        self.max_states: int = max_states
+        self._states: Dict[int, PortfolioState] = {}
+        self._by_ticker: Dict[int, Tuple[PortfolioState, Dict[str, Position]]] = {}
+        self._lock = threading.RLock()
+        self._portfolio_locks: Dict[int, threading.RLock] = {}
+        # Zvyšuje se při každém zneplatnění (ostatní cache tak poznají změnu portfolií)
+        self.version: int = 0
+        # Počet zneplatnění jednotlivých portfolií (stav načtený během zneplatnění se neukládá)
+        self._generations: Dict[int, int] = {}
+
+    def _portfolio_lock(self, portfolio_id: int) -> threading.RLock:
+        """
+        Vrací:
+            Zámek pro zápisy a načítání jednoho portfolia
+        """
+        lock = self._portfolio_locks.get(portfolio_id)
+        if lock is None:
+            with self._lock:
+                lock = self._portfolio_locks.setdefault(portfolio_id, threading.RLock())
+        return lock
+
+    def state(self, portfolio_id: int) -> PortfolioState:
+        """
+        Vrátí aktuální neměnný stav portfolia (z databáze jen při prvním přístupu
+        nebo po zneplatnění).
+
+        Parametry:
+            portfolio_id: ID portfolia
+
+        Vrací:
+            PortfolioState
+        """
+        state = self._states.get(portfolio_id)
+        if state is not None:
+            return state
+
+        # Načítání jiných portfolií neblokuje (zámek jen pro toto portfolio)
+        with self._portfolio_lock(portfolio_id):
+            state = self._states.get(portfolio_id)
+            if state is None:
+                generation = self._generations.get(portfolio_id, 0)
+                state = self._load(portfolio_id)
+                with self._lock:
+                    # Zneplatnění během načítání - načtený stav už nemusí být aktuální
+                    if self._generations.get(portfolio_id, 0) != generation:
+                        return state
+                    self._states[portfolio_id] = state
+                    while len(self._states) > self.max_states:
+                        evicted = next(iter(self._states))
+                        self.invalidate(evicted)
+                        self._snapshots.discard(evicted)
+                logger.debug("Portfolio %s načteno (%s pozic)", portfolio_id, len(state.positions))
+        return state
+
+    @staticmethod
+    def _load(portfolio_id: int) -> PortfolioState:
+        # Vlastní krátká transakce: čtecí transakce požadavku (WAL snímek z jeho
+        # prvního dotazu) by neviděla zápisy potvrzené mezitím jinými vlákny
+        if in_session_scope():
+            return PortfolioService._read_state(db.session(), portfolio_id)
+        with session_scope() as session:
+            return PortfolioService._read_state(session, portfolio_id)
+
+    @staticmethod
+    def _read_state(session: Session, portfolio_id: int) -> PortfolioState:
+        # Položky se načtou jedním dotazem spolu s portfoliem (bez líného načítání)
+        db_portfolio = session.get(DB_Portfolio, portfolio_id, options=[selectinload(DB_Portfolio.items)],
+                                   populate_existing=True)
+        if db_portfolio is None:
+            raise LookupError(f"Portfolio {portfolio_id} neexistuje")
+        positions = tuple(PositionRecord.from_item(item) for item in db_portfolio.items)
+        # Čtení nikdy neprochází knihu transakcí - jen loty a pozice
+        holdings = tuple(HoldingRecord.from_row(row) for row in
+                         session.query(Holding).filter_by(portfolio_id=portfolio_id).all())
+        return PortfolioState(db_portfolio.id, db_portfolio.name, positions, holdings)
+
+    def stocks(self, portfolio_id: int) -> Dict[str, Position]:
+        """
+        Vrací:
+            Pozice agregované podle tickeru, spočítané jednou pro každý stav
+        """
+        state = self.state(portfolio_id)
+        cached = self._by_ticker.get(portfolio_id)
+        if cached is not None and cached[0] is state:
+            return cached[1]
+        stocks = state.by_ticker()
+        self._by_ticker[portfolio_id] = (state, stocks)
+        return stocks
+
+    def snapshot(self, portfolio_id: int) -> PortfolioSnapshot:
+        """
+        Vrací:
+            Materializovaný souhrn portfolia (hodnota, náklady, zisk/ztráta)
+        """
+        return self._snapshots.get(
+            portfolio_id,
+            lambda: [(p.ticker, p.quantity, p.purchase_price) for p in self.state(portfolio_id).positions]
+        )
+
+    def invalidate(self, portfolio_id: int) -> None:
+        with self._lock:
+            self.version += 1
+            self._generations[portfolio_id] = self._generations.get(portfolio_id, 0) + 1
+            self._states.pop(portfolio_id, None)
+            self._by_ticker.pop(portfolio_id, None)
+
+    def _holding(self, portfolio_id: int, ticker: str) -> Holding:
+        holding = Holding.query.filter_by(portfolio_id=portfolio_id, ticker=ticker).first()
+        if holding is None:
+            holding = Holding(portfolio_id=portfolio_id, ticker=ticker, quantity=0.0, cost_basis=0.0, realized_pl=0.0)
+            db.session.add(holding)
+        return holding
+
+    def add_position(self, portfolio_id: int, ticker: str, quantity: float, purchase_price: float,
+                     purchase_date: Optional[datetime] = None, notes: Optional[str] = None) -> PositionRecord:
+        """
+        Nákup - zápis transakce, nového lotu a úprava materializované pozice.
+
+        Parametry:
+            portfolio_id: ID portfolia
+            ticker: Symbol akcie
+            quantity: Počet akcií
+            purchase_price: Nákupní cena za akcii
+            purchase_date: Datum nákupu
+            notes: Volitelné poznámky
+
+        Vrací:
+            Uloženou pozici (lot); ValueError při neplatném množství nebo ceně
+        """
+        check_trade(quantity, purchase_price)
+        purchase_date = purchase_date or datetime.utcnow()
+        with self._portfolio_lock(portfolio_id):
+            with session_scope(immediate=True) as session:
+                item = PortfolioItem(
+                    portfolio_id=portfolio_id,
+                    ticker=ticker,
+                    quantity=quantity,
+                    purchase_price=purchase_price,
+                    purchase_date=purchase_date,
+                    notes=notes
+                )
+                session.add(item)
+                session.flush()  # ID lotu pro záznam transakce
+                session.add(Transaction(portfolio_id=portfolio_id, ticker=ticker, side=BUY, quantity=quantity,
+                                        price=purchase_price, executed_at=purchase_date, lot_id=item.id,
+                                        notes=notes))
+                LotAccounting.buy(self._holding(portfolio_id, ticker), quantity, purchase_price)
+                record = PositionRecord.from_item(item)
+            self.invalidate(portfolio_id)
+            snapshot = self._snapshots.peek(portfolio_id)
+            if snapshot is not None:
+                snapshot.add_position(ticker, quantity, purchase_price)
+        return record
+
+    def remove_position(self, item_id: int, portfolio_id: Optional[int] = None) -> Optional[PositionRecord]:
+        """
+        Odebrání jednoho lotu (oprava chybného zápisu, bez realizace zisku).
+
+        Parametry:
+            item_id: ID položky
+            portfolio_id: Je-li zadáno, položka musí patřit do tohoto portfolia
+
+        Vrací:
+            Odebranou pozici, nebo None pokud neexistuje
+        """
+        if portfolio_id is None:
+            portfolio_id = db.session.query(PortfolioItem.portfolio_id).filter(PortfolioItem.id == item_id).scalar()
+            if portfolio_id is None:
+                return None
+        with self._portfolio_lock(portfolio_id):
+            with session_scope(immediate=True) as session:
+                item = session.get(PortfolioItem, item_id)
+                if item is None or item.portfolio_id != portfolio_id:
+                    return None
+                record = PositionRecord.from_item(item)
+                session.add(Transaction(portfolio_id=portfolio_id, ticker=record.ticker, side=REMOVE,
+                                        quantity=record.quantity, price=record.purchase_price, lot_id=record.id))
+                LotAccounting.remove(self._holding(portfolio_id, record.ticker), record.quantity, record.purchase_price)
+                session.delete(item)
+            self.invalidate(portfolio_id)
+            snapshot = self._snapshots.peek(portfolio_id)
+            if snapshot is not None:
+                snapshot.remove_position(record.ticker, record.quantity, record.purchase_price)
+        return record
+
+    def sell(self, portfolio_id: int, ticker: str, quantity: float, price: float,
+             executed_at: Optional[datetime] = None, notes: Optional[str] = None) -> float:
+        """
+        Prodej akcií metodou FIFO (od nejstarších lotů).
+
+        Parametry:
+            portfolio_id: ID portfolia
+            ticker: Symbol akcie
+            quantity: Prodávané množství
+            price: Prodejní cena za akcii
+            executed_at: Datum prodeje
+            notes: Volitelné poznámky
+
+        Vrací:
+            Realizovaný zisk/ztrátu prodeje (ValueError při neplatném nebo nedostatečném množství či ceně)
+        """
+        check_trade(quantity, price)
+        with self._portfolio_lock(portfolio_id):
+            # Loty se čtou až uvnitř zapisovací transakce, FIFO tak vidí poslední stav
+            with session_scope(immediate=True) as session:
+                lots = (PortfolioItem.query
+                        .filter_by(portfolio_id=portfolio_id, ticker=ticker)
+                        .order_by(PortfolioItem.purchase_date, PortfolioItem.id)
+                        .all())
+                fills = LotAccounting.fifo_fills(lots, quantity)
+                realized = LotAccounting.sell(self._holding(portfolio_id, ticker), fills, price)
+                session.add(Transaction(portfolio_id=portfolio_id, ticker=ticker, side=SELL, quantity=quantity,
+                                        price=price, executed_at=executed_at or datetime.utcnow(),
+                                        realized_pl=realized, notes=notes))
+                consumed = [(lot.purchase_price, taken) for lot, taken in fills]
+                for lot, taken in fills:
+                    if lot.quantity - taken <= EPSILON:
+                        session.delete(lot)
+                    else:
+                        lot.quantity -= taken
+            self.invalidate(portfolio_id)
+            snapshot = self._snapshots.peek(portfolio_id)
+            if snapshot is not None:
+                for purchase_price, taken in consumed:
+                    snapshot.remove_position(ticker, taken, purchase_price)
+        logger.debug("Prodej %s %s za %s, realizováno %.2f", quantity, ticker, price, realized)
+        return realized
+
+    def remove_ticker(self, portfolio_id: int, ticker: str, quantity: Optional[float] = None,
+                      price: Optional[float] = None) -> bool:
+        """
+        Prodej celé akcie nebo její části (od nejstarších nákupů).
+
+        Parametry:
+            portfolio_id: ID portfolia
+            ticker: Symbol akcie
+            quantity: Množství k odstranění (None = vše, více než držené = vše)
+            price: Prodejní cena (výchozí je poslední známá cena, jinak průměrná
+                nákupní cena - bez realizovaného zisku)
+
+        Vrací:
+            True pokud bylo co odebrat, jinak False
+        """
+        holding = self.stocks(portfolio_id).get(ticker)
+        if holding is None or holding.quantity <= 0:
+            return False
+        if quantity is None or quantity > holding.quantity:
+            quantity = holding.quantity
+        if price is None:
+            price = quote_cache.last(ticker)
+        if price is None:
+            price = holding.purchase_price
+        self.sell(portfolio_id, ticker, quantity, price)
+        return True
+
+    def import_positions(self, portfolio_id: int, rows: Iterable[Union[ImportedRow, RowError]],
+                         batch_size: int = 1000, strict: bool = False) -> ImportResult:
+        """
+        Hromadný import nákupních lotů v jedné databázové transakci.
+
+        Loty i transakce se vkládají po dávkách jedním příkazem INSERT pro celou
+        dávku (executemany), materializované pozice se upraví jednou za ticker.
+
+        Parametry:
+            portfolio_id: ID portfolia
+            rows: Proud zkontrolovaných řádků a chyb (viz CsvPositionReader)
+            batch_size: Počet řádků v jedné dávce
+            strict: Při jakékoli chybě řádku se nic neuloží
+
+        Vrací:
+            ImportResult
+        """
+        result = ImportResult()
+        deltas: Dict[str, HoldingState] = {}
+
+        def valid_rows():
+            for row in rows:
+                if isinstance(row, RowError):
+                    result.errors.append(row)
+                else:
+                    yield row
+
+        with self._portfolio_lock(portfolio_id):
+            with session_scope(immediate=True) as session:
+                for batch in batched(valid_rows(), batch_size):
+                    lot_ids = session.scalars(
+                        insert(PortfolioItem).returning(PortfolioItem.id, sort_by_parameter_order=True),
+                        [{'portfolio_id': portfolio_id, 'ticker': row.ticker, 'quantity': row.quantity,
+                          'purchase_price': row.purchase_price, 'purchase_date': row.purchase_date,
+                          'notes': row.notes} for row in batch]
+                    ).all()
+                    session.execute(insert(Transaction), [
+                        {'portfolio_id': portfolio_id, 'ticker': row.ticker, 'side': BUY, 'quantity': row.quantity,
+                         'price': row.purchase_price, 'executed_at': row.purchase_date, 'lot_id': lot_id,
+                         'realized_pl': 0.0, 'notes': row.notes, 'created_at': datetime.utcnow()}
+                        for row, lot_id in zip(batch, lot_ids)
+                    ])
+                    for row in batch:
+                        delta = deltas.setdefault(row.ticker, HoldingState(row.ticker))
+                        LotAccounting.buy(delta, row.quantity, row.purchase_price)
+                    result.imported += len(batch)
+
+                if strict and result.errors:
+                    session.rollback()
+                    result.imported = 0
+                    return result
+
+                existing = {holding.ticker: holding for holding in
+                            Holding.query.filter(Holding.portfolio_id == portfolio_id,
+                                                 Holding.ticker.in_(list(deltas))).all()} if deltas else {}
+                for ticker, delta in deltas.items():
+                    holding = existing.get(ticker)
+                    if holding is None:
+                        holding = Holding(portfolio_id=portfolio_id, ticker=ticker, quantity=0.0,
+                                          cost_basis=0.0, realized_pl=0.0)
+                        session.add(holding)
+                    holding.quantity += delta.quantity
+                    holding.cost_basis += delta.cost_basis
+
+            result.committed = True
+            result.tickers = list(deltas)
+            self.invalidate(portfolio_id)
+            # Souhrn se při dalším přístupu sestaví znovu z nového stavu
+            self._snapshots.discard(portfolio_id)
+        logger.info("Import do portfolia %s: %s lotů, %s chyb", portfolio_id, result.imported, len(result.errors))
+        return result
+
+    def backfill_ledger(self, portfolio_id: int) -> int:
+        """
+        Založí knihu transakcí pro portfolio z doby před jejím zavedením
+        (každý existující lot se zapíše jako nákup) a sestaví pozice.
+
+        Vrací:
+            Počet zapsaných transakcí (0 pokud kniha už existuje)
+        """
+        with self._portfolio_lock(portfolio_id):
+            with session_scope(immediate=True) as session:
+                if Transaction.query.filter_by(portfolio_id=portfolio_id).first() is not None:
+                    return 0
+                items = (PortfolioItem.query.filter_by(portfolio_id=portfolio_id)
+                         .order_by(PortfolioItem.purchase_date, PortfolioItem.id).all())
+                session.add_all([
+                    Transaction(portfolio_id=portfolio_id, ticker=item.ticker, side=BUY, quantity=item.quantity,
+                                price=item.purchase_price, executed_at=item.purchase_date, lot_id=item.id,
+                                notes=item.notes)
+                    for item in items
+                ])
+            self.rebuild_holdings(portfolio_id)
+            if items:
+                logger.info("Kniha transakcí portfolia %s založena z %s lotů", portfolio_id, len(items))
+            return len(items)
+
+    def backfill_all(self) -> int:
+        """
+        Založí knihu transakcí pro všechna portfolia, která mají položky, ale
+        žádné transakce (jeden dotaz, volá se při startu).
+
+        Vrací:
+            Počet doplněných portfolií
+        """
+        with_ledger = db.session.query(Transaction.portfolio_id).distinct()
+        portfolio_ids = [row[0] for row in (db.session.query(PortfolioItem.portfolio_id).distinct()
+                                            .filter(PortfolioItem.portfolio_id.notin_(with_ledger))
+                                            .all())]
+        for portfolio_id in portfolio_ids:
+            self.backfill_ledger(portfolio_id)
+        return len(portfolio_ids)
+
+    def rebuild_holdings(self, portfolio_id: int) -> None:
+        """
+        Přestavba materializovaných pozic přehráním celé knihy transakcí
+        (údržba, běžný provoz je upravuje přírůstkově).
+        """
+        with self._portfolio_lock(portfolio_id):
+            with session_scope(immediate=True) as session:
+                transactions = (Transaction.query.filter_by(portfolio_id=portfolio_id)
+                                .order_by(Transaction.id).all())
+                ledger = Ledger.replay(transactions)
+                # Úprava existujících řádků na místě (smazání a nové vložení by kolidovalo s identity map)
+                existing = {holding.ticker: holding for holding in Holding.query.filter_by(portfolio_id=portfolio_id)}
+                for ticker, state in ledger.holdings.items():
+                    holding = existing.pop(ticker, None)
+                    if holding is None:
+                        holding = Holding(portfolio_id=portfolio_id, ticker=ticker)
+                        session.add(holding)
+                    holding.quantity = state.quantity
+                    holding.cost_basis = state.cost_basis
+                    holding.realized_pl = state.realized_pl
+                for holding in existing.values():
+                    session.delete(holding)
+            self.invalidate(portfolio_id)
+
+
+# Sdílená služba pro celou aplikaci
+portfolio_service = PortfolioService(snapshots)
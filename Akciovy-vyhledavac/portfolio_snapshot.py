@@ -0,0 +1,185 @@
+import logging
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from market_cache import QuoteCache, quote_cache
+
+logger = logging.getLogger(__name__)
+
+
+class PortfolioSnapshot:
+    """
+    Materializovaný souhrn portfolia (hodnota, náklady, zisk/ztráta).
+
+    Souhrn se nepřepočítává při čtení, ale průběžně upravuje při přidání nebo
+    odebrání pozice a při změně ceny ve sdílené cache, takže čtení je O(1).
+    Pozice bez známé ceny se do hodnoty započítávají nákupní cenou.
+    """
+
+    def __init__(self, quotes: QuoteCache):
+        """
+        Parametry:
+            quotes: Cache cen, ze které se čtou poslední známé ceny
+        """
+        self._quotes = quotes
+        self._lock = threading.Lock()
+        self._quantity: Dict[str, float] = {}  # ticker -> celkové množství
+        self._cost: Dict[str, float] = {}  # ticker -> celkové náklady
+        self._price: Dict[str, float] = {}  # ticker -> cena použitá v total_value
+        self._unpriced: set = set()
+        self.total_cost: float = 0.0
+        self.total_value: float = 0.0
+
+    def _revalue(self, ticker: str, quantity_delta: float, cost_delta: float) -> None:
+        # Volá se se zamčeným zámkem
+        quantity = self._quantity.get(ticker, 0.0)
+        cost = self._cost.get(ticker, 0.0)
+        old_value = quantity * self._price[ticker] if ticker in self._price else cost
+
+        quantity += quantity_delta
+        cost += cost_delta
+        if quantity <= 0:
+            self._quantity.pop(ticker, None)
+            self._cost.pop(ticker, None)
+            self._price.pop(ticker, None)
+            self._unpriced.discard(ticker)
+            new_value = 0.0
+        else:
+            self._quantity[ticker] = quantity
+            self._cost[ticker] = cost
+            price = self._quotes.last(ticker)
+            if price is None:
+                self._price.pop(ticker, None)
+                self._unpriced.add(ticker)
+                new_value = cost
+            else:
+                self._price[ticker] = price
+                self._unpriced.discard(ticker)
+                new_value = quantity * price
+
+        self.total_cost += cost_delta
+        self.total_value += new_value - old_value
+
+    def add_position(self, ticker: str, quantity: float, purchase_price: float) -> None:
+        """
+        Započítání nové pozice.
+
+        Parametry:
+            ticker: Symbol akcie
+            quantity: Počet akcií
+            purchase_price: Nákupní cena za akcii
+        """
+        with self._lock:
+            self._revalue(ticker, quantity, quantity * purchase_price)
+
+    def remove_position(self, ticker: str, quantity: float, purchase_price: float) -> None:
+        """
+        Odečtení odebrané pozice.
+
+        Parametry:
+            ticker: Symbol akcie
+            quantity: Počet akcií
+            purchase_price: Nákupní cena za akcii
+        """
+        with self._lock:
+            self._revalue(ticker, -quantity, -quantity * purchase_price)
+
+    def on_quote(self, ticker: str, old_price: Optional[float], new_price: float) -> None:
+        """
+        Posluchač QuoteCache - přecení jen dotčený ticker.
+        """
+        with self._lock:
+            quantity = self._quantity.get(ticker)
+            if quantity is None:
+                return
+            old_value = quantity * self._price[ticker] if ticker in self._price else self._cost[ticker]
+            self._price[ticker] = new_price
+            self._unpriced.discard(ticker)
+            self.total_value += quantity * new_price - old_value
+
+    @property
+    def unpriced_tickers(self) -> Tuple[str, ...]:
+        """Tickery, pro které zatím není v cache žádná cena."""
+        return tuple(sorted(self._unpriced))
+
+    def summary(self, cash_balance: float = 0.0) -> Dict[str, float]:
+        """
+        Vrací:
+            Souhrn ve stejném tvaru jako PortfolioValuation.summary
+        """
+        with self._lock:
+            total_value = self.total_value
+            total_cost = self.total_cost
+
+        total_gain_loss = total_value - total_cost
+        total_gain_loss_percent = (total_gain_loss / total_cost) * 100 if total_cost > 0 else 0.0
+        return {
+            'total_value': total_value + cash_balance,
+            'total_cost': total_cost,
+            'total_gain_loss': total_gain_loss,
+            'total_gain_loss_percent': total_gain_loss_percent,
+            'cash_balance': cash_balance
+        }
+
+
+class SnapshotRegistry:
+    """
+    Snímky portfolií podle ID, vytvářené líně při prvním přístupu.
+
+    Drží se nejvýše max_entries snímků (nejdéle nesestavované se zahazují
+    a při dalším přístupu znovu sestaví), aby paměť ani rozesílání změn cen
+    nerostly s počtem všech portfolií v databázi.
+    """
+
+    def __init__(self, quotes: QuoteCache, max_entries: int = 4096):
+        self._quotes = quotes
+        self.max_entries: int = max_entries
+        self._snapshots: Dict[int, PortfolioSnapshot] = {}
+        self._lock = threading.Lock()
+        quotes.subscribe(self._on_quote)
+
+    def _on_quote(self, ticker: str, old_price: Optional[float], new_price: float) -> None:
+        for snapshot in list(self._snapshots.values()):
+            snapshot.on_quote(ticker, old_price, new_price)
+
+    def get(self, portfolio_id: int,
+            loader: Callable[[], Iterable[Tuple[str, float, float]]]) -> PortfolioSnapshot:
+        """
+        Vrátí snímek portfolia, při prvním přístupu ho sestaví z pozic.
+
+        Parametry:
+            portfolio_id: ID portfolia
+            loader: Funkce vracející pozice jako (ticker, množství, nákupní cena)
+
+        Vrací:
+            Materializovaný snímek portfolia
+        """
+        snapshot = self._snapshots.get(portfolio_id)
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshots.get(portfolio_id)
+            if snapshot is None:
+                snapshot = PortfolioSnapshot(self._quotes)
+                for ticker, quantity, purchase_price in loader():
+                    snapshot.add_position(ticker, quantity, purchase_price)
+                self._snapshots[portfolio_id] = snapshot
+                while len(self._snapshots) > self.max_entries:
+                    self._snapshots.pop(next(iter(self._snapshots)))
+                logger.debug("Snapshot portfolia %s sestaven", portfolio_id)
+        return snapshot
+
+    def peek(self, portfolio_id: int) -> Optional[PortfolioSnapshot]:
+        """
+        Vrací:
+            Snímek, pokud už byl sestaven, jinak None (bez načítání)
+        """
+        return self._snapshots.get(portfolio_id)
+
+    def discard(self, portfolio_id: int) -> None:
+        with self._lock:
+            self._snapshots.pop(portfolio_id, None)
+
+
+# Sdílený registr snímků navázaný na sdílenou cache cen
+snapshots = SnapshotRegistry(quote_cache)
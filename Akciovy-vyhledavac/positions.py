@@ -0,0 +1,178 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, overload
+from valuation import PortfolioValuation
+
+
+@dataclass(slots=True)
+class Position:
+    """
+    Držená akcie v portfoliu (agregace všech nákupů jednoho tickeru).
+
+    Díky __slots__ nemá instance vlastní __dict__, takže zabírá zlomek paměti
+    oproti slovníku s detaily akcie.
+    """
+    ticker: str
+    quantity: float
+    purchase_price: float
+    purchase_date: Optional[datetime] = None
+    notes: Optional[str] = None
+
+    @property
+    def cost_basis(self) -> float:
+        return self.quantity * self.purchase_price
+
+    def add(self, quantity: float, purchase_price: float, notes: Optional[str] = None) -> None:
+        """
+        Přikoupení akcií - nákupní cena se přepočítá na vážený průměr.
+
+        Parametry:
+            quantity: Počet přikoupených akcií
+            purchase_price: Nákupní cena za akcii
+            notes: Volitelné poznámky (přepíší stávající)
+        """
+        total_shares = self.quantity + quantity
+        total_cost = self.cost_basis + quantity * purchase_price
+        self.quantity = total_shares
+        self.purchase_price = total_cost / total_shares if total_shares > 0 else 0
+        self.notes = notes or self.notes
+
+
+class PositionRow:
+    """
+    Pohled na jeden řádek ocenění portfolia.
+
+    Nic nekopíruje - atributy čte ze sloupců PortfolioView podle indexu, takže
+    šablony s ním pracují stejně jako dříve se slovníkem (item.ticker, item.gain_loss).
+    """
+    __slots__ = ("_view", "_index")
+
+    def __init__(self, view: "PortfolioView", index: int):
+        self._view = view
+        self._index = index
+
+    @property
+    def position(self) -> Any:
+        return self._view.positions[self._index]
+
+    @property
+    def id(self) -> Optional[int]:
+        return getattr(self.position, "id", None)
+
+    @property
+    def ticker(self) -> str:
+        return self.position.ticker
+
+    @property
+    def company_name(self) -> str:
+        return self._view.company_names.get(self.ticker, self.ticker)
+
+    @property
+    def quantity(self) -> float:
+        return self.position.quantity
+
+    @property
+    def purchase_price(self) -> float:
+        return self.position.purchase_price
+
+    @property
+    def purchase_date(self) -> Optional[datetime]:
+        return self.position.purchase_date
+
+    @property
+    def notes(self) -> Optional[str]:
+        return self.position.notes
+
+    @property
+    def current_price(self) -> float:
+        return self._view.columns['current_price'][self._index]
+
+    @property
+    def current_value(self) -> float:
+        return self._view.columns['current_value'][self._index]
+
+    @property
+    def cost_basis(self) -> float:
+        return self._view.columns['cost_basis'][self._index]
+
+    @property
+    def gain_loss(self) -> float:
+        return self._view.columns['gain_loss'][self._index]
+
+    @property
+    def gain_loss_percent(self) -> float:
+        return self._view.columns['gain_loss_percent'][self._index]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Vrací:
+            Řádek jako slovník (pro JSON API)
+        """
+        return {
+            'id': self.id,
+            'ticker': self.ticker,
+            'company_name': self.company_name,
+            'quantity': self.quantity,
+            'purchase_price': self.purchase_price,
+            'purchase_date': self.purchase_date,
+            'current_price': self.current_price,
+            'current_value': self.current_value,
+            'cost_basis': self.cost_basis,
+            'gain_loss': self.gain_loss,
+            'gain_loss_percent': self.gain_loss_percent,
+            'notes': self.notes
+        }
+
+
+class PortfolioView(Sequence[PositionRow]):
+    """
+    Oceněné pozice portfolia pro šablony.
+
+    Drží pozice, sloupce ocenění a názvy společností; řádky (PositionRow) jsou
+    jen lehké pohledy vytvářené při iteraci, ne slovníky s kopiemi hodnot.
+    """
+
+    def __init__(self, positions: Sequence[Any], valuation: PortfolioValuation,
+                 company_names: Optional[Mapping[str, str]] = None):
+        """
+        Parametry:
+            positions: Pozice s atributy ticker, quantity, purchase_price, purchase_date, notes
+            valuation: Ocenění pozic ve stejném pořadí
+            company_names: Slovník ticker -> název společnosti
+        """
+        if len(positions) != len(valuation):
+            raise ValueError("Počet pozic neodpovídá ocenění")
+        self.positions: Sequence[Any] = positions
+        self.valuation: PortfolioValuation = valuation
+        self.company_names: Mapping[str, str] = company_names or {}
+        # Sloupce se převedou na Python čísla jednou pro celou stránku
+        self.columns: Dict[str, Sequence[float]] = valuation.rows()
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    @overload
+    def __getitem__(self, index: int) -> PositionRow: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[PositionRow]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [PositionRow(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return PositionRow(self, index)
+
+    def __iter__(self) -> Iterator[PositionRow]:
+        for i in range(len(self.positions)):
+            yield PositionRow(self, i)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """
+        Vrací:
+            Všechny řádky jako slovníky (pro JSON API)
+        """
+        return [row.to_dict() for row in self]
@@ -0,0 +1,311 @@
+import heapq
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, time as dt_time, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+from sqlalchemy import func, select
+from models import db, PortfolioItem
+from market_cache import quote_cache, history_cache
+from portfolio_service import portfolio_service
+from stock_data import StockData
+
+logger = logging.getLogger(__name__)
+
+# Skóre, pod kterým ticker přestává být oblíbený (jeden požadavek vydrží jeden poločas)
+MIN_SCORE = 0.5
+# Skóre, pod kterým se záznam o oblíbenosti zapomene
+FORGET_SCORE = 0.05
+
+# Klíč obnovy: (ticker, období historie), období None = aktuální cena
+RefreshKey = Tuple[str, Optional[str]]
+
+
+@dataclass(frozen=True, slots=True)
+class MarketHours:
+    """
+    Obchodní hodiny burzy v jejím časovém pásmu (bez svátků).
+    """
+    name: str
+    timezone: str
+    opens: dt_time
+    closes: dt_time
+
+    def is_open(self, now: datetime) -> bool:
+        """
+        Vrací:
+            True, pokud se v čase now (s časovým pásmem) obchoduje
+        """
+        local = now.astimezone(ZoneInfo(self.timezone))
+        return local.weekday() < 5 and self.opens <= local.time() < self.closes
+
+    def last_close(self, now: datetime) -> datetime:
+        """
+        Vrací:
+            Poslední uzavření obchodování před časem now (s časovým pásmem)
+        """
+        zone = ZoneInfo(self.timezone)
+        local = now.astimezone(zone)
+        day = local.date() if local.time() >= self.closes else local.date() - timedelta(days=1)
+        while day.weekday() >= 5:
+            day -= timedelta(days=1)
+        return datetime.combine(day, self.closes, tzinfo=zone)
+
+
+# Americké burzy (výchozí) a Burza cenných papírů Praha (tickery s příponou .PR)
+US_MARKET = MarketHours("US", "America/New_York", dt_time(9, 30), dt_time(16, 0))
+PRAGUE_MARKET = MarketHours("Praha", "Europe/Prague", dt_time(9, 0), dt_time(16, 25))
+SUFFIX_MARKETS = {".PR": PRAGUE_MARKET}
+
+
+def market_for(ticker: str) -> MarketHours:
+    """
+    Vrací:
+        Burzu tickeru podle přípony symbolu (bez přípony americké burzy)
+    """
+    for suffix, market in SUFFIX_MARKETS.items():
+        if ticker.endswith(suffix):
+            return market
+    return US_MARKET
+
+
+class PrefetchScheduler:
+    """
+    Předběžné načítání cen a historií oblíbených tickerů.
+
+    Oblíbenost se počítá z požadavků na data (skóre s poločasem rozpadu);
+    ke skóre ceny tickeru se přičítá počet portfolií, která ho drží, takže
+    tickery z portfolií jsou oblíbené i bez požadavků. Jejich ceny
+    a historie obnovuje vlákno na pozadí hromadným stažením, během
+    obchodních hodin burzy v intervalu a po uzavření jednou (závěrečné ceny),
+    takže požadavek na oblíbený ticker najde data v cache.
+
+    Data s prošlou platností se požadavku vrátí hned a obnoví se na pozadí
+    (stale-while-revalidate), pokud nejsou starší než max_stale.
+    """
+
+    def __init__(self, interval: float = 30.0, quote_interval: float = 60.0, history_interval: float = 900.0,
+                 hot_size: int = 50, half_life: float = 3600.0, max_stale: float = 21600.0,
+                 portfolio_weight: float = 1.0, membership_ttl: float = 600.0):
+        """
+        Parametry:
+            interval: Jak často vlákno kontroluje oblíbené tickery v sekundách (0 = vypnuto)
+            quote_interval: Interval obnovy cen během obchodních hodin
+            history_interval: Interval obnovy historií během obchodních hodin
+            hot_size: Počet oblíbených tickerů (a zvlášť dvojic ticker + období historie)
+            half_life: Poločas rozpadu skóre oblíbenosti v sekundách
+            max_stale: Nejvyšší stáří dat, která se ještě vrátí a obnoví na pozadí
+            portfolio_weight: Skóre ceny za každé portfolio, které ticker drží
+            membership_ttl: Jak dlouho platí načtené tickery z portfolií, pokud se
+                portfolia v tomto procesu nezměnila (zápisy z jiných procesů)
+        """
+        self.interval: float = interval
+        self.quote_interval: float = quote_interval
+        self.history_interval: float = history_interval
+        self.hot_size: int = hot_size
+        self.half_life: float = half_life
+        self.max_stale: float = max_stale
+        self._scores: Dict[RefreshKey, Tuple[float, float]] = {}  # klíč -> (skóre, čas poslední změny)
+        self.portfolio_weight: float = portfolio_weight
+        self.membership_ttl: float = membership_ttl
+        self._portfolio_tickers: Dict[str, int] = {}  # ticker -> počet portfolií, která ho drží
+        self._membership_loaded: Optional[Tuple[int, float]] = None  # (verze portfolií, čas načtení)
+        self._pending: Set[RefreshKey] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _decayed(self, score: float, updated: float, now: float) -> float:
+        return score * 0.5 ** ((now - updated) / self.half_life)
+
+    def record(self, ticker: str, period: Optional[str] = None) -> None:
+        """
+        Započítá požadavek na cenu (period None) nebo historii tickeru.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._scores.get((ticker, period))
+            self._scores[(ticker, period)] = (1.0 + (self._decayed(*entry, now) if entry else 0.0), now)
+
+    def hot(self) -> List[RefreshKey]:
+        """
+        Oblíbené ceny a historie k obnově.
+
+        Vrací:
+            Klíče (ticker, období) - ceny nejoblíbenějších tickerů (skóre včetně
+            portfolií) a historie nejoblíbenějších dvojic ticker + období,
+            každé nejvýše hot_size
+        """
+        now = time.monotonic()
+        with self._lock:
+            scores = {key: self._decayed(score, updated, now) for key, (score, updated) in self._scores.items()}
+            for key in [key for key, score in scores.items() if score < FORGET_SCORE]:
+                del self._scores[key]
+            portfolio = dict(self._portfolio_tickers)
+        for ticker, count in portfolio.items():
+            scores[(ticker, None)] = scores.get((ticker, None), 0.0) + count * self.portfolio_weight
+        quotes = heapq.nlargest(self.hot_size, (key for key in scores if key[1] is None and scores[key] >= MIN_SCORE),
+                                key=scores.get)
+        histories = heapq.nlargest(self.hot_size, (key for key in scores
+                                                   if key[1] is not None and scores[key] >= MIN_SCORE),
+                                   key=scores.get)
+        return quotes + histories
+
+    def is_due(self, key: RefreshKey, age: Optional[float], now: Optional[datetime] = None) -> bool:
+        """
+        Rozhodne, zda data podle obchodních hodin burzy tickeru potřebují obnovu.
+
+        Parametry:
+            key: (ticker, období historie nebo None pro cenu)
+            age: Stáří dat v cache v sekundách (None = data chybí)
+            now: Aktuální čas s časovým pásmem (výchozí teď)
+
+        Vrací:
+            True, pokud data chybí, během obchodování jsou starší než interval
+            obnovy, nebo mimo obchodování pocházejí z doby před uzavřením
+        """
+        if age is None:
+            return True
+        now = now or datetime.now(timezone.utc)
+        market = market_for(key[0])
+        if market.is_open(now):
+            return age >= (self.quote_interval if key[1] is None else self.history_interval)
+        return now - timedelta(seconds=age) < market.last_close(now)
+
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def serve_stale(self, ticker: str, period: Optional[str], age: float) -> bool:
+        """
+        Rozhodne, zda se data s prošlou platností v cache vrátí požadavku;
+        pokud ano a data potřebují obnovu, naplánuje ji na pozadí.
+
+        Parametry:
+            ticker: Symbol akcie
+            period: Období historie (None = cena)
+            age: Stáří dat v cache v sekundách
+
+        Vrací:
+            True, pokud se data vrátí (plánovač běží a data nejsou starší než max_stale)
+        """
+        if age > self.max_stale or not self.running():
+            return False
+        key = (ticker, period)
+        if self.is_due(key, age):
+            with self._lock:
+                if key in self._pending:
+                    return True
+                self._pending.add(key)
+            self._wake.set()
+        return True
+
+    def _age(self, key: RefreshKey) -> Optional[float]:
+        entry = quote_cache.peek(key[0]) if key[1] is None else history_cache.peek(*key)
+        return entry[1] if entry else None
+
+    def refresh(self, keys: Iterable[RefreshKey]) -> int:
+        """
+        Stáhne zadané ceny a historie hromadně (historie po obdobích).
+
+        Vrací:
+            Počet obnovených cen a historií
+        """
+        quotes: List[str] = []
+        histories: Dict[str, List[str]] = {}
+        for ticker, period in dict.fromkeys(keys):
+            if period is None:
+                quotes.append(ticker)
+            else:
+                histories.setdefault(period, []).append(ticker)
+        refreshed = 0
+        if quotes:
+            refreshed += len(StockData.get_prices(quotes, refresh=True))
+        for period, tickers in histories.items():
+            refreshed += len(StockData.get_histories(tickers, period, refresh=True))
+        return refreshed
+
+    def _load_portfolio_tickers(self) -> None:
+        # Dotaz jen po změně portfolií (nebo po membership_ttl kvůli zápisům z jiných procesů)
+        now = time.monotonic()
+        version = portfolio_service.version
+        loaded = self._membership_loaded
+        if loaded is not None and loaded[0] == version and now - loaded[1] < self.membership_ttl:
+            return
+        rows = db.session.execute(select(PortfolioItem.ticker, func.count(PortfolioItem.portfolio_id.distinct()))
+                                  .where(PortfolioItem.quantity > 0)
+                                  .group_by(PortfolioItem.ticker)).all()
+        with self._lock:
+            self._portfolio_tickers = {ticker: count for ticker, count in rows}
+        self._membership_loaded = (version, now)
+
+    def run_once(self) -> int:
+        """
+        Obnoví oblíbená data, která podle obchodních hodin potřebují obnovu
+        (tickery z portfolií se čtou z databáze, vyžaduje kontext aplikace).
+
+        Vrací:
+            Počet obnovených cen a historií
+        """
+        self._load_portfolio_tickers()
+        now = datetime.now(timezone.utc)
+        due = [key for key in self.hot() if self.is_due(key, self._age(key), now)]
+        if not due:
+            return 0
+        started = time.perf_counter()
+        refreshed = self.refresh(due)
+        logger.info("Předběžně načteno %s cen a historií oblíbených tickerů za %.2f s",
+                    refreshed, time.perf_counter() - started)
+        return refreshed
+
+    def _refresh_pending(self) -> None:
+        # Klíče zůstávají v _pending až do konce stažení (souběžné požadavky je nenaplánují znovu)
+        with self._lock:
+            pending = list(self._pending)
+        if pending:
+            try:
+                self.refresh(pending)
+                logger.debug("Na pozadí obnoveno %s zastaralých cen a historií", len(pending))
+            finally:
+                with self._lock:
+                    self._pending.difference_update(pending)
+
+    def start(self, app: Any) -> None:
+        """
+        Spustí vlákno předběžného načítání a obnovy zastaralých dat.
+
+        Parametry:
+            app: Flask aplikace (vlákno potřebuje její kontext pro databázi)
+        """
+        if self.interval <= 0 or self.running():
+            return
+
+        def run() -> None:
+            next_run = time.monotonic()
+            while not self._stop_event.is_set():
+                try:
+                    # Zastaralá data z požadavků mají přednost před plánovanou obnovou
+                    self._refresh_pending()
+                    if time.monotonic() >= next_run:
+                        next_run = time.monotonic() + self.interval
+                        with app.app_context():
+                            self.run_once()
+                except Exception as e:
+                    logger.error("Chyba při předběžném načítání dat: %s", e)
+                self._wake.wait(max(0.0, next_run - time.monotonic()))
+                self._wake.clear()
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=run, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Zastaví vlákno předběžného načítání."""
+        self._stop_event.set()
+        self._wake.set()
+
+
+# Sdílený plánovač pro celou aplikaci
+prefetch_scheduler = PrefetchScheduler()
@@ -0,0 +1,149 @@
+import logging
+from typing import List, Mapping, Optional, Sequence
+import numpy as np
+import pandas as pd
+from stock_data import StockData
+
+logger = logging.getLogger(__name__)
+
+
+def _daily_index(index: pd.Index) -> pd.DatetimeIndex:
+    """
+    Převede index historie na data bez časové zóny (obchodní den dané burzy).
+    """
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        # Zachová místní datum burzy (převod na UTC by posunul den)
+        index = index.tz_localize(None)
+    return index.normalize()
+
+
+class PriceMatrix:
+    """
+    Zarovnaná matice zavíracích cen datum × ticker.
+
+    Historie všech tickerů se spojí přes sjednocení obchodních dnů (outer join),
+    chybějící dny se doplní poslední známou cenou, takže lze počítat vektorově
+    i s akciemi z různých burz (např. CEZ.PR a americké tituly). Dny před
+    prvním obchodem tickeru zůstávají NaN (viz common).
+    """
+
+    def __init__(self, dates: np.ndarray, tickers: Sequence[str], closes: np.ndarray):
+        """
+        Parametry:
+            dates: Vektor dat (datetime64[D]) seřazený vzestupně
+            tickers: Seznam tickerů odpovídající sloupcům
+            closes: Matice cen tvaru (počet dní, počet tickerů)
+        """
+        self.dates: np.ndarray = dates
+        self.tickers: List[str] = list(tickers)
+        self.closes: np.ndarray = closes
+
+    @classmethod
+    def from_histories(cls, histories: Mapping[str, pd.DataFrame], column: str = "Close") -> "PriceMatrix":
+        """
+        Sestaví matici z historií jednotlivých tickerů.
+
+        Parametry:
+            histories: Slovník ticker -> DataFrame z StockData.get_history
+            column: Sloupec s cenou
+
+        Vrací:
+            PriceMatrix (tickery bez dat jsou vynechány)
+        """
+        series = {}
+        for ticker, data in histories.items():
+            if data is None or data.empty or column not in data:
+                continue
+            values = pd.Series(data[column].to_numpy(dtype=np.float64), index=_daily_index(data.index))
+            # Při více záznamech za den (intradenní data) platí poslední
+            series[ticker] = values[~values.index.duplicated(keep="last")]
+
+        if not series:
+            return cls(np.array([], dtype="datetime64[D]"), [], np.empty((0, 0)))
+
+        frame = pd.concat(series, axis=1, join="outer").sort_index()
+        # Dopředné doplnění přes svátky jedné z burz; dny před prvním obchodem
+        # tickeru se nedoplňují (zpětné doplnění by vytvořilo nulové výnosy)
+        frame = frame.ffill()
+        return cls(frame.index.to_numpy(dtype="datetime64[D]"), list(frame.columns), frame.to_numpy())
+
+    @classmethod
+    def load(cls, tickers: Sequence[str], period: str) -> "PriceMatrix":
+        """
+        Načte historie (ze sdílené cache, chybějící jedním hromadným stažením)
+        a sestaví z nich matici.
+
+        Parametry:
+            tickers: Seznam tickerů
+            period: Časové období
+
+        Vrací:
+            PriceMatrix
+        """
+        return cls.from_histories(StockData.get_histories(tickers, period))
+
+    def common(self) -> "PriceMatrix":
+        """
+        Vrací:
+            Matici od prvního dne, kdy mají cenu všechny tickery (bez NaN)
+        """
+        if not len(self.dates):
+            return self
+        complete = ~np.isnan(self.closes).any(axis=1)
+        start = int(np.argmax(complete)) if complete.any() else len(self.dates)
+        if start == 0:
+            return self
+        return PriceMatrix(self.dates[start:], self.tickers, self.closes[start:])
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def last_date(self) -> Optional[np.datetime64]:
+        return self.dates[-1] if len(self.dates) else None
+
+    def column(self, ticker: str) -> Optional[int]:
+        """
+        Vrací:
+            Index sloupce tickeru, nebo None
+        """
+        try:
+            return self.tickers.index(ticker)
+        except ValueError:
+            return None
+
+    def returns(self) -> np.ndarray:
+        """
+        Vrací:
+            Matici jednodenních výnosů tvaru (počet dní - 1, počet tickerů)
+        """
+        if len(self.dates) < 2:
+            return np.empty((0, len(self.tickers)))
+        return self.closes[1:] / self.closes[:-1] - 1.0
+
+    def rebased(self) -> np.ndarray:
+        """
+        Vrací:
+            Procentuální změnu každého tickeru od prvního společného dne
+        """
+        if not len(self.dates):
+            return np.empty_like(self.closes)
+        return (self.closes / self.closes[0] - 1.0) * 100.0
+
+    def row_index(self, date: np.datetime64) -> Optional[int]:
+        """
+        Vrací:
+            Index řádku pro dané datum, nebo None pokud v matici není
+        """
+        i = int(np.searchsorted(self.dates, date))
+        if i < len(self.dates) and self.dates[i] == date:
+            return i
+        return None
+
+    def rows_after(self, date: np.datetime64) -> np.ndarray:
+        """
+        Vrací:
+            Indexy řádků s datem pozdějším než zadané (nové obchodní dny)
+        """
+        return np.arange(int(np.searchsorted(self.dates, date, side="right")), len(self.dates))
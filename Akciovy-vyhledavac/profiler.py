@@ -0,0 +1,186 @@
+import cProfile
+import hmac
+import logging
+import os
+import re
+import sys
+import threading
+import uuid
+from collections import Counter
+from typing import Optional
+from flask import Flask, current_app, g, request, send_file, abort
+
+logger = logging.getLogger(__name__)
+
+# Hlavičky, kterými si klient vyžádá profilování požadavku
+TOKEN_HEADER = "X-Profile-Token"
+MODE_HEADER = "X-Profile-Mode"
+REQUEST_ID_HEADER = "X-Request-ID"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class StackSampler(threading.Thread):
+    """
+    Vzorkovací profiler, který v pravidelném intervalu zaznamenává zásobník
+    volání jednoho vlákna a agreguje ho do formátu "collapsed stacks".
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        """
+        Inicializace vzorkovače.
+
+        Parametry:
+            thread_id: Identifikátor vlákna, které se má vzorkovat
+            interval: Interval mezi vzorky v sekundách
+        """
+        super().__init__(name="stack-sampler", daemon=True)
+        self.thread_id: int = thread_id
+        self.interval: float = interval
+        self.samples: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+
+            # Kořen zásobníku je ve formátu collapsed stacks vlevo
+            self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        """Zastaví vzorkování a počká na ukončení vlákna."""
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        """
+        Vrací:
+            Vzorky ve formátu "rámec;rámec;rámec počet" (vstup pro flamegraph.pl / speedscope)
+        """
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+
+class RequestProfiler:
+    """
+    Volitelné profilování jednotlivých HTTP požadavků.
+
+    Požadavek se profiluje pouze tehdy, když je profilování zapnuto v konfiguraci
+    a klient pošle hlavičku X-Profile-Token se shodným tajemstvím. Výsledný profil
+    se uloží pod ID požadavku, které se vrací v hlavičce X-Profile-Id.
+    """
+
+    MODES = ("sample", "cprofile")
+
+    def __init__(self, app: Optional[Flask] = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Registrace háčků a ladicí cesty pro stažení profilu.
+
+        Parametry:
+            app: Instance Flask aplikace
+        """
+        app.config.setdefault("PROFILING_ENABLED", False)
+        app.config.setdefault("PROFILING_SECRET", "")
+        app.config.setdefault("PROFILING_MODE", "sample")
+        app.config.setdefault("PROFILING_INTERVAL", 0.005)
+        if not app.config.get("PROFILE_DIR"):
+            app.config["PROFILE_DIR"] = os.path.join(app.instance_path, "profiles")
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+        app.add_url_rule("/debug/profiles/<profile_id>", "download_profile", self._download)
+
+    @staticmethod
+    def _authorized(app: Flask) -> bool:
+        secret = app.config.get("PROFILING_SECRET", "")
+        if not app.config.get("PROFILING_ENABLED") or not secret:
+            return False
+        token = request.headers.get(TOKEN_HEADER, "")
+        return bool(token) and hmac.compare_digest(token, secret)
+
+    @staticmethod
+    def _request_id() -> str:
+        request_id = request.headers.get(REQUEST_ID_HEADER, "")
+        if _REQUEST_ID_RE.match(request_id):
+            return request_id
+        return uuid.uuid4().hex
+
+    def _start(self) -> None:
+        if request.endpoint == "download_profile" or not self._authorized(current_app):
+            return
+
+        mode = request.headers.get(MODE_HEADER, current_app.config["PROFILING_MODE"])
+        if mode not in self.MODES:
+            mode = "sample"
+
+        g.profile_id = self._request_id()
+        g.profile_mode = mode
+        if mode == "cprofile":
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+        else:
+            g.profiler = StackSampler(threading.get_ident(), current_app.config["PROFILING_INTERVAL"])
+            g.profiler.start()
+        logger.info("Profilování požadavku %s (%s) pro %s", g.profile_id, mode, request.path)
+
+    def _stop(self) -> Optional[str]:
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return None
+
+        profile_dir = current_app.config["PROFILE_DIR"]
+        os.makedirs(profile_dir, exist_ok=True)
+
+        if g.profile_mode == "cprofile":
+            profiler.disable()
+            path = os.path.join(profile_dir, f"{g.profile_id}.prof")
+            profiler.dump_stats(path)
+        else:
+            profiler.stop()
+            path = os.path.join(profile_dir, f"{g.profile_id}.folded")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profiler.collapsed())
+
+        logger.info("Profil požadavku %s uložen do %s", g.profile_id, path)
+        return path
+
+    def _finish(self, response):
+        if g.get("profiler") is not None:
+            try:
+                self._stop()
+                response.headers[PROFILE_ID_HEADER] = g.profile_id
+            except Exception as e:
+                logger.error("Error saving profile: %s", e)
+        return response
+
+    def _teardown(self, exc) -> None:
+        # Požadavek skončil výjimkou dřív, než proběhl after_request
+        if g.get("profiler") is not None:
+            try:
+                self._stop()
+            except Exception as e:
+                logger.error("Error saving profile: %s", e)
+
+    def _download(self, profile_id: str):
+        if not self._authorized(current_app) or not _REQUEST_ID_RE.match(profile_id):
+            abort(404)
+
+        profile_dir = current_app.config["PROFILE_DIR"]
+        for extension, mimetype in ((".folded", "text/plain"), (".prof", "application/octet-stream")):
+            path = os.path.join(profile_dir, profile_id + extension)
+            if os.path.exists(path):
+                return send_file(path, mimetype=mimetype, as_attachment=True)
+        abort(404)
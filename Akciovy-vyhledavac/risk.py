@@ -0,0 +1,266 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from price_matrix import PriceMatrix
+from stock_data import StockData
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+# Kvantil normálního rozdělení pro jednostranný 95% VaR
+Z_95 = 1.6448536269514722
+
+
+class ReturnStats:
+    """
+    Postačující statistiky denních výnosů (počet, součty, matice součinů).
+
+    Kovariance, volatilita, beta i korelace se z nich počítají bez průchodu
+    celou historií; nový obchodní den jen přičte jeden řádek a den, který
+    vypadl z okna období, se odečte.
+    """
+
+    def __init__(self, matrix: PriceMatrix):
+        """
+        Parametry:
+            matrix: Zarovnaná matice zavíracích cen
+        """
+        self.tickers = list(matrix.tickers)
+        returns = matrix.returns()
+        # Datum výnosu je datum druhého z dvojice zavíracích cen
+        self.dates = matrix.dates[1:].copy()
+        self.returns = returns
+        self._sum = returns.sum(axis=0)
+        self._cross = returns.T @ returns
+        self._last_closes = matrix.closes[-1].copy() if len(matrix) else np.zeros(len(self.tickers))
+
+    @property
+    def observations(self) -> int:
+        return len(self.returns)
+
+    @property
+    def last_date(self) -> Optional[np.datetime64]:
+        return self.dates[-1] if len(self.dates) else None
+
+    @property
+    def last_closes(self) -> np.ndarray:
+        return self._last_closes
+
+    def mean(self) -> np.ndarray:
+        """
+        Vrací:
+            Průměrný denní výnos každého tickeru
+        """
+        n = self.observations
+        return self._sum / n if n else np.zeros(len(self.tickers))
+
+    def update(self, matrix: PriceMatrix) -> bool:
+        """
+        Přírůstková aktualizace o nové obchodní dny.
+
+        Parametry:
+            matrix: Novější matice se stejnými tickery
+
+        Vrací:
+            True pokud šlo navázat, False pokud je nutné statistiky sestavit znovu
+        """
+        if matrix.tickers != self.tickers or not len(self.dates):
+            return False
+        last = matrix.row_index(self.dates[-1])
+        if last is None or not np.allclose(matrix.closes[last], self._last_closes):
+            return False
+
+        new_rows = matrix.rows_after(self.dates[-1])
+        if len(new_rows):
+            closes = matrix.closes[np.concatenate(([last], new_rows))]
+            new_returns = closes[1:] / closes[:-1] - 1.0
+            self._sum += new_returns.sum(axis=0)
+            self._cross += new_returns.T @ new_returns
+            self.returns = np.concatenate([self.returns, new_returns])
+            self.dates = np.concatenate([self.dates, matrix.dates[new_rows]])
+            self._last_closes = matrix.closes[-1].copy()
+
+        # Posuv okna - výnosy ze dnů, které už matice nemá, se odečtou
+        if len(matrix) > 1:
+            drop = int(np.searchsorted(self.dates, matrix.dates[1], side="left"))
+            if drop:
+                dropped = self.returns[:drop]
+                self._sum -= dropped.sum(axis=0)
+                self._cross -= dropped.T @ dropped
+                self.returns = self.returns[drop:]
+                self.dates = self.dates[drop:]
+        return True
+
+    def covariance(self) -> np.ndarray:
+        """
+        Vrací:
+            Výběrovou kovarianční matici denních výnosů
+        """
+        n = self.observations
+        if n < 2:
+            return np.full((len(self.tickers), len(self.tickers)), np.nan)
+        mean = self.mean()
+        return (self._cross - n * np.outer(mean, mean)) / (n - 1)
+
+    @staticmethod
+    def correlation_from(cov: np.ndarray) -> np.ndarray:
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        corr = np.clip(corr, -1.0, 1.0)
+        np.fill_diagonal(corr, 1.0)
+        return corr
+
+
+class RiskAnalyzer:
+    """
+    Riziková analýza portfolia: volatilita, beta vůči benchmarku, korelace a VaR.
+
+    Statistiky výnosů se drží podle (tickery, benchmark, období) a aktualizují
+    přírůstkově; hotové výsledky se pamatují pro daný stav portfolia a obchodní den.
+    Historie se načítají (případně stahují) mimo zámek a matice se sestaví znovu
+    jen tehdy, když cache vrátí jiné historie než minule.
+    """
+
+    def __init__(self, benchmark: str = "SPY", period: str = "1y", max_entries: int = 64):
+        """
+        Parametry:
+            benchmark: Ticker srovnávacího indexu pro výpočet bety
+            period: Časové období historie pro výpočet
+            max_entries: Maximální počet pamatovaných skupin tickerů (nejdéle nepoužité se zahazují)
+        """
+        self.benchmark: str = benchmark
+        self.period: str = period
+        self.max_entries: int = max_entries
+        # (tickery, benchmark, období) -> (historie, matice, statistiky)
+        self._stats: "OrderedDict[Tuple[Tuple[str, ...], str, str], Tuple[Dict, PriceMatrix, ReturnStats]]" = \
+            OrderedDict()
+        self._reports: "OrderedDict[Tuple[int, str, str], Tuple[Any, Any, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _same_histories(a: Mapping[str, pd.DataFrame], b: Mapping[str, pd.DataFrame]) -> bool:
+        # Cache vrací stále tytéž objekty, dokud historii neobnoví
+        return a.keys() == b.keys() and all(a[ticker] is b[ticker] for ticker in a)
+
+    def _remember(self, store: OrderedDict, key: Tuple, value: Any) -> None:
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > self.max_entries:
+            store.popitem(last=False)
+
+    def _return_stats(self, tickers: Sequence[str], benchmark: str, period: str) -> ReturnStats:
+        # Volá se bez zámku - načtení historií může stahovat data
+        key = (tuple(tickers), benchmark, period)
+        histories = StockData.get_histories(list(tickers) + [benchmark], period)
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is not None and self._same_histories(entry[0], histories):
+                self._stats.move_to_end(key)
+                return entry[2]
+
+        # Výnosy jen ze dnů, kdy mají cenu všechny tickery
+        matrix = PriceMatrix.from_histories(histories).common()
+        with self._lock:
+            entry = self._stats.get(key)
+            stats = entry[2] if entry is not None else None
+            if stats is None or not stats.update(matrix):
+                stats = ReturnStats(matrix)
+                logger.debug("Statistiky výnosů sestaveny pro %s (%s dní)", matrix.tickers, stats.observations)
+            self._remember(self._stats, key, (histories, matrix, stats))
+            return stats
+
+    def analyze(self, state: Any, benchmark: Optional[str] = None, period: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Riziková analýza portfolia.
+
+        Parametry:
+            state: PortfolioState (neměnný stav pozic)
+            benchmark: Ticker benchmarku (výchozí podle konfigurace)
+            period: Časové období (výchozí podle konfigurace)
+
+        Vrací:
+            Slovník s ukazateli jednotlivých akcií i celého portfolia
+        """
+        benchmark = benchmark or self.benchmark
+        period = period or self.period
+
+        quantities: Dict[str, float] = {}
+        for position in state.positions:
+            quantities[position.ticker] = quantities.get(position.ticker, 0.0) + position.quantity
+        held = list(quantities)
+
+        stats = self._return_stats(held, benchmark, period)
+        with self._lock:
+            key = (state.portfolio_id, benchmark, period)
+            cached = self._reports.get(key)
+            if cached is not None and cached[0] is state and cached[1] == stats.last_date:
+                self._reports.move_to_end(key)
+                return cached[2]
+
+            report = self._report(stats, quantities, benchmark, period)
+            self._remember(self._reports, key, (state, stats.last_date, report))
+            return report
+
+    @staticmethod
+    def _report(stats: ReturnStats, quantities: Dict[str, float], benchmark: str, period: str) -> Dict[str, Any]:
+        tickers = [t for t in quantities if t in stats.tickers]
+        report: Dict[str, Any] = {
+            'benchmark': benchmark,
+            'period': period,
+            'as_of': str(stats.last_date) if stats.last_date is not None else None,
+            'observations': stats.observations,
+            'tickers': tickers,
+            'volatility': {},
+            'beta': {},
+            'correlation': {'tickers': tickers, 'matrix': []},
+            'portfolio': None
+        }
+        if stats.observations < 2 or not tickers:
+            return report
+
+        cov = stats.covariance()
+        idx = np.array([stats.tickers.index(t) for t in tickers])
+        bench = stats.tickers.index(benchmark) if benchmark in stats.tickers else None
+
+        daily_vol = np.sqrt(np.clip(np.diag(cov)[idx], 0.0, None))
+        annual_vol = daily_vol * np.sqrt(TRADING_DAYS)
+        report['volatility'] = dict(zip(tickers, np.round(annual_vol, 6).tolist()))
+
+        betas = None
+        if bench is not None and cov[bench, bench] > 0:
+            betas = cov[idx, bench] / cov[bench, bench]
+            report['beta'] = dict(zip(tickers, np.round(betas, 6).tolist()))
+
+        corr = ReturnStats.correlation_from(cov[np.ix_(idx, idx)])
+        report['correlation']['matrix'] = np.round(corr, 6).tolist()
+
+        # Váhy podle aktuální tržní hodnoty pozic
+        values = np.array([quantities[t] for t in tickers]) * stats.last_closes[idx]
+        total = float(values.sum())
+        if total <= 0:
+            return report
+        weights = values / total
+
+        portfolio_var = float(weights @ cov[np.ix_(idx, idx)] @ weights)
+        portfolio_daily_vol = np.sqrt(max(portfolio_var, 0.0))
+        portfolio_mean = float(weights @ stats.mean()[idx])
+        # VaR jako jednodenní ztráta v měně portfolia (95% hladina)
+        historical_var = -float(np.percentile(stats.returns[:, idx] @ weights, 5)) * total
+        parametric_var = (Z_95 * portfolio_daily_vol - portfolio_mean) * total
+
+        report['portfolio'] = {
+            'value': total,
+            'volatility': float(portfolio_daily_vol * np.sqrt(TRADING_DAYS)),
+            'beta': float(weights @ betas) if betas is not None else None,
+            'var_95_historical': max(historical_var, 0.0),
+            'var_95_parametric': max(float(parametric_var), 0.0)
+        }
+        return report
+
+
+# Sdílený analyzátor (benchmark a období nastavuje server z konfigurace)
+risk_analyzer = RiskAnalyzer()
@@ -0,0 +1,447 @@
+import csv
+import logging
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import delete, insert, select
+from models import db, Fundamentals
+from database import session_scope
+from stock_data import StockData
+from comparison import parse_tickers
+
+logger = logging.getLogger(__name__)
+
+# Číselné ukazatele, podle kterých lze filtrovat a řadit
+SCREENER_FIELDS = ("price", "market_cap", "pe_ratio", "dividend_yield", "eps", "beta",
+                   "fifty_two_week_high", "fifty_two_week_low")
+# Ukazatel -> klíč v profilu yfinance (Ticker.info)
+PROFILE_KEYS = {
+    'market_cap': 'marketCap',
+    'pe_ratio': 'trailingPE',
+    'dividend_yield': 'dividendYield',
+    'eps': 'trailingEps',
+    'beta': 'beta',
+    'fifty_two_week_high': 'fiftyTwoWeekHigh',
+    'fifty_two_week_low': 'fiftyTwoWeekLow',
+}
+# Burzy v seznamu symbolů, které nejsou akcie (indexy, měny, komodity)
+NON_EQUITY_EXCHANGES = {"INDEX", "FX", "CRYPTO", "COMEX", "NYMEX"}
+# Nejdelší odklad dalšího pokusu o ticker, jehož stažení opakovaně selhává
+MAX_FAILURE_BACKOFF = 7 * 86400.0
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+@dataclass(frozen=True, slots=True)
+class FundamentalsRecord:
+    """
+    Fundamentální ukazatele jednoho tickeru v okamžiku stažení.
+    """
+    ticker: str
+    name: Optional[str] = None
+    sector: Optional[str] = None
+    industry: Optional[str] = None
+    exchange: Optional[str] = None
+    price: Optional[float] = None
+    market_cap: Optional[float] = None
+    pe_ratio: Optional[float] = None
+    dividend_yield: Optional[float] = None
+    eps: Optional[float] = None
+    beta: Optional[float] = None
+    fifty_two_week_high: Optional[float] = None
+    fifty_two_week_low: Optional[float] = None
+    updated_at: Optional[datetime] = None
+
+    @classmethod
+    def from_profile(cls, ticker: str, profile: Mapping[str, Any], price: Optional[float],
+                     updated_at: datetime) -> "FundamentalsRecord":
+        """
+        Sestaví záznam z profilu yfinance (StockData.get_profile) a aktuální ceny.
+        """
+        return cls(ticker=ticker,
+                   name=profile.get('shortName') or profile.get('longName'),
+                   sector=profile.get('sector'),
+                   industry=profile.get('industry'),
+                   exchange=profile.get('exchange'),
+                   price=_number(price) or _number(profile.get('currentPrice')),
+                   updated_at=updated_at,
+                   **{name: _number(profile.get(key)) for name, key in PROFILE_KEYS.items()})
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['updated_at'] = self.updated_at.isoformat() if self.updated_at else None
+        return data
+
+
+@dataclass(frozen=True)
+class ScreenerQuery:
+    """
+    Kritéria screeneru: rozsahy ukazatelů, sektor, řazení a stránka výsledků.
+    """
+    ranges: Dict[str, Tuple[Optional[float], Optional[float]]] = field(default_factory=dict)
+    sector: Optional[str] = None
+    sort: str = "market_cap"
+    descending: bool = True
+    offset: int = 0
+    limit: int = 50
+
+    @classmethod
+    def from_args(cls, args: Mapping[str, str], max_limit: int = 500) -> "ScreenerQuery":
+        """
+        Načte kritéria z parametrů požadavku (<ukazatel>_min, <ukazatel>_max,
+        sector, sort, order, offset, limit).
+
+        Parametry:
+            args: Parametry URL nebo formuláře
+            max_limit: Nejvyšší povolený počet výsledků na stránku
+
+        Vrací:
+            ScreenerQuery; neplatná hodnota vyvolá ValueError se srozumitelnou zprávou
+        """
+        ranges = {}
+        for name in SCREENER_FIELDS:
+            bounds = []
+            for suffix in ("min", "max"):
+                raw = (args.get(f"{name}_{suffix}") or "").strip()
+                value = _number(raw) if raw else None
+                if raw and value is None:
+                    raise ValueError(f"Invalid value for {name}_{suffix}: {raw}")
+                bounds.append(value)
+            if bounds != [None, None]:
+                ranges[name] = (bounds[0], bounds[1])
+
+        sort = args.get("sort") or "market_cap"
+        if sort not in SCREENER_FIELDS and sort != "ticker":
+            raise ValueError(f"Unsupported sort field: {sort}")
+        order = args.get("order") or "desc"
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Unsupported order: {order}")
+        try:
+            offset = int(args.get("offset") or 0)
+            limit = int(args.get("limit") or 50)
+        except ValueError:
+            raise ValueError("offset and limit must be integers")
+        if offset < 0 or not 1 <= limit <= max_limit:
+            raise ValueError(f"limit must be between 1 and {max_limit}, offset must not be negative")
+        return cls(ranges, (args.get("sector") or "").strip() or None, sort, order == "desc", offset, limit)
+
+
+class ScreenerSnapshot:
+    """
+    Neměnný sloupcový snímek fundamentů pro rychlé dotazy.
+
+    Každý ukazatel je vektor numpy s předpočítaným pořadím (argsort, NaN na
+    konci). Rozsahový filtr je dvojí půlení v seřazených hodnotách, ostatní
+    podmínky se vyhodnotí vektorově jen nad řádky nejužšího rozsahu a řazení
+    výsledku je průchod předpočítaným pořadím - bez třídění při dotazu.
+    """
+
+    def __init__(self, records: Sequence[FundamentalsRecord]):
+        """
+        Parametry:
+            records: Záznamy (jeden na ticker)
+        """
+        self.records: List[FundamentalsRecord] = sorted(records, key=lambda record: record.ticker)
+        self.tickers = np.array([record.ticker for record in self.records], dtype=object)
+        self.sectors = np.array([(record.sector or "").lower() for record in self.records], dtype=object)
+        self.columns: Dict[str, np.ndarray] = {}
+        self._orders: Dict[str, np.ndarray] = {}
+        self._sorted: Dict[str, np.ndarray] = {}
+        self._valid: Dict[str, int] = {}
+        for name in SCREENER_FIELDS:
+            values = np.array([getattr(record, name) for record in self.records], dtype=np.float64)
+            order = np.argsort(values, kind="stable")
+            self.columns[name] = values
+            self._orders[name] = order
+            self._sorted[name] = values[order]
+            # Počet tickerů s hodnotou (NaN jsou v pořadí na konci)
+            self._valid[name] = int(np.count_nonzero(~np.isnan(values)))
+        # Tickery jsou seřazené už v records
+        self._orders["ticker"] = np.arange(len(self.records))
+        # Stáří snímku určuje nejstarší záznam (novější záznamy ho nezakryjí)
+        self.as_of: Optional[datetime] = min((record.updated_at for record in self.records if record.updated_at),
+                                             default=None)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def sector_names(self) -> List[str]:
+        """
+        Vrací:
+            Abecední seznam sektorů ve snímku
+        """
+        return sorted({record.sector for record in self.records if record.sector})
+
+    def _range_rows(self, name: str, low: Optional[float], high: Optional[float]) -> np.ndarray:
+        values = self._sorted[name]
+        valid = self._valid[name]
+        start = 0 if low is None else int(np.searchsorted(values[:valid], low, side="left"))
+        stop = valid if high is None else int(np.searchsorted(values[:valid], high, side="right"))
+        return self._orders[name][start:max(start, stop)]
+
+    def query(self, query: ScreenerQuery) -> Tuple[int, List[FundamentalsRecord]]:
+        """
+        Vyhodnotí kritéria nad snímkem.
+
+        Parametry:
+            query: Kritéria a stránka výsledků
+
+        Vrací:
+            Dvojici (celkový počet vyhovujících tickerů, záznamy zvolené stránky)
+        """
+        count = len(self.records)
+        if not count:
+            return 0, []
+
+        if query.ranges:
+            # Nejužší rozsah (půlení) určí kandidáty, ostatní podmínky jen nad nimi
+            candidates = min((self._range_rows(name, low, high) for name, (low, high) in query.ranges.items()),
+                             key=len)
+            keep = np.ones(len(candidates), dtype=bool)
+            for name, (low, high) in query.ranges.items():
+                values = self.columns[name][candidates]
+                if low is not None:
+                    keep &= values >= low
+                if high is not None:
+                    keep &= values <= high
+            candidates = candidates[keep]
+        else:
+            candidates = np.arange(count)
+        if query.sector:
+            candidates = candidates[self.sectors[candidates] == query.sector.lower()]
+
+        selected = np.zeros(count, dtype=bool)
+        selected[candidates] = True
+        order = self._orders[query.sort]
+        ordered = order[selected[order]]
+        if query.descending:
+            if query.sort == "ticker":
+                ordered = ordered[::-1]
+            else:
+                # Sestupně, ale tickery bez hodnoty (NaN) zůstávají na konci
+                missing = np.isnan(self.columns[query.sort][ordered])
+                ordered = np.concatenate((ordered[~missing][::-1], ordered[missing]))
+        page = ordered[query.offset:query.offset + query.limit]
+        return len(candidates), [self.records[i] for i in page]
+
+
+class ScreenerService:
+    """
+    Udržuje snímek fundamentů pro zvolený seznam tickerů.
+
+    Snímek je uložený v tabulce Fundamentals (přežije restart) a v paměti
+    jako ScreenerSnapshot, který se při obnově vymění jedním přiřazením, takže
+    dotazy nikdy nečekají na stahování. Obnova běží ve vlákně na pozadí po
+    dávkách: ceny jedním hromadným stažením, profily souběžně. Obnovují se jen
+    chybějící a zastaralé tickery; ticker, jehož stažení selhalo, se zkouší
+    znovu s exponenciálně rostoucím odkladem.
+    """
+
+    def __init__(self, batch_size: int = 100, workers: int = 8, refresh_interval: float = 86400.0,
+                 failure_backoff: float = 3600.0):
+        """
+        Parametry:
+            batch_size: Počet tickerů v jedné dávce stahování a zápisu
+            workers: Počet souběžných stahování profilů
+            refresh_interval: Interval obnovy snímku v sekundách (0 = bez obnovy na pozadí)
+            failure_backoff: Odklad dalšího pokusu po prvním selhání tickeru v sekundách
+                (s každým dalším selháním se zdvojnásobí)
+        """
+        self.batch_size: int = batch_size
+        self.workers: int = workers
+        self.refresh_interval: float = refresh_interval
+        self.failure_backoff: float = failure_backoff
+        self.universe: List[str] = []
+        self._snapshot = ScreenerSnapshot([])
+        self._records: Dict[str, FundamentalsRecord] = {}
+        self._failures: Dict[str, Tuple[int, datetime]] = {}  # ticker -> (počet selhání, další pokus)
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def snapshot(self) -> ScreenerSnapshot:
+        return self._snapshot
+
+    def load(self) -> ScreenerSnapshot:
+        """
+        Načte uložený snímek z databáze (vyžaduje kontext aplikace).
+
+        Vrací:
+            Načtený snímek
+        """
+        rows = db.session.execute(select(Fundamentals)).scalars().all()
+        self._records = {row.ticker: FundamentalsRecord(**{name: getattr(row, name)
+                                                            for name in FundamentalsRecord.__dataclass_fields__})
+                         for row in rows}
+        self._snapshot = ScreenerSnapshot(list(self._records.values()))
+        logger.info("Snímek screeneru načten: %s tickerů", len(self._records))
+        return self._snapshot
+
+    def due(self, now: Optional[datetime] = None) -> List[str]:
+        """
+        Vrací:
+            Tickery ze seznamu, které ve snímku chybí nebo jsou starší než interval
+            obnovy (bez tickerů, jejichž další pokus po selhání ještě nenastal)
+        """
+        now = now or datetime.utcnow()
+        expired = now - timedelta(seconds=self.refresh_interval)
+        due = []
+        for ticker in self.universe:
+            record = self._records.get(ticker)
+            if record is not None and record.updated_at is not None and record.updated_at >= expired:
+                continue
+            failure = self._failures.get(ticker)
+            if failure is not None and failure[1] > now:
+                continue
+            due.append(ticker)
+        return due
+
+    def is_stale(self) -> bool:
+        """
+        Vrací:
+            True, pokud je co obnovit (viz due)
+        """
+        return bool(self.due())
+
+    def _record_failures(self, tickers: Iterable[str], now: datetime) -> None:
+        for ticker in tickers:
+            count = self._failures.get(ticker, (0, now))[0] + 1
+            delay = min(self.failure_backoff * 2 ** (count - 1), MAX_FAILURE_BACKOFF)
+            self._failures[ticker] = (count, now + timedelta(seconds=delay))
+
+    def fetch(self, tickers: Sequence[str]) -> List[FundamentalsRecord]:
+        """
+        Stáhne fundamenty pro dávku tickerů (ceny hromadně, profily souběžně).
+
+        Parametry:
+            tickers: Tickery dávky
+
+        Vrací:
+            Záznamy pro tickery, které se podařilo stáhnout
+        """
+        prices = StockData.get_prices(tickers)
+        now = datetime.utcnow()
+
+        def profile(ticker: str) -> Optional[FundamentalsRecord]:
+            try:
+                return FundamentalsRecord.from_profile(ticker, StockData(ticker).get_profile(), prices.get(ticker), now)
+            except Exception as e:
+                logger.warning("Fundamenty %s se nepodařilo stáhnout: %s", ticker, e)
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            return [record for record in executor.map(profile, tickers) if record is not None]
+
+    def save(self, records: Sequence[FundamentalsRecord]) -> None:
+        """
+        Uloží záznamy do tabulky Fundamentals (nahradí stávající řádky tickerů).
+        """
+        if not records:
+            return
+        with session_scope(immediate=True) as session:
+            session.execute(delete(Fundamentals).where(Fundamentals.ticker.in_([r.ticker for r in records])))
+            session.execute(insert(Fundamentals), [asdict(record) for record in records])
+
+    def refresh(self, tickers: Optional[Iterable[str]] = None) -> int:
+        """
+        Obnoví snímek po dávkách; po každé dávce je nový stav hned viditelný.
+        Souběžná obnova se nespouští (vrátí 0).
+
+        Parametry:
+            tickers: Tickery k obnovení (výchozí chybějící a zastaralé, viz due)
+
+        Vrací:
+            Počet obnovených tickerů
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            logger.info("Obnova screeneru už běží")
+            return 0
+        try:
+            tickers = list(dict.fromkeys(self.due() if tickers is None else tickers))
+            refreshed = 0
+            for start in range(0, len(tickers), self.batch_size):
+                batch = tickers[start:start + self.batch_size]
+                records = self.fetch(batch)
+                self.save(records)
+                self._records.update((record.ticker, record) for record in records)
+                self._snapshot = ScreenerSnapshot(list(self._records.values()))
+                fetched = {record.ticker for record in records}
+                for ticker in fetched:
+                    self._failures.pop(ticker, None)
+                self._record_failures([ticker for ticker in batch if ticker not in fetched], datetime.utcnow())
+                refreshed += len(records)
+            logger.info("Screener obnoven: %s z %s tickerů", refreshed, len(tickers))
+            return refreshed
+        finally:
+            self._refresh_lock.release()
+
+    def start(self, app: Any) -> None:
+        """
+        Spustí vlákno, které obnovuje snímek, když je zastaralý.
+
+        Parametry:
+            app: Flask aplikace (vlákno potřebuje její kontext pro databázi)
+        """
+        if self.refresh_interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+
+        def run() -> None:
+            # První kontrola hned po startu, další v intervalu obnovy
+            wait = 0.0
+            while not self._stop_event.wait(wait):
+                wait = min(self.refresh_interval, 3600.0)
+                try:
+                    with app.app_context():
+                        if self.is_stale():
+                            self.refresh()
+                except Exception as e:
+                    logger.error("Chyba při obnově screeneru: %s", e)
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=run, name="screener-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Zastaví vlákno obnovy."""
+        self._stop_event.set()
+
+
+def load_universe(source: str, symbols: Iterable[Any] = ()) -> List[str]:
+    """
+    Seznam tickerů pro screener.
+
+    Parametry:
+        source: Cesta k souboru (ticker v prvním sloupci) nebo tickery oddělené
+            čárkou; prázdný řetězec = akcie z lokálního seznamu symbolů
+        symbols: Lokální seznam symbolů (Symbol s atributy symbol a exchange)
+
+    Vrací:
+        Tickery bez duplicit
+    """
+    if not source:
+        return [entry.symbol for entry in symbols if entry.exchange not in NON_EQUITY_EXCHANGES]
+    if os.path.isfile(source):
+        with open(source, newline="", encoding="utf-8") as handle:
+            values = [row[0] for row in csv.reader(handle) if row and row[0].strip().lower() not in ("symbol", "ticker")]
+    else:
+        values = [source]
+    tickers, invalid = parse_tickers(values)
+    if invalid:
+        logger.warning("Neplatné tickery v seznamu screeneru: %s", invalid[:20])
+    return tickers
+
+
+# Sdílený screener pro celou aplikaci
+screener_service = ScreenerService()
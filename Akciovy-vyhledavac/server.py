@@ -1,36 +1,297 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
+from flask import (Flask, Response, render_template, request, jsonify, redirect, url_for, flash, session, g,
+                   send_file, stream_with_context)
+import dataclasses
+import io
+import json
 import logging
 import os
+import queue
+import tempfile
 from datetime import datetime
+import click
+import numpy as np
 from stock_data import StockData
 from api_handler import APIHandler
 from graph_generator import GraphGenerator
 from portfolio import Portfolio
 from user import User
-from models import db, Portfolio as DB_Portfolio, PortfolioItem
+from valuation import PortfolioValuation
+from positions import PortfolioView
+from market_cache import quote_cache, history_cache
+from portfolio_service import portfolio_service
+from account_service import account_service
+from pagination import Page
+from importer import CsvPositionReader, TICKER_PATTERN
+from exporter import Exporter, POSITION_COLUMNS, TRANSACTION_COLUMNS, HISTORY_COLUMNS
+from equity_curve import equity_curves
+from risk import risk_analyzer
+from comparison import Comparison, parse_tickers
+from correlation import correlation_analyzer, WINDOWS
+from indicators import indicator_engine, INDICATORS
+from symbol_index import symbol_index
+from screener import screener_service, load_universe, ScreenerQuery, SCREENER_FIELDS
+from news_handler import article_fetcher
+from news_store import news_service, feed_sources
+from translation import translation_service, translation_backend
+from alerts import alert_engine, ALERT_KINDS
+from prefetch import prefetch_scheduler
+from cache_snapshot import cache_snapshot
+from models import db, upgrade_schema, PriceAlert
+from database import configure_engine, engine_options
+from config import Config
+from profiler import RequestProfiler
+from logging_config import setup_logging
 
-# Konfigurace logování
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+app.config.from_object(Config)
+setup_logging(app.config)
 app.secret_key = os.environ.get("SESSION_SECRET", "default-secret-key")
+StockData.offline = app.config["STOCK_DATA_OFFLINE"]
+quote_cache.ttl = app.config["QUOTE_CACHE_TTL"]
+history_cache.ttl = app.config["HISTORY_CACHE_TTL"]
+portfolio_service.max_states = app.config["PORTFOLIO_CACHE_SIZE"]
+risk_analyzer.benchmark = app.config["RISK_BENCHMARK"]
+risk_analyzer.period = app.config["RISK_PERIOD"]
+symbol_index.load(app.config["SYMBOLS_FILE"])
+symbol_index.negative_ttl = app.config["SYMBOLS_NEGATIVE_TTL"]
+screener_service.refresh_interval = app.config["SCREENER_REFRESH_INTERVAL"]
+screener_service.batch_size = app.config["SCREENER_BATCH_SIZE"]
+screener_service.workers = app.config["SCREENER_WORKERS"]
+screener_service.universe = load_universe(app.config["SCREENER_UNIVERSE"], symbol_index)
+translation_service.backend = translation_backend("local" if StockData.offline else app.config["TRANSLATION_BACKEND"],
+                                                  app.config["TRANSLATION_TIMEOUT"])
+translation_service.max_entries = app.config["TRANSLATION_CACHE_SIZE"]
+article_fetcher.max_workers = app.config["NEWS_FETCH_WORKERS"]
+article_fetcher.per_host = app.config["NEWS_PER_HOST"]
+article_fetcher.timeout = app.config["NEWS_FETCH_TIMEOUT"]
+article_fetcher.ttl = app.config["NEWS_SUMMARY_TTL"]
+news_service.sources = feed_sources(app.config["NEWS_FEEDS"], app.config["NEWS_PER_TICKER"],
+                                    app.config["NEWS_FETCH_WORKERS"])
+news_service.tickers = load_universe(app.config["NEWS_TICKERS"], symbol_index)
+news_service.interval = app.config["NEWS_INGEST_INTERVAL"]
+news_service.retention_days = app.config["NEWS_RETENTION_DAYS"]
+alert_engine.poll_interval = app.config["ALERT_POLL_INTERVAL"]
+alert_engine.max_per_user = app.config["ALERT_MAX_PER_USER"]
+prefetch_scheduler.interval = app.config["PREFETCH_INTERVAL"]
+prefetch_scheduler.quote_interval = app.config["PREFETCH_QUOTE_INTERVAL"]
+prefetch_scheduler.history_interval = app.config["PREFETCH_HISTORY_INTERVAL"]
+prefetch_scheduler.hot_size = app.config["PREFETCH_HOT_SIZE"]
+prefetch_scheduler.half_life = app.config["PREFETCH_HALF_LIFE"]
+prefetch_scheduler.max_stale = app.config["STALE_MAX_AGE"]
+StockData.scheduler = prefetch_scheduler
+cache_snapshot.path = app.config["CACHE_SNAPSHOT_PATH"]
+cache_snapshot.interval = app.config["CACHE_SNAPSHOT_INTERVAL"]
+cache_snapshot.max_age = app.config["STALE_MAX_AGE"]
+# Cache z minulého běhu (historie se sestaví ze souboru až při prvním použití)
+cache_snapshot.load()
 
-# Použití SQLite pro lokální vývoj místo PostgreSQL
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///portfolio.db"
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)
 db.init_app(app)
 
+# Volitelné profilování jednotlivých požadavků (viz profiler.py)
+profiler = RequestProfiler(app)
+
 # Inicializace databáze
+default_user_id = None
+default_portfolio_id = None
 with app.app_context():
+    configure_engine(db.engine, app.config["SQLITE_BUSY_TIMEOUT_MS"])
     try:
         db.create_all()
+        upgrade_schema()
         logger.info("Databázové tabulky byly úspěšně vytvořeny")
+        # Výchozí účet pro nepřihlášené návštěvníky; převezme portfolia z doby před uživateli
+        default_user_id = account_service.ensure_user(app.config["DEFAULT_USERNAME"], app.config["DEFAULT_EMAIL"]).id
+        account_service.adopt_orphan_portfolios(default_user_id)
+        default_portfolio_id = account_service.default_portfolio_id(default_user_id)
+        # Portfolia z doby před knihou transakcí dostanou počáteční nákupy
+        portfolio_service.backfill_all()
+        # Uložený snímek fundamentů je ve screeneru hned; obnova běží na pozadí
+        screener_service.load()
+        # Aktivní cenová upozornění do seřazených polí hranic
+        alert_engine.load()
     except Exception as e:
-        logger.error(f"Chyba při vytváření databázových tabulek: {str(e)}")
+        logger.error("Chyba při vytváření databázových tabulek: %s", e)
+screener_service.start(app)
+news_service.start(app)
+alert_engine.start(app)
+prefetch_scheduler.start(app)
+cache_snapshot.start()
+
+# Časová období nabízená ve formulářích
+PERIODS = [
+    {"value": "1mo", "label": "1 měsíc"},
+    {"value": "3mo", "label": "3 měsíce"},
+    {"value": "6mo", "label": "6 měsíců"},
+    {"value": "1y", "label": "1 rok"},
+    {"value": "2y", "label": "2 roky"},
+    {"value": "5y", "label": "5 let"},
+    {"value": "10y", "label": "10 let"},
+]
+PERIOD_VALUES = {period["value"] for period in PERIODS}
+
+# Technické indikátory nabízené k zobrazení v grafu akcie
+INDICATOR_OPTIONS = [
+    {"value": "sma", "label": "SMA 20/50/200"},
+    {"value": "ema", "label": "EMA 20"},
+    {"value": "bollinger", "label": "Bollinger"},
+    {"value": "volume", "label": "Objem"},
+    {"value": "rsi", "label": "RSI 14"},
+    {"value": "macd", "label": "MACD"},
+]
+
+def known_ticker(ticker: str, verify: bool = False) -> bool:
+    """
+    Ověří symbol ještě před voláním yfinance: formát a ve striktním režimu
+    i přítomnost v lokálním seznamu symbolů (překlepy tak nevedou na upstream).
+    Platí stejně pro vyhledávání, API, portfolio i import.
+
+    Symbol mimo seznam lze ověřit u yfinance (výsledek se pamatuje), ale jen
+    při zápisech (verify=True, přidání do portfolia a import) a jen se
+    zapnutým SYMBOLS_VERIFY_UPSTREAM - čtecí požadavky na upstream nečekají,
+    jen přijmou symbol, který už dříve ověřen byl.
+
+    Parametry:
+        ticker: Symbol akcie (velkými písmeny)
+        verify: Zda smí symbol mimo seznam ověřit u yfinance
+
+    Vrací:
+        True, pokud lze pro symbol stahovat data
+    """
+    if not TICKER_PATTERN.match(ticker):
+        return False
+    if not app.config["SYMBOLS_STRICT"] or not len(symbol_index) or ticker in symbol_index:
+        return True
+    if not verify or not app.config["SYMBOLS_VERIFY_UPSTREAM"]:
+        # Symbol ověřený dříve při zápisu (např. v portfoliu) platí i pro čtení
+        return symbol_index.verified(ticker)
+    return symbol_index.verify(ticker, StockData.exists)
 
-# Ukládání dat aktivního uživatele v paměti (v reálné aplikaci by byla uložena v databázi)
-active_user = User(username="Demo User", email="demo@example.com")
+def known_ticker_verified(ticker: str) -> bool:
+    """
+    known_ticker pro zápisy (symbol mimo seznam se smí ověřit u yfinance).
+    """
+    return known_ticker(ticker, verify=True)
+
+def ticker_suggestions(ticker: str, limit: int = 3) -> list[str]:
+    """
+    Vrací:
+        Symboly podobné neznámému tickeru (pro nápovědu "Měli jste na mysli")
+    """
+    return [entry.symbol for entry in symbol_index.search(ticker, limit)]
+
+def current_user() -> User:
+    """
+    Uživatel aktuálního požadavku podle session (nepřihlášený návštěvník
+    pracuje s výchozím účtem). Vybrané portfolio se do session ukládá až po
+    ověření vlastnictví, takže stačí jeden dotaz na uživatele podle klíče.
+
+    Vrací:
+        User s portfoliem napojeným na portfolio_service
+    """
+    if "user" not in g:
+        account = account_service.get(session["user_id"]) if "user_id" in session else None
+        if account is None:
+            session.pop("user_id", None)
+            session.pop("portfolio_id", None)
+            account = account_service.get(default_user_id)
+            portfolio_id = default_portfolio_id
+        else:
+            portfolio_id = session.get("portfolio_id") or account_service.default_portfolio_id(account.id)
+        
+        state = portfolio_service.state(portfolio_id)
+        g.user = User(
+            username=account.username,
+            email=account.email,
+            portfolio=Portfolio(name=state.name, service=portfolio_service, portfolio_id=portfolio_id),
+            user_id=account.id
+        )
+    return g.user
+
+@app.context_processor
+def inject_current_user():
+    return {"current_user": current_user}
+
+@app.route("/login", methods=["GET", "POST"])
+def login():
+    """
+    Přihlášení uživatele jménem, e-mailem a heslem (neznámý uživatel se založí).
+
+    Sdílený výchozí účet nepřihlášených návštěvníků se přihlásit nedá.
+    """
+    if request.method == "POST":
+        username = request.form.get("username", "").strip()
+        email = request.form.get("email", "").strip()
+        password = request.form.get("password", "")
+        if not username or not email or not password:
+            flash("Prosím vyplňte uživatelské jméno, e-mail i heslo", "danger")
+            return redirect(url_for("login"))
+        if username == app.config["DEFAULT_USERNAME"]:
+            flash("Výchozí účet je sdílený, zvolte jiné uživatelské jméno", "danger")
+            return redirect(url_for("login"))
+        try:
+            account = account_service.authenticate(username, email, password)
+        except ValueError as e:
+            logger.info("Login rejected for %s", username)
+            flash(str(e), "danger")
+            return redirect(url_for("login"))
+        except Exception as e:
+            logger.warning("Login failed for %s: %s", username, e)
+            flash("Uživatele se nepodařilo přihlásit (e-mail už může být použit)", "danger")
+            return redirect(url_for("login"))
+        session.clear()
+        session["user_id"] = account.id
+        session["portfolio_id"] = account_service.default_portfolio_id(account.id)
+        flash(f"Přihlášen jako {account.username}", "success")
+        return redirect(url_for("portfolio"))
+    
+    return render_template("login.html")
+
+@app.route("/logout", methods=["POST"])
+def logout():
+    session.clear()
+    flash("Byli jste odhlášeni", "success")
+    return redirect(url_for("index"))
+
+@app.route("/portfolios", methods=["GET", "POST"])
+def portfolios():
+    """
+    Přehled portfolií uživatele a založení nového
+    """
+    user = current_user()
+    if request.method == "POST":
+        name = request.form.get("name", "").strip()
+        if not name:
+            flash("Prosím zadejte název portfolia", "danger")
+        else:
+            session["user_id"] = user.user_id
+            session["portfolio_id"] = account_service.create_portfolio(user.user_id, name[:100])
+            flash(f"Portfolio {name} bylo založeno", "success")
+            return redirect(url_for("portfolio"))
+    
+    page_number = request.args.get("page", 1, type=int)
+    per_page = 20
+    listings, total = account_service.portfolios(user.user_id, page_number, per_page)
+    page = Page.of(page_number, per_page, total)
+    if page.number != page_number:
+        listings, total = account_service.portfolios(user.user_id, page.number, per_page)
+    
+    return render_template("portfolios.html",
+                           listings=listings,
+                           page=page,
+                           selected_id=user.portfolio.portfolio_id)
+
+@app.route("/portfolios/<int:portfolio_id>/select", methods=["POST"])
+def select_portfolio(portfolio_id):
+    user = current_user()
+    if not account_service.owns(user.user_id, portfolio_id):
+        flash("Portfolio nebylo nalezeno", "danger")
+        return redirect(url_for("portfolios"))
+    session["user_id"] = user.user_id
+    session["portfolio_id"] = portfolio_id
+    return redirect(url_for("portfolio"))
 
 @app.route("/", methods=["GET", "POST"])
 def index():
@@ -40,22 +301,22 @@ def index():
     selected_period = "1mo"
     company_info = None
     news_items = []
-    periods = [
-        {"value": "1mo", "label": "1 měsíc"},
-        {"value": "3mo", "label": "3 měsíce"},
-        {"value": "6mo", "label": "6 měsíců"},
-        {"value": "1y", "label": "1 rok"},
-        {"value": "2y", "label": "2 roky"},
-        {"value": "5y", "label": "5 let"},
-    ]
+    periods = PERIODS
+    selected_indicators = []
 
     if request.method == "POST":
         ticker = request.form.get("ticker", "").strip().upper()
         selected_period = request.form.get("period", "1mo")
+        selected_indicators = [name for name in request.form.getlist("indicators") if name in INDICATORS]
 
-        if ticker:
+        if ticker and not known_ticker(ticker):
+            error = f"Neznámý symbol akcie {ticker}"
+            suggestions = ticker_suggestions(ticker)
+            if suggestions:
+                error += f". Měli jste na mysli: {', '.join(suggestions)}?"
+        elif ticker:
             try:
-                logger.debug(f"Fetching stock data for {ticker} with period {selected_period}")
+                logger.debug("Fetching stock data for %s with period %s", ticker, selected_period)
                 stock_data = APIHandler.fetch_stock_data(ticker, period=selected_period)
                 company_info = APIHandler.fetch_company_info(ticker)
                 
@@ -65,20 +326,21 @@ def index():
                 if not stock_data.empty:
                     try:
                         # Získání názvu souboru s obrázkem z GraphGenerator
-                        image_filename = GraphGenerator.plot_stock(stock_data, ticker, selected_period)
+                        image_filename = GraphGenerator.plot_stock(stock_data, ticker, selected_period,
+                                                                   overlays=selected_indicators)
                         if image_filename:
                             # Nastavení URL obrázku pro šablonu
                             chart = url_for('static', filename=f'images/{image_filename}')
-                            logger.debug(f"Generated chart at: {chart}")
+                            logger.debug("Generated chart at: %s", chart)
                         else:
                             error = f"Nepodařilo se vytvořit graf pro {ticker}"
                     except Exception as e:
-                        logger.error(f"Error generating plot: {str(e)}")
+                        logger.error("Error generating plot: %s", e)
                         error = f"Chyba při generování grafu: {str(e)}"
                 else:
                     error = f"Nepodařilo se načíst data pro {ticker}"
             except Exception as e:
-                logger.error(f"Error processing request: {str(e)}")
+                logger.error("Error processing request: %s", e)
                 error = f"Chyba při zpracování požadavku: {str(e)}"
         else:
             error = "Zadejte prosím symbol akcie"
@@ -89,6 +351,8 @@ def index():
                            ticker=ticker,
                            selected_period=selected_period,
                            periods=periods,
+                           indicator_options=INDICATOR_OPTIONS,
+                           selected_indicators=selected_indicators,
                            company_info=company_info,
                            news_items=news_items)
 
@@ -99,6 +363,8 @@ def get_stock_data():
     
     if not ticker:
         return jsonify({"error": "Ticker symbol is required"}), 400
+    if not known_ticker(ticker):
+        return jsonify({"error": f"Unknown ticker: {ticker}", "suggestions": ticker_suggestions(ticker)}), 400
     
     try:
         data = APIHandler.fetch_stock_data(ticker, period=period)
@@ -108,7 +374,65 @@ def get_stock_data():
             "data": data.to_dict(orient="records")
         })
     except Exception as e:
-        logger.error(f"API error: {str(e)}")
+        logger.error("API error: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/symbols/search", methods=["GET"])
+def search_symbols():
+    """
+    Našeptávání symbolů podle tickeru nebo názvu společnosti (JSON).
+
+    Parametry (query):
+        q: Zadaný text
+        limit: Nejvyšší počet výsledků
+    """
+    query = request.args.get("q", "").strip()[:64]
+    limit = min(max(request.args.get("limit", app.config["SYMBOL_SEARCH_LIMIT"], type=int), 1), 50)
+    return jsonify({
+        "query": query,
+        "results": [entry.to_dict() for entry in symbol_index.search(query, limit)],
+    })
+
+@app.route("/api/indicators", methods=["GET"])
+def get_indicators():
+    """
+    Technické indikátory pro historii akcie (JSON).
+
+    Parametry (query):
+        ticker: Symbol akcie
+        period: Časové období
+        indicators: Skupiny indikátorů oddělené čárkou (výchozí všechny)
+    """
+    ticker = request.args.get("ticker", "").strip().upper()
+    period = request.args.get("period", "1y")
+    requested = [name.strip().lower() for name in request.args.get("indicators", "").split(",") if name.strip()]
+
+    if not ticker:
+        return jsonify({"error": "Ticker symbol is required"}), 400
+    if not known_ticker(ticker):
+        return jsonify({"error": f"Unknown ticker: {ticker}", "suggestions": ticker_suggestions(ticker)}), 400
+    if period not in PERIOD_VALUES:
+        return jsonify({"error": f"Unsupported period: {period}"}), 400
+    unknown = [name for name in requested if name not in INDICATORS]
+    if unknown:
+        return jsonify({"error": f"Unsupported indicators: {', '.join(unknown)}"}), 400
+
+    try:
+        data = APIHandler.fetch_stock_data(ticker, period=period)
+        if data.empty:
+            return jsonify({"error": f"No data for {ticker}"}), 404
+        columns = indicator_engine.select(indicator_engine.compute(ticker, data), requested or INDICATORS)
+        return jsonify({
+            "ticker": ticker,
+            "period": period,
+            "dates": [str(day) for day in data.index.date],
+            "close": np.round(data["Close"].to_numpy(dtype=float), 4).tolist(),
+            # NaN (nenaplněné okno) není platné JSON
+            "indicators": {name: np.where(np.isnan(values), None, np.round(values, 4)).tolist()
+                           for name, values in columns.items()},
+        })
+    except Exception as e:
+        logger.error("API error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route("/portfolio", methods=["GET"])
@@ -116,126 +440,70 @@ def portfolio():
     """
     View user's portfolio
     """
-    # V reálné aplikaci bychom načítali uživatele ze session a jeho portfolio
-    # z databáze. Tady používáme active_user z paměti.
+    # Neměnný snímek pozic ze služby - zobrazení stránky nic nezapisuje
+    state = portfolio_service.state(current_user().portfolio.portfolio_id)
     
-    # Také načteme data z databáze pro zachování kompatibility se stávajícím kódem
-    db_portfolio = DB_Portfolio.query.first()
-    if not db_portfolio:
-        db_portfolio = DB_Portfolio(name="Moje Portfolio")
-        db.session.add(db_portfolio)
-        db.session.commit()
+    items = state.positions
+    page = Page.of(request.args.get("page", 1, type=int), app.config["PORTFOLIO_PAGE_SIZE"], len(items))
+    page_items = items[page.start:page.end]
     
-    # Vytvoření cache pro data akcií, aby se zabránilo opakovaným API voláním pro stejný ticker
-    stock_cache = {}
-    
-    # Synchronizace portfolia v paměti s databází pro demonstrační účely
-    portfolio_items = []
-    tickers = []
-    
-    # První průchod - shromáždění všech ticker symbolů
-    for item in db_portfolio.items:
-        tickers.append(item.ticker)
-        
-        # Přidání do portfolia v paměti, pokud tam ještě není
-        active_user.add_to_portfolio(
-            item.ticker,
-            item.quantity,
-            item.purchase_price,
-            item.purchase_date,
-            item.notes
-        )
+    # Ceny jsou potřeba pro všechny tickery (souhrn), názvy společností jen pro zobrazenou stránku
+    prices = {}
+    for ticker in dict.fromkeys(item.ticker for item in items):
+        try:
+            prices[ticker] = StockData(ticker).get_price()
+        except Exception as e:
+            logger.error("Error pre-loading data for %s: %s", ticker, e)
+            prices[ticker] = 0.0
     
-    # Hromadné načtení všech dat akcií nejprve pro zlepšení výkonu
-    for ticker in tickers:
+    company_names = {}
+    for ticker in dict.fromkeys(item.ticker for item in page_items):
         try:
-            if ticker not in stock_cache:
-                stock = StockData(ticker)
-                # Uložení instance akcie a informací o společnosti do cache pro opakované použití
-                stock_cache[ticker] = {
-                    'stock': stock,
-                    'price': stock.get_price(),
-                    'company_info': stock.get_company_info()
-                }
+            company_names[ticker] = StockData(ticker).get_company_info().get('name', ticker)
         except Exception as e:
-            logger.error(f"Error pre-loading data for {ticker}: {str(e)}")
-            # Vytvoření prázdného záznamu v cache, aby se zabránilo opakovaným neúspěšným API voláním
-            stock_cache[ticker] = {
-                'stock': None,
-                'price': 0.0,
-                'company_info': {'name': ticker}
-            }
-    
-    # Druhý průchod - sestavení položek portfolia s využitím dat z cache
-    for item in db_portfolio.items:
+            logger.error("Error loading company info for %s: %s", ticker, e)
+            company_names[ticker] = ticker
+    
+    # Souhrn se počítá vektorově přes všechny položky, řádky šablony jen pro stránku
+    # (pohledy do sloupců ocenění, bez slovníku na řádek)
+    valuation = PortfolioValuation(
+        [item.quantity for item in items],
+        [item.purchase_price for item in items],
+        [prices[item.ticker] for item in items]
+    )
+    portfolio_summary = valuation.summary()
+    page_valuation = PortfolioValuation(
+        valuation.quantities[page.start:page.end],
+        valuation.purchase_prices[page.start:page.end],
+        valuation.current_prices[page.start:page.end]
+    )
+    portfolio_items = PortfolioView(page_items, page_valuation, company_names)
+    
+    # Rizikové ukazatele (počítají se jednou za obchodní den a stav portfolia)
+    risk = None
+    if state.positions:
         try:
-            ticker = item.ticker
-            
-            # Získání dat z cache
-            cache_data = stock_cache.get(ticker, {})
-            current_price = cache_data.get('price', 0.0)
-            company_info = cache_data.get('company_info', {'name': ticker})
-            
-            # Výpočet hodnot
-            current_value = item.quantity * current_price
-            cost_basis = item.quantity * item.purchase_price
-            gain_loss = current_value - cost_basis
-            gain_loss_percent = (gain_loss / cost_basis) * 100 if cost_basis > 0 else 0
-            
-            # Získání názvu společnosti z informací v cache
-            company_name = company_info.get('name', ticker)
-            
-            # Přidání do položek portfolia pro zobrazení
-            portfolio_items.append({
-                'id': item.id,
-                'ticker': item.ticker,
-                'company_name': company_name,
-                'quantity': item.quantity,
-                'purchase_price': item.purchase_price,
-                'purchase_date': item.purchase_date,
-                'current_price': current_price,
-                'current_value': current_value,
-                'cost_basis': cost_basis,
-                'gain_loss': gain_loss,
-                'gain_loss_percent': gain_loss_percent,
-                'notes': item.notes
-            })
+            risk = risk_analyzer.analyze(state)
         except Exception as e:
-            logger.error(f"Error processing portfolio item {item.ticker}: {str(e)}")
-    
-    # Výpočet výkonnosti portfolia pomocí dat z cache
-    total_value = sum(item['current_value'] for item in portfolio_items)
-    total_cost = sum(item['cost_basis'] for item in portfolio_items)
-    total_gain_loss = total_value - total_cost
-    total_gain_loss_percent = (total_gain_loss / total_cost) * 100 if total_cost > 0 else 0
-    
-    portfolio_summary = {
-        'total_value': total_value,
-        'total_cost': total_cost,
-        'total_gain_loss': total_gain_loss,
-        'total_gain_loss_percent': total_gain_loss_percent
-    }
+            logger.error("Risk analysis failed: %s", e)
     
     return render_template("portfolio.html", 
-                           portfolio=db_portfolio,
+                           portfolio=state,
                            portfolio_items=portfolio_items,
                            total_value=portfolio_summary['total_value'],
                            total_cost=portfolio_summary['total_cost'],
                            total_gain_loss=portfolio_summary['total_gain_loss'],
-                           total_gain_loss_percent=portfolio_summary['total_gain_loss_percent'])
+                           total_gain_loss_percent=portfolio_summary['total_gain_loss_percent'],
+                           realized_pl=state.realized_pl,
+                           page=page,
+                           tickers=sorted({item.ticker for item in items}),
+                           risk=risk)
 
 @app.route("/portfolio/add", methods=["GET", "POST"])
 def add_to_portfolio():
     """
     Add stock to portfolio
     """
-    # Získání nebo vytvoření výchozího portfolia
-    db_portfolio = DB_Portfolio.query.first()
-    if not db_portfolio:
-        db_portfolio = DB_Portfolio(name="Moje Portfolio")
-        db.session.add(db_portfolio)
-        db.session.commit()
-    
     if request.method == "POST":
         ticker = request.form.get("ticker", "").strip().upper()
         quantity_str = request.form.get("quantity", "")
@@ -247,6 +515,13 @@ def add_to_portfolio():
         if not ticker or not quantity_str or not purchase_price_str:
             flash("Prosím vyplňte všechna povinná pole", "danger")
             return redirect(url_for("add_to_portfolio"))
+        if not known_ticker(ticker, verify=True):
+            error = f"Neznámý symbol akcie {ticker}"
+            suggestions = ticker_suggestions(ticker)
+            if suggestions:
+                error += f". Měli jste na mysli: {', '.join(suggestions)}?"
+            flash(error, "danger")
+            return redirect(url_for("add_to_portfolio"))
         
         try:
             quantity = float(quantity_str)
@@ -256,33 +531,24 @@ def add_to_portfolio():
                 purchase_date = datetime.strptime(purchase_date_str, "%Y-%m-%d")
             else:
                 purchase_date = datetime.utcnow()
-            
-            # Přidání jak do portfolia v paměti, tak do databáze
-            success = active_user.add_to_portfolio(
+        except ValueError:
+            flash("Neplatné hodnoty. Množství a cena musí být čísla.", "danger")
+            return redirect(url_for("add_to_portfolio"))
+        
+        try:
+            # Zápis jde přes portfolio_service (databáze, zneplatnění stavu, souhrn)
+            success = current_user().add_to_portfolio(
                 ticker, quantity, purchase_price, purchase_date, notes
             )
             
             if success:
-                # Přidání do databáze
-                portfolio_item = PortfolioItem(
-                    portfolio_id=db_portfolio.id,
-                    ticker=ticker,
-                    quantity=quantity,
-                    purchase_price=purchase_price,
-                    purchase_date=purchase_date,
-                    notes=notes
-                )
-                
-                db.session.add(portfolio_item)
-                db.session.commit()
-                
                 flash(f"{ticker} úspěšně přidán do portfolia", "success")
                 return redirect(url_for("portfolio"))
             else:
                 flash(f"Chyba při přidávání akcie {ticker} do portfolia", "danger")
                 
-        except ValueError:
-            flash("Neplatné hodnoty. Množství a cena musí být čísla.", "danger")
+        except ValueError as e:
+            flash(f"Neplatné hodnoty: {str(e)}", "danger")
         except Exception as e:
             flash(f"Chyba při přidávání do portfolia: {str(e)}", "danger")
     
@@ -297,7 +563,7 @@ def add_to_portfolio():
             stock = StockData(ticker)
             current_price = stock.get_price()
         except Exception as e:
-            logger.error(f"Error getting current price for {ticker}: {str(e)}")
+            logger.error("Error getting current price for %s: %s", ticker, e)
     
     return render_template("add_to_portfolio.html", 
                           ticker=ticker, 
@@ -310,22 +576,275 @@ def delete_from_portfolio(item_id):
     Delete stock from portfolio
     """
     try:
-        # Nalezení položky v databázi
-        portfolio_item = PortfolioItem.query.get_or_404(item_id)
-        ticker = portfolio_item.ticker
+        removed = portfolio_service.remove_position(item_id, current_user().portfolio.portfolio_id)
+        if removed is None:
+            flash("Položka portfolia nebyla nalezena", "danger")
+        else:
+            flash(f"{removed.ticker} byl odebrán z portfolia", "success")
+    except Exception as e:
+        flash(f"Chyba při odebírání z portfolia: {str(e)}", "danger")
+    
+    return redirect(url_for("portfolio"))
+
+@app.route("/portfolio/import", methods=["GET", "POST"])
+def import_portfolio():
+    """
+    Hromadný import pozic z CSV souboru od brokera
+    """
+    result = None
+    if request.method == "POST":
+        upload = request.files.get("file")
+        if upload is None or not upload.filename:
+            flash("Prosím vyberte CSV soubor", "danger")
+            return redirect(url_for("import_portfolio"))
         
-        # Odstranění jak z paměti, tak z databáze
-        active_user.remove_from_portfolio(ticker)
+        strict = request.form.get("strict") == "on"
+        stream = io.TextIOWrapper(upload.stream, encoding="utf-8-sig", newline="")
+        try:
+            result = portfolio_service.import_positions(
+                current_user().portfolio.portfolio_id,
+                CsvPositionReader(stream, known_ticker=known_ticker_verified),
+                batch_size=app.config["IMPORT_BATCH_SIZE"],
+                strict=strict
+            )
+            # Ceny všech importovaných tickerů jedním hromadným voláním
+            result.prices = StockData.get_prices(result.tickers)
+        except UnicodeDecodeError:
+            flash("Soubor není v kódování UTF-8", "danger")
+            return redirect(url_for("import_portfolio"))
+        except Exception as e:
+            logger.error("Import failed: %s", e)
+            flash(f"Chyba při importu: {str(e)}", "danger")
+            return redirect(url_for("import_portfolio"))
         
-        db.session.delete(portfolio_item)
-        db.session.commit()
+        if result.committed:
+            flash(f"Importováno {result.imported} položek ({len(result.errors)} řádků s chybou)",
+                  "success" if not result.errors else "warning")
+        else:
+            flash(f"Import zrušen - soubor obsahuje {len(result.errors)} chybných řádků", "danger")
+    
+    return render_template("import.html", result=result)
+
+@app.cli.command("import-positions")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--username", default=None, help="Uživatel, do jehož portfolia se importuje (výchozí účet; nový účet je bez hesla, viz set-password)")
+@click.option("--portfolio-id", type=int, default=None, help="ID portfolia (výchozí portfolio uživatele)")
+@click.option("--strict", is_flag=True, help="Při chybném řádku nic neukládat")
+@click.option("--batch-size", type=int, default=None, help="Velikost dávky pro INSERT")
+def import_positions_command(path, username, portfolio_id, strict, batch_size):
+    """
+    Import pozic z CSV souboru (flask --app server import-positions soubor.csv).
+    """
+    account = account_service.ensure_user(username, f"{username}@localhost") if username \
+        else account_service.get(default_user_id)
+    if portfolio_id is None:
+        portfolio_id = account_service.default_portfolio_id(account.id)
+    elif not account_service.owns(account.id, portfolio_id):
+        raise click.ClickException(f"Portfolio {portfolio_id} nepatří uživateli {account.username}")
+    
+    started = datetime.now()
+    with open(path, encoding="utf-8-sig", newline="") as stream:
+        result = portfolio_service.import_positions(
+            portfolio_id, CsvPositionReader(stream, known_ticker=known_ticker_verified),
+            batch_size=batch_size or app.config["IMPORT_BATCH_SIZE"], strict=strict
+        )
+    result.prices = StockData.get_prices(result.tickers)
+    elapsed = (datetime.now() - started).total_seconds()
+    
+    for error in result.errors[:50]:
+        click.echo(f"řádek {error.line}: {error.message}", err=True)
+    if len(result.errors) > 50:
+        click.echo(f"... a dalších {len(result.errors) - 50} chyb", err=True)
+    if not result.committed:
+        raise click.ClickException("Import zrušen kvůli chybným řádkům (--strict)")
+    click.echo(f"Importováno {result.imported} položek do portfolia {portfolio_id} "
+               f"({len(result.tickers)} tickerů, {len(result.errors)} chyb) za {elapsed:.2f} s")
+
+EXPORT_MIMETYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+def export_response(filename, columns, rows):
+    """
+    Odpověď s exportem ve formátu podle parametru format (csv, parquet).
+
+    CSV se streamuje po blocích. Parquet a CSV požadované s hlavičkou Range
+    (navázání přerušeného stahování) se po částech zapíší do dočasného souboru
+    a odešlou přes send_file, který obslouží i byte-range požadavky.
+    """
+    export_format = request.args.get("format", "csv")
+    if export_format not in EXPORT_MIMETYPES:
+        return jsonify({"error": f"Unsupported format: {export_format}"}), 400
+    if export_format == "parquet" and not Exporter.parquet_available():
+        return jsonify({"error": "Parquet export requires the pyarrow package"}), 501
+    
+    chunk_rows = app.config["EXPORT_CHUNK_ROWS"]
+    download_name = f"{filename}.{export_format}"
+    if export_format == "csv" and "Range" not in request.headers:
+        response = Response(stream_with_context(Exporter.csv_chunks(columns, rows, chunk_rows)), mimetype="text/csv")
+        response.headers["Content-Disposition"] = f'attachment; filename="{download_name}"'
+        return response
+    
+    handle, path = tempfile.mkstemp(suffix=f".{export_format}")
+    os.close(handle)
+    try:
+        if export_format == "csv":
+            with open(path, "w", encoding="utf-8", newline="") as stream:
+                Exporter.write_csv(columns, rows, stream, chunk_rows)
+        else:
+            Exporter.write_parquet(columns, rows, path, chunk_rows)
+        response = send_file(path, mimetype=EXPORT_MIMETYPES[export_format], as_attachment=True,
+                             download_name=download_name, conditional=True)
+    finally:
+        # send_file už má soubor otevřený, odpověď se čte z deskriptoru
+        try:
+            os.unlink(path)
+        except OSError:
+            logger.warning("Dočasný soubor exportu %s nelze smazat", path)
+    return response
+
+@app.route("/export/portfolio/positions", methods=["GET"])
+def export_positions():
+    state = portfolio_service.state(current_user().portfolio.portfolio_id)
+    return export_response(f"portfolio-{state.portfolio_id}-positions", POSITION_COLUMNS, Exporter.positions(state))
+
+@app.route("/export/portfolio/transactions", methods=["GET"])
+def export_transactions():
+    portfolio_id = current_user().portfolio.portfolio_id
+    rows = Exporter.transactions(portfolio_id, app.config["EXPORT_CHUNK_ROWS"])
+    return export_response(f"portfolio-{portfolio_id}-transactions", TRANSACTION_COLUMNS, rows)
+
+@app.route("/export/history/<ticker>", methods=["GET"])
+def export_history(ticker):
+    ticker = ticker.strip().upper()
+    period = request.args.get("period", "1y")
+    if not known_ticker(ticker):
+        return jsonify({"error": f"Invalid ticker: {ticker}"}), 400
+    if period not in PERIOD_VALUES:
+        return jsonify({"error": f"Unsupported period: {period}"}), 400
+    return export_response(f"{ticker}-{period}", HISTORY_COLUMNS, Exporter.history(ticker, period))
+
+@app.route("/portfolio/sell", methods=["POST"])
+def sell_from_portfolio():
+    """
+    Prodej akcií z portfolia (FIFO, zapisuje se do knihy transakcí)
+    """
+    ticker = request.form.get("ticker", "").strip().upper()
+    try:
+        quantity = float(request.form.get("quantity", ""))
+        price = float(request.form.get("price", ""))
+        sale_date_str = request.form.get("sale_date", "")
+        executed_at = datetime.strptime(sale_date_str, "%Y-%m-%d") if sale_date_str else None
         
-        flash(f"{ticker} byl odebrán z portfolia", "success")
+        realized = portfolio_service.sell(current_user().portfolio.portfolio_id, ticker, quantity, price, executed_at)
+        flash(f"Prodáno {quantity:g} ks {ticker}, realizovaný zisk/ztráta {realized:+,.2f} Kč", "success")
+    except ValueError as e:
+        flash(f"Prodej se nezdařil: {str(e)}", "danger")
     except Exception as e:
-        flash(f"Chyba při odebírání z portfolia: {str(e)}", "danger")
+        flash(f"Chyba při prodeji: {str(e)}", "danger")
     
     return redirect(url_for("portfolio"))
 
+@app.route("/api/portfolio/positions", methods=["GET"])
+def api_portfolio_positions():
+    """
+    Materializované pozice s realizovaným a nerealizovaným ziskem
+    """
+    try:
+        state = portfolio_service.state(current_user().portfolio.portfolio_id)
+        positions = []
+        for holding in state.holdings:
+            price = StockData(holding.ticker).get_price() if holding.quantity > 0 else 0.0
+            positions.append({
+                'ticker': holding.ticker,
+                'quantity': holding.quantity,
+                'cost_basis': holding.cost_basis,
+                'average_price': holding.cost_basis / holding.quantity if holding.quantity > 0 else 0.0,
+                'current_price': price,
+                'realized_pl': holding.realized_pl,
+                'unrealized_pl': holding.unrealized_pl(price)
+            })
+        return jsonify({"positions": positions, "realized_pl": state.realized_pl})
+    except Exception as e:
+        logger.error("API error: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/portfolio/equity-curve", methods=["GET"])
+def portfolio_equity_curve():
+    """
+    Graf vývoje hodnoty portfolia v čase
+    """
+    selected_period = request.args.get("period", "1y")
+    if selected_period not in PERIOD_VALUES:
+        selected_period = "1y"
+    
+    chart = None
+    error = None
+    state = portfolio_service.state(current_user().portfolio.portfolio_id)
+    
+    # I zcela prodané portfolio má historii (pozice zůstávají v holdings s nulovým množstvím)
+    if state.positions or state.holdings:
+        curve = equity_curves.get(state, selected_period)
+        if len(curve):
+            image_filename = GraphGenerator.plot_equity_curve(curve.dates, curve.values, curve.costs, selected_period)
+            if image_filename:
+                chart = url_for('static', filename=f'images/{image_filename}')
+            else:
+                error = "Nepodařilo se vytvořit graf hodnoty portfolia"
+        else:
+            error = "Pro pozice v portfoliu nejsou k dispozici cenová data"
+    else:
+        error = "Vaše portfolio je prázdné"
+    
+    return render_template("equity_curve.html",
+                           portfolio=state,
+                           chart=chart,
+                           error=error,
+                           selected_period=selected_period,
+                           periods=PERIODS)
+
+@app.route("/api/portfolio/equity-curve", methods=["GET"])
+def api_portfolio_equity_curve():
+    period = request.args.get("period", "1y")
+    if period not in PERIOD_VALUES:
+        return jsonify({"error": f"Unsupported period: {period}"}), 400
+    
+    try:
+        state = portfolio_service.state(current_user().portfolio.portfolio_id)
+        curve = equity_curves.get(state, period)
+        return jsonify({"period": period, **curve.to_dict()})
+    except Exception as e:
+        logger.error("API error: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/portfolio/risk", methods=["GET"])
+def api_portfolio_risk():
+    period = request.args.get("period", risk_analyzer.period)
+    if period not in PERIOD_VALUES:
+        return jsonify({"error": f"Unsupported period: {period}"}), 400
+    benchmark = request.args.get("benchmark", risk_analyzer.benchmark).strip().upper()
+    if not benchmark:
+        return jsonify({"error": "Benchmark is required"}), 400
+    if not known_ticker(benchmark):
+        return jsonify({"error": f"Unknown ticker: {benchmark}", "suggestions": ticker_suggestions(benchmark)}), 400
+    
+    try:
+        state = portfolio_service.state(current_user().portfolio.portfolio_id)
+        return jsonify(risk_analyzer.analyze(state, benchmark=benchmark, period=period))
+    except Exception as e:
+        logger.error("API error: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+def requested_tickers(values):
+    """
+    Tickery ke srovnání z pole tickers (více symbolů oddělených čárkou)
+    a ze starších polí ticker1 až ticker3.
+
+    Vrací:
+        Dvojici (platné tickery, neplatné a neznámé symboly)
+    """
+    tickers, invalid = parse_tickers([values.get("tickers", "")] + [values.get(f"ticker{i}", "") for i in (1, 2, 3)])
+    unknown = [ticker for ticker in tickers if not known_ticker(ticker)]
+    return [ticker for ticker in tickers if ticker not in unknown], invalid + unknown
+
 @app.route("/compare", methods=["GET", "POST"])
 def compare_stocks():
     """
@@ -333,99 +852,466 @@ def compare_stocks():
     """
     chart = None
     error = None
-    tickers = []
-    selected_period = "1mo"
+    ranking = []
+    missing = []
     
-    periods = [
-        {"value": "1mo", "label": "1 měsíc"},
-        {"value": "3mo", "label": "3 měsíce"},
-        {"value": "6mo", "label": "6 měsíců"},
-        {"value": "1y", "label": "1 rok"},
-        {"value": "2y", "label": "2 roky"},
-        {"value": "5y", "label": "5 let"},
-    ]
+    periods = PERIODS
     
-    if request.method == "POST":
-        # Získání tickerů z formuláře
-        ticker1 = request.form.get("ticker1", "").strip().upper()
-        ticker2 = request.form.get("ticker2", "").strip().upper()
-        ticker3 = request.form.get("ticker3", "").strip().upper()
-        selected_period = request.form.get("period", "1mo")
-        
-        # Sestavení seznamu tickerů (pouze neprázdné)
-        tickers = [t for t in [ticker1, ticker2, ticker3] if t]
-        
-        if tickers:
+    # Formulář (POST) nebo odkaz se symboly v URL (GET)
+    tickers, invalid = requested_tickers(request.values)
+    selected_period = request.values.get("period", "1mo")
+    
+    if request.method == "POST" or tickers or invalid:
+        max_tickers = app.config["COMPARE_MAX_TICKERS"]
+        if invalid:
+            error = f"Neplatné symboly: {', '.join(invalid)}"
+        elif not tickers:
+            error = "Zadejte prosím alespoň jeden symbol akcie"
+        elif len(tickers) > max_tickers:
+            error = f"Najednou lze porovnat nejvýše {max_tickers} akcií"
+        elif selected_period not in PERIOD_VALUES:
+            error = "Neplatné časové období"
+        else:
             try:
-                # Generování srovnávacího grafu
-                image_filename = GraphGenerator.plot_comparison(tickers, selected_period)
+                # Jedno načtení a zarovnání dat pro graf i tabulku
+                comparison = Comparison.load(tickers, selected_period)
+                ranking = comparison.ranking()
+                missing = comparison.missing
+                image_filename = GraphGenerator.plot_comparison(tickers, selected_period, comparison=comparison)
                 if image_filename:
                     chart = url_for('static', filename=f'images/{image_filename}')
-                    logger.debug(f"Generated comparison chart at: {chart}")
+                    logger.debug("Generated comparison chart at: %s", chart)
+                else:
+                    error = "Nepodařilo se načíst data pro zadané akcie"
             except Exception as e:
-                logger.error(f"Error generating comparison chart: {str(e)}")
+                logger.error("Error generating comparison chart: %s", e)
                 error = f"Chyba při generování grafu: {str(e)}"
-        else:
-            error = "Zadejte prosím alespoň jeden symbol akcie"
     
     return render_template("compare.html",
                            chart=chart,
                            error=error,
                            tickers=tickers,
+                           ranking=ranking,
+                           missing=missing,
                            selected_period=selected_period,
                            periods=periods)
 
+@app.route("/api/compare", methods=["GET"])
+def api_compare():
+    """
+    Zarovnané řady pro srovnání akcií (?tickers=AAPL,MSFT,CEZ.PR&period=1y)
+    """
+    tickers, invalid = requested_tickers(request.args)
+    period = request.args.get("period", "1y")
+    max_tickers = app.config["COMPARE_MAX_TICKERS"]
+    if invalid:
+        return jsonify({"error": f"Invalid tickers: {', '.join(invalid)}"}), 400
+    if not tickers:
+        return jsonify({"error": "No tickers given"}), 400
+    if len(tickers) > max_tickers:
+        return jsonify({"error": f"At most {max_tickers} tickers can be compared"}), 400
+    if period not in PERIOD_VALUES:
+        return jsonify({"error": f"Unsupported period: {period}"}), 400
+    try:
+        return jsonify(Comparison.load(tickers, period).to_dict())
+    except Exception as e:
+        logger.error("API error: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+def correlation_params(values):
+    """
+    Kontrola parametrů formuláře korelační analýzy (tickers, period, window).
+
+    Vrací:
+        Čtveřici (tickery, období, okno, chybová zpráva nebo None)
+    """
+    tickers, invalid = requested_tickers(values)
+    period = values.get("period", "1y")
+    try:
+        window = int(values.get("window", "0"))
+    except ValueError:
+        window = -1
+    max_tickers = app.config["CORRELATION_MAX_TICKERS"]
+    if invalid:
+        return tickers, period, window, f"Neplatné symboly: {', '.join(invalid)}"
+    if len(tickers) < 2:
+        return tickers, period, window, "Zadejte prosím alespoň dva symboly akcií"
+    if len(tickers) > max_tickers:
+        return tickers, period, window, f"Najednou lze analyzovat nejvýše {max_tickers} akcií"
+    if period not in PERIOD_VALUES:
+        return tickers, period, window, "Neplatné časové období"
+    if window < 0:
+        return tickers, period, window, "Neplatné okno"
+    return tickers, period, window, None
+
+@app.route("/correlation", methods=["GET", "POST"])
+def correlation():
+    """
+    Heatmapa korelací denních výnosů skupiny akcií
+    """
+    chart = None
+    report = None
+    values = request.values
+    if request.method == "GET" and "tickers" not in values:
+        # Výchozí skupina jsou akcie v aktuálním portfoliu
+        held = portfolio_service.stocks(current_user().portfolio.portfolio_id)
+        values = {"tickers": ",".join(held), "period": values.get("period", "1y"), "window": values.get("window", "0")}
+    
+    tickers, selected_period, window, error = correlation_params(values)
+    if error and request.method == "GET" and not tickers:
+        error = None
+    elif not error:
+        try:
+            report = correlation_analyzer.analyze(tickers, selected_period, window)
+            image_filename = GraphGenerator.plot_correlation(report)
+            if image_filename:
+                chart = url_for('static', filename=f'images/{image_filename}')
+            else:
+                error = "Pro zadané akcie nejsou k dispozici data"
+        except Exception as e:
+            logger.error("Error generating correlation heatmap: %s", e)
+            error = f"Chyba při výpočtu korelací: {str(e)}"
+    
+    return render_template("correlation.html",
+                           chart=chart,
+                           error=error,
+                           report=report,
+                           tickers=tickers,
+                           selected_period=selected_period,
+                           window=window,
+                           windows=WINDOWS,
+                           periods=PERIODS)
+
+@app.route("/api/correlation", methods=["GET"])
+def api_correlation():
+    """
+    Korelační matice denních výnosů (?tickers=AAPL,MSFT,CEZ.PR&period=1y&window=60)
+    """
+    tickers, invalid = requested_tickers(request.args)
+    period = request.args.get("period", "1y")
+    window = request.args.get("window", "0")
+    max_tickers = app.config["CORRELATION_MAX_TICKERS"]
+    if invalid:
+        return jsonify({"error": f"Invalid tickers: {', '.join(invalid)}"}), 400
+    if len(tickers) < 2:
+        return jsonify({"error": "At least two tickers are required"}), 400
+    if len(tickers) > max_tickers:
+        return jsonify({"error": f"At most {max_tickers} tickers can be analyzed"}), 400
+    if period not in PERIOD_VALUES:
+        return jsonify({"error": f"Unsupported period: {period}"}), 400
+    if not window.isdigit():
+        return jsonify({"error": f"Invalid window: {window}"}), 400
+    window = int(window)
+    try:
+        return jsonify(correlation_analyzer.analyze(tickers, period, window))
+    except Exception as e:
+        logger.error("API error: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+# Ukazatele screeneru ve formuláři a tabulce (pole, popisek, krok vstupu)
+SCREENER_COLUMNS = [
+    {"value": "price", "label": "Cena", "step": "any"},
+    {"value": "market_cap", "label": "Tržní kapitalizace", "step": "any"},
+    {"value": "pe_ratio", "label": "P/E", "step": "any"},
+    {"value": "dividend_yield", "label": "Dividendový výnos", "step": "any"},
+    {"value": "eps", "label": "EPS", "step": "any"},
+    {"value": "beta", "label": "Beta", "step": "any"},
+]
+
+@app.route("/screener", methods=["GET"])
+def screener():
+    """
+    Vyhledávání akcií podle fundamentálních ukazatelů
+    """
+    snapshot = screener_service.snapshot
+    filters = {key: value for key, value in request.args.items() if key != "page" and value != ""}
+    per_page = app.config["PORTFOLIO_PAGE_SIZE"]
+    page_number = max(request.args.get("page", 1, type=int), 1)
+    error = None
+    rows = []
+    total = 0
+    try:
+        query = dataclasses.replace(ScreenerQuery.from_args(filters, app.config["SCREENER_MAX_LIMIT"]),
+                                    offset=(page_number - 1) * per_page, limit=per_page)
+        total, rows = snapshot.query(query)
+    except ValueError as e:
+        error = f"Neplatný filtr: {e}"
+    
+    return render_template("screener.html",
+                           error=error,
+                           rows=rows,
+                           page=Page.of(page_number, per_page, total),
+                           filters=filters,
+                           columns=SCREENER_COLUMNS,
+                           sectors=snapshot.sector_names(),
+                           universe_size=len(screener_service.universe),
+                           snapshot_size=len(snapshot),
+                           as_of=snapshot.as_of)
+
+@app.route("/api/screener", methods=["GET"])
+def api_screener():
+    """
+    Akcie splňující kritéria (?market_cap_min=1e11&pe_ratio_max=20&sector=Technology&sort=dividend_yield)
+    """
+    snapshot = screener_service.snapshot
+    try:
+        query = ScreenerQuery.from_args(request.args, app.config["SCREENER_MAX_LIMIT"])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    total, rows = snapshot.query(query)
+    return jsonify({
+        "as_of": snapshot.as_of.isoformat() if snapshot.as_of else None,
+        "universe": len(snapshot),
+        "total": total,
+        "offset": query.offset,
+        "limit": query.limit,
+        "fields": list(SCREENER_FIELDS),
+        "results": [row.to_dict() for row in rows],
+    })
+
+@app.cli.command("set-password")
+@click.argument("username")
+@click.password_option()
+def set_password_command(username, password):
+    """
+    Nastaví heslo uživatele (účty bez hesla se přihlásit nedají).
+    """
+    if not account_service.set_password(username, password):
+        raise click.ClickException(f"Uživatel {username} neexistuje")
+    click.echo(f"Heslo uživatele {username} nastaveno")
+
+@app.cli.command("refresh-fundamentals")
+@click.option("--tickers", default=None, help="Tickery oddělené čárkou (výchozí chybějící a zastaralé tickery)")
+@click.option("--all", "refresh_all", is_flag=True, help="Obnovit celý seznam screeneru")
+def refresh_fundamentals(tickers, refresh_all):
+    """
+    Obnoví snímek fundamentů pro screener (např. z cronu místo vlákna na pozadí).
+    """
+    selected = parse_tickers([tickers])[0] if tickers else (screener_service.universe if refresh_all else None)
+    started = datetime.now()
+    refreshed = screener_service.refresh(selected)
+    elapsed = (datetime.now() - started).total_seconds()
+    click.echo(f"Obnoveno {refreshed} tickerů za {elapsed:.2f} s")
+
+@app.route("/news", methods=["GET"])
+def news():
+    """
+    Hledání ve zprávách (fulltext v titulcích a shrnutích, volitelně jen pro ticker)
+    """
+    query = request.args.get("q", "").strip()
+    ticker = request.args.get("ticker", "").strip().upper()
+    per_page = app.config["NEWS_SEARCH_LIMIT"]
+    page_number = max(request.args.get("page", 1, type=int), 1)
+    # Stejná kontrola jako /api/news - neznámý symbol nejde na zdroje zpráv
+    if ticker and not known_ticker(ticker):
+        error = f"Neznámý symbol akcie {ticker}"
+        suggestions = ticker_suggestions(ticker)
+        if suggestions:
+            error += f". Měli jste na mysli: {', '.join(suggestions)}?"
+        return render_template("news.html", query=query, ticker=ticker, results=[], page_number=1,
+                               has_next=False, error=error), 404
+    results = []
+    if query:
+        # O jeden výsledek navíc - pozná se, jestli existuje další stránka
+        results = news_service.search(query, ticker or None, per_page + 1, (page_number - 1) * per_page)
+    elif ticker:
+        results = news_service.news_for(ticker, per_page + 1) if page_number == 1 else []
+    has_next = len(results) > per_page
+    
+    return render_template("news.html",
+                           query=query,
+                           ticker=ticker,
+                           results=results[:per_page],
+                           page_number=page_number,
+                           has_next=has_next)
+
+@app.route("/api/news", methods=["GET"])
+def api_news():
+    """
+    Nejnovější zprávy tickeru (?ticker=AAPL&limit=5)
+    """
+    ticker = request.args.get("ticker", "").strip().upper()
+    if not ticker:
+        return jsonify({"error": "Ticker is required"}), 400
+    if not known_ticker(ticker):
+        return jsonify({"error": f"Unknown ticker {ticker}", "suggestions": ticker_suggestions(ticker)}), 404
+    limit = min(max(request.args.get("limit", 5, type=int), 1), app.config["NEWS_SEARCH_LIMIT"])
+    return jsonify({"ticker": ticker, "results": news_service.news_for(ticker, limit)})
+
+@app.route("/api/news/search", methods=["GET"])
+def api_news_search():
+    """
+    Fulltextové hledání ve zprávách (?q=cloud revenue&ticker=MSFT&limit=20&offset=0)
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "Query parameter q is required"}), 400
+    ticker = request.args.get("ticker", "").strip().upper() or None
+    limit = min(max(request.args.get("limit", app.config["NEWS_SEARCH_LIMIT"], type=int), 1), 100)
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    return jsonify({
+        "query": query,
+        "ticker": ticker,
+        "offset": offset,
+        "limit": limit,
+        "results": news_service.search(query, ticker, limit, offset),
+    })
+
+@app.cli.command("ingest-news")
+@click.option("--tickers", default=None, help="Tickery oddělené čárkou (výchozí NEWS_TICKERS)")
+def ingest_news(tickers):
+    """
+    Stáhne zprávy ze všech zdrojů a uloží je (např. z cronu místo vlákna na pozadí).
+    """
+    selected = parse_tickers([tickers])[0] if tickers else None
+    started = datetime.now()
+    stored = news_service.ingest(selected)
+    elapsed = (datetime.now() - started).total_seconds()
+    click.echo(f"Uloženo {stored} nových článků za {elapsed:.2f} s")
+
+# Typy cenových upozornění ve formuláři
+ALERT_OPTIONS = [
+    {"value": "above", "label": "Cena nad", "unit": "cena"},
+    {"value": "below", "label": "Cena pod", "unit": "cena"},
+    {"value": "move", "label": "Pohyb o", "unit": "%"},
+]
+
+@app.route("/alerts", methods=["GET", "POST"])
+def alerts():
+    """
+    Cenová upozornění uživatele (vytvoření, seznam aktivních a spuštěných)
+    """
+    user = current_user()
+    if request.method == "POST":
+        ticker = request.form.get("ticker", "").strip().upper()
+        kind = request.form.get("kind", "")
+        try:
+            threshold = float(request.form.get("threshold", ""))
+        except ValueError:
+            flash("Hranice upozornění musí být číslo", "danger")
+            return redirect(url_for("alerts"))
+        if not known_ticker(ticker):
+            flash(f"Neznámý symbol akcie {ticker}", "danger")
+            return redirect(url_for("alerts"))
+        try:
+            alert_engine.add(user.user_id, ticker, kind, threshold)
+            flash(f"Upozornění pro {ticker} bylo vytvořeno", "success")
+        except ValueError as e:
+            flash(f"Upozornění nelze vytvořit: {e}", "danger")
+        return redirect(url_for("alerts"))
+    
+    return render_template("alerts.html",
+                           active=alert_engine.alerts(user.user_id),
+                           triggered=alert_engine.alerts(user.user_id, triggered=True, limit=50),
+                           options=ALERT_OPTIONS,
+                           ticker=request.args.get("ticker", ""))
+
+@app.route("/alerts/<int:alert_id>/delete", methods=["POST"])
+def delete_alert(alert_id):
+    """
+    Smazání cenového upozornění
+    """
+    if alert_engine.remove(current_user().user_id, alert_id):
+        flash("Upozornění bylo smazáno", "success")
+    else:
+        flash("Upozornění nebylo nalezeno", "danger")
+    return redirect(url_for("alerts"))
+
+@app.route("/alerts/stream", methods=["GET"])
+def alerts_stream():
+    """
+    Spuštěná upozornění uživatele jako Server-Sent Events
+    """
+    user_id = current_user().user_id
+    heartbeat = app.config["ALERT_SSE_HEARTBEAT"]
+    events = alert_engine.subscribe(user_id)
+    
+    def generate():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = events.get(timeout=heartbeat)
+                except queue.Empty:
+                    # Udržovací komentář (proxy nezavřou nečinné spojení, odpojení klienta se pozná)
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"id: {event.alert_id}\nevent: alert\ndata: {json.dumps(event.to_dict())}\n\n"
+        finally:
+            alert_engine.unsubscribe(user_id, events)
+    
+    return Response(generate(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def alert_to_dict(alert: PriceAlert) -> dict:
+    """Upozornění pro odpověď API."""
+    return {
+        "id": alert.id,
+        "ticker": alert.ticker,
+        "kind": alert.kind,
+        "threshold": alert.threshold,
+        "reference_price": alert.reference_price,
+        "created_at": alert.created_at.isoformat() if alert.created_at else None,
+        "triggered_at": alert.triggered_at.isoformat() if alert.triggered_at else None,
+        "triggered_price": alert.triggered_price,
+    }
+
+@app.route("/api/alerts", methods=["GET", "POST"])
+def api_alerts():
+    """
+    Seznam upozornění uživatele (GET) nebo vytvoření upozornění
+    (POST JSON {"ticker": "AAPL", "kind": "above", "threshold": 200})
+    """
+    user_id = current_user().user_id
+    if request.method == "GET":
+        return jsonify({
+            "active": [alert_to_dict(alert) for alert in alert_engine.alerts(user_id)],
+            "triggered": [alert_to_dict(alert) for alert in alert_engine.alerts(user_id, triggered=True)],
+        })
+    
+    payload = request.get_json(silent=True) or {}
+    ticker = str(payload.get("ticker", "")).strip().upper()
+    kind = payload.get("kind")
+    if kind not in ALERT_KINDS:
+        return jsonify({"error": f"kind must be one of {', '.join(ALERT_KINDS)}"}), 400
+    try:
+        threshold = float(payload.get("threshold"))
+    except (TypeError, ValueError):
+        return jsonify({"error": "threshold must be a number"}), 400
+    if not known_ticker(ticker):
+        return jsonify({"error": f"Unknown ticker {ticker}", "suggestions": ticker_suggestions(ticker)}), 404
+    try:
+        alert_id = alert_engine.add(user_id, ticker, kind, threshold)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"id": alert_id}), 201
+
+@app.route("/api/alerts/<int:alert_id>", methods=["DELETE"])
+def api_delete_alert(alert_id):
+    """
+    Smazání upozornění uživatele
+    """
+    if not alert_engine.remove(current_user().user_id, alert_id):
+        return jsonify({"error": "Alert not found"}), 404
+    return "", 204
+
 @app.route("/user/profile", methods=["GET"])
 def user_profile():
     """
     Zobrazení profilu uživatele
     """
-    # V reálné aplikaci bychom získali uživatele ze session
-    # Zde používáme active_user z paměti
-    
-    # Výpočet souhrnu portfolia přímo, namísto použití metody,
-    # která by znovu spustila API volání pro všechny akcie
-    db_portfolio = DB_Portfolio.query.first()
-    if not db_portfolio:
-        portfolio_summary = {
-            'total_value': 0.0,
-            'total_cost': 0.0,
-            'total_gain_loss': 0.0,
-            'total_gain_loss_percent': 0.0,
-            'cash_balance': 0.0
-        }
-    else:
-        # Získání vypočtených hodnot ze stránky portfolia, aby se zabránilo přepočítávání
-        # V reálné aplikaci by tyto hodnoty mohly být uloženy v cache nebo v session
-        portfolio_items = []
-        total_value = 0.0
-        total_cost = 0.0
-        
-        for item in db_portfolio.items:
-            try:
-                purchase_value = item.quantity * item.purchase_price
-                total_cost += purchase_value
-                # Výpočet simulované aktuální hodnoty (o 5 % vyšší než nákupní cena)
-                # Toto je pouze pro demonstraci, aby se zobrazil nenulový zisk/ztráta
-                current_value = item.quantity * (item.purchase_price * 1.05)
-                total_value += current_value
-            except Exception as e:
-                logger.error(f"Error processing portfolio item: {str(e)}")
-        
-        total_gain_loss = total_value - total_cost
-        total_gain_loss_percent = (total_gain_loss / total_cost) * 100 if total_cost > 0 else 0
-        
-        portfolio_summary = {
-            'total_value': total_value,
-            'total_cost': total_cost,
-            'total_gain_loss': total_gain_loss,
-            'total_gain_loss_percent': total_gain_loss_percent,
-            'cash_balance': 0.0  # Placeholder for actual balance
-        }
+    user = current_user()
+    
+    # Souhrn se čte z materializovaného snímku, který se průběžně aktualizuje
+    # při změnách cen ve sdílené cache a při přidání/odebrání pozic (bez volání API)
+    snapshot = portfolio_service.snapshot(user.portfolio.portfolio_id)
+    portfolio_summary = snapshot.summary()
+    unpriced_tickers = snapshot.unpriced_tickers
     
     return render_template("user_profile.html", 
-                          user=active_user,
-                          portfolio_summary=portfolio_summary)
+                          user=user,
+                          portfolio_summary=portfolio_summary,
+                          unpriced_tickers=unpriced_tickers)
 
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
@@ -31,6 +31,56 @@ document.addEventListener('DOMContentLoaded', function() {
         return new bootstrap.Tooltip(tooltipTriggerEl)
     });
     
+    // Našeptávání symbolů podle tickeru nebo názvu společnosti
+    const tickerInput = document.getElementById('ticker');
+    const suggestions = document.getElementById('ticker-suggestions');
+    if (tickerInput && suggestions && tickerInput.dataset.searchUrl) {
+        let searchTimer = null;
+        let lastQuery = '';
+        tickerInput.addEventListener('input', function() {
+            clearTimeout(searchTimer);
+            const query = tickerInput.value.trim();
+            if (!query || query === lastQuery) {
+                return;
+            }
+            searchTimer = setTimeout(() => {
+                lastQuery = query;
+                fetch(tickerInput.dataset.searchUrl + '?q=' + encodeURIComponent(query))
+                    .then(response => response.json())
+                    .then(data => {
+                        suggestions.replaceChildren(...data.results.map(result => {
+                            const option = document.createElement('option');
+                            option.value = result.symbol;
+                            option.label = result.name + (result.exchange ? ' (' + result.exchange + ')' : '');
+                            return option;
+                        }));
+                    })
+                    .catch(() => suggestions.replaceChildren());
+            }, 120);
+        });
+    }
+
+    // Spuštěná cenová upozornění v reálném čase (Server-Sent Events)
+    const alertFeed = document.getElementById('alert-feed');
+    if (alertFeed && alertFeed.dataset.streamUrl && window.EventSource) {
+        const kindLabels = {above: 'nad', below: 'pod', move: 'pohyb o'};
+        const source = new EventSource(alertFeed.dataset.streamUrl);
+        source.addEventListener('alert', function(event) {
+            const alert = JSON.parse(event.data);
+            const empty = document.getElementById('alert-feed-empty');
+            if (empty) {
+                empty.remove();
+            }
+            const item = document.createElement('li');
+            item.className = 'list-group-item list-group-item-warning';
+            const strong = document.createElement('strong');
+            strong.textContent = alert.ticker;
+            const threshold = alert.kind === 'move' ? alert.threshold + ' %' : alert.threshold.toFixed(2);
+            item.append(strong, ' za ' + alert.price.toFixed(2) + ' (' + kindLabels[alert.kind] + ' ' + threshold + ')');
+            alertFeed.prepend(item);
+        });
+    }
+
     // Add validation styling to form
     const stockForm = document.getElementById('stock-form');
     if (stockForm) {
@@ -1,11 +1,14 @@
 import yfinance as yf
 import pandas as pd
 import logging
-from typing import Dict, Any, Optional
-from googletrans import Translator
+import zlib
+from typing import Dict, Any, Iterable, Optional, TYPE_CHECKING
+from market_cache import quote_cache, history_cache
+from translation import translation_service
+
+if TYPE_CHECKING:
+    from prefetch import PrefetchScheduler
 
-# Konfigurace logování
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 class StockData:
@@ -13,6 +16,12 @@ class StockData:
     Třída reprezentující data akcií pro konkrétní ticker symbol.
     Zpracovává interakce s API yfinance.
     """
+
+    # V offline režimu se místo yfinance používají deterministická lokální data
+    offline: bool = False
+    # Plánovač předběžného načítání (viz prefetch.py): sleduje oblíbenost tickerů a obnovuje
+    # zastaralá data na pozadí; bez něj se data s prošlou platností stahují hned
+    scheduler: Optional["PrefetchScheduler"] = None
     
     def __init__(self, ticker: str):
         """
@@ -25,13 +34,60 @@ class StockData:
             raise ValueError("Symbol akcie nemůže být prázdný")
             
         self.ticker: str = ticker
+        if StockData.offline:
+            self.stock = None
+            return
         try:
             self.stock = yf.Ticker(ticker)
-            logger.debug(f"StockData initialized for {ticker}")
+            logger.debug("StockData initialized for %s", ticker)
         except Exception as e:
-            logger.error(f"Error initializing StockData for {ticker}: {str(e)}")
+            logger.error("Error initializing StockData for %s: %s", ticker, e)
             raise
     
+    @staticmethod
+    def exists(ticker: str) -> Optional[bool]:
+        """
+        Ověří u zdroje dat, že symbol existuje (má nějaké obchody). V offline
+        režimu zdroj není, takže neexistuje žádný symbol mimo lokální seznam.
+
+        Parametry:
+            ticker: Symbol akcie
+
+        Vrací:
+            True/False, nebo None pokud se ověření nepodařilo (chyba sítě)
+        """
+        if StockData.offline:
+            return False
+        if quote_cache.peek(ticker) is not None:
+            return True
+        try:
+            return not yf.Ticker(ticker).history(period="5d").empty
+        except Exception as e:
+            logger.warning("Symbol %s nelze ověřit: %s", ticker, e)
+            return None
+
+    @staticmethod
+    def _stale_price(ticker: str) -> Optional[float]:
+        """
+        Cena s prošlou platností, pokud ji plánovač dovolí vrátit (a obnoví ji na pozadí).
+        """
+        entry = quote_cache.peek(ticker)
+        if entry is None or StockData.scheduler is None:
+            return None
+        price, age = entry
+        return price if StockData.scheduler.serve_stale(ticker, None, age) else None
+
+    @staticmethod
+    def _stale_history(ticker: str, period: str) -> Optional[pd.DataFrame]:
+        """
+        Historie s prošlou platností, pokud ji plánovač dovolí vrátit (a obnoví ji na pozadí).
+        """
+        entry = history_cache.peek(ticker, period)
+        if entry is None or StockData.scheduler is None:
+            return None
+        data, age = entry
+        return data if StockData.scheduler.serve_stale(ticker, period, age) else None
+
     def get_price(self) -> float:
         """
         Získání aktuální ceny akcie.
@@ -39,15 +95,88 @@ class StockData:
         Vrací:
             Aktuální cenu jako číslo (float)
         """
+        if StockData.scheduler is not None:
+            StockData.scheduler.record(self.ticker)
+        cached = quote_cache.get(self.ticker)
+        if cached is None:
+            cached = self._stale_price(self.ticker)
+        if cached is not None:
+            return cached
+        return self.refresh_price()
+
+    def refresh_price(self) -> float:
+        """
+        Stažení aktuální ceny bez použití cache (uloží se do sdílené cache).
+        
+        Vrací:
+            Aktuální cenu jako číslo (float), 0.0 při chybě
+        """
         try:
-            data = self.get_history(period="1d")
+            # Cena se bere přímo z API, ne z cache historií (ta má delší platnost)
+            data = self._fetch_history(period="1d")
             if not data.empty:
-                return data.iloc[-1]['Close']
+                price = float(data.iloc[-1]['Close'])
+                # Uložení do sdílené cache (upozorní i odvozené souhrny portfolií)
+                quote_cache.set(self.ticker, price)
+                return price
             return 0.0
         except Exception as e:
-            logger.error(f"Error getting price for {self.ticker}: {str(e)}")
+            logger.error("Error getting price for %s: %s", self.ticker, e)
             return 0.0
     
+    @staticmethod
+    def get_prices(tickers: Iterable[str], refresh: bool = False) -> Dict[str, float]:
+        """
+        Hromadné získání aktuálních cen jedním voláním API.
+
+        Ceny, které jsou ve sdílené cache, se znovu nenačítají; ostatní se stáhnou
+        jedním požadavkem yf.download a uloží do cache.
+
+        Parametry:
+            tickers: Symboly akcií
+            refresh: Stáhnout znovu i ceny, které jsou v cache
+
+        Vrací:
+            Slovník ticker -> aktuální cena
+        """
+        prices: Dict[str, float] = {}
+        missing = []
+        for ticker in dict.fromkeys(tickers):
+            cached = None if refresh else quote_cache.get(ticker)
+            if cached is None and not refresh:
+                cached = StockData._stale_price(ticker)
+            if cached is not None:
+                prices[ticker] = cached
+            else:
+                missing.append(ticker)
+        if not missing:
+            return prices
+
+        if not StockData.offline:
+            try:
+                data = yf.download(missing, period="5d", progress=False, auto_adjust=False, threads=True)
+                closes = data["Close"] if not data.empty else pd.DataFrame()
+                if isinstance(closes, pd.Series):
+                    closes = closes.to_frame(missing[0])
+                for ticker in missing:
+                    if ticker in closes:
+                        series = closes[ticker].dropna()
+                        if not series.empty:
+                            prices[ticker] = float(series.iloc[-1])
+                            quote_cache.set(ticker, prices[ticker])
+            except Exception as e:
+                logger.error("Bulk price download failed for %s tickers: %s", len(missing), e)
+
+        # Tickery bez dat z hromadného stažení (a offline režim) jednotlivě
+        for ticker in missing:
+            if ticker not in prices:
+                try:
+                    prices[ticker] = StockData(ticker).refresh_price()
+                except Exception as e:
+                    logger.error("Error getting price for %s: %s", ticker, e)
+                    prices[ticker] = 0.0
+        return prices
+
     def get_history(self, period: str = "1mo") -> pd.DataFrame:
         """
         Získání historických cenových dat akcie.
@@ -58,15 +187,105 @@ class StockData:
         Vrací:
             Pandas DataFrame s cenovými daty akcie
         """
-        logger.debug(f"Získávání dat pro {self.ticker} s obdobím {period}")
+        if StockData.scheduler is not None:
+            StockData.scheduler.record(self.ticker, period)
+        cached = history_cache.get(self.ticker, period)
+        if cached is None:
+            cached = self._stale_history(self.ticker, period)
+        if cached is not None:
+            return cached
+        return self.refresh_history(period)
+
+    def refresh_history(self, period: str = "1mo") -> pd.DataFrame:
+        """
+        Stažení historie bez použití cache (uloží se do sdílené cache).
+        
+        Parametry:
+            period: Časové období pro data
+            
+        Vrací:
+            Pandas DataFrame s cenovými daty akcie
+        """
+        data = self._fetch_history(period)
+        history_cache.set(self.ticker, period, data)
+        return data
+
+    @staticmethod
+    def get_histories(tickers: Iterable[str], period: str = "1mo", refresh: bool = False) -> Dict[str, pd.DataFrame]:
+        """
+        Hromadné získání historií více akcií jedním voláním API.
+
+        Historie ze sdílené cache se znovu nenačítají; ostatní se stáhnou jedním
+        požadavkem yf.download a každá se uloží do cache samostatně.
+
+        Parametry:
+            tickers: Symboly akcií
+            period: Časové období pro data
+            refresh: Stáhnout znovu i historie, které jsou v cache
+
+        Vrací:
+            Slovník ticker -> DataFrame s cenovými daty
+        """
+        requested = list(dict.fromkeys(tickers))
+        histories: Dict[str, pd.DataFrame] = {}
+        missing = []
+        for ticker in requested:
+            if StockData.scheduler is not None and not refresh:
+                StockData.scheduler.record(ticker, period)
+            cached = None if refresh else history_cache.get(ticker, period)
+            if cached is None and not refresh:
+                cached = StockData._stale_history(ticker, period)
+            if cached is not None:
+                histories[ticker] = cached
+            else:
+                missing.append(ticker)
+
+        if len(missing) > 1 and not StockData.offline:
+            try:
+                data = yf.download(missing, period=period, group_by="ticker", auto_adjust=True,
+                                   progress=False, threads=True)
+                downloaded = set(data.columns.get_level_values(0)) if not data.empty else set()
+                for ticker in missing:
+                    if ticker in downloaded:
+                        # Řádky z obchodních dnů jiných burz jsou pro tento ticker prázdné
+                        frame = data[ticker].dropna(how="all")
+                        if not frame.empty:
+                            histories[ticker] = frame
+                            history_cache.set(ticker, period, frame)
+            except Exception as e:
+                logger.error("Bulk history download failed for %s tickers: %s", len(missing), e)
+
+        # Tickery bez dat z hromadného stažení (a offline režim) jednotlivě
+        for ticker in missing:
+            if ticker not in histories:
+                try:
+                    histories[ticker] = StockData(ticker).refresh_history(period)
+                except Exception as e:
+                    logger.error("Error fetching data for %s: %s", ticker, e)
+        # Pořadí podle požadavku (určuje pořadí sloupců PriceMatrix)
+        return {ticker: histories[ticker] for ticker in requested if ticker in histories}
+    
+    def _fetch_history(self, period: str) -> pd.DataFrame:
+        """
+        Načtení historických dat z API bez použití cache.
+        
+        Parametry:
+            period: Časové období pro data
+            
+        Vrací:
+            Pandas DataFrame s cenovými daty akcie
+        """
+        logger.debug("Získávání dat pro %s s obdobím %s", self.ticker, period)
+        if StockData.offline:
+            return self._generate_test_data(period)
         try:
             data = self.stock.history(period=period)
             if data.empty:
-                logger.warning(f"Nenalezena žádná data pro {self.ticker}")
+                logger.warning("Nenalezena žádná data pro %s", self.ticker)
                 return self._generate_test_data(period)
             return data
         except Exception as e:
-            logger.error(f"Chyba při získávání dat pro {self.ticker}: {str(e)}")
+            logger.error("Chyba při získávání dat pro %s: %s", self.ticker, e)
             return self._generate_test_data(period)
     
     def _generate_test_data(self, period: str = "1mo") -> pd.DataFrame:
@@ -92,7 +311,8 @@ class StockData:
             "1y": 365,
             "2y": 730,
             "5y": 1825,
-            "max": 1825
+            "10y": 3650,
+            "max": 3650
         }
         
         days = periods_days.get(period, 30)
@@ -105,9 +325,10 @@ class StockData:
         dates = dates[dates.dayofweek < 5]
         
         # Generate random price data with a trend
-        np.random.seed(42)  # For reproducibility
+        # Seed podle tickeru, aby různé akcie měly různé, ale reprodukovatelné průběhy
+        rng = np.random.default_rng(zlib.crc32(self.ticker.encode("utf-8")))
         base_price = 100.0
-        price_changes = np.random.normal(0, 1, size=len(dates))
+        price_changes = rng.normal(0, 1, size=len(dates))
         price_changes = price_changes.cumsum() * 2  # Cumulative changes with some volatility
         
         # Create prices with a slight upward trend
@@ -115,16 +336,52 @@ class StockData:
         
         # Create DataFrame
         data = pd.DataFrame({
-            'Open': prices - np.random.uniform(0, 2, size=len(dates)),
-            'High': prices + np.random.uniform(0, 2, size=len(dates)),
-            'Low': prices - np.random.uniform(0, 2, size=len(dates)),
+            'Open': prices - rng.uniform(0, 2, size=len(dates)),
+            'High': prices + rng.uniform(0, 2, size=len(dates)),
+            'Low': prices - rng.uniform(0, 2, size=len(dates)),
             'Close': prices,
-            'Volume': np.random.randint(1000000, 10000000, size=len(dates))
+            'Volume': rng.integers(1000000, 10000000, size=len(dates))
         }, index=dates)
         
-        logger.warning(f"Using generated test data for {self.ticker}")
+        if not StockData.offline:
+            logger.warning("Using generated test data for %s", self.ticker)
         return data
     
+    def _offline_profile(self) -> Dict[str, Any]:
+        """
+        Deterministický profil společnosti pro offline režim.
+        
+        Vrací:
+            Slovník ve tvaru odpovídajícím yfinance Ticker.info
+        """
+        seed = zlib.crc32(self.ticker.encode("utf-8"))
+        sectors = ('Technology', 'Financial Services', 'Healthcare', 'Energy', 'Utilities', 'Industrials')
+        return {
+            'shortName': f"{self.ticker} Inc.",
+            'sector': sectors[seed % len(sectors)],
+            'industry': 'Software',
+            'country': 'United States',
+            'fullTimeEmployees': 1000 + seed % 100000,
+            'website': None,
+            'longBusinessSummary': None,
+            'marketCap': (seed % 1000 + 1) * 1_000_000_000,
+            'trailingPE': 5 + seed % 40,
+            'dividendYield': (seed % 50) / 1000,
+            'trailingEps': (seed % 2000) / 100,
+            'beta': 0.5 + (seed % 150) / 100,
+            'fiftyTwoWeekHigh': 150.0,
+            'fiftyTwoWeekLow': 80.0,
+        }
+    
+    def get_profile(self) -> Dict[str, Any]:
+        """
+        Profil společnosti tak, jak ho vrací yfinance (bez překladů).
+        
+        Vrací:
+            Slovník ve tvaru Ticker.info (prázdný, pokud data nejsou)
+        """
+        return (self._offline_profile() if StockData.offline else self.stock.info) or {}
+    
     def get_company_info(self) -> Dict[str, Any]:
         """
         Získání informací o společnosti pro akcii.
@@ -136,9 +393,9 @@ class StockData:
             info = {}
             
             # Get company profile information
-            profile = self.stock.info
+            profile = self.get_profile()
             if not profile:
-                logger.warning(f"No info found for {self.ticker}")
+                logger.warning("No info found for %s", self.ticker)
                 return {}
             
             # Extract relevant info
@@ -159,16 +416,15 @@ class StockData:
             info['fifty_two_week_high'] = profile.get('fiftyTwoWeekHigh', None)
             info['fifty_two_week_low'] = profile.get('fiftyTwoWeekLow', None)
             
-            # Add Czech translations for relevant fields
-            info['sector_cz'] = self._translate_field(info['sector'])
-            info['industry_cz'] = self._translate_field(info['industry'])
-            info['country_cz'] = self._translate_field(info['country'])
-            info['description_cz'] = self._translate_field(info['description'])
+            # České překlady (jednou dávkou, uložené překlady se nepřekládají znovu)
+            info['sector_cz'], info['industry_cz'], info['country_cz'], info['description_cz'] = \
+                translation_service.translate_many([info['sector'], info['industry'], info['country'],
+                                                    info['description']])
             
             return info
             
         except Exception as e:
-            logger.error(f"Chyba při získávání informací o společnosti pro {self.ticker}: {str(e)}")
+            logger.error("Chyba při získávání informací o společnosti pro %s: %s", self.ticker, e)
             return {}
             
     def _translate_field(self, text: str) -> str:
@@ -181,58 +437,4 @@ class StockData:
         Vrací:
             Přeložený text
         """
-        if not text:
-            return ""
-            
-        try:
-            # Simple translation approach (similar to NewsHandler)
-            # In a production environment, use a proper translation API
-            
-            # Common financial terms translations
-            common_terms = {
-                "Technology": "Technologie",
-                "Financial Services": "Finanční služby",
-                "Healthcare": "Zdravotnictví",
-                "Communication Services": "Komunikační služby",
-                "Consumer Cyclical": "Spotřební cyklické",
-                "Consumer Defensive": "Spotřební defenzivní",
-                "Energy": "Energie",
-                "Industrials": "Průmysl",
-                "Basic Materials": "Základní materiály",
-                "Real Estate": "Nemovitosti",
-                "Utilities": "Veřejné služby",
-                "United States": "Spojené státy americké",
-                "China": "Čína",
-                "Japan": "Japonsko",
-                "Germany": "Německo",
-                "Software": "Software",
-                "Hardware": "Hardware",
-                "Semiconductors": "Polovodiče",
-                "Internet Content & Information": "Internetový obsah a informace",
-                "Auto Manufacturers": "Výrobci automobilů",
-                "Banks": "Banky",
-                "Insurance": "Pojišťovnictví",
-                "Biotechnology": "Biotechnologie",
-                "Medical Devices": "Zdravotnické zařízení"
-            }
-            
-            # Check if the text is in our dictionary
-            if text in common_terms:
-                return common_terms[text]
-                
-            # For longer text like description, add a Czech header
-            if len(text) > 100:
-                return f"[Přeloženo automaticky] {text}"
-                
-            # For other fields, try to use translator if available
-            try:
-                translator = Translator()
-                translated = translator.translate(text, dest='cs')
-                return translated.text
-            except:
-                # Fall back to adding a Czech header if translation fails
-                return f"[Přeloženo automaticky] {text}"
-                
-        except Exception as e:
-            logger.error(f"Error translating text: {str(e)}")
-            return f"[Přeloženo automaticky] {text}"
\ No newline at end of file
+        return translation_service.translate(text)
@@ -0,0 +1,231 @@
+import csv
+import difflib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Slova názvu kratší než tato délka se do indexu nezařazují (a.s., AG, Inc ...)
+MIN_WORD_LENGTH = 2
+# Podobnost (difflib) potřebná pro nabídnutí symbolu nebo slova s překlepem
+FUZZY_CUTOFF = 0.75
+NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Převede text na malá písmena bez diakritiky a interpunkce (ČEZ -> cez).
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return NON_WORD.sub(" ", stripped.lower()).strip()
+
+
+@dataclass(frozen=True, slots=True)
+class Symbol:
+    """
+    Jeden obchodovatelný titul z lokálního seznamu symbolů.
+    """
+    symbol: str
+    name: str
+    exchange: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'symbol': self.symbol, 'name': self.name, 'exchange': self.exchange}
+
+
+class SymbolIndex:
+    """
+    Prefixový index symbolů a názvů společností pro našeptávání.
+
+    Symboly i slova názvů jsou v seřazených polích, takže prefix se najde
+    dvěma půleními (bisect) bez procházení celého seznamu. Překlepy řeší
+    difflib jen nad slovy se stejným počátečním písmenem. Výsledky častých
+    dotazů se pamatují (LRU), protože našeptávač posílá dotaz po každém znaku.
+
+    Symbol mimo seznam lze jednou ověřit u zdroje dat (viz verify); výsledek
+    se pamatuje, neexistující symbol jen po dobu negative_ttl.
+    """
+
+    def __init__(self, symbols: Iterable[Symbol] = (), cache_size: int = 4096, negative_ttl: float = 86400.0):
+        """
+        Parametry:
+            symbols: Počáteční seznam symbolů
+            cache_size: Počet pamatovaných výsledků hledání (i ověření symbolů)
+            negative_ttl: Jak dlouho se pamatuje, že symbol neexistuje (v sekundách)
+        """
+        self._cache_size = cache_size
+        self.negative_ttl: float = negative_ttl
+        self._verified: "OrderedDict[str, Tuple[bool, float]]" = OrderedDict()  # symbol -> (existuje, čas ověření)
+        self._verified_lock = threading.Lock()
+        self._build(symbols)
+
+    def _build(self, symbols: Iterable[Symbol]) -> None:
+        entries = sorted({entry.symbol: entry for entry in symbols}.values(), key=lambda entry: entry.symbol)
+        words: List[Tuple[str, int, int]] = []
+        for row, entry in enumerate(entries):
+            for position, word in enumerate(normalize_text(entry.name).split()):
+                if len(word) >= MIN_WORD_LENGTH:
+                    words.append((word, position, row))
+        words.sort()
+        # Jedno přiřazení - souběžné hledání vidí buď starý, nebo nový index
+        self._data = (
+            entries,
+            [entry.symbol for entry in entries],
+            [word for word, _, _ in words],
+            [(position, row) for _, position, row in words],
+        )
+        self._search = lru_cache(maxsize=self._cache_size)(self._search_uncached)
+
+    def load(self, path: str) -> "SymbolIndex":
+        """
+        Načte seznam symbolů z CSV (sloupce symbol, name, exchange) a nahradí
+        jím stávající index. Chybějící soubor ponechá index prázdný.
+
+        Parametry:
+            path: Cesta k souboru se seznamem symbolů
+
+        Vrací:
+            Tento index
+        """
+        try:
+            with open(path, newline="", encoding="utf-8") as handle:
+                symbols = [Symbol(row['symbol'].strip().upper(), row['name'].strip(), (row.get('exchange') or "").strip())
+                           for row in csv.DictReader(handle) if (row.get('symbol') or "").strip()]
+        except FileNotFoundError:
+            logger.warning("Seznam symbolů %s nenalezen, našeptávání je prázdné", path)
+            symbols = []
+        self._build(symbols)
+        logger.info("Načteno %s symbolů pro vyhledávání", len(symbols))
+        return self
+
+    def __len__(self) -> int:
+        return len(self._data[0])
+
+    def __iter__(self) -> Iterator[Symbol]:
+        return iter(self._data[0])
+
+    def __contains__(self, symbol: str) -> bool:
+        return self.get(symbol) is not None
+
+    def get(self, symbol: str) -> Optional[Symbol]:
+        """
+        Vrací:
+            Symbol s přesně tímto tickerem, nebo None
+        """
+        entries, keys, _, _ = self._data
+        i = bisect_left(keys, symbol)
+        return entries[i] if i < len(keys) and keys[i] == symbol else None
+
+    def verified(self, symbol: str) -> bool:
+        """
+        Vrací:
+            True, pokud byl symbol mimo seznam už dříve ověřen jako existující
+            (bez dotazu na zdroj dat)
+        """
+        with self._verified_lock:
+            entry = self._verified.get(symbol)
+        return entry is not None and entry[0]
+
+    def verify(self, symbol: str, lookup: Callable[[str], Optional[bool]]) -> bool:
+        """
+        Ověří symbol, který v seznamu není, u zdroje dat (jednou, výsledek se pamatuje).
+
+        Parametry:
+            symbol: Symbol ve správném formátu
+            lookup: Ověření u zdroje dat (None = nepodařilo se, nic se nepamatuje)
+
+        Vrací:
+            True, pokud symbol existuje
+        """
+        now = time.monotonic()
+        with self._verified_lock:
+            entry = self._verified.get(symbol)
+            if entry is not None and (entry[0] or now - entry[1] < self.negative_ttl):
+                self._verified.move_to_end(symbol)
+                return entry[0]
+
+        # Dotaz na zdroj dat mimo zámek
+        exists = lookup(symbol)
+        if exists is None:
+            return False
+        with self._verified_lock:
+            self._verified[symbol] = (exists, now)
+            self._verified.move_to_end(symbol)
+            while len(self._verified) > self._cache_size:
+                self._verified.popitem(last=False)
+        logger.info("Symbol %s mimo seznam ověřen u zdroje dat: %s", symbol, "existuje" if exists else "neexistuje")
+        return exists
+
+    @staticmethod
+    def _prefix_range(keys: List[str], prefix: str) -> range:
+        return range(bisect_left(keys, prefix), bisect_left(keys, prefix + "\uffff"))
+
+    def search(self, query: str, limit: int = 10) -> List[Symbol]:
+        """
+        Našeptá symboly podle začátku tickeru nebo slova v názvu společnosti,
+        s tolerancí překlepů.
+
+        Parametry:
+            query: Zadaný text (ticker nebo část názvu)
+            limit: Nejvyšší počet výsledků
+
+        Vrací:
+            Symboly od nejlepší shody (přesný ticker, začátek tickeru, začátek
+            slova v názvu, podobný ticker nebo slovo)
+        """
+        return list(self._search(query.strip(), limit))
+
+    def _search_uncached(self, query: str, limit: int) -> Tuple[Symbol, ...]:
+        entries, keys, words, word_rows = self._data
+        ticker = query.upper()
+        text = normalize_text(query)
+        if not ticker or limit <= 0:
+            return ()
+
+        # Řádek -> pořadí shody (nižší je lepší)
+        ranks: Dict[int, Tuple[int, int]] = {}
+
+        def add(row: int, rank: Tuple[int, int]) -> None:
+            if row not in ranks or rank < ranks[row]:
+                ranks[row] = rank
+
+        for row in self._prefix_range(keys, ticker)[:limit]:
+            add(row, (0 if keys[row] == ticker else 1, len(keys[row])))
+
+        tokens = text.split()
+        if tokens:
+            # Všechna slova dotazu musí být začátky slov názvu; řadí se podle prvního slova
+            candidates = None
+            for token in tokens:
+                matched = {word_rows[i][1]: word_rows[i][0] for i in self._prefix_range(words, token)}
+                candidates = matched if candidates is None else {row: candidates[row] for row in candidates
+                                                                if row in matched}
+            for row, position in sorted(candidates.items(), key=lambda item: item[1])[:limit * 2]:
+                add(row, (2 if position == 0 else 3, len(keys[row])))
+
+        if len(ranks) < limit and len(text) >= 3:
+            # Překlepy: jen kandidáti se stejným prvním písmenem (malý výřez seřazených polí)
+            span = self._prefix_range(keys, ticker[0])
+            for match in difflib.get_close_matches(ticker, keys[span.start:span.stop], limit, FUZZY_CUTOFF):
+                add(bisect_left(keys, match), (4, 0))
+            span = self._prefix_range(words, tokens[-1][0])
+            for match in difflib.get_close_matches(tokens[-1], words[span.start:span.stop], limit, FUZZY_CUTOFF):
+                for i in self._prefix_range(words, match):
+                    if words[i] == match:
+                        add(word_rows[i][1], (5, word_rows[i][0]))
+
+        best = sorted(ranks, key=lambda row: (ranks[row], keys[row]))[:limit]
+        return tuple(entries[row] for row in best)
+
+
+# Sdílený index symbolů pro celou aplikaci (naplní se při startu serveru)
+symbol_index = SymbolIndex()
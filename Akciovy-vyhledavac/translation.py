@@ -0,0 +1,296 @@
+import hashlib
+import inspect
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+from flask import has_app_context
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from models import db, Translation
+from database import in_session_scope, session_scope
+
+logger = logging.getLogger(__name__)
+
+# Označení textu, který se nepodařilo přeložit (zobrazí se originál)
+UNTRANSLATED_PREFIX = "[Přeloženo automaticky] "
+# Nejvyšší délka textu v jednom požadavku na překladač (limit bezplatného API je 5000 znaků)
+MAX_BATCH_CHARS = 4500
+# Nejvyšší počet parametrů v jednom SQL dotazu
+QUERY_CHUNK = 500
+
+# Ustálené překlady sektorů, odvětví a zemí z profilů yfinance
+GLOSSARY: Dict[str, str] = {
+    "Technology": "Technologie",
+    "Financial Services": "Finanční služby",
+    "Healthcare": "Zdravotnictví",
+    "Communication Services": "Komunikační služby",
+    "Consumer Cyclical": "Spotřební cyklické",
+    "Consumer Defensive": "Spotřební defenzivní",
+    "Energy": "Energie",
+    "Industrials": "Průmysl",
+    "Basic Materials": "Základní materiály",
+    "Real Estate": "Nemovitosti",
+    "Utilities": "Veřejné služby",
+    "United States": "Spojené státy americké",
+    "China": "Čína",
+    "Japan": "Japonsko",
+    "Germany": "Německo",
+    "Software": "Software",
+    "Hardware": "Hardware",
+    "Semiconductors": "Polovodiče",
+    "Internet Content & Information": "Internetový obsah a informace",
+    "Auto Manufacturers": "Výrobci automobilů",
+    "Banks": "Banky",
+    "Insurance": "Pojišťovnictví",
+    "Biotechnology": "Biotechnologie",
+    "Medical Devices": "Zdravotnické zařízení",
+}
+
+
+def untranslated(text: str) -> str:
+    """
+    Vrací:
+        Původní text označený jako nepřeložený
+    """
+    return f"{UNTRANSLATED_PREFIX}{text}"
+
+
+class TranslationBackend:
+    """
+    Překladač pro TranslationService. Podtřídy překládají dávku textů najednou;
+    text, který se nepodařilo přeložit, vrací jako None.
+    """
+    name = "backend"
+
+    def translate_batch(self, texts: Sequence[str], dest: str) -> List[Optional[str]]:
+        """
+        Parametry:
+            texts: Texty k překladu (bez duplicit)
+            dest: Cílový jazyk (např. "cs")
+
+        Vrací:
+            Překlady ve stejném pořadí (None = nepřeloženo)
+        """
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}>"
+
+
+class LocalBackend(TranslationBackend):
+    """
+    Lokální překladač bez sítě (offline režim, testy): přeloží jen texty ze
+    zadaného slovníku, ostatní vrátí jako nepřeložené.
+    """
+    name = "local"
+
+    def __init__(self, translations: Optional[Dict[str, str]] = None):
+        """
+        Parametry:
+            translations: Pevné překlady text -> překlad
+        """
+        self.translations: Dict[str, str] = translations or {}
+        self.calls: int = 0
+
+    def translate_batch(self, texts: Sequence[str], dest: str) -> List[Optional[str]]:
+        self.calls += 1
+        return [self.translations.get(text) for text in texts]
+
+
+class GoogleBackend(TranslationBackend):
+    """
+    Google Translate přes googletrans. Klient (a jeho HTTP spojení) se
+    vytvoří jednou a používá opakovaně. Texty dávky se spojí po řádcích do
+    co nejmenšího počtu požadavků; když překlad počet řádků nezachová,
+    přeloží se texty dané dávky jednotlivě.
+    """
+    name = "google"
+
+    def __init__(self, timeout: float = 10.0):
+        """
+        Parametry:
+            timeout: Časový limit jednoho požadavku v sekundách
+        """
+        self.timeout: float = timeout
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _translator(self):
+        with self._lock:
+            if self._client is None:
+                from googletrans import Translator
+                self._client = Translator(raise_exception=True, timeout=self.timeout)
+            return self._client
+
+    def _translate(self, text: str, dest: str) -> str:
+        result = self._translator().translate(text, dest=dest)
+        # Novější googletrans má asynchronní rozhraní
+        if inspect.isawaitable(result):
+            result = asyncio.run(result)
+        return result.text
+
+    @staticmethod
+    def _batches(texts: Sequence[str]) -> Iterable[List[str]]:
+        batch: List[str] = []
+        size = 0
+        for text in texts:
+            if batch and size + len(text) + 1 > MAX_BATCH_CHARS:
+                yield batch
+                batch, size = [], 0
+            batch.append(text)
+            size += len(text) + 1
+        if batch:
+            yield batch
+
+    def translate_batch(self, texts: Sequence[str], dest: str) -> List[Optional[str]]:
+        results: Dict[str, Optional[str]] = {}
+        # Řádky uvnitř textu by rozbily spojení dávky
+        flat = {text: " ".join(text.split()) for text in texts}
+        for batch in self._batches([flat[text] for text in texts]):
+            try:
+                lines = self._translate("\n".join(batch), dest).split("\n") if len(batch) > 1 else []
+                if len(lines) != len(batch):
+                    lines = [self._translate(text, dest) for text in batch]
+                results.update(zip(batch, lines))
+            except Exception as e:
+                logger.warning("Překlad %s textů selhal: %s", len(batch), e)
+        return [results.get(flat[text]) for text in texts]
+
+
+class TranslationService:
+    """
+    Překlady s trvalou pamětí (tabulka translation) klíčovanou hashem textu.
+
+    Ustálené termíny se překládají podle slovníku GLOSSARY. Ostatní texty
+    se nejdřív hledají v paměti procesu, pak jedním dotazem
+    v databázi a jen chybějící se pošlou překladači v jedné dávce. Uložené
+    překlady platí i po restartu, takže se stejný sektor nebo odvětví
+    nepřekládá dvakrát. Nepřeložené texty se neukládají (zkusí se znovu).
+    """
+
+    def __init__(self, backend: Optional[TranslationBackend] = None, dest: str = "cs", max_entries: int = 4096,
+                 max_length: int = 5000):
+        """
+        Parametry:
+            backend: Překladač (výchozí lokální bez sítě)
+            dest: Cílový jazyk
+            max_entries: Počet překladů držených v paměti procesu
+            max_length: Delší texty se nepřekládají (vrátí se označený originál)
+        """
+        self.backend: TranslationBackend = backend or LocalBackend()
+        self.dest: str = dest
+        self.max_entries: int = max_entries
+        self.max_length: int = max_length
+        self._memo: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, text: str, dest: str) -> str:
+        # Překlady různých překladačů se nemíchají (lokální nepřepíše skutečný překlad)
+        return hashlib.sha1(f"{self.backend.name}\n{dest}\n{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, values: Dict[str, str]) -> None:
+        with self._lock:
+            for key, value in values.items():
+                self._memo[key] = value
+                self._memo.move_to_end(key)
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+
+    def _load(self, keys: List[str]) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        for start in range(0, len(keys), QUERY_CHUNK):
+            rows = db.session.execute(select(Translation.key, Translation.text)
+                                      .where(Translation.key.in_(keys[start:start + QUERY_CHUNK]))).all()
+            found.update((row.key, row.text) for row in rows)
+        return found
+
+    def _save(self, values: Dict[str, str], dest: str) -> None:
+        try:
+            with session_scope(immediate=True) as session:
+                # Souběžný požadavek mohl stejné texty mezitím uložit
+                existing = set(session.execute(select(Translation.key)
+                                               .where(Translation.key.in_(list(values)))).scalars())
+                now = datetime.utcnow()
+                rows = [{"key": key, "backend": self.backend.name, "dest": dest, "text": value, "created_at": now}
+                        for key, value in values.items() if key not in existing]
+                if rows:
+                    session.execute(insert(Translation), rows)
+        except IntegrityError as e:
+            logger.debug("Překlady už uložil jiný požadavek: %s", e)
+
+    def translate_many(self, texts: Iterable[Optional[str]], dest: Optional[str] = None) -> List[str]:
+        """
+        Přeloží texty; chybějící v paměti se přeloží jednou dávkou.
+
+        Parametry:
+            texts: Texty k překladu (prázdné a None zůstanou prázdné)
+            dest: Cílový jazyk (výchozí jazyk služby)
+
+        Vrací:
+            Překlady ve stejném pořadí; nepřeložitelné texty označené originály
+        """
+        dest = dest or self.dest
+        texts = [text or "" for text in texts]
+        result: Dict[str, str] = {text: GLOSSARY[text] for text in texts if dest == "cs" and text in GLOSSARY}
+        keys = {text: self._key(text, dest) for text in texts
+                if text and text not in result and len(text) <= self.max_length}
+        with self._lock:
+            for text, key in keys.items():
+                value = self._memo.get(key)
+                if value is not None:
+                    result[text] = value
+                    self._memo.move_to_end(key)
+
+        missing = {text: key for text, key in keys.items() if text not in result}
+        if missing and has_app_context():
+            stored = self._load(list(missing.values()))
+            self._remember(stored)
+            for text, key in list(missing.items()):
+                if key in stored:
+                    result[text] = stored[key]
+                    del missing[text]
+
+        if missing:
+            pending = list(missing)
+            translated = {text: value for text, value in zip(pending, self.backend.translate_batch(pending, dest))
+                          if value is not None}
+            logger.debug("Přeloženo %s z %s textů (%s)", len(translated), len(pending), self.backend.name)
+            values = {missing[text]: value for text, value in translated.items()}
+            self._remember(values)
+            # Uvnitř cizí transakce se neukládá (vnořený zápis by ji potvrdil)
+            if values and has_app_context() and not in_session_scope():
+                self._save(values, dest)
+            result.update(translated)
+
+        return [result.get(text, untranslated(text)) if text else "" for text in texts]
+
+    def translate(self, text: Optional[str], dest: Optional[str] = None) -> str:
+        """
+        Přeloží jeden text (viz translate_many).
+        """
+        return self.translate_many([text], dest)[0]
+
+
+def translation_backend(name: str, timeout: float = 10.0) -> TranslationBackend:
+    """
+    Překladač podle konfigurace.
+
+    Parametry:
+        name: "google" nebo "local"
+        timeout: Časový limit požadavku na překladač
+
+    Vrací:
+        Instanci překladače (neznámý název = lokální)
+    """
+    if name == "google":
+        return GoogleBackend(timeout)
+    if name != "local":
+        logger.warning("Neznámý překladač %s, použije se lokální", name)
+    return LocalBackend()
+
+
+# Sdílená překladová služba pro celou aplikaci
+translation_service = TranslationService()
@@ -3,8 +3,6 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 from portfolio import Portfolio
 
-# Konfigurace logování
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 class User:
@@ -12,18 +10,22 @@ class User:
     Třída reprezentující uživatele aplikace.
     """
     
-    def __init__(self, username: str, email: str):
+    def __init__(self, username: str, email: str, portfolio: Optional[Portfolio] = None,
+                 user_id: Optional[int] = None):
         """
         Inicializace nového uživatele.
         
         Parametry:
             username: Uživatelské jméno
             email: E-mailová adresa uživatele
+            portfolio: Existující portfolio (výchozí je nové prázdné portfolio v paměti)
+            user_id: ID uživatele v databázi (u uživatelů uložených v databázi)
         """
+        self.user_id: Optional[int] = user_id
         self.username: str = username
         self.email: str = email
-        self.portfolio: Portfolio = Portfolio(name=f"Portfolio uživatele {username}")
-        logger.debug(f"Uživatel {username} inicializován")
+        self.portfolio: Portfolio = portfolio or Portfolio(name=f"Portfolio uživatele {username}")
+        logger.debug("Uživatel %s inicializován", username)
     
     def add_to_portfolio(self, ticker: str, quantity: float, purchase_price: float, 
                          purchase_date: datetime = None, notes: str = None) -> bool:
@@ -42,18 +44,19 @@ class User:
         """
         return self.portfolio.add_stock(ticker, quantity, purchase_price, purchase_date, notes)
     
-    def remove_from_portfolio(self, ticker: str, quantity: float = None) -> bool:
+    def remove_from_portfolio(self, ticker: str, quantity: float = None, price: float = None) -> bool:
         """
-        Odstranění akcie z portfolia uživatele.
+        Odstranění (prodej) akcie z portfolia uživatele.
         
         Parametry:
             ticker: Symbol akcie
             quantity: Množství k odstranění (None = vše)
+            price: Prodejní cena za akcii (None = poslední známá cena)
             
         Vrací:
             True pokud úspěšné, jinak False
         """
-        return self.portfolio.remove_stock(ticker, quantity)
+        return self.portfolio.remove_stock(ticker, quantity, price)
     
     def view_portfolio(self) -> Dict[str, Any]:
         """
@@ -63,8 +66,8 @@ class User:
             Slovník s položkami portfolia a souhrnnou metrikou
         """
         try:
-            portfolio_items = self.portfolio.get_portfolio()
-            portfolio_summary = self.portfolio.get_total_value()
+            # Jedno ocenění pro položky i souhrn (ceny se načítají jen jednou)
+            portfolio_items, portfolio_summary = self.portfolio.valuate()
             
             return {
                 'user': {
@@ -76,7 +79,7 @@ class User:
                 'summary': portfolio_summary
             }
         except Exception as e:
-            logger.error(f"Error viewing portfolio for {self.username}: {str(e)}")
+            logger.error("Error viewing portfolio for %s: %s", self.username, e)
             return {
                 'user': {
                     'username': self.username,
@@ -0,0 +1,84 @@
+from typing import Dict, Iterable, Sequence
+import numpy as np
+
+
+class PortfolioValuation:
+    """
+    Vektorové ocenění pozic portfolia.
+
+    Pozice jsou uloženy jako NumPy vektory (množství, nákupní cena, aktuální cena)
+    a všechny ukazatele se spočítají jedním průchodem bez Python smyčky.
+    """
+
+    def __init__(self, quantities: Iterable[float], purchase_prices: Iterable[float],
+                 current_prices: Iterable[float]):
+        """
+        Inicializace a výpočet ocenění.
+
+        Parametry:
+            quantities: Počty akcií jednotlivých pozic
+            purchase_prices: Nákupní ceny za akcii
+            current_prices: Aktuální ceny za akcii
+        """
+        self.quantities = np.asarray(quantities, dtype=np.float64)
+        self.purchase_prices = np.asarray(purchase_prices, dtype=np.float64)
+        self.current_prices = np.asarray(current_prices, dtype=np.float64)
+
+        if not (self.quantities.shape == self.purchase_prices.shape == self.current_prices.shape):
+            raise ValueError("Vektory množství a cen musí mít stejnou délku")
+
+        self.current_value = self.quantities * self.current_prices
+        self.cost_basis = self.quantities * self.purchase_prices
+        self.gain_loss = self.current_value - self.cost_basis
+
+        # Dělení jen tam, kde je nenulový nákupní základ
+        self.gain_loss_percent = np.zeros_like(self.gain_loss)
+        np.divide(self.gain_loss, self.cost_basis, out=self.gain_loss_percent, where=self.cost_basis > 0)
+        self.gain_loss_percent *= 100.0
+
+    def __len__(self) -> int:
+        return len(self.quantities)
+
+    @property
+    def total_value(self) -> float:
+        return float(self.current_value.sum())
+
+    @property
+    def total_cost(self) -> float:
+        return float(self.cost_basis.sum())
+
+    def summary(self, cash_balance: float = 0.0) -> Dict[str, float]:
+        """
+        Souhrnné ukazatele celého portfolia.
+
+        Parametry:
+            cash_balance: Hotovostní zůstatek, který se přičte k celkové hodnotě
+
+        Vrací:
+            Slovník s celkovou hodnotou, náklady, ziskem/ztrátou a hotovostí
+        """
+        total_value = self.total_value
+        total_cost = self.total_cost
+        total_gain_loss = total_value - total_cost
+        total_gain_loss_percent = (total_gain_loss / total_cost) * 100 if total_cost > 0 else 0.0
+
+        return {
+            'total_value': total_value + cash_balance,
+            'total_cost': total_cost,
+            'total_gain_loss': total_gain_loss,
+            'total_gain_loss_percent': total_gain_loss_percent,
+            'cash_balance': cash_balance
+        }
+
+    def rows(self) -> Dict[str, Sequence[float]]:
+        """
+        Vrací:
+            Vypočtené sloupce jako Python seznamy (pro sestavení řádků šablony)
+        """
+        return {
+            'current_price': self.current_prices.tolist(),
+            'current_value': self.current_value.tolist(),
+            'cost_basis': self.cost_basis.tolist(),
+            'gain_loss': self.gain_loss.tolist(),
+            'gain_loss_percent': self.gain_loss_percent.tolist()
+        }